@@ -2,6 +2,7 @@
 from flask import Flask, redirect, url_for
 from flask_login import LoginManager, login_required, current_user
 from flask_session import Session
+from sqlalchemy.orm import lazyload
 import os
 from dotenv import load_dotenv
 
@@ -13,6 +14,8 @@ load_dotenv()
 from models import db, User
 from auth import auth_bp
 from dash_app import create_dash_app
+from utils.log_retention import start_log_maintenance
+from captcha_utils import captcha_pool
 
 def create_app():
     """创建Flask应用"""
@@ -38,7 +41,8 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # 权限检查走 utils/permission_cache 的缓存，每个请求加载用户时不再预加载角色和权限
+        return User.query.options(lazyload(User.roles)).get(int(user_id))
     
     # 注册蓝图
     app.register_blueprint(auth_bp)
@@ -69,6 +73,12 @@ def create_app():
             db.session.commit()
             print("默认管理员账户已创建: admin/admin123")
     
+    # 后台定期汇总和归档操作日志
+    start_log_maintenance()
+    
+    # 后台预生成登录验证码
+    captcha_pool.start()
+    
     # 创建并集成Dash应用
     dash_app = create_dash_app(app)
     
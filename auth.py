@@ -4,7 +4,7 @@ from models import User, db
 import re
 
 # 导入验证码工具
-from captcha_utils import captcha_generator
+from captcha_utils import captcha_pool
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -241,7 +241,8 @@ def register():
 @auth_bp.route('/captcha')
 def generate_captcha():
     """生成验证码"""
-    text, image_data = captcha_generator.generate_captcha()
+    # 从预生成池中取出，不在请求中渲染图片
+    text, image_data = captcha_pool.pop()
     # 将验证码文本存储在session中
     session['captcha'] = text.upper()  # 统一转为大写
     session['captcha_generated'] = True
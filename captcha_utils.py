@@ -1,10 +1,43 @@
 # captcha_utils.py
+"""
+验证码生成
+
+/captcha 每次请求都同步渲染图片（绘制文字、干扰线、噪点，再 PNG 编码和 base64），
+登录页加载要承担这部分 CPU 开销，也容易被用来放大请求压力。这里改为：
+
+- 字体只加载一次：依次尝试 CAPTCHA_FONT_PATH、arial.ttf、DejaVuSans.ttf，均失败时使用默认字体
+- 预生成池：CaptchaPool 最多保存 CAPTCHA_POOL_SIZE 个已渲染的验证码，低于
+  CAPTCHA_POOL_LOW_WATER 时唤醒后台线程补充；pop() 取出即移除，每个验证码只会发放一次，
+  超过 CAPTCHA_POOL_MAX_AGE 秒的验证码不再发放
+- 池为空（突发请求耗尽）时当场生成一个，同时唤醒补充线程
+"""
+import logging
+import os
+import queue
 import random
 import string
+import threading
+import time
 from PIL import Image, ImageDraw, ImageFont
 import io
 import base64
 
+logger = logging.getLogger(__name__)
+
+# 验证码字体路径（可选），未设置或加载失败时依次尝试常见字体
+CAPTCHA_FONT_PATH = os.getenv('CAPTCHA_FONT_PATH', '')
+
+# 验证码池容量
+CAPTCHA_POOL_SIZE = int(os.getenv('CAPTCHA_POOL_SIZE', '200'))
+
+# 池中剩余数量低于该值时唤醒补充线程
+CAPTCHA_POOL_LOW_WATER = int(os.getenv('CAPTCHA_POOL_LOW_WATER', '50'))
+
+# 预生成验证码的最长保存时间（秒）
+CAPTCHA_POOL_MAX_AGE = int(os.getenv('CAPTCHA_POOL_MAX_AGE', '600'))
+
+_FALLBACK_FONTS = ("arial.ttf", "DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
 class CaptchaGenerator:
     """简单验证码生成器"""
     
@@ -13,6 +46,22 @@ class CaptchaGenerator:
         self.height = height
         # 避免容易混淆的字符
         self.chars = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+        self._font = None
+    
+    @property
+    def font(self):
+        """验证码字体（首次使用时加载并缓存）"""
+        if self._font is None:
+            for path in filter(None, (CAPTCHA_FONT_PATH,) + _FALLBACK_FONTS):
+                try:
+                    self._font = ImageFont.truetype(path, 24)
+                    break
+                except OSError:
+                    continue
+            else:
+                logger.warning("未找到验证码字体，使用默认字体")
+                self._font = ImageFont.load_default()
+        return self._font
     
     def generate_text(self, length=4):
         """生成验证码文本"""
@@ -24,11 +73,7 @@ class CaptchaGenerator:
         image = Image.new('RGB', (self.width, self.height), color='white')
         draw = ImageDraw.Draw(image)
         
-        # 尝试使用系统字体，如果没有则使用默认字体
-        try:
-            font = ImageFont.truetype("arial.ttf", 24)
-        except:
-            font = ImageFont.load_default()
+        font = self.font
         
         # 绘制文字
         text_width = draw.textlength(text, font=font)
@@ -73,5 +118,109 @@ class CaptchaGenerator:
         
         return text, f"data:image/png;base64,{img_base64}"
 
+
+class CaptchaPool:
+    """预生成验证码池（线程安全），由后台线程补充"""
+    
+    def __init__(self, generator, size=CAPTCHA_POOL_SIZE, low_water=CAPTCHA_POOL_LOW_WATER,
+                 max_age=CAPTCHA_POOL_MAX_AGE):
+        self.generator = generator
+        self.low_water = min(low_water, size)
+        self.max_age = max_age
+        self._queue = queue.Queue(maxsize=size)
+        self._refill = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats = {'served': 0, 'generated': 0, 'misses': 0, 'expired': 0}
+    
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='captcha-pool-refill', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        """后台线程：把池补满后等待下一次唤醒"""
+        while True:
+            # 先清除唤醒标记，补充期间的 pop() 会重新设置，避免丢失唤醒
+            self._refill.clear()
+            try:
+                while not self._queue.full():
+                    text, image_data = self.generator.generate_captcha()
+                    self._queue.put_nowait((time.time(), text, image_data))
+                    self._stats['generated'] += 1
+            except queue.Full:
+                pass
+            except Exception as e:
+                logger.error(f"预生成验证码失败: {e}")
+                time.sleep(1)
+            if self._queue.qsize() >= self.low_water:
+                # 定期醒来替换过期的验证码，访问量低时池中也始终是可用的验证码
+                if not self._refill.wait(timeout=self.max_age / 2):
+                    self._purge_expired()
+    
+    def _purge_expired(self):
+        """移除池中已过期的验证码"""
+        now = time.time()
+        fresh = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if now - item[0] > self.max_age:
+                self._stats['expired'] += 1
+            else:
+                fresh.append(item)
+        for item in fresh:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                break
+    
+    def start(self):
+        """启动补充线程（开始预生成）"""
+        self._ensure_started()
+    
+    def pop(self):
+        """
+        取出一个验证码（取出即从池中移除）
+        
+        Returns:
+            tuple: (验证码文本, data URI 格式的图片)
+        """
+        self._ensure_started()
+        result = None
+        now = time.time()
+        while result is None:
+            try:
+                created_at, text, image_data = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if now - created_at > self.max_age:
+                self._stats['expired'] += 1
+                continue
+            result = (text, image_data)
+        
+        if self._queue.qsize() < self.low_water:
+            self._refill.set()
+        
+        if result is None:
+            # 池已耗尽，当场生成
+            self._stats['misses'] += 1
+            result = self.generator.generate_captcha()
+        self._stats['served'] += 1
+        return result
+    
+    def get_stats(self):
+        """验证码池状态，用于调试和监控"""
+        return dict(self._stats, pooled=self._queue.qsize())
+
 # 全局验证码生成器实例
-captcha_generator = CaptchaGenerator()
\ No newline at end of file
+captcha_generator = CaptchaGenerator()
+
+# 全局验证码池（进程内共享）
+captcha_pool = CaptchaPool(captcha_generator)
\ No newline at end of file
@@ -54,6 +54,7 @@ from modules.management.management_callback import management_callbacks
 
 from modules.report_management.layout import create_report_management_layout
 from modules.report_management.callbacks import register_report_management_callbacks
+from utils.layout_cache import get_cached_layout
 
 # 导入权限控制模块
 try:
@@ -90,6 +91,18 @@ except ImportError:
 # 初始化数据库
 init_db()
 
+# 标签页布局工厂：切换标签页时只调用当前标签页的工厂函数
+TAB_LAYOUT_FACTORIES = {
+    'tab-1': create_indicator_layout,
+    'tab-2': create_data_layout,
+    'tab-3': create_management_layout,
+    'tab-4': create_report_management_layout,
+    'tab-5': update_construction_mode_layout,
+    'tab-6': history_data_layout,
+    'tab-7': create_price_prediction_layout,
+    'tab-8': create_integration_layout,
+}
+
 def create_dash_app(server):
     """创建Dash应用"""
     app = dash.Dash(
@@ -357,9 +370,10 @@ def create_dash_app(server):
     @app.callback(
         Output('tab-content-container', 'children'),
         [Input('tabs', 'active_tab')],
-        [State('accessible-tabs-store', 'data')]
+        [State('accessible-tabs-store', 'data'),
+         State('user-permissions-store', 'data')]
     )
-    def render_tab_content(active_tab, accessible_tabs):
+    def render_tab_content(active_tab, accessible_tabs, user_permissions):
         """根据选中的标签页渲染对应内容"""
         if not active_tab:
             return dbc.Alert("请选择一个标签页", color="info")
@@ -381,24 +395,13 @@ def create_dash_app(server):
             if active_tab not in accessible_tab_ids:
                 return dbc.Alert("您没有访问此模块的权限", color="danger")
         
-        # 根据标签ID渲染对应内容
+        # 只调用当前标签页的布局工厂，静态布局树按（标签页, 权限集合）缓存
         try:
-            content_mapping = {
-                'tab-1': create_indicator_layout(),
-                'tab-2': create_data_layout(),
-                'tab-3': create_management_layout(),
-                'tab-4': create_report_management_layout(),
-                'tab-5': update_construction_mode_layout(),
-                'tab-6': history_data_layout(),
-                'tab-7': create_price_prediction_layout(),
-                'tab-8': create_integration_layout(),
-            }
-            
-            content = content_mapping.get(active_tab)
-            if content is None:
+            factory = TAB_LAYOUT_FACTORIES.get(active_tab)
+            if factory is None:
                 return dbc.Alert("模块内容加载失败", color="warning")
             
-            return content
+            return get_cached_layout(active_tab, user_permissions, factory)
             
         except Exception as e:
             print(f"渲染标签页内容失败: {e}")
@@ -547,6 +547,7 @@ CREATE TABLE `operation_logs`  (
   INDEX `ix_operation_logs_module`(`module` ASC) USING BTREE,
   INDEX `ix_operation_logs_operation_type`(`operation_type` ASC) USING BTREE,
   INDEX `ix_operation_logs_created_at`(`created_at` ASC) USING BTREE,
+  FULLTEXT INDEX `ft_operation_logs_search`(`operation_desc`, `module`, `operation_type`) WITH PARSER `ngram`,
   CONSTRAINT `operation_logs_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE RESTRICT ON UPDATE RESTRICT
 ) ENGINE = InnoDB AUTO_INCREMENT = 35 CHARACTER SET = utf8mb3 COLLATE = utf8mb3_bin ROW_FORMAT = Dynamic;
 
@@ -3,6 +3,9 @@ from flask_login import UserMixin
 from datetime import datetime, timedelta
 import bcrypt
 
+from utils.operation_log_writer import enqueue_operation_log
+from utils.permission_cache import get_permission_set
+
 db = SQLAlchemy()
 
 # 用户角色关联表（多对多关系）
@@ -97,27 +100,26 @@ class User(UserMixin, db.Model):
         self.locked_until = None
         self.failed_login_attempts = 0
     
+    def get_permission_set(self):
+        """获取用户的角色代码和权限代码集合（缓存，见 utils/permission_cache.py）"""
+        return get_permission_set(self.id)
+    
     def has_permission(self, permission_code):
         """检查用户是否拥有特定权限"""
-        for role in self.roles:
-            if role.has_permission(permission_code):
-                return True
-        return False
+        return permission_code in self.get_permission_set().permissions
     
     def has_any_permission(self, permission_codes):
         """检查用户是否拥有任意一个权限"""
-        return any(self.has_permission(code) for code in permission_codes)
+        permissions = self.get_permission_set().permissions
+        return any(code in permissions for code in permission_codes)
     
     def has_role(self, role_code):
         """检查用户是否拥有特定角色"""
-        return any(role.code == role_code for role in self.roles)
+        return role_code in self.get_permission_set().roles
     
     def get_all_permissions(self):
         """获取用户所有权限"""
-        permissions = set()
-        for role in self.roles:
-            permissions.update(role.get_permissions())
-        return list(permissions)
+        return sorted(self.get_permission_set().permissions)
     
     def get_role_names(self):
         """获取用户所有角色名称"""
@@ -350,6 +352,11 @@ class Task(db.Model):
 class OperationLog(db.Model):
     """操作日志模型"""
     __tablename__ = 'operation_logs'
+    __table_args__ = (
+        # 日志搜索使用的全文索引（ngram 分词支持中文），见 modules/management/log_queries.py
+        db.Index('ft_operation_logs_search', 'operation_desc', 'module', 'operation_type',
+                 mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -386,30 +393,28 @@ class OperationLog(db.Model):
                      module='', target_type=None, target_id=None, level='info',
                      status='success', ip_address=None, old_values=None, 
                      new_values=None, error_message=None):
-        """记录操作日志"""
+        """记录操作日志
+
+        日志行放入 utils/operation_log_writer 的队列，由后台线程批量写入，
+        不在调用方的请求和数据库会话中提交。
+        """
         import json
         
-        log = cls(
-            user_id=user_id,
-            operation_type=operation_type,
-            operation_desc=operation_desc,
-            module=module,
-            target_type=target_type,
-            target_id=str(target_id) if target_id else None,
-            level=level,
-            status=status,
-            ip_address=ip_address,
-            old_values=json.dumps(old_values, ensure_ascii=False) if old_values else None,
-            new_values=json.dumps(new_values, ensure_ascii=False) if new_values else None,
-            error_message=error_message
-        )
-        
-        try:
-            db.session.add(log)
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            print(f"记录操作日志失败: {e}")
+        enqueue_operation_log({
+            'user_id': user_id,
+            'operation_type': operation_type,
+            'operation_desc': operation_desc,
+            'module': module,
+            'target_type': target_type,
+            'target_id': str(target_id) if target_id else None,
+            'level': level,
+            'status': status,
+            'ip_address': ip_address,
+            'old_values': json.dumps(old_values, ensure_ascii=False) if old_values else None,
+            'new_values': json.dumps(new_values, ensure_ascii=False) if new_values else None,
+            'error_message': error_message,
+            'created_at': datetime.utcnow(),
+        })
     
     def get_level_color(self):
         """获取日志级别对应的颜色"""
@@ -9,8 +9,8 @@ from .modals import create_parameter_form,create_c403_c409_content,create_c404_c
 from .metal_config import DEFAULT_PARAM_ID,param_types,units
 from .results import create_result_layout,create_result_layout2
 from .db_connection import calculate_cost,save_project,save_custom_parameters,init_db,get_mode_details_from_database,get_parameter_suggestions,get_connection,get_connection_diy,calculate_cost_diy,save_calculation_result,calculate_steel_lining_cost_fixed,debug_steel_lining_database,delete_custom_project,get_project_basic_info
+from utils.price_cache import get_price_table
 from .layout import (update_construction_mode_layout, load_custom_modes, create_custom_modes_row,create_custom_modes_row_with_pagination,create_pagination_controls)
-import mysql.connector
 import time
 import pandas as pd
 import dash_bootstrap_components as dbc
@@ -25,15 +25,8 @@ from .translation import (
     translate_field_name,
     translate_table_name
 )
-# MySQL数据库连接配置
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4',
-    'autocommit': False
-}
+# MySQL数据库连接配置（共享连接池，见 utils/db_pool.py）
+from utils.db_pool import get_connection as get_pooled_connection
 
 # 在 modules/Construction_Mode/callbacks.py 中添加/修改以下函数
 
@@ -1010,28 +1003,18 @@ def create_model_modal_callback(app):
             return []
         
         try:
-            conn = get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # 构建查询条件
-            if param_name and param_type:
-                query = """
-                SELECT * FROM `construction_parameter_table`
-                WHERE `parameter_category` LIKE %s AND `engineering_parameter` LIKE %s
-                """
-                cursor.execute(query, (f'%{param_type}%', f'%{param_name}%'))
-            elif param_type:
-                query = """
-                SELECT * FROM `construction_parameter_table`
-                WHERE `parameter_category` LIKE %s
-                """
-                cursor.execute(query, (f'%{param_type}%',))
-            else:
+            if not param_type:
                 return html.Div("请选择参数类型")
-            
-            results = cursor.fetchall()
-            conn.close()
-            
+
+            # 从单价表缓存中按条件筛选（等价于 LIKE '%...%'）
+            price_df = get_price_table()
+            mask = price_df['parameter_category'].fillna('').astype(str).str.contains(param_type, case=False, regex=False)
+            if param_name:
+                mask &= price_df['engineering_parameter'].fillna('').astype(str).str.contains(param_name, case=False, regex=False)
+
+            matched_df = price_df[mask]
+            results = matched_df.astype(object).where(matched_df.notna(), None).to_dict('records')
+
             # 如果没有数据
             if not results:
                 return html.Div("未找到匹配的价格数据")
@@ -1106,9 +1089,7 @@ def create_model_modal_callback(app):
         try:
             init_db() 
             # 检查项目名称是否已存在
-            mysql_config = MYSQL_CONFIG.copy()
-            mysql_config['autocommit'] = True  # 对于简单查询使用自动提交
-            conn = mysql.connector.connect(**mysql_config)
+            conn = get_pooled_connection()
             cursor = conn.cursor(dictionary=True)
             
             # 准备要保存的数据
@@ -1638,9 +1619,7 @@ def create_model_modal_callback(app):
             init_db()
             
             # 检查项目名称是否已存在
-            mysql_config = MYSQL_CONFIG.copy()
-            mysql_config['autocommit'] = True
-            conn = mysql.connector.connect(**mysql_config)
+            conn = get_pooled_connection()
             cursor = conn.cursor(dictionary=True)
             
             cursor.execute("SELECT `project_id` FROM `project_info` WHERE `project_name` = %s", (project_info["project_name"],))
@@ -1814,7 +1793,24 @@ def register_custom_mode_callbacks(app):
     
     # 注册分页回调
     register_pagination_callbacks(app)
-    
+
+    @app.callback(
+        Output("custom-modes-container", "children", allow_duplicate=True),
+        Input("custom-modes-loader", "data"),
+        prevent_initial_call='initial_duplicate'
+    )
+    def load_custom_modes_section(_):
+        """施工模式标签页渲染后加载自定义模式列表（布局本身不查询数据库，可被缓存）"""
+        try:
+            custom_modes = load_custom_modes()
+            return create_custom_modes_row_with_pagination(custom_modes, current_page=1)
+        except Exception as e:
+            print(f"加载自定义模式时出错: {e}")
+            return html.Div([
+                html.P("从parameter_info表加载自定义模式时出错", className="text-center text-danger"),
+                html.P(f"错误信息: {str(e)}", className="text-center text-muted small")
+            ])
+
     @app.callback(
         Output("custom-modes-container", "children", allow_duplicate=True),
         Input("refresh-custom-modes", "n_clicks"),
@@ -0,0 +1,162 @@
+# modules/Construction_Mode/cost_engine.py
+"""
+向量化成本计算引擎
+
+把"单价 × 数量"的逐参数 Python 运算改为 NumPy 矩阵运算：数量为 n 维向量，
+直接施工/模块化施工单价各为 n×3（人工、材料、机械）矩阵，一次计算出全部参数的
+分项成本、行总计和汇总，再组装成原有的 {"直接施工", "模块化施工", "明细"} 结构。
+calculate_cost、calculate_cost_diy 和 calculate_steel_lining_cost_fixed 均由此计算，
+参数上百个的自定义模式也不会变慢。
+"""
+
+import numpy as np
+import pandas as pd
+
+DIRECT = "直接施工"
+MODULAR = "模块化施工"
+DETAIL = "明细"
+
+# 分项成本（与单价矩阵的列顺序一致）
+COST_ITEMS = ("人工费", "材料费", "机械费")
+
+# construction_parameter_table / parameter_info 的单价字段
+DIRECT_PRICE_COLUMNS = ["direct_labor_unit_price", "direct_material_unit_price", "direct_machinery_unit_price"]
+MODULAR_PRICE_COLUMNS = ["modular_labor_unit_price", "modular_material_unit_price", "modular_machinery_unit_price"]
+
+# 钢衬里单价表（steel_lining）的单价字段
+STEEL_LINING_DIRECT_PRICE_COLUMNS = ["labor_cost", "material_cost", "machinery_cost"]
+STEEL_LINING_MODULAR_PRICE_COLUMNS = ["modular_labor_cost", "modular_material_cost", "modular_machinery_cost"]
+
+# 钢衬里表没有模块化单价字段时的换算比例：人工费降低20%，材料费增加10%，机械费降低10%
+STEEL_LINING_MODULAR_RATIOS = np.array([0.8, 1.1, 0.9])
+
+
+def empty_cost_result():
+    """创建空的成本结果"""
+    return {
+        DIRECT: {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0, "总计": 0},
+        MODULAR: {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0, "总计": 0},
+        DETAIL: []
+    }
+
+
+def parse_quantity(value):
+    """解析参数数量：去除首尾空白，空值按 0 处理；无法转换时抛出 ValueError"""
+    quantity_str = str(value).strip() if value is not None else ""
+    return float(quantity_str) if quantity_str else 0.0
+
+
+def to_price_array(values):
+    """
+    将单价序列安全地转换为浮点数组
+
+    空值、空字符串按 0 处理；无法转换的值按 0 处理并打印警告。
+    """
+    series = pd.Series(values, dtype=object)
+    series = series.map(lambda v: v.strip() if isinstance(v, str) else v)
+    numeric = pd.to_numeric(series, errors='coerce')
+    invalid = numeric.isna() & series.notna() & (series != "")
+    if invalid.any():
+        print(f"警告: 无法转换值 {series[invalid].tolist()} 为浮点数，使用0代替")
+    return numeric.fillna(0.0).to_numpy(dtype=float)
+
+
+def price_matrix(price_df, columns):
+    """从单价表中取出指定的三列单价，组成 n×3 矩阵（缺少的列按 0 处理）"""
+    n = len(price_df)
+    return np.column_stack([
+        to_price_array(price_df[col]) if col in price_df.columns else np.zeros(n)
+        for col in columns
+    ]) if n else np.zeros((0, len(columns)))
+
+
+def collect_priced_rows(params_dict, resolved):
+    """
+    按参数顺序收集已匹配到单价的参数、数量和单价行
+
+    Args:
+        params_dict (dict): {参数名: 数量}
+        resolved (dict): {参数名: (单价行 pandas.Series 或 None, 匹配方式)}
+
+    Returns:
+        tuple: (参数名列表, 数量数组, 单价行 DataFrame)
+    """
+    params, quantities, rows = [], [], []
+    for param, quantity in params_dict.items():
+        row = resolved.get(param, (None, None))[0]
+        if row is None:
+            print(f"警告: 未找到参数 '{param}' 的价格数据")
+            continue
+        try:
+            quantities.append(parse_quantity(quantity))
+        except (ValueError, TypeError) as e:
+            print(f"计算参数 '{param}' 成本时出错: {e}")
+            continue
+        params.append(param)
+        rows.append(row)
+
+    price_df = pd.DataFrame(rows).reset_index(drop=True) if rows else pd.DataFrame()
+    return params, np.asarray(quantities, dtype=float), price_df
+
+
+def compute_cost_breakdown(params, quantities, direct_prices, modular_prices, others, categories=None):
+    """
+    一次性计算全部参数的直接施工和模块化施工成本
+
+    Args:
+        params (list): 参数名称，长度 n
+        quantities (array-like): 数量向量，形状 (n,)
+        direct_prices (array-like): 直接施工单价矩阵，形状 (n, 3)，列为人工、材料、机械
+        modular_prices (array-like): 模块化施工单价矩阵，形状 (n, 3)
+        others (dict): 其他费用，"直接施工间接费" / "模块化施工间接费" 按每个参数计入行总计
+        categories (list): 参数类别，长度 n；为 None 时为空字符串
+
+    Returns:
+        dict: {"直接施工": {...}, "模块化施工": {...}, "明细": [...]}
+    """
+    result = empty_cost_result()
+    n = len(params)
+    if n == 0:
+        return result
+
+    q = np.asarray(quantities, dtype=float).reshape(-1, 1)
+    indirect = {
+        DIRECT: to_price_array([others.get("直接施工间接费", 0)])[0],
+        MODULAR: to_price_array([others.get("模块化施工间接费", 0)])[0],
+    }
+    costs = {
+        DIRECT: np.asarray(direct_prices, dtype=float).reshape(n, 3) * q,
+        MODULAR: np.asarray(modular_prices, dtype=float).reshape(n, 3) * q,
+    }
+
+    rounded = {}
+    for method, matrix in costs.items():
+        row_totals = matrix.sum(axis=1) + indirect[method]
+        item_totals = matrix.sum(axis=0)
+
+        summary = result[method]
+        for i, item in enumerate(COST_ITEMS):
+            summary[item] = round(float(item_totals[i]), 2)
+        summary["间接费用"] = float(indirect[method])
+        summary["总计"] = round(float(row_totals.sum()), 2)
+
+        # 明细各列：人工、材料、机械、间接费用、总计
+        detail = np.column_stack([matrix, np.full(n, indirect[method]), row_totals])
+        rounded[method] = np.round(detail, 2).tolist()
+
+    if categories is None:
+        categories = [""] * n
+    detail_keys = COST_ITEMS + ("间接费用", "总计")
+    quantity_list = q.ravel().tolist()
+
+    result[DETAIL] = [
+        {
+            "参数": params[i],
+            "数量": quantity_list[i],
+            "参数类别": categories[i],
+            DIRECT: dict(zip(detail_keys, rounded[DIRECT][i])),
+            MODULAR: dict(zip(detail_keys, rounded[MODULAR][i])),
+        }
+        for i in range(n)
+    ]
+    return result
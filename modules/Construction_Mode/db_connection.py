@@ -1,4 +1,3 @@
-import mysql.connector
 import pandas as pd
 from pathlib import Path
 import json
@@ -25,20 +24,34 @@ except ImportError as e:
     def translate_dataframe_columns(df):
         return df
     
-# MySQL数据库连接配置
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4',
-    'autocommit': True  # 默认启用自动提交
-}
+# MySQL数据库连接配置（共享连接池，见 utils/db_pool.py）
+from utils.db_pool import get_connection as get_pooled_connection
+from utils.price_cache import get_price_table
+from .price_lookup import (
+    ParameterPriceIndex,
+    MATCH_FUZZY,
+    MATCH_FALLBACK,
+    get_construction_price_index,
+    fetch_custom_parameter_prices,
+    fetch_steel_lining_price_table,
+    resolve_parameter_rows
+)
+from .cost_engine import (
+    DIRECT_PRICE_COLUMNS,
+    MODULAR_PRICE_COLUMNS,
+    STEEL_LINING_DIRECT_PRICE_COLUMNS,
+    STEEL_LINING_MODULAR_PRICE_COLUMNS,
+    STEEL_LINING_MODULAR_RATIOS,
+    collect_priced_rows,
+    compute_cost_breakdown,
+    empty_cost_result,
+    price_matrix
+)
 
 def get_connection():
     """获取MySQL数据库连接"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         return conn
     except Exception as e:
         print(f"MySQL连接失败: {e}")
@@ -47,7 +60,7 @@ def get_connection():
 def get_connection_diy():
     """获取MySQL数据库连接（DIY版本）"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         return conn
     except Exception as e:
         print(f"MySQL连接失败: {e}")
@@ -64,24 +77,11 @@ def get_price_data(mode, param_category=None):
     Returns:
         pandas.DataFrame: 价格数据（列名已翻译为中文显示）
     """
-    conn = get_connection()
+    # 从单价表缓存读取（已按 sequence_number 排序）
+    df = get_price_table(mode).copy()
     
     if param_category:
-        query = """
-        SELECT * FROM `construction_parameter_table` 
-        WHERE `mode` = %s AND `parameter_category` = %s
-        ORDER BY `sequence_number`
-        """
-        df = pd.read_sql(query, conn, params=(mode, param_category))
-    else:
-        query = """
-        SELECT * FROM `construction_parameter_table` 
-        WHERE `mode` = %s
-        ORDER BY `sequence_number`
-        """
-        df = pd.read_sql(query, conn, params=(mode,))
-    
-    conn.close()
+        df = df[df['parameter_category'] == param_category].reset_index(drop=True)
     
     # 翻译列名为中文显示
     return translate_dataframe_columns(df)
@@ -98,8 +98,6 @@ def calculate_cost(mode, params_dict, others):
     Returns:
         dict: 包含直接施工和模块化施工成本明细的字典
     """
-    conn = get_connection()
-    
     # 模式名称映射 - 将传入的带空格的中文模式名映射为数据库中的实际值
     mode_mapping = {
         " 钢筋笼施工模式 ": "钢筋笼施工模式",
@@ -117,162 +115,36 @@ def calculate_cost(mode, params_dict, others):
     
     print(f"原始模式: '{mode}' -> 清理后: '{clean_mode}' -> 实际模式: '{actual_mode}'")
     
-    # 初始化结果
-    result = {
-        "直接施工": {"人工费": 0, "材料费": 0, "机械费": 0,"间接费用": 0, "总计": 0},
-        "模块化施工": {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0,"总计": 0},
-        "明细": []
-    }
-    
-    # 逐个处理每个参数
-    for param, quantity in params_dict.items():
-        # 清理参数名称：去除首尾空格
-        clean_param = param.strip()
-        print(f"查找参数: '{clean_param}' 在模式: '{actual_mode}' 中")
-        
-        # 查找该参数的价格数据 - 使用英文表名和字段名
-        query = """
-        SELECT * FROM `construction_parameter_table`
-        WHERE `mode` = %s AND TRIM(`engineering_parameter`) = %s
-        """
-        
-        try:
-            param_df = pd.read_sql(query, conn, params=(actual_mode, clean_param))
-            
-            if param_df.empty:
-                print(f"精确匹配失败，尝试模糊匹配参数: '{clean_param}'")
-                # 尝试模糊匹配 - 标准处理方式
-                fuzzy_query = """
-                SELECT * FROM `construction_parameter_table`
-                WHERE `mode` = %s AND TRIM(`engineering_parameter`) LIKE %s
-                """
-                param_df = pd.read_sql(fuzzy_query, conn, params=(actual_mode, f'%{clean_param}%'))
-                
-                if param_df.empty:
-                    # 最后尝试只通过参数名匹配（忽略模式）
-                    param_only_query = """
-                    SELECT * FROM `construction_parameter_table`
-                    WHERE TRIM(`engineering_parameter`) = %s
-                    LIMIT 1
-                    """
-                    param_df = pd.read_sql(param_only_query, conn, params=(clean_param,))
-                    
-                    if param_df.empty:
-                        print(f"警告: 未找到参数 '{clean_param}' 的价格数据")
-                        continue
-                    else:
-                        print(f"通过参数名匹配找到: '{clean_param}'")
-                else:
-                    print(f"通过模糊匹配找到: '{clean_param}'")
-            else:
-                print(f"精确匹配成功: '{clean_param}'")
-        
-        except Exception as e:
-            print(f"查询参数 '{param}' 时出错: {e}")
-            continue
-        
-        if not param_df.empty:
-            row = param_df.iloc[0]
-            
-            try:
-                # 确保数量是有效数值
-                # 移除字符串两端的空白，并将空字符串转换为0
-                quantity_str = str(quantity).strip() if quantity is not None else ""
-                quantity = float(quantity_str) if quantity_str else 0
-                
-                # 安全地获取单价，确保它们是数值
-                def safe_float(value):
-                    """安全地将值转换为浮点数"""
-                    if pd.isna(value) or value is None:
-                        return 0.0
-                    try:
-                        # 如果是字符串，先去除空白
-                        if isinstance(value, str):
-                            value = value.strip()
-                            if not value:  # 如果是空字符串
-                                return 0.0
-                        return float(value)
-                    except (ValueError, TypeError):
-                        print(f"警告: 无法转换值 '{value}' 为浮点数，使用0代替")
-                        return 0.0
-                
-                # 获取并转换单价 - 使用英文字段名
-                direct_labor_unit = safe_float(row["direct_labor_unit_price"])
-                direct_material_unit = safe_float(row["direct_material_unit_price"])
-                direct_machine_unit = safe_float(row["direct_machinery_unit_price"])
-                direct_others_unit = safe_float(others.get("直接施工间接费", 0))
-                
-                modular_labor_unit = safe_float(row["modular_labor_unit_price"])
-                modular_material_unit = safe_float(row["modular_material_unit_price"])
-                modular_machine_unit = safe_float(row["modular_machinery_unit_price"])
-                modular_others_unit = safe_float(others.get("模块化施工间接费", 0))
-                
-                # 计算直接施工成本
-                direct_labor = direct_labor_unit * quantity
-                direct_material = direct_material_unit * quantity
-                direct_machine = direct_machine_unit * quantity
-                direct_others = direct_others_unit
-                direct_total = direct_labor + direct_material + direct_machine + direct_others_unit
-                
-                # 计算模块化施工成本
-                modular_labor = modular_labor_unit * quantity
-                modular_material = modular_material_unit * quantity
-                modular_machine = modular_machine_unit * quantity
-                modular_others = modular_others_unit
-                modular_total = modular_labor + modular_material + modular_machine + modular_others_unit
-                
-                # 添加到总计
-                result["直接施工"]["人工费"] += direct_labor
-                result["直接施工"]["材料费"] += direct_material
-                result["直接施工"]["机械费"] += direct_machine
-                result["直接施工"]["间接费用"] = direct_others
-                result["直接施工"]["总计"] += direct_total
-                
-                result["模块化施工"]["人工费"] += modular_labor
-                result["模块化施工"]["材料费"] += modular_material
-                result["模块化施工"]["机械费"] += modular_machine
-                result["模块化施工"]["间接费用"] = modular_others
-                result["模块化施工"]["总计"] += modular_total
-                
-                # 添加明细 - 使用英文字段名获取参数类别
-                result["明细"].append({
-                    "参数": param,
-                    "数量": quantity,
-                    "参数类别": row["parameter_category"] if "parameter_category" in row else "",
-                    "直接施工": {
-                        "人工费": round(direct_labor, 2),
-                        "材料费": round(direct_material, 2),
-                        "机械费": round(direct_machine, 2),
-                        "间接费用": round(direct_others,2),
-                        "总计": round(direct_total, 2)
-                    },
-                    "模块化施工": {
-                        "人工费": round(modular_labor, 2),
-                        "材料费": round(modular_material, 2),
-                        "机械费": round(modular_machine, 2),
-                        "间接费用": round(modular_others,2),
-                        "总计": round(modular_total, 2)
-                    }
-                })
-                
-            except Exception as e:
-                print(f"计算参数 '{param}' 成本时出错: {e}")
-                # 记录错误但继续处理其他参数
-        else:
-            print(f"警告: 未找到参数 '{param}' 的价格数据")
-    
-    # 四舍五入总计结果
-    for method in ["直接施工", "模块化施工"]:
-        for cost_type in ["人工费", "材料费", "机械费", "总计"]:
-            result[method][cost_type] = round(result[method][cost_type], 2)
-    
-    conn.close()
-    return result
+    # 从单价表缓存取得当前模式的名称索引，在内存中完成精确、模糊和忽略模式的匹配
+    try:
+        resolved = resolve_parameter_rows(
+            get_construction_price_index(actual_mode), params_dict.keys(),
+            fallback_index=get_construction_price_index()
+        )
+    except Exception as e:
+        print(f"批量查询模式 '{actual_mode}' 的价格数据时出错: {e}")
+        resolved = {}
+
+    for param, (row, match_type) in resolved.items():
+        if match_type == MATCH_FUZZY:
+            print(f"通过模糊匹配找到: '{param.strip()}'")
+        elif match_type == MATCH_FALLBACK:
+            print(f"通过参数名匹配找到: '{param.strip()}'")
+
+    # 向量化计算成本
+    params, quantities, price_rows = collect_priced_rows(params_dict, resolved)
+    categories = price_rows["parameter_category"].tolist() if "parameter_category" in price_rows.columns else None
+    return compute_cost_breakdown(
+        params, quantities,
+        price_matrix(price_rows, DIRECT_PRICE_COLUMNS),
+        price_matrix(price_rows, MODULAR_PRICE_COLUMNS),
+        others, categories
+    )
 
 def init_db():
     """初始化MySQL数据库，如果不存在则创建必要的表（英文表结构）"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor()
         
         # 获取所有表名
@@ -337,9 +209,7 @@ def save_project(project_data):
     """保存项目基本信息并返回项目ID - 确保唯一性"""
     conn = None
     try:
-        mysql_config = MYSQL_CONFIG.copy()
-        mysql_config['autocommit'] = False
-        conn = mysql.connector.connect(**mysql_config)
+        conn = get_pooled_connection(autocommit=False)
         cursor = conn.cursor(dictionary=True)
         
         project_name = project_data.get('project_name', '')
@@ -410,9 +280,7 @@ def save_custom_parameters(project_id, custom_params, replace_existing=True):
     """
     conn = None
     try:
-        mysql_config = MYSQL_CONFIG.copy()
-        mysql_config['autocommit'] = False
-        conn = mysql.connector.connect(**mysql_config)
+        conn = get_pooled_connection(autocommit=False)
         cursor = conn.cursor(dictionary=True)
         
         if not project_id:
@@ -610,7 +478,7 @@ def get_mode_details_from_database(mode_id):
     """从MySQL数据库获取指定ID的自定义模式详细信息"""
     try:
         # 连接到数据库
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 获取项目基本信息 - 使用英文表名和字段名
@@ -772,9 +640,7 @@ def save_selected_parameters(project_id, selected_parameters):
     conn = None
     try:
         # 创建连接时关闭自动提交以支持事务
-        mysql_config = MYSQL_CONFIG.copy()
-        mysql_config['autocommit'] = False
-        conn = mysql.connector.connect(**mysql_config)
+        conn = get_pooled_connection(autocommit=False)
         cursor = conn.cursor(dictionary=True)
         
         print(f"开始保存选中参数，project_id: {project_id}, 参数数量: {len(selected_parameters)}")
@@ -870,124 +736,30 @@ def calculate_cost_diy(mode, params_dict, others):
     """
     conn = get_connection_diy()
     
-    # 初始化结果
-    result = {
-        "直接施工": {"人工费": 0, "材料费": 0, "机械费": 0,"间接费用": 0, "总计": 0},
-        "模块化施工": {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0,"总计": 0},
-        "明细": []
-    }
-    
-    # 逐个处理每个参数
-    for param, quantity in params_dict.items():
-        # 查找该参数的价格数据 - 使用英文表名和字段名
-        query = """
-        SELECT * FROM `parameter_info`
-        WHERE `parameter_name` = %s
-        """
-        param_df = pd.read_sql(query, conn, params=(param,))
-        print(param)
-        
-        if not param_df.empty:
-            row = param_df.iloc[0]
-            
-            try:
-                # 确保数量是有效数值
-                quantity_str = str(quantity).strip() if quantity is not None else ""
-                quantity = float(quantity_str) if quantity_str else 0
-                
-                # 安全地获取单价，确保它们是数值
-                def safe_float(value):
-                    """安全地将值转换为浮点数"""
-                    if pd.isna(value) or value is None:
-                        return 0.0
-                    try:
-                        if isinstance(value, str):
-                            value = value.strip()
-                            if not value:
-                                return 0.0
-                        return float(value)
-                    except (ValueError, TypeError):
-                        print(f"警告: 无法转换值 '{value}' 为浮点数，使用0代替")
-                        return 0.0
-                
-                # 获取并转换单价 - 使用英文字段名
-                direct_labor_unit = safe_float(row["direct_labor_unit_price"])
-                direct_material_unit = safe_float(row["direct_material_unit_price"])
-                direct_machine_unit = safe_float(row["direct_machinery_unit_price"])
-                direct_others_unit = safe_float(others.get("直接施工间接费", 0))
-                
-                modular_labor_unit = safe_float(row["modular_labor_unit_price"])
-                modular_material_unit = safe_float(row["modular_material_unit_price"])
-                modular_machine_unit = safe_float(row["modular_machinery_unit_price"])
-                modular_others_unit = safe_float(others.get("模块化施工间接费", 0))
-                
-                # 计算直接施工成本
-                direct_labor = direct_labor_unit * quantity
-                direct_material = direct_material_unit * quantity
-                direct_machine = direct_machine_unit * quantity
-                direct_others = direct_others_unit
-                direct_total = direct_labor + direct_material + direct_machine + direct_others_unit
-                
-                # 计算模块化施工成本
-                modular_labor = modular_labor_unit * quantity
-                modular_material = modular_material_unit * quantity
-                modular_machine = modular_machine_unit * quantity
-                modular_others = modular_others_unit
-                modular_total = modular_labor + modular_material + modular_machine + modular_others_unit
-                
-                # 添加到总计
-                result["直接施工"]["人工费"] += direct_labor
-                result["直接施工"]["材料费"] += direct_material
-                result["直接施工"]["机械费"] += direct_machine
-                result["直接施工"]["间接费用"] = direct_others
-                result["直接施工"]["总计"] += direct_total
-                
-                result["模块化施工"]["人工费"] += modular_labor
-                result["模块化施工"]["材料费"] += modular_material
-                result["模块化施工"]["机械费"] += modular_machine
-                result["模块化施工"]["间接费用"] = modular_others
-                result["模块化施工"]["总计"] += modular_total
-                
-                # 添加明细 - 使用英文字段名获取参数类别
-                result["明细"].append({
-                    "参数": param,
-                    "数量": quantity,
-                    "参数类别": row["parameter_type"] if "parameter_type" in row else "",
-                    "直接施工": {
-                        "人工费": round(direct_labor, 2),
-                        "材料费": round(direct_material, 2),
-                        "机械费": round(direct_machine, 2),
-                        "间接费用": round(direct_others,2),
-                        "总计": round(direct_total, 2)
-                    },
-                    "模块化施工": {
-                        "人工费": round(modular_labor, 2),
-                        "材料费": round(modular_material, 2),
-                        "机械费": round(modular_machine, 2),
-                        "间接费用": round(modular_others,2),
-                        "总计": round(modular_total, 2)
-                    }
-                })
-                
-            except Exception as e:
-                print(f"计算参数 '{param}' 成本时出错: {e}")
-        else:
-            print(f"警告: 未找到参数 '{param}' 的价格数据")
-    
-    # 四舍五入总计结果
-    for method in ["直接施工", "模块化施工"]:
-        for cost_type in ["人工费", "材料费", "机械费", "总计"]:
-            result[method][cost_type] = round(result[method][cost_type], 2)
-    
-    conn.close()
-    return result
+    # 一次性读取全部参数的单价行，在内存中按名称匹配
+    try:
+        price_index = ParameterPriceIndex(
+            fetch_custom_parameter_prices(conn, params_dict.keys()), "parameter_name")
+    finally:
+        conn.close()
+    resolved = resolve_parameter_rows(price_index, params_dict.keys(), fuzzy=False)
+
+    # 向量化计算成本
+    params, quantities, price_rows = collect_priced_rows(params_dict, resolved)
+    categories = price_rows["parameter_type"].tolist() if "parameter_type" in price_rows.columns else None
+    return compute_cost_breakdown(
+        params, quantities,
+        price_matrix(price_rows, DIRECT_PRICE_COLUMNS),
+        price_matrix(price_rows, MODULAR_PRICE_COLUMNS),
+        others, categories
+    )
 
 def save_calculation_result(project_id, construction_mode, cost_data, cost_json):
     """
     保存计算结果到MySQL数据库 - 完全无result_id版本
     """
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         print(f"开始保存计算结果到数据库...")
@@ -1140,7 +912,7 @@ def debug_steel_lining_database():
     """调试钢衬里MySQL数据库，检查表结构和数据"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         print("=== 钢衬里MySQL数据库诊断 ===")
@@ -1195,7 +967,7 @@ def calculate_steel_lining_cost_fixed(mode, params_dict, others):
     """
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         print(f"开始计算钢衬里成本，模式: {mode}")
@@ -1226,155 +998,34 @@ def calculate_steel_lining_cost_fixed(mode, params_dict, others):
             conn.close()
         return create_empty_steel_lining_result()
     
-    # 初始化结果 - 完全按照标准格式
-    result = {
-        "直接施工": {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0, "总计": 0},
-        "模块化施工": {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0, "总计": 0},
-        "明细": []
-    }
-    
-    # 逐个处理每个参数 - 完全按照标准方式
-    for param, quantity in params_dict.items():
-        print(f"正在查询参数: {param}")
-        
-        # 查找该参数的价格数据 - 使用标准查询方式
-        query = f"""
-        SELECT * FROM `{table_name}`
-        WHERE `name` = %s
-        """
-        
-        try:
-            param_df = pd.read_sql(query, conn, params=(param,))
-            
-            if param_df.empty:
-                print(f"精确匹配失败，尝试模糊匹配参数: '{param}'")
-                # 尝试模糊匹配 - 标准处理方式
-                fuzzy_query = f"""
-                SELECT * FROM `{table_name}`
-                WHERE `name` LIKE %s
-                """
-                param_df = pd.read_sql(fuzzy_query, conn, params=(f'%{param}%',))
-                
-                if param_df.empty:
-                    print(f"警告: 未找到参数 '{param}' 的价格数据")
-                    continue
-                else:
-                    print(f"通过模糊匹配找到: '{param}'")
-        
-        except Exception as e:
-            print(f"查询参数 '{param}' 时出错: {e}")
-            continue
-        
-        if not param_df.empty:
-            row = param_df.iloc[0]
-            
-            try:
-                # 确保数量是有效数值 - 标准处理方式
-                quantity_str = str(quantity).strip() if quantity is not None else ""
-                quantity = float(quantity_str) if quantity_str else 0
-                
-                # 安全地获取单价，确保它们是数值 - 完全按照标准方式
-                def safe_float_local(value):
-                    """安全地将值转换为浮点数 - 标准函数"""
-                    if pd.isna(value) or value is None:
-                        return 0.0
-                    try:
-                        if isinstance(value, str):
-                            value = value.strip()
-                            if not value:
-                                return 0.0
-                        return float(value)
-                    except (ValueError, TypeError):
-                        print(f"警告: 无法转换值 '{value}' 为浮点数，使用0代替")
-                        return 0.0
-                
-                # 获取直接施工单价 - 钢衬里表字段映射
-                direct_labor_unit = safe_float_local(row.get("labor_cost", 0))
-                direct_material_unit = safe_float_local(row.get("material_cost", 0))
-                direct_machine_unit = safe_float_local(row.get("machinery_cost", 0))
-                direct_others_unit = safe_float_local(others.get("直接施工间接费", 0))
-                
-                # 获取模块化施工单价 - 检查是否有模块化字段
-                if "modular_labor_cost" in row:
-                    # 如果表中有模块化字段，直接使用
-                    modular_labor_unit = safe_float_local(row.get("modular_labor_cost", 0))
-                    modular_material_unit = safe_float_local(row.get("modular_material_cost", 0))
-                    modular_machine_unit = safe_float_local(row.get("modular_machinery_cost", 0))
-                    print(f"使用数据库中的模块化施工单价")
-                else:
-                    # 如果表中没有模块化字段，使用比例计算
-                    print(f"数据库中无模块化字段，使用比例计算模块化单价")
-                    modular_labor_unit = direct_labor_unit * 0.8      # 人工费降低20%
-                    modular_material_unit = direct_material_unit * 1.1 # 材料费增加10%  
-                    modular_machine_unit = direct_machine_unit * 0.9   # 机械费降低10%
-                
-                modular_others_unit = safe_float_local(others.get("模块化施工间接费", 0))
-                
-                # ====== 标准计算公式 - 完全按照其他模式的计算方式 ======
-                # 计算直接施工成本 - 标准公式：单价 × 数量
-                direct_labor = direct_labor_unit * quantity
-                direct_material = direct_material_unit * quantity  
-                direct_machine = direct_machine_unit * quantity
-                direct_others = direct_others_unit  # 间接费用不乘数量
-                direct_total = direct_labor + direct_material + direct_machine + direct_others_unit
-                
-                # 计算模块化施工成本 - 标准公式：单价 × 数量  
-                modular_labor = modular_labor_unit * quantity
-                modular_material = modular_material_unit * quantity
-                modular_machine = modular_machine_unit * quantity
-                modular_others = modular_others_unit  # 间接费用不乘数量
-                modular_total = modular_labor + modular_material + modular_machine + modular_others_unit
-                
-                # 添加到总计 - 完全按照标准方式
-                result["直接施工"]["人工费"] += direct_labor
-                result["直接施工"]["材料费"] += direct_material
-                result["直接施工"]["机械费"] += direct_machine
-                result["直接施工"]["间接费用"] = direct_others
-                result["直接施工"]["总计"] += direct_total
-                
-                result["模块化施工"]["人工费"] += modular_labor
-                result["模块化施工"]["材料费"] += modular_material
-                result["模块化施工"]["机械费"] += modular_machine
-                result["模块化施工"]["间接费用"] = modular_others
-                result["模块化施工"]["总计"] += modular_total
-                
-                # 添加明细 - 完全按照标准格式
-                result["明细"].append({
-                    "参数": param,
-                    "数量": quantity,
-                    "参数类别": "钢衬里",  # 钢衬里固定类别
-                    "直接施工": {
-                        "人工费": round(direct_labor, 2),
-                        "材料费": round(direct_material, 2),
-                        "机械费": round(direct_machine, 2),
-                        "间接费用": round(direct_others, 2),
-                        "总计": round(direct_total, 2)
-                    },
-                    "模块化施工": {
-                        "人工费": round(modular_labor, 2),
-                        "材料费": round(modular_material, 2),
-                        "机械费": round(modular_machine, 2),
-                        "间接费用": round(modular_others, 2),
-                        "总计": round(modular_total, 2)
-                    }
-                })
-                
-                print(f"参数 '{param}' 计算完成:")
-                print(f"  - 直接施工: 人工{direct_labor:.2f}, 材料{direct_material:.2f}, 机械{direct_machine:.2f}, 总计{direct_total:.2f}")
-                print(f"  - 模块化施工: 人工{modular_labor:.2f}, 材料{modular_material:.2f}, 机械{modular_machine:.2f}, 总计{modular_total:.2f}")
-                
-            except Exception as e:
-                print(f"计算参数 '{param}' 成本时出错: {e}")
-                continue
-        else:
-            print(f"警告: 未找到参数 '{param}' 的价格数据")
-    
-    # 四舍五入总计结果 - 完全按照标准方式
-    for method in ["直接施工", "模块化施工"]:
-        for cost_type in ["人工费", "材料费", "机械费", "总计"]:
-            result[method][cost_type] = round(result[method][cost_type], 2)
-    
-    conn.close()
+    # 一次性读取钢衬里单价表，在内存中完成精确和模糊匹配
+    try:
+        price_index = ParameterPriceIndex(fetch_steel_lining_price_table(conn, table_name), "name")
+        resolved = resolve_parameter_rows(price_index, params_dict.keys())
+    except Exception as e:
+        print(f"批量查询表 '{table_name}' 的价格数据时出错: {e}")
+        resolved = {}
+    finally:
+        conn.close()
+
+    for param, (row, match_type) in resolved.items():
+        if match_type == MATCH_FUZZY:
+            print(f"通过模糊匹配找到: '{param}'")
+
+    # 向量化计算成本 - 标准公式：单价 × 数量，间接费用不乘数量
+    params, quantities, price_rows = collect_priced_rows(params_dict, resolved)
+    direct_prices = price_matrix(price_rows, STEEL_LINING_DIRECT_PRICE_COLUMNS)
+    if "modular_labor_cost" in price_rows.columns:
+        # 如果表中有模块化字段，直接使用
+        print("使用数据库中的模块化施工单价")
+        modular_prices = price_matrix(price_rows, STEEL_LINING_MODULAR_PRICE_COLUMNS)
+    else:
+        # 如果表中没有模块化字段，使用比例计算
+        print("数据库中无模块化字段，使用比例计算模块化单价")
+        modular_prices = direct_prices * STEEL_LINING_MODULAR_RATIOS
+
+    result = compute_cost_breakdown(params, quantities, direct_prices, modular_prices, others,
+                                    categories=["钢衬里"] * len(params))  # 钢衬里固定类别
     
     # 打印最终结果用于调试
     print("=== 钢衬里成本计算结果 ===")
@@ -1388,11 +1039,7 @@ def calculate_steel_lining_cost_fixed(mode, params_dict, others):
 # 在文件末尾添加新的辅助函数
 def create_empty_steel_lining_result():
     """创建钢衬里空结果 - 标准格式"""
-    return {
-        "直接施工": {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0, "总计": 0},
-        "模块化施工": {"人工费": 0, "材料费": 0, "机械费": 0, "间接费用": 0, "总计": 0},
-        "明细": []
-    }
+    return empty_cost_result()
 
 
 def delete_custom_project(project_id):
@@ -1408,9 +1055,7 @@ def delete_custom_project(project_id):
     conn = None
     try:
         # 使用事务确保数据一致性
-        mysql_config = MYSQL_CONFIG.copy()
-        mysql_config['autocommit'] = False
-        conn = mysql.connector.connect(**mysql_config)
+        conn = get_pooled_connection(autocommit=False)
         cursor = conn.cursor(dictionary=True)
         
         print(f"开始删除project_id: {project_id}")
@@ -1506,7 +1151,7 @@ def get_project_basic_info(project_id):
         dict: 项目基本信息，如果不存在返回None
     """
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 获取项目基本信息和参数统计
@@ -1552,7 +1197,7 @@ def get_project_basic_info(project_id):
 def debug_project_parameter_relationship():
     """调试函数：检查项目和参数的关联关系"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         print("=== 项目和参数关联关系调试 ===")
@@ -1597,7 +1242,7 @@ def fix_existing_project_ids():
     为不同的project_name分配不同的project_id，保留所有现有数据
     """
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         print("=== 开始修复项目ID分配问题 ===")
@@ -1737,7 +1382,7 @@ def run_project_id_fix():
 def fix_calculation_result_table():
     """修复 calculation_result 表的字段长度问题"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor()
         
         print("开始检查和修复 calculation_result 表...")
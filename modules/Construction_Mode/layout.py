@@ -3,27 +3,17 @@ from dash import html, dash_table, dcc
 from utils.components import create_icon_button
 from config import PRIMARY_COLOR
 from .db_connection import get_mode_details_from_database
-import mysql.connector
+from utils.db_pool import get_connection as get_pooled_connection
 from .translation import reverse_translate_table_name, reverse_translate_field_name  # 新增
 from datetime import datetime
 import math  # 添加这个导入用于分页计算
 
-# MySQL数据库连接配置
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4',
-    'autocommit': False
-}
-
 def load_custom_modes():
     """从MySQL数据库加载所有自定义模式 - 按project_id数量生成选项卡"""
     try:
         print("开始从parameter_info表查询现存项目...")
         
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 首先检查parameter_info表中有多少个不同的project_id
@@ -129,10 +119,7 @@ def load_custom_modes():
 def debug_project_ids():
     """调试函数：检查parameter_info表中的project_id统计"""
     try:
-        from modules.Construction_Mode.db_connection import MYSQL_CONFIG
-        import mysql.connector
-        
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         cursor = conn.cursor(dictionary=True)
         
         print("=== parameter_info表project_id统计 ===")
@@ -590,14 +577,16 @@ def create_custom_modes_row(custom_modes):
     ])
 
 def update_construction_mode_layout():
-    """更新施工模式选择界面的布局，包括修复的分页功能"""
-    # 加载自定义模式
-    custom_modes = load_custom_modes()
-    
-    # 创建带分页的自定义模式部分 - 使用修复版本
+    """更新施工模式选择界面的布局，包括修复的分页功能
+
+    布局本身不查询数据库，可以被标签页布局缓存复用；自定义模式列表由
+    register_custom_mode_callbacks 中的加载回调在布局渲染后填充到 custom-modes-container。
+    """
+    # 创建带分页的自定义模式部分，列表内容在布局渲染后异步加载
     custom_modes_section = html.Div([
+        dcc.Store(id="custom-modes-loader", data=True),
         html.Div(
-            create_custom_modes_row_with_pagination(custom_modes, current_page=1),
+            dbc.Spinner(html.Div(style={"minHeight": "120px"}), color="primary"),
             id="custom-modes-container",
             style={
                 "position": "relative",
@@ -0,0 +1,142 @@
+# modules/Construction_Mode/price_lookup.py
+"""
+参数单价批量查询
+
+成本计算原先对每个参数依次执行精确查询、LIKE 模糊查询和忽略模式的查询，
+一个 30 个参数的表单最多需要 90 次数据库往返。这里改为一次性读取当前模式的
+全部单价行，在内存中建立规范化名称索引，精确匹配、模糊匹配和忽略模式的回退匹配
+都在本地完成。construction_parameter_table 的索引随 utils.price_cache 中的单价表缓存
+一起缓存和失效，单价查询直接命中内存。
+
+calculate_cost、calculate_cost_diy 和 calculate_steel_lining_cost_fixed 共用这里的解析逻辑。
+"""
+
+import pandas as pd
+
+from utils.price_cache import price_table_cache
+
+# 匹配方式
+MATCH_EXACT = 'exact'
+MATCH_FUZZY = 'fuzzy'
+MATCH_FALLBACK = 'fallback'
+
+
+def normalize_param_name(name):
+    """
+    规范化参数名称：去除首尾空白并忽略大小写
+
+    与 MySQL 默认排序规则下 TRIM(name) = %s 的比较结果保持一致。
+    """
+    if name is None:
+        return ""
+    if not isinstance(name, str) and pd.isna(name):
+        return ""
+    return str(name).strip().casefold()
+
+
+class ParameterPriceIndex:
+    """单价表的内存名称索引，支持精确匹配和模糊（包含）匹配"""
+
+    def __init__(self, df, name_column):
+        self.df = df.reset_index(drop=True) if df is not None else pd.DataFrame()
+        self.name_column = name_column
+        self._exact = {}
+        self._names = []
+
+        if name_column in self.df.columns:
+            for position, name in enumerate(self.df[name_column].tolist()):
+                key = normalize_param_name(name)
+                # 同名多行时与原查询一致，取第一行
+                self._exact.setdefault(key, position)
+                self._names.append((key, position))
+
+    def __len__(self):
+        return len(self.df)
+
+    def find_exact(self, param):
+        """精确匹配参数名称，未找到时返回 None"""
+        position = self._exact.get(normalize_param_name(param))
+        return self.df.iloc[position] if position is not None else None
+
+    def find_fuzzy(self, param):
+        """模糊匹配：返回第一个名称包含该参数的行（等价于 LIKE '%param%'）"""
+        key = normalize_param_name(param)
+        for name, position in self._names:
+            if key in name:
+                return self.df.iloc[position]
+        return None
+
+    def resolve(self, param, fuzzy=True):
+        """
+        依次尝试精确匹配和模糊匹配
+
+        Returns:
+            tuple: (pandas.Series 或 None, 匹配方式或 None)
+        """
+        row = self.find_exact(param)
+        if row is not None:
+            return row, MATCH_EXACT
+        if fuzzy:
+            row = self.find_fuzzy(param)
+            if row is not None:
+                return row, MATCH_FUZZY
+        return None, None
+
+
+def fetch_custom_parameter_prices(conn, param_names):
+    """按参数名称批量读取自定义模式 parameter_info 中的单价行"""
+    names = sorted({str(name) for name in param_names if name is not None})
+    if not names:
+        return pd.DataFrame()
+    placeholders = ", ".join(["%s"] * len(names))
+    query = f"""
+    SELECT * FROM `parameter_info`
+    WHERE `parameter_name` IN ({placeholders})
+    """
+    return pd.read_sql(query, conn, params=tuple(names))
+
+
+def fetch_steel_lining_price_table(conn, table_name="steel_lining"):
+    """一次性读取钢衬里单价表的全部行"""
+    return pd.read_sql(f"SELECT * FROM `{table_name}`", conn)
+
+
+def get_construction_price_index(mode=None):
+    """
+    获取 construction_parameter_table 的单价索引（随单价表缓存）
+
+    Args:
+        mode (str): 施工模式；为 None 时索引全部模式（用于忽略模式的回退匹配）
+    """
+    return price_table_cache.get_derived(
+        mode, "name_index", lambda df: ParameterPriceIndex(df, "engineering_parameter"))
+
+
+def resolve_parameter_rows(index, param_names, fuzzy=True, fallback_index=None):
+    """
+    批量解析参数对应的单价行
+
+    Args:
+        index (ParameterPriceIndex): 当前模式的单价索引
+        param_names (iterable): 参数名称
+        fuzzy (bool): 精确匹配失败时是否尝试模糊匹配
+        fallback_index (ParameterPriceIndex): 可选，对仍未匹配的参数做忽略模式的精确匹配
+
+    Returns:
+        dict: {参数名: (pandas.Series 或 None, 匹配方式或 None)}
+    """
+    resolved = {}
+    missing = []
+    for param in param_names:
+        row, match_type = index.resolve(param, fuzzy=fuzzy)
+        resolved[param] = (row, match_type)
+        if row is None:
+            missing.append(param)
+
+    if missing and fallback_index is not None:
+        for param in missing:
+            row = fallback_index.find_exact(param)
+            if row is not None:
+                resolved[param] = (row, MATCH_FALLBACK)
+
+    return resolved
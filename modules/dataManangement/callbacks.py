@@ -12,13 +12,14 @@ from utils.file_handlers import parse_uploaded_file
 import plotly.graph_objects as go
 import time
 from datetime import datetime
-import mysql.connector
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, Float, String, text
+from sqlalchemy import MetaData, Table, Column, Integer, Float, String, text
 from sqlalchemy.ext.declarative import declarative_base
 import pymysql
 from dash.exceptions import PreventUpdate  # 添加这个导入
 import logging  # 添加这个导入
 from config import PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR, BG_COLOR, CARD_BG, THEME, FONT_AWESOME_URL
+from modules.pricePrediction.training_jobs import submit_training_job, register_training_job_monitor_callbacks
+from modules.historyData.data import invalidate_table_query_cache
 from .translation import (
     translate_table_name, 
     translate_field_name, 
@@ -30,14 +31,16 @@ from .translation import (
     FIELD_TRANSLATIONS
 )
 
-# MySQL数据库连接配置
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4'
-}
+# MySQL数据库连接配置（共享连接池，见 utils/db_pool.py）
+from utils.db_pool import get_engine, get_connection as get_pooled_connection
+from utils.indicator_status_cache import invalidate_indicator_status_cache, invalidate_indicator_status_for_table
+from utils.price_cache import invalidate_price_cache_for_table
+from utils.formula_engine import check_indicator_formula
+from utils.search_index import ALIAS_SOURCE_TABLE, invalidate_search_index_for_table
+from utils.schema_cache import (
+    INTERNAL_TABLES, get_table_names, get_table_column_names, invalidate_schema_cache, invalidate_table_row_count,
+    table_exists
+)
 
 
 # 计算类型映射字典
@@ -64,13 +67,9 @@ def reverse_translate_calculation_type(chinese_type):
     return REVERSE_CALCULATION_TYPE_TRANSLATIONS.get(chinese_type, chinese_type)
 
 def create_db_connection():
-    """创建到MySQL数据库的连接"""
+    """获取到MySQL数据库的SQLAlchemy引擎（共享连接池引擎，不再每次新建）"""
     try:
-        # 使用SQLAlchemy创建MySQL引擎
-        # 构建MySQL连接字符串
-        connection_string = f"mysql+pymysql://{MYSQL_CONFIG['user']}:{MYSQL_CONFIG['password']}@{MYSQL_CONFIG['host']}/{MYSQL_CONFIG['database']}?charset={MYSQL_CONFIG['charset']}"
-        engine = create_engine(connection_string, echo=False)
-        return engine
+        return get_engine()
     except Exception as e:
         print(f"MySQL数据库连接错误: {str(e)}")
         return None
@@ -78,7 +77,7 @@ def create_db_connection():
 def create_raw_mysql_connection():
     """创建原生MySQL连接（用于某些特殊操作）"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection(autocommit=False)
         return conn
     except Exception as e:
         print(f"原生MySQL连接错误: {str(e)}")
@@ -86,57 +85,36 @@ def create_raw_mysql_connection():
 
 # 获取数据库中的所有表
 def get_all_tables():
-    """获取MySQL数据库中的所有表名"""
+    """获取MySQL数据库中的所有表名（使用表结构缓存，不再反射整个数据库）"""
     try:
-        engine = create_db_connection()
-        if engine:
-            # 使用SQLAlchemy元数据来获取表信息
-            metadata = MetaData()
-            metadata.reflect(bind=engine)
-            
-            # 过滤掉不需要的系统表 - 更新为英文表名
-            excluded_tables = {
-                'Mode1', 'Mode2', 'sqlite_sequence',
-                'price_custom_calculation_results', 'price_custom_parameters'
-            }
-            
-            filtered_tables = [table_name for table_name in metadata.tables.keys() 
-                             if table_name not in excluded_tables]
-            
-            # 使用翻译函数将表名转换为中文显示
-            return translate_table_options([{"label": table_name, "value": table_name} 
-                                          for table_name in filtered_tables])
-        return []
+        # 过滤掉不需要的系统表 - 更新为英文表名
+        excluded_tables = {
+            'Mode1', 'Mode2', 'sqlite_sequence',
+            'price_custom_calculation_results', 'price_custom_parameters'
+        } | INTERNAL_TABLES
+        
+        filtered_tables = [table_name for table_name in get_table_names()
+                         if table_name not in excluded_tables]
+        
+        # 使用翻译函数将表名转换为中文显示
+        return translate_table_options([{"label": table_name, "value": table_name} 
+                                      for table_name in filtered_tables])
     except Exception as e:
         print(f"获取MySQL表名错误: {str(e)}")
         return []
 
 def check_table_exists(table_name):
-    """检查表是否存在"""
+    """检查表是否存在（使用表结构缓存）"""
     try:
-        conn = create_raw_mysql_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SHOW TABLES LIKE %s", (table_name,))
-            result = cursor.fetchone()
-            conn.close()
-            return result is not None
-        return False
+        return table_exists(table_name)
     except Exception as e:
         print(f"检查表存在性错误: {str(e)}")
         return False
 
 def get_table_columns(table_name):
-    """获取表的列信息"""
+    """获取表的列信息（使用表结构缓存）"""
     try:
-        conn = create_raw_mysql_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(f"DESCRIBE `{table_name}`")
-            columns = cursor.fetchall()
-            conn.close()
-            return [col['Field'] for col in columns]
-        return []
+        return get_table_column_names(table_name)
     except Exception as e:
         print(f"获取表列信息错误: {str(e)}")
         return []
@@ -300,6 +278,8 @@ def update_basic_indicator(indicator_data):
             ))
             
             conn.commit()
+            invalidate_indicator_status_cache("基础指标已修改")
+            invalidate_search_index_for_table(ALIAS_SOURCE_TABLE)
             conn.close()
             return True
         return False
@@ -359,6 +339,8 @@ def add_basic_indicator(indicator_data, main_category='custom'):
             cursor.execute(insert_query, insert_params)
             
             conn.commit()
+            invalidate_indicator_status_cache("基础指标已新增")
+            invalidate_search_index_for_table(ALIAS_SOURCE_TABLE)
             conn.close()
             print(f"成功添加指标，ID: {next_id}")
             return True
@@ -395,6 +377,8 @@ def delete_basic_indicator(indicator_id):
                 
                 if deleted_count > 0:
                     conn.commit()
+                    invalidate_indicator_status_cache("基础指标已删除")
+                    invalidate_search_index_for_table(ALIAS_SOURCE_TABLE)
                     print(f"成功删除指标 ID: {indicator_id}")
                     conn.close()
                     return True
@@ -427,6 +411,8 @@ def delete_multiple_basic_indicators(indicator_ids):
             cursor.execute(query, indicator_ids)
             deleted_count = cursor.rowcount
             conn.commit()
+            invalidate_indicator_status_cache("基础指标已批量删除")
+            invalidate_search_index_for_table(ALIAS_SOURCE_TABLE)
             conn.close()
             return deleted_count
         return 0
@@ -688,6 +674,7 @@ def add_new_indicator_category(category_name):
             ))
             
             conn.commit()
+            invalidate_indicator_status_cache("指标分类已新增")
             conn.close()
             print(f"成功创建分类占位符，ID: {range_start}")
             return True, f"成功创建分类 '{category_name}'，ID范围：{range_start}-{range_end}"
@@ -816,6 +803,8 @@ def delete_category_and_indicators(category_value):
             
             deleted_count = cursor.rowcount
             conn.commit()
+            invalidate_indicator_status_cache("指标分类已删除")
+            invalidate_search_index_for_table(ALIAS_SOURCE_TABLE)
             conn.close()
             
             print(f"成功删除 {deleted_count} 个指标")
@@ -871,6 +860,8 @@ def clean_orphaned_placeholders():
                 cursor.execute(f"DELETE FROM basic_indicators WHERE id IN ({placeholders_str})")
                 deleted_count = cursor.rowcount
                 conn.commit()
+                invalidate_indicator_status_cache("孤立占位符已清理")
+                invalidate_search_index_for_table(ALIAS_SOURCE_TABLE)
                 print(f"已清理 {deleted_count} 个孤立占位符")
             else:
                 print("没有发现孤立占位符")
@@ -1232,25 +1223,12 @@ def get_composite_dependencies(composite_id):
         print(f"获取复合指标依赖关系错误: {str(e)}")
         return {}
 
-def validate_composite_formula(formula, dependencies):
-    """验证复合指标公式的有效性"""
+def validate_composite_formula(formula, dependencies, code=None, construction_mode=None):
+    """验证复合指标公式的有效性（语法、自引用、循环引用）"""
     try:
-        # 简单的公式验证逻辑
-        # 检查公式中引用的指标是否在dependencies中定义
-        import re
-        
-        # 查找公式中的所有引用 {XXX-XXX-XXX}
-        references = re.findall(r'\{([^}]+)\}', formula)
-        
-        # 查找公式中的所有参数引用 QTY_XXX
-        parameters = re.findall(r'QTY_\w+', formula)
-        
-        print(f"公式中的引用: {references}")
-        print(f"公式中的参数: {parameters}")
-        
-        # 检查所有引用是否都有对应的依赖定义
-        # 这里可以添加更复杂的验证逻辑
-        
+        parsed = check_indicator_formula(code, formula, construction_mode)
+        print(f"公式中的引用: {list(parsed.refs)}")
+        print(f"公式中的参数: {list(parsed.inputs)}")
         return True, "公式验证通过"
     except Exception as e:
         return False, f"公式验证失败: {str(e)}"
@@ -1388,6 +1366,7 @@ def add_comprehensive_indicator(indicator_data):
             
             cursor.execute(insert_query, insert_params)
             conn.commit()
+            invalidate_indicator_status_cache("综合指标已新增")
             conn.close()
             print(f"成功添加综合指标，ID: {next_id}")
             return True
@@ -1449,6 +1428,7 @@ def update_comprehensive_indicator(indicator_data):
             
             if affected_rows > 0:
                 conn.commit()
+                invalidate_indicator_status_cache("综合指标已修改")
                 print("提交成功")
                 conn.close()
                 return True
@@ -1486,6 +1466,7 @@ def delete_comprehensive_indicator(indicator_id):
                 
                 if deleted_count > 0:
                     conn.commit()
+                    invalidate_indicator_status_cache("综合指标已删除")
                     print(f"成功删除综合指标 ID: {indicator_id}")
                     conn.close()
                     return True
@@ -1587,24 +1568,12 @@ def get_comprehensive_dependencies(comprehensive_id):
         print(f"获取综合指标依赖关系错误: {str(e)}")
         return {}
 
-def validate_comprehensive_logic(calculation_logic, dependencies):
-    """验证综合指标计算逻辑的有效性"""
+def validate_comprehensive_logic(calculation_logic, dependencies, code=None, construction_mode=None):
+    """验证综合指标计算逻辑的有效性（语法、自引用、循环引用）"""
     try:
-        # 简单的逻辑验证
-        # 检查逻辑中引用的指标是否在dependencies中定义
-        import re
-        
-        # 查找逻辑中的所有引用 {XXX-XXX-XXX}
-        references = re.findall(r'\{([^}]+)\}', calculation_logic)
-        
-        # 查找逻辑中的所有输入参数引用 INPUT_XXX
-        input_params = re.findall(r'INPUT_\w+', calculation_logic)
-        
-        print(f"计算逻辑中的引用: {references}")
-        print(f"计算逻辑中的输入参数: {input_params}")
-        
-        # 这里可以添加更复杂的验证逻辑
-        
+        parsed = check_indicator_formula(code, calculation_logic, construction_mode)
+        print(f"计算逻辑中的引用: {list(parsed.refs)}")
+        print(f"计算逻辑中的输入参数: {list(parsed.inputs)}")
         return True, "计算逻辑验证通过"
     except Exception as e:
         return False, f"计算逻辑验证失败: {str(e)}"
@@ -1661,6 +1630,7 @@ def update_algorithm_status_by_id(algorithm_id, status):
             )
             affected_rows = cursor.rowcount
             conn.commit()
+            invalidate_indicator_status_cache("算法配置已修改")
             conn.close()
             return affected_rows > 0
         return False
@@ -1744,6 +1714,7 @@ def update_algorithm_status(algorithm_type, construction_mode, status):
             )
             affected_rows = cursor.rowcount
             conn.commit()
+            invalidate_indicator_status_cache("算法配置已修改")
             conn.close()
             return affected_rows > 0
         return False
@@ -1769,6 +1740,7 @@ def update_algorithm_parameters(algorithm_type, construction_mode, parameters=No
             )
             affected_rows = cursor.rowcount
             conn.commit()
+            invalidate_indicator_status_cache("算法配置已修改")
             conn.close()
             return affected_rows > 0
         return False
@@ -2264,30 +2236,19 @@ def register_data_callbacks(app):
         return no_update
 
 
-    # 模拟训练进度回调
+    # 预测模型后台训练：提交训练任务，由进度监视组件轮询显示
+    register_training_job_monitor_callbacks(app, "model-training")
+
     @app.callback(
-        [Output("training-progress", "value"),
-         Output("training-status", "children")],
-        [Input("start-training", "n_clicks"),
-         Input("pause-training", "n_clicks")]
+        Output("model-training-job-store", "data"),
+        [Input("start-training", "n_clicks")],
+        prevent_initial_call=True
     )
-    def update_training_progress(start_clicks, pause_clicks):
-        ctx = callback_context
-        
-        if not ctx.triggered:
-            # 初始状态
-            return 40, "当前状态：训练中... (40% 完成，损失：0.035)"
-        
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        
-        if button_id == "start-training":
-            # 模拟训练进度增加
-            return 75, "当前状态：训练中... (75% 完成，损失：0.018)"
-        elif button_id == "pause-training":
-            # 模拟训练暂停
-            return 40, "当前状态：训练已暂停 (40% 完成，损失：0.035)"
-        
-        return 40, "当前状态：训练中... (40% 完成，损失：0.035)"
+    def start_model_training(start_clicks):
+        """手动提交钢筋笼和钢衬里模式的后台训练任务"""
+        if not start_clicks:
+            raise PreventUpdate
+        return [submit_training_job(mode) for mode in ('steel_cage', 'steel_lining')]
 
 
 
@@ -2688,6 +2649,7 @@ def register_data_callbacks(app):
                     
                     # 创建新表并导入数据
                     df.to_sql(table_name, engine, if_exists='fail', index=False, method='multi')
+                    invalidate_schema_cache(f"新建表 {table_name}")
                     status_message = f"成功创建并导入数据到新表: {translate_table_name(table_name)}"
                     
                 else:  # 添加到现有表
@@ -2714,10 +2676,12 @@ def register_data_callbacks(app):
                         df = df.reindex(columns=existing_columns, fill_value=None)
                         
                         df.to_sql(existing_table, engine, if_exists='append', index=False, method='multi')
+                        invalidate_table_row_count(existing_table)
                         status_message = f"成功追加数据到表: {translate_table_name(existing_table)}"
                         
                     elif import_mode == 'replace':
                         df.to_sql(existing_table, engine, if_exists='replace', index=False, method='multi')
+                        invalidate_schema_cache(f"替换表 {existing_table}")
                         status_message = f"成功替换表: {translate_table_name(existing_table)} 中的数据"
                         
                     elif import_mode == 'update':
@@ -2776,6 +2740,11 @@ def register_data_callbacks(app):
                 
                 # 查询更新后的表数据并翻译列名
                 table_name = existing_table if operation_type == 'existing_table' else new_table_name
+                invalidate_indicator_status_for_table(table_name)
+                invalidate_price_cache_for_table(table_name, f"导入数据到 {table_name}")
+                invalidate_search_index_for_table(table_name)
+                # 施工历史数据页的表结构元数据和分页 COUNT 缓存（追加、更新不改表结构，需单独清除）
+                invalidate_table_query_cache(table_name)
                 try:
                     updated_data = pd.read_sql_table(table_name, engine)
                     # 翻译列名为中文显示
@@ -4010,6 +3979,18 @@ def register_data_callbacks(app):
             
             return [dash.no_update] * 10 + [error_alert, {'marginBottom': '15px', 'display': 'block'}]
         
+        # 校验公式语法和指标间的循环引用
+        formula_valid, formula_message = validate_composite_formula(
+            formula.strip(), None, code=code.strip(), construction_mode=construction_mode
+        )
+        if not formula_valid:
+            error_alert = dbc.Alert([
+                html.I(className="fas fa-exclamation-triangle", style={'marginRight': '8px'}),
+                formula_message
+            ], color="danger", className="mb-0")
+            
+            return [dash.no_update] * 10 + [error_alert, {'marginBottom': '15px', 'display': 'block'}]
+        
         try:
             # 确保状态值是正确的英文值
             if status not in ['enabled', 'disabled']:
@@ -4530,6 +4511,19 @@ def register_data_callbacks(app):
             
             return [dash.no_update] * 10 + [error_alert, {'marginBottom': '15px', 'display': 'block'}]
         
+        # 校验计算逻辑语法和指标间的循环引用
+        if logic and logic.strip():
+            logic_valid, logic_message = validate_comprehensive_logic(
+                logic.strip(), None, code=code.strip(), construction_mode=construction_mode
+            )
+            if not logic_valid:
+                error_alert = dbc.Alert([
+                    html.I(className="fas fa-exclamation-triangle", style={'marginRight': '8px'}),
+                    logic_message
+                ], color="danger", className="mb-0")
+                
+                return [dash.no_update] * 10 + [error_alert, {'marginBottom': '15px', 'display': 'block'}]
+        
         try:
             # 构建指标数据（暂时使用空的dependencies）
             indicator_data = {
@@ -5444,7 +5438,8 @@ def register_data_callbacks(app):
     @app.callback(
         [Output("parameter-status-alert", "children"),
         Output("parameter-status-alert", "style"),
-        Output("parameter-editing-mode", "data", allow_duplicate=True)],
+        Output("parameter-editing-mode", "data", allow_duplicate=True),
+        Output("model-training-job-store", "data", allow_duplicate=True)],
         [Input("save-parameters", "n_clicks")],
         [State("selected-algorithm-data", "data"),
         State({"type": "param-input", "index": ALL}, "value"),
@@ -5454,7 +5449,7 @@ def register_data_callbacks(app):
     def save_algorithm_parameters(save_clicks, algorithm_data, param_values, param_ids):
         """保存算法参数 - 支持复杂参数类型"""
         if not save_clicks or not algorithm_data or 'algorithm' not in algorithm_data:
-            return [], {'display': 'none'}, False
+            return [], {'display': 'none'}, False, no_update
         
         try:
             algorithm_name = algorithm_data['algorithm']
@@ -5463,7 +5458,7 @@ def register_data_callbacks(app):
             if not parameters:
                 return [
                     dbc.Alert("没有参数需要保存", color="warning")
-                ], {'display': 'block', 'marginTop': '15px'}, False
+                ], {'display': 'block', 'marginTop': '15px'}, False, no_update
             
             # 重新组织参数值
             processed_params = process_complex_parameters(parameters, param_values, param_ids)
@@ -5512,19 +5507,21 @@ def register_data_callbacks(app):
                         html.Hr(),
                         html.P(error_message, style={'whiteSpace': 'pre-line'})
                     ], color="danger")
-                ], {'display': 'block', 'marginTop': '15px'}, True  # 保持编辑模式
+                ], {'display': 'block', 'marginTop': '15px'}, True, no_update  # 保持编辑模式
             else:
+                # 参数已变化，在后台重新训练预测模型
+                training_job_ids = [submit_training_job(mode) for mode in ('steel_cage', 'steel_lining')]
                 return [
                     dbc.Alert([
                         html.I(className="fas fa-check-circle", style={'marginRight': '8px'}),
-                        f"成功保存 {saved_count} 个参数"
+                        f"成功保存 {saved_count} 个参数，预测模型正在后台重新训练"
                     ], color="success")
-                ], {'display': 'block', 'marginTop': '15px'}, False  # 退出编辑模式
+                ], {'display': 'block', 'marginTop': '15px'}, False, training_job_ids  # 退出编辑模式
                 
         except Exception as e:
             return [
                 dbc.Alert(f"保存参数时发生错误: {str(e)}", color="danger")
-            ], {'display': 'block', 'marginTop': '15px'}, True
+            ], {'display': 'block', 'marginTop': '15px'}, True, no_update
 
     def process_complex_parameters(parameters, param_values, param_ids):
         """处理复杂参数类型，将多个输入值组合成最终参数值"""
@@ -6,6 +6,7 @@ import time
 from datetime import datetime
 
 from config import PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR, BG_COLOR, CARD_BG, THEME, FONT_AWESOME_URL
+from modules.pricePrediction.training_jobs import create_training_job_monitor
 
 def create_import_modal():
     """创建导入数据模态窗口"""
@@ -1614,6 +1615,26 @@ def create_model_training_modal():
                 )
             ]),
             
+            # 预测模型后台训练区域
+            html.Div([
+                html.Div([
+                    html.H6("预测模型训练", style={'fontWeight': 'bold', 'margin': '0', 'display': 'inline-block'}),
+                    dbc.Button([
+                        html.I(className="fas fa-sync-alt", style={'marginRight': '5px'}),
+                        "重新训练预测模型"
+                    ], id="start-training", color="success", size="sm", style={'float': 'right'})
+                ], style={'marginBottom': '10px', 'overflow': 'hidden'}),
+                html.P("保存参数后将自动在后台重新训练预测模型，训练期间系统其他功能可正常使用。",
+                       style={'color': '#666', 'fontSize': '13px', 'marginBottom': '10px'}),
+                create_training_job_monitor("model-training")
+            ], style={
+                'marginTop': '20px',
+                'padding': '15px',
+                'border': '1px solid #dee2e6',
+                'borderRadius': '5px',
+                'backgroundColor': '#f8f9fa'
+            }),
+
             # 状态管理组件（隐藏）
             html.Div([
                 dcc.Store(id="selected-algorithm-data", data={}),
@@ -1,8 +1,9 @@
 # modules/dataManagement/model_comparison.py
 import pandas as pd
 import numpy as np
-import mysql.connector
-from sklearn.model_selection import LeaveOneOut, cross_val_score
+from utils.db_pool import get_connection as get_pooled_connection
+from sklearn.base import clone
+from sklearn.model_selection import KFold, LeaveOneOut, cross_val_score
 from sklearn.linear_model import RidgeCV, Ridge
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
@@ -10,23 +11,159 @@ from sklearn.svm import SVR
 from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.preprocessing import StandardScaler
+import atexit
+import hashlib
 import json
 import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 logger = logging.getLogger(__name__)
 
+# 交叉验证进程池的最大进程数（1 表示在当前进程中串行执行）
+CV_MAX_WORKERS = int(os.getenv('MODEL_COMPARISON_MAX_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# 训练任务（算法数 × 折数）少于该值时不值得启动进程，直接串行执行
+CV_PARALLEL_MIN_TASKS = int(os.getenv('MODEL_COMPARISON_PARALLEL_MIN_TASKS', '4'))
+
+# 最多缓存的算法评估结果数
+CV_CACHE_MAX_ENTRIES = int(os.getenv('MODEL_COMPARISON_CACHE_MAX_ENTRIES', '128'))
+
+
+class _CVResultCache:
+    """按指纹缓存单个算法的交叉验证评估结果（LRU，线程安全）"""
+
+    def __init__(self, max_entries=CV_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cv_result_cache = _CVResultCache()
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """获取共享的交叉验证进程池（首次使用时创建）"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=CV_MAX_WORKERS)
+            atexit.register(_process_pool.shutdown, wait=False)
+        return _process_pool
+
+
+def _reset_process_pool():
+    """丢弃已损坏的进程池，下次使用时重新创建"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = None
+
+
+def _data_fingerprint(X_scaled, y_values, cv_method):
+    """标准化后的特征、目标值和交叉验证方案的指纹"""
+    digest = hashlib.md5()
+    digest.update(np.ascontiguousarray(X_scaled, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(y_values, dtype=float).tobytes())
+    digest.update(repr(X_scaled.shape).encode('utf-8'))
+    digest.update(repr(cv_method).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _algorithm_cache_key(data_fingerprint, algorithm_type, parameters):
+    """单个算法评估结果的缓存键"""
+    params_json = json.dumps(parameters, sort_keys=True, default=str)
+    return f"{data_fingerprint}:{algorithm_type}:{hashlib.md5(params_json.encode('utf-8')).hexdigest()}"
+
+
+def _fit_predict_fold(model, X_train, y_train, X_test):
+    """在一个交叉验证折上训练并预测（在进程池中执行）"""
+    model.fit(X_train, y_train)
+    return model.predict(X_test)
+
+
+def _run_cross_validation(models, X_scaled, y_values, splits):
+    """
+    对多个算法执行交叉验证
+
+    Args:
+        models (dict): {算法类型: 未训练的模型实例}
+        X_scaled (numpy.ndarray): 标准化后的特征
+        y_values (numpy.ndarray): 目标值
+        splits (list): [(train_index, test_index), ...]
+
+    Returns:
+        dict: {算法类型: [各折的预测值]}，出错的算法不包含在结果中
+    """
+    tasks = [(algorithm_type, fold) for algorithm_type in models for fold in range(len(splits))]
+    predictions = {algorithm_type: [None] * len(splits) for algorithm_type in models}
+    failed = set()
+
+    if CV_MAX_WORKERS > 1 and len(tasks) >= CV_PARALLEL_MIN_TASKS:
+        try:
+            executor = _get_process_pool()
+            futures = {}
+            for algorithm_type, fold in tasks:
+                train_index, test_index = splits[fold]
+                future = executor.submit(_fit_predict_fold, clone(models[algorithm_type]),
+                                         X_scaled[train_index], y_values[train_index], X_scaled[test_index])
+                futures[future] = (algorithm_type, fold)
+            for future, (algorithm_type, fold) in futures.items():
+                try:
+                    predictions[algorithm_type][fold] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    if algorithm_type not in failed:
+                        logger.error(f"评估算法 {algorithm_type} 时出错: {e}")
+                    failed.add(algorithm_type)
+            return {key: value for key, value in predictions.items() if key not in failed}
+        except BrokenProcessPool as e:
+            logger.warning(f"交叉验证进程池不可用，改为串行执行: {e}")
+            _reset_process_pool()
+            failed.clear()
+
+    for algorithm_type, model in models.items():
+        try:
+            for fold, (train_index, test_index) in enumerate(splits):
+                predictions[algorithm_type][fold] = _fit_predict_fold(
+                    model, X_scaled[train_index], y_values[train_index], X_scaled[test_index])
+        except Exception as e:
+            logger.error(f"评估算法 {algorithm_type} 时出错: {e}")
+            failed.add(algorithm_type)
+    return {key: value for key, value in predictions.items() if key not in failed}
+
+
 class ModelPerformanceComparison:
     """模型性能对比类 - 用于评估和比较不同算法在历史数据上的表现"""
     
     def __init__(self, construction_mode='steel_cage'):
         self.construction_mode = construction_mode
-        self.mysql_config = {
-            'host': 'localhost',
-            'user': 'dash',
-            'password': '123456',
-            'database': 'dash_project',
-            'charset': 'utf8mb4'
-        }
         self.algorithms = {}
         self.enabled_algorithms = {}
         self.evaluation_results = None
@@ -34,7 +171,7 @@ class ModelPerformanceComparison:
     def load_algorithm_configs(self):
         """从数据库加载算法配置"""
         try:
-            conn = mysql.connector.connect(**self.mysql_config)
+            conn = get_pooled_connection()
             cursor = conn.cursor(dictionary=True)
             
             query = """
@@ -66,7 +203,7 @@ class ModelPerformanceComparison:
     def load_historical_data(self):
         """加载历史数据用于性能评估"""
         try:
-            conn = mysql.connector.connect(**self.mysql_config)
+            conn = get_pooled_connection()
             
             if self.construction_mode == 'steel_cage':
                 # 钢筋笼模式的历史数据 - 移除ORDER BY避免字段不存在错误
@@ -236,7 +373,13 @@ class ModelPerformanceComparison:
             return None
     
     def evaluate_algorithms(self):
-        """评估所有启用的算法性能"""
+        """
+        评估所有启用的算法性能
+
+        各算法、各折的训练相互独立，统一提交到进程池并行执行；
+        评估结果按（数据、交叉验证方案、算法参数）指纹缓存，
+        重复对比时直接返回，只有数据或参数变化的算法才会重新评估。
+        """
         if not self.enabled_algorithms:
             logger.error("没有启用的算法可供评估")
             return None
@@ -255,6 +398,7 @@ class ModelPerformanceComparison:
         # 数据标准化
         scaler = StandardScaler()
         X_scaled = scaler.fit_transform(X)
+        y_values = y.to_numpy()
         
         # 选择合适的交叉验证方法
         if n_samples <= 10:
@@ -263,38 +407,43 @@ class ModelPerformanceComparison:
             cv_name = "留一法交叉验证"
         else:
             # 样本多时使用k折交叉验证
-            from sklearn.model_selection import KFold
             cv_method = KFold(n_splits=min(5, n_samples//2), shuffle=True, random_state=42)
             cv_name = "K折交叉验证"
         
         logger.info(f"使用 {cv_name}，样本数量: {n_samples}")
         
+        data_fingerprint = _data_fingerprint(X_scaled, y_values, cv_method)
         results = {}
+        pending_models = {}
+        cache_keys = {}
         
         for algorithm_type, config in self.enabled_algorithms.items():
+            cache_key = _algorithm_cache_key(data_fingerprint, algorithm_type, config['parameters'])
+            cached = _cv_result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"{config['name']} 使用缓存的评估结果")
+                results[algorithm_type] = dict(cached, algorithm_name=config['name'])
+                continue
+            
+            logger.info(f"正在评估算法: {config['name']} ({algorithm_type})")
+            # 创建算法实例
+            model = self.create_algorithm_instance(algorithm_type, config['parameters'], n_samples)
+            if model is None:
+                continue
+            pending_models[algorithm_type] = model
+            cache_keys[algorithm_type] = cache_key
+        
+        # 执行交叉验证
+        splits = list(cv_method.split(X_scaled))
+        fold_predictions = _run_cross_validation(pending_models, X_scaled, y_values, splits)
+        
+        for algorithm_type, predictions in fold_predictions.items():
+            config = self.enabled_algorithms[algorithm_type]
             try:
-                logger.info(f"正在评估算法: {config['name']} ({algorithm_type})")
-                
-                # 创建算法实例
-                model = self.create_algorithm_instance(algorithm_type, config['parameters'], n_samples)
-                if model is None:
-                    continue
-                
-                # 执行交叉验证
                 y_true = []
                 y_pred = []
-                
-                for train_index, test_index in cv_method.split(X_scaled):
-                    X_train, X_test = X_scaled[train_index], X_scaled[test_index]
-                    y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-                    
-                    # 训练模型
-                    model.fit(X_train, y_train)
-                    
-                    # 预测
-                    pred = model.predict(X_test)
-                    
-                    y_true.extend(y_test.values)
+                for (_, test_index), pred in zip(splits, predictions):
+                    y_true.extend(y_values[test_index])
                     y_pred.extend(pred)
                 
                 # 计算性能指标
@@ -322,6 +471,7 @@ class ModelPerformanceComparison:
                     'y_true': y_true,
                     'y_pred': y_pred
                 }
+                _cv_result_cache.put(cache_keys[algorithm_type], results[algorithm_type])
                 
                 logger.info(f"{config['name']} 评估完成: MAE={mae:.2f}, RMSE={rmse:.2f}, R²={r2:.3f}")
                 
@@ -329,8 +479,9 @@ class ModelPerformanceComparison:
                 logger.error(f"评估算法 {algorithm_type} 时出错: {e}")
                 continue
         
-        self.evaluation_results = results
-        return results
+        # 保持与启用算法相同的顺序
+        self.evaluation_results = {key: results[key] for key in self.enabled_algorithms if key in results}
+        return self.evaluation_results
     
     def get_comparison_summary(self):
         """获取性能对比汇总表"""
@@ -6,11 +6,13 @@ from dash.exceptions import PreventUpdate
 from dash import Output, Input, State, callback_context
 import dash_bootstrap_components as dbc
 
+from utils.excel_export import create_export_task, register_export_download
 from .data import (
-    get_table_schema, get_table_data, get_next_id, update_record, add_record, delete_record,
+    get_table_schema, get_table_page, get_next_id, update_record, add_record, delete_record,
     get_all_project_tables, dynamic_get_schema_from_table, restore_deleted_record,
     debug_database_structure
 )
+from .report_templates import HISTORY_TABLE_TEMPLATE
 from .translation import (
     translate_history_table_name,
     translate_history_field_name,
@@ -42,14 +44,13 @@ def register_history_data_callbacks(app):
             print(f"更新项目选项失败: {e}")
             return []
 
-    # 2. 主表格数据更新回调（实现左右互相覆盖）
+    # 2. 主表格数据源更新回调（实现左右互相覆盖）
+    # 只确定要显示的表、列定义和搜索条件，当前页数据由回调 2b 分页加载
     @app.callback(
         [Output('construction-data-table', 'columns'),
-        Output('construction-data-table', 'data'),
         Output('current-mode', 'data'),
-        Output('data-stats', 'children'),
-        Output('table-pagination', 'max_value'),
         Output('current-table-name', 'data'),
+        Output('table-query-store', 'data'),
         Output('project-select', 'value', allow_duplicate=True)],  # 项目选择控制
         [Input('construction-mode-radio', 'value'),
         Input('btn-refresh', 'n_clicks'),
@@ -64,10 +65,12 @@ def register_history_data_callbacks(app):
         mode_to_use = mode_value or current_mode or 'steel_cage'
         current_table_name = ""
         schema = None
-        data = []
         table_display_name = "默认表格"
         project_value_to_return = selected_project  # 默认保持当前项目选择
-        
+
+        def empty_result(message, project_value):
+            return [], mode_to_use, "", {'table_name': '', 'message': message}, project_value
+
         try:
             ctx = callback_context
             trigger_id = 'construction-mode-radio'
@@ -93,95 +96,41 @@ def register_history_data_callbacks(app):
                             # 翻译表名为中文显示
                             chinese_table_name = translate_history_table_name(first_project)
                             table_display_name = f"默认显示: {chinese_table_name}"
-                            data = get_table_data(first_project, mode=mode_to_use)  # 传入模式参数
                             print(f"施工模式表未找到，使用项目表作为默认: {first_project}")
                         else:
-                            return [], [], mode_to_use, f"未找到可用的数据表", 1, "", None
+                            return empty_result("未找到可用的数据表", None)
                     except Exception as e:
                         print(f"获取项目表作为替代失败: {e}")
-                        return [], [], mode_to_use, f"未找到可用的数据表", 1, "", None
+                        return empty_result("未找到可用的数据表", None)
                 else:
                     current_table_name = schema['table_name']
                     table_display_name = schema.get('display_name', '未知模式')
-                    use_mode_db = schema.get('use_mode_db', False)
-                    
-                    # 获取施工模式数据
-                    if trigger_id == 'btn-search' and search_term and search_term.strip():
-                        data = get_table_data(current_table_name, search_term, use_mode_db=use_mode_db)
-                    else:
-                        data = get_table_data(current_table_name, use_mode_db=use_mode_db)
-                    
-                    print(f"显示施工模式数据: {mode_to_use}, 表: {current_table_name}, 专用数据库: {use_mode_db}")
-                    
-            elif trigger_id == 'project-select':
-                # 右边项目被选择，显示项目数据
-                if selected_project:
-                    current_table_name = selected_project
-                    schema = dynamic_get_schema_from_table(selected_project, mode_to_use)  # 传入模式参数
-                    if not schema:
-                        return [], [], mode_to_use, f"无法获取项目 {selected_project} 的数据", 1, "", selected_project
-                    
-                    if trigger_id == 'btn-search' and search_term and search_term.strip():
-                        data = get_table_data(selected_project, search_term, mode=mode_to_use)  # 传入模式参数
-                    else:
-                        data = get_table_data(selected_project, mode=mode_to_use)  # 传入模式参数
+                    print(f"显示施工模式数据: {mode_to_use}, 表: {current_table_name}")
                     
-                    # 翻译项目表名为中文显示
-                    chinese_table_name = translate_history_table_name(selected_project)
-                    table_display_name = f"项目: {chinese_table_name}"
-                    print(f"显示项目数据: {selected_project} (模式: {mode_to_use})")
-                else:
-                    # 项目被清空，显示当前施工模式数据
-                    schema = get_table_schema(mode_to_use)
-                    if schema:
-                        current_table_name = schema['table_name']
-                        table_display_name = schema.get('display_name', '未知模式')
-                        use_mode_db = schema.get('use_mode_db', False)
-                        data = get_table_data(current_table_name, use_mode_db=use_mode_db)
-                        print(f"项目清空，回到施工模式数据: {mode_to_use}")
-                    else:
-                        return [], [], mode_to_use, "无可用数据", 1, "", None
+            elif selected_project:
+                # 右边项目被选择，或在项目数据上刷新/搜索，显示项目数据
+                current_table_name = selected_project
+                schema = dynamic_get_schema_from_table(selected_project, mode_to_use)  # 传入模式参数
+                if not schema:
+                    return empty_result(f"无法获取项目 {selected_project} 的数据", selected_project)
+                
+                # 翻译项目表名为中文显示
+                chinese_table_name = translate_history_table_name(selected_project)
+                table_display_name = f"项目: {chinese_table_name}"
+                print(f"显示项目数据: {selected_project} (模式: {mode_to_use})")
             
             else:
-                # 其他触发器（刷新、搜索等），保持当前显示的数据源
-                if selected_project:
-                    # 当前显示的是项目数据
-                    current_table_name = selected_project
-                    schema = dynamic_get_schema_from_table(selected_project, mode_to_use)  # 传入模式参数
-                    if not schema:
-                        return [], [], mode_to_use, f"无法获取项目 {selected_project} 的数据", 1, "", selected_project
-                    
-                    if trigger_id == 'btn-search' and search_term and search_term.strip():
-                        data = get_table_data(selected_project, search_term, mode=mode_to_use)  # 传入模式参数
-                    else:
-                        data = get_table_data(selected_project, mode=mode_to_use)  # 传入模式参数
-                    
-                    # 翻译项目表名为中文显示
-                    chinese_table_name = translate_history_table_name(selected_project)
-                    table_display_name = f"项目: {chinese_table_name}"
-                    print(f"保持项目数据: {selected_project} (模式: {mode_to_use})")
-                else:
-                    # 当前显示的是施工模式数据
-                    schema = get_table_schema(mode_to_use)
-                    if schema:
-                        current_table_name = schema['table_name']
-                        table_display_name = schema.get('display_name', '未知模式')
-                        use_mode_db = schema.get('use_mode_db', False)
-                        
-                        if trigger_id == 'btn-search' and search_term and search_term.strip():
-                            data = get_table_data(current_table_name, search_term, use_mode_db=use_mode_db)
-                        else:
-                            data = get_table_data(current_table_name, use_mode_db=use_mode_db)
-                        
-                        print(f"保持施工模式数据: {mode_to_use}")
-                    else:
-                        return [], [], mode_to_use, "无可用数据", 1, "", None
-
-            print(f"Debug: current_table_name={current_table_name}, schema存在={schema is not None}, data数量={len(data) if data else 0}")
+                # 项目被清空，或在施工模式数据上刷新/搜索，显示施工模式数据
+                schema = get_table_schema(mode_to_use)
+                if not schema:
+                    return empty_result("无可用数据", None)
+                current_table_name = schema['table_name']
+                table_display_name = schema.get('display_name', '未知模式')
+                print(f"显示施工模式数据: {mode_to_use}")
 
             # 确保有有效的schema
             if not schema:
-                return [], [], mode_to_use, "无可用数据", 1, "", project_value_to_return
+                return empty_result("无可用数据", project_value_to_return)
 
             # 构建列定义
             columns = []
@@ -195,8 +144,8 @@ def register_history_data_callbacks(app):
             })
             
             # 添加原有列（schema中的列名已经是翻译后的中文）
+            chinese_timestamp = translate_history_field_name("timestamp")
             for col in schema["columns"]:
-                chinese_timestamp = translate_history_field_name("timestamp")
                 if col["name"] != chinese_timestamp:  # 隐藏时间戳列
                     # 检查是否为ID类列（使用中文名称判断）
                     is_id_column = col["name"] in ["序号", "ID", "id", "ROWID"]
@@ -208,65 +157,133 @@ def register_history_data_callbacks(app):
                     }
                     columns.append(column_def)
 
-            # 确保data是列表格式
-            if not isinstance(data, list):
-                data = []
+            # 搜索只在点击搜索按钮时生效
+            applied_search = search_term.strip() if trigger_id == 'btn-search' and search_term and search_term.strip() else None
+
+            table_query = {
+                'table_name': current_table_name,
+                'display_name': table_display_name,
+                'search_term': applied_search,
+                'mode': mode_to_use if selected_project else None,  # 项目数据传入模式参数
+                'loaded_at': datetime.now().isoformat(),  # 保证刷新时即使表名不变也会重新加载
+            }
+
+            print(f"Debug: 最终返回 - columns={len(columns)}, table={current_table_name}, mode={mode_to_use}, project={project_value_to_return}")
+            return columns, mode_to_use, current_table_name, table_query, project_value_to_return
+
+        except Exception as e:
+            print(f"更新表格数据失败: {e}")
+            import traceback
+            traceback.print_exc()
+            # 确保在异常情况下也返回有效的 mode_to_use
+            return empty_result(f"加载数据失败: {str(e)}", project_value_to_return)
+
+    # 2b. 分页加载当前页数据（分页、排序、筛选都在数据库中完成）
+    @app.callback(
+        [Output('construction-data-table', 'data'),
+        Output('construction-data-table', 'page_count'),
+        Output('construction-data-table', 'page_current'),
+        Output('data-stats', 'children')],
+        [Input('table-query-store', 'data'),
+        Input('construction-data-table', 'page_current'),
+        Input('construction-data-table', 'page_size'),
+        Input('construction-data-table', 'sort_by'),
+        Input('construction-data-table', 'filter_query')],
+        [State('construction-data-table', 'columns')],
+        prevent_initial_call=True
+    )
+    def load_table_page(table_query, page_current, page_size, sort_by, filter_query, columns):
+        table_query = table_query or {}
+        table_name = table_query.get('table_name')
+        if not table_name:
+            return [], 1, 0, table_query.get('message', "无可用数据")
+
+        try:
+            # 切换表或修改筛选条件时回到第一页
+            trigger_id = callback_context.triggered[0]['prop_id'] if callback_context.triggered else ''
+            if trigger_id in ('table-query-store.data', 'construction-data-table.filter_query'):
+                page_current = 0
+
+            mode = table_query.get('mode')
+            search_term = table_query.get('search_term')
+            page_size = page_size or 15
+            data, total, page_current = get_table_page(
+                table_name, page_current, page_size, sort_by=sort_by,
+                filter_query=filter_query, search_term=search_term, mode=mode
+            )
 
             # 为每行数据添加操作按钮和行类型标识
-            for i, row in enumerate(data):
-                if isinstance(row, dict):
-                    row["operations"] = "删除"
-                    row["row_type"] = "normal"  # 标识为普通行
-                else:
-                    print(f"警告: 第{i}行数据格式不正确: {row}")
+            for row in data:
+                row["operations"] = "删除"
+                row["row_type"] = "normal"  # 标识为普通行
 
-            # 添加一个新增行
-            if schema and schema.get("columns"):
-                new_row = {
-                    "operations": "新增",
-                    "row_type": "new"  # 标识为新增行
-                }
-                
-                for col in schema["columns"]:
-                    chinese_id_field = translate_history_field_name("sequence_number")
-                    chinese_timestamp_field = translate_history_field_name("timestamp")
-                    
-                    if col["name"] in [chinese_id_field, "ID", "id"]:
-                        try:
-                            # 需要区分项目数据和施工模式数据
-                            if selected_project:
-                                # 项目数据：传入mode参数
-                                new_row[col["name"]] = get_next_id(current_table_name, mode_to_use) if current_table_name else 1
-                            else:
-                                # 施工模式数据：不传mode参数
-                                new_row[col["name"]] = get_next_id(current_table_name) if current_table_name else 1
-                        except Exception as e:
-                            print(f"获取下一个ID失败: {e}")
-                            new_row[col["name"]] = 1
-                    elif col["name"] not in [chinese_timestamp_field, "ROWID"]:
-                        new_row[col["name"]] = ""
-                data.append(new_row)
+            # 在每页末尾添加一个新增行
+            chinese_id_field = translate_history_field_name("sequence_number")
+            new_row = {
+                "operations": "新增",
+                "row_type": "new"  # 标识为新增行
+            }
+            for col in columns or []:
+                if col["id"] == "operations":
+                    continue
+                if col["id"] in [chinese_id_field, "ID", "id"]:
+                    try:
+                        new_row[col["id"]] = get_next_id(table_name, mode) if mode else get_next_id(table_name)
+                    except Exception as e:
+                        print(f"获取下一个ID失败: {e}")
+                        new_row[col["id"]] = 1
+                elif col["id"] != "ROWID":
+                    new_row[col["id"]] = ""
+            data.append(new_row)
 
-            # 分页计算
-            page_size = 15
-            total_pages = max(1, (len(data) + page_size - 1) // page_size)
+            page_count = max(1, (total + page_size - 1) // page_size)
 
             # 构建统计信息
-            actual_data_count = max(0, len(data) - 1) if data else 0  # 减去新增行
-            if trigger_id == 'btn-search' and search_term and search_term.strip():
-                stats_text = f"{table_display_name} - 搜索 '{search_term}' 结果: 共 {actual_data_count} 条记录"
+            table_display_name = table_query.get('display_name', '')
+            if search_term:
+                stats_text = f"{table_display_name} - 搜索 '{search_term}' 结果: 共 {total} 条记录"
             else:
-                stats_text = f"{table_display_name} - 共 {actual_data_count} 条记录"
+                stats_text = f"{table_display_name} - 共 {total} 条记录"
+            if filter_query:
+                stats_text += "（已筛选）"
 
-            print(f"Debug: 最终返回 - columns={len(columns)}, data={len(data)}, mode={mode_to_use}, project={project_value_to_return}")
-            return columns, data, mode_to_use, stats_text, total_pages, current_table_name, project_value_to_return
+            return data, page_count, page_current, stats_text
 
         except Exception as e:
-            print(f"更新表格数据失败: {e}")
-            import traceback
-            traceback.print_exc()
-            # 确保在异常情况下也返回有效的 mode_to_use
-            return [], [], mode_to_use, f"加载数据失败: {str(e)}", 1, "", project_value_to_return
+            print(f"分页加载表格数据失败: {e}")
+            return [], 1, 0, f"加载数据失败: {str(e)}"
+
+    # 2c. 导出Excel：按当前表、搜索、排序和筛选条件在服务端导出全部记录
+    register_export_download(app, 'download-history-table')
+
+    @app.callback(
+        Output('download-history-table', 'data'),
+        Input('btn-export-history', 'n_clicks'),
+        [State('table-query-store', 'data'),
+        State('construction-data-table', 'sort_by'),
+        State('construction-data-table', 'filter_query')],
+        prevent_initial_call=True
+    )
+    def export_history_table(n_clicks, table_query, sort_by, filter_query):
+        table_query = table_query or {}
+        table_name = table_query.get('table_name')
+        if not n_clicks or not table_name:
+            raise PreventUpdate
+
+        report_data = {
+            'table_name': table_name,
+            'mode': table_query.get('mode'),
+            'search_term': table_query.get('search_term'),
+            'sort_by': sort_by or [],
+            'filter_query': filter_query or '',
+        }
+        display_name = table_query.get('display_name') or table_name
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        try:
+            return create_export_task(HISTORY_TABLE_TEMPLATE, report_data, f"{display_name}_{timestamp}.xlsx")
+        except Exception as e:
+            print(f"导出表 {table_name} 失败: {e}")
+            raise PreventUpdate
 
     # 3. 处理表格单元格编辑（简化版）
     @app.callback(
@@ -297,6 +314,7 @@ def register_history_data_callbacks(app):
                 return dbc.Alert("错误：无法确定目标表", color="danger", duration=3000)
 
             # 比较数据找出变化
+            chinese_id_field = translate_history_field_name("sequence_number")
             for i in range(min(len(current_data), len(previous_data))):
                 current_row = current_data[i]
                 previous_row = previous_data[i]
@@ -308,6 +326,10 @@ def register_history_data_callbacks(app):
                 if current_row.get("operations") == "新增":
                     continue
                 
+                # 分页加载、删除行后同一位置是另一条记录，不是单元格编辑
+                if current_row.get(chinese_id_field) != previous_row.get(chinese_id_field):
+                    continue
+                
                 # 检查是否有变化
                 has_changes = False
                 for key in current_row:
@@ -1,7 +1,9 @@
 # modules/historyData/data.py (修改版本)
-import mysql.connector
 from datetime import datetime
+import os
 import re
+import threading
+import time
 from .translation import (
     translate_history_table_name, 
     translate_history_field_name,
@@ -9,15 +11,38 @@ from .translation import (
     reverse_translate_field_name
 )
 
-# MySQL数据库连接配置
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名 - 使用新的英文数据库
-    'charset': 'utf8mb4',
-    'autocommit': False
-}
+# MySQL数据库连接配置（共享连接池，见 utils/db_pool.py）
+# 本模块的写操作需要显式提交，因此以事务模式借出连接
+from utils.db_pool import MYSQL_CONFIG, get_connection as get_pooled_connection
+from utils.price_cache import invalidate_price_cache_for_table
+from utils.search_index import invalidate_search_index_for_table
+from utils.indicator_status_cache import invalidate_indicator_status_for_table
+from utils.schema_cache import (
+    get_table_names, get_table_columns_info, get_table_row_counts, invalidate_table_row_count,
+    register_schema_listener, table_exists as schema_table_exists
+)
+
+# 表结构元数据（中文名映射等派生信息）缓存有效期（秒），表结构很少变化
+HISTORY_SCHEMA_CACHE_TTL = int(os.getenv('HISTORY_SCHEMA_CACHE_TTL', '600'))
+
+# 分页查询 COUNT 结果缓存有效期（秒），本模块写入数据时会立即失效
+HISTORY_COUNT_CACHE_TTL = int(os.getenv('HISTORY_COUNT_CACHE_TTL', '60'))
+
+# 导出时每批从数据库读取的行数
+HISTORY_EXPORT_BATCH_SIZE = int(os.getenv('HISTORY_EXPORT_BATCH_SIZE', '1000'))
+
+# 数值类型关键字
+NUMERIC_TYPE_KEYWORDS = ['INT', 'DECIMAL', 'FLOAT', 'DOUBLE', 'NUMERIC']
+
+# DataTable 自定义筛选表达式支持的运算符（与 dash_table 的 filter_query 语法一致）
+FILTER_OPERATORS = [
+    ['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'],
+    ['ne ', '!='], ['eq ', '='], ['contains '], ['datestartswith '],
+]
+
+_table_meta_cache = {}
+_count_cache = {}
+_cache_lock = threading.Lock()
 
 def translate_schema_columns(columns):
     """翻译schema中的列定义"""
@@ -104,7 +129,7 @@ def get_db_connection(mode=None):
     """连接数据库，支持根据模式选择不同的数据库"""
     try:
         # MySQL不需要根据模式选择不同的数据库文件，所有数据都在同一个数据库中
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection(autocommit=False)
         print(f"成功连接到MySQL数据库: {MYSQL_CONFIG['database']}")
         return conn
     except Exception as e:
@@ -118,7 +143,7 @@ def get_mode_db_connection():
     MySQL版本中，所有数据都在同一个数据库中
     """
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection(autocommit=False)
         print(f"成功连接到施工模式MySQL数据库: {MYSQL_CONFIG['database']}")
         return conn
     except Exception as e:
@@ -129,16 +154,9 @@ def get_mode_db_connection():
 
 # 获取不同模式的表结构定义（修改：使用英文表名和字段名）
 def get_table_schema(mode):
-    # 使用施工模式专用数据库检查表
+    # 使用表结构缓存检查表
     try:
-        conn = get_mode_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SHOW TABLES")
-        existing_tables = [list(row.values())[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        print(f"施工模式数据库中存在的表: {existing_tables}")
-        
+        existing_tables = get_table_names()
     except Exception as e:
         print(f"检查施工模式数据库表失败: {e}")
         existing_tables = []
@@ -282,18 +300,8 @@ def get_all_project_tables(mode=None):
             print(f"未找到模式 {mode} 对应的表配置")
             return []
         
-        # 连接数据库验证表是否存在
-        conn = get_db_connection(mode)
-        cursor = conn.cursor()
-        cursor.execute("SHOW TABLES")
-        all_existing_tables = cursor.fetchall()
-        conn.close()
-        
-        # 提取现有表名
-        existing_table_names = set()
-        for table in all_existing_tables:
-            table_name = list(table.values())[0] if isinstance(table, dict) else table[0]
-            existing_table_names.add(table_name)
+        # 使用表结构缓存验证表是否存在
+        existing_table_names = set(get_table_names())
         
         # 只保留数据库中实际存在的表
         tables = []
@@ -306,9 +314,10 @@ def get_all_project_tables(mode=None):
         # 构建下拉框选项，包含表名和记录数，显示中文名称
         options = []
         table_list = []
+        record_counts = get_table_row_counts(tables)  # 一条查询统计所有表的记录数
         
         for table_name in tables:
-            record_count = get_table_record_count(table_name, mode)  # 传入模式参数
+            record_count = record_counts.get(table_name, 0)
             chinese_name = translate_history_table_name(table_name)
             label = f"{chinese_name} ({record_count}条记录)"
             table_list.append({
@@ -334,12 +343,7 @@ def get_all_project_tables(mode=None):
 def get_table_record_count(table_name, mode=None):
     """获取表的记录数量，支持不同模式数据库"""
     try:
-        conn = get_db_connection(mode)  # 传入模式参数
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"SELECT COUNT(*) as count FROM `{table_name}`")
-        result = cursor.fetchone()
-        conn.close()
-        return result["count"] if result else 0
+        return get_table_row_counts([table_name]).get(table_name, 0)
     except Exception as e:
         print(f"获取表 {table_name} 记录数失败: {e}")
         return 0
@@ -353,11 +357,7 @@ def dynamic_get_schema_from_table(table_name, mode=None):
             print(f"警告：表 {table_name} 不存在")
             return None
             
-        conn = get_db_connection(mode)  # 传入模式参数
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"DESCRIBE `{table_name}`")
-        columns_info = cursor.fetchall()
-        conn.close()
+        columns_info = get_table_columns_info(table_name)
 
         if not columns_info:
             print(f"警告：表 {table_name} 没有列信息")
@@ -400,19 +400,16 @@ def get_table_data(table_name, search_term=None, use_mode_db=False, mode=None):
         conn = get_db_connection(mode)
         print(f"使用MySQL数据库获取表 {table_name} 数据")
         
-        # 检查表是否存在
+        # 检查表是否存在，列信息来自表结构缓存
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SHOW TABLES LIKE %s", (table_name,))
+        columns_info = get_table_columns_info(table_name)
         
-        if not cursor.fetchone():
+        if not columns_info:
             print(f"警告：表 {table_name} 不存在")
             conn.close()
             return []
         
         if search_term and search_term.strip():
-            # 先获取表的列信息，用于构建搜索条件
-            cursor.execute(f"DESCRIBE `{table_name}`")
-            columns_info = cursor.fetchall()
             
             # 构建搜索条件 - 对所有文本类型的列进行模糊搜索
             search_conditions = []
@@ -439,9 +436,6 @@ def get_table_data(table_name, search_term=None, use_mode_db=False, mode=None):
                 query = f"SELECT * FROM `{table_name}` ORDER BY `{order_field}`"
                 cursor.execute(query)
         else:
-            # 获取列信息用于排序
-            cursor.execute(f"DESCRIBE `{table_name}`")
-            columns_info = cursor.fetchall()
             order_field = "sequence_number" if "sequence_number" in [col['Field'] for col in columns_info] else list(columns_info)[0]['Field']
             query = f"SELECT * FROM `{table_name}` ORDER BY `{order_field}`"
             cursor.execute(query)
@@ -469,12 +463,240 @@ def get_table_data(table_name, search_term=None, use_mode_db=False, mode=None):
         print(f"获取表 {table_name} 数据失败: {e}")
         return []
 
+# 表结构元数据（字段、类型、中文名映射），由表结构缓存派生，每个表只翻译一次
+def get_table_meta(table_name, mode=None):
+    """获取表结构元数据，表不存在时返回 None"""
+    now = time.time()
+    with _cache_lock:
+        entry = _table_meta_cache.get(table_name)
+        if entry and now - entry[0] < HISTORY_SCHEMA_CACHE_TTL:
+            return entry[1]
+
+    columns_info = get_table_columns_info(table_name)
+    if not columns_info:
+        return None
+
+    fields = [col['Field'] for col in columns_info]
+    types = {}
+    search_fields = []
+    for col in columns_info:
+        col_name = col['Field']
+        col_type = col['Type'].upper()
+        types[col_name] = 'numeric' if any(t in col_type for t in NUMERIC_TYPE_KEYWORDS) else 'text'
+        # 与 get_table_data 的搜索范围一致：非浮点列以及几个固定的文本列
+        if not any(t in col_type for t in ['DECIMAL', 'FLOAT', 'DOUBLE']) or col_name in ['mode', 'parameter_category', 'engineering_parameter', 'unit']:
+            search_fields.append(col_name)
+
+    display_names = {field: translate_history_field_name(field) for field in fields}
+    meta = {
+        'fields': fields,
+        'types': types,
+        'display_names': display_names,
+        'field_by_display': {display: field for field, display in display_names.items()},
+        'search_fields': search_fields,
+        'order_field': 'sequence_number' if 'sequence_number' in fields else fields[0],
+    }
+    with _cache_lock:
+        _table_meta_cache[table_name] = (time.time(), meta)
+    return meta
+
+def _invalidate_count_cache(table_name):
+    with _cache_lock:
+        for key in [key for key in _count_cache if key[0] == table_name]:
+            del _count_cache[key]
+    invalidate_table_row_count(table_name)
+
+def invalidate_table_query_cache(table_name=None):
+    """清除表结构元数据和 COUNT 缓存；table_name 为空时清除全部"""
+    if table_name is None:
+        with _cache_lock:
+            _table_meta_cache.clear()
+            _count_cache.clear()
+        return
+    with _cache_lock:
+        _table_meta_cache.pop(table_name, None)
+    _invalidate_count_cache(table_name)
+
+# 建表、删表、改表结构（包括导入替换整表）后，表结构元数据和 COUNT 缓存随表结构缓存一起清除
+register_schema_listener(invalidate_table_query_cache)
+
+def split_filter_part(filter_part):
+    """解析 DataTable filter_query 中的单个条件，返回 (列名, 运算符, 值)"""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                if not value_part:
+                    return None, None, None
+                v0 = value_part[0]
+                if v0 == value_part[-1] and v0 in ("'", '"', '`') and len(value_part) > 1:
+                    value = value_part[1:-1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return None, None, None
+
+def _build_where_clause(meta, filter_query=None, search_term=None):
+    """根据 DataTable 筛选表达式和搜索关键词构建参数化 WHERE 子句"""
+    conditions = []
+    params = []
+
+    if search_term and search_term.strip() and meta['search_fields']:
+        pattern = f"%{search_term.strip()}%"
+        conditions.append('(' + ' OR '.join(f"`{field}` LIKE %s" for field in meta['search_fields']) + ')')
+        params.extend([pattern] * len(meta['search_fields']))
+
+    for filter_part in (filter_query or '').split(' && '):
+        if not filter_part.strip():
+            continue
+        display_name, operator, value = split_filter_part(filter_part)
+        field = meta['field_by_display'].get(display_name) or (display_name if display_name in meta['types'] else None)
+        if not field or operator is None:
+            continue
+        if operator == 'contains':
+            conditions.append(f"CAST(`{field}` AS CHAR) LIKE %s")
+            params.append(f"%{value}%")
+        elif operator == 'datestartswith':
+            conditions.append(f"CAST(`{field}` AS CHAR) LIKE %s")
+            params.append(f"{value}%")
+        else:
+            sql_operator = {'ge': '>=', 'le': '<=', 'lt': '<', 'gt': '>', 'ne': '!=', 'eq': '='}[operator]
+            conditions.append(f"`{field}` {sql_operator} %s")
+            params.append(value)
+
+    where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where_sql, params
+
+def _build_order_clause(meta, sort_by=None):
+    """根据 DataTable sort_by 构建 ORDER BY 子句（只接受表中存在的列）"""
+    order_parts = []
+    for sort in sort_by or []:
+        column_id = sort.get('column_id')
+        field = meta['field_by_display'].get(column_id) or (column_id if column_id in meta['types'] else None)
+        if field:
+            direction = 'DESC' if sort.get('direction') == 'desc' else 'ASC'
+            order_parts.append(f"`{field}` {direction}")
+    order_field = meta['order_field']
+    if f"`{order_field}` ASC" not in order_parts and f"`{order_field}` DESC" not in order_parts:
+        order_parts.append(f"`{order_field}` ASC")
+    return " ORDER BY " + ", ".join(order_parts)
+
+def _get_cached_count(cursor, table_name, where_sql, params):
+    key = (table_name, where_sql, tuple(params))
+    now = time.time()
+    with _cache_lock:
+        entry = _count_cache.get(key)
+        if entry and now - entry[0] < HISTORY_COUNT_CACHE_TTL:
+            return entry[1]
+
+    cursor.execute(f"SELECT COUNT(*) as count FROM `{table_name}`{where_sql}", params)
+    result = cursor.fetchone()
+    total = result['count'] if result else 0
+    with _cache_lock:
+        _count_cache[key] = (time.time(), total)
+    return total
+
+# 分页获取表数据（供 construction-data-table 的自定义分页/排序/筛选使用）
+def get_table_page(table_name, page_current=0, page_size=15, sort_by=None, filter_query=None,
+                   search_term=None, mode=None):
+    """
+    按页获取表数据，排序、筛选和搜索都在数据库中完成
+
+    Args:
+        table_name (str): 表名
+        page_current (int): 页码（从0开始）
+        page_size (int): 每页记录数
+        sort_by (list): DataTable 的 sort_by
+        filter_query (str): DataTable 的 filter_query
+        search_term (str): 搜索框关键词
+        mode (str): 施工模式
+
+    Returns:
+        tuple: (当前页记录列表（中文字段名）, 符合条件的总记录数, 实际页码)
+    """
+    meta = get_table_meta(table_name, mode)
+    if not meta:
+        print(f"警告：表 {table_name} 不存在")
+        return [], 0, 0
+
+    page_size = max(1, int(page_size or 15))
+    page_current = max(0, int(page_current or 0))
+    where_sql, params = _build_where_clause(meta, filter_query, search_term)
+    order_sql = _build_order_clause(meta, sort_by)
+
+    try:
+        conn = get_db_connection(mode)
+        cursor = conn.cursor(dictionary=True)
+        total = _get_cached_count(cursor, table_name, where_sql, params)
+
+        # 页码超出范围时（例如筛选后记录变少）回到最后一页
+        last_page = max(0, (total - 1) // page_size)
+        page_current = min(page_current, last_page)
+
+        cursor.execute(
+            f"SELECT * FROM `{table_name}`{where_sql}{order_sql} LIMIT %s OFFSET %s",
+            params + [page_size, page_current * page_size]
+        )
+        rows = cursor.fetchall()
+        conn.close()
+    except Exception as e:
+        print(f"分页获取表 {table_name} 数据失败: {e}")
+        return [], 0, 0
+
+    display_names = meta['display_names']
+    result = [
+        {display_names.get(key, key): ("" if value is None else value) for key, value in row.items()}
+        for row in rows
+    ]
+    return result, total, page_current
+
+# 按当前排序/筛选/搜索条件读取全部记录（供导出使用）
+def iter_table_rows(table_name, sort_by=None, filter_query=None, search_term=None, mode=None,
+                    batch_size=HISTORY_EXPORT_BATCH_SIZE, limit=None):
+    """
+    逐批读取符合条件的全部记录，条件与 get_table_page 相同，但不分页
+
+    Args:
+        limit (int): 最多读取的记录数，为 None 时读取全部
+
+    Yields:
+        dict: 一条记录（英文字段名）
+    """
+    meta = get_table_meta(table_name, mode)
+    if not meta:
+        print(f"警告：表 {table_name} 不存在")
+        return
+
+    where_sql, params = _build_where_clause(meta, filter_query, search_term)
+    order_sql = _build_order_clause(meta, sort_by)
+    conn = get_db_connection(mode)
+    try:
+        cursor = conn.cursor(dictionary=True)
+        limit_sql = ""
+        if limit is not None:
+            limit_sql = " LIMIT %s"
+            params = list(params) + [int(limit)]
+        cursor.execute(f"SELECT * FROM `{table_name}`{where_sql}{order_sql}{limit_sql}", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
 # 获取下一个可用的ID（改进：处理不存在的表和不同的ID列名）
 def get_next_id(table_name, mode=None):
     """获取下一个可用的ID，支持不同模式数据库"""
     try:
-        # 首先检查表是否存在
-        if not table_exists(table_name, mode):
+        # 首先检查表是否存在（表结构元数据有缓存，不再每次 DESCRIBE）
+        meta = get_table_meta(table_name, mode)
+        if not meta:
             print(f"警告：表 {table_name} 不存在，返回默认ID")
             return 1
             
@@ -482,9 +704,7 @@ def get_next_id(table_name, mode=None):
         cursor = conn.cursor(dictionary=True)
         
         # 检查是否有"sequence_number"列（英文字段名）
-        cursor.execute(f"DESCRIBE `{table_name}`")
-        columns_info = cursor.fetchall()
-        column_names = [col['Field'] for col in columns_info]
+        column_names = meta['fields']
         
         if "sequence_number" in column_names:
             cursor.execute(f"SELECT MAX(`sequence_number`) as max_id FROM `{table_name}`")
@@ -527,6 +747,10 @@ def add_record(table_name, record_data, mode=None):
         cursor.execute(query, values)
         conn.commit()
         conn.close()
+        _invalidate_count_cache(table_name)
+        invalidate_price_cache_for_table(table_name)
+        invalidate_search_index_for_table(table_name)
+        invalidate_indicator_status_for_table(table_name)
         return True
     except Exception as e:
         print(f"添加记录到表 {table_name} 失败: {e}")
@@ -555,6 +779,11 @@ def update_record(table_name, record_id, record_data, mode=None):
         affected_rows = cursor.rowcount
         conn.close()
         
+        if affected_rows > 0:
+            _invalidate_count_cache(table_name)
+            invalidate_price_cache_for_table(table_name)
+            invalidate_search_index_for_table(table_name)
+            invalidate_indicator_status_for_table(table_name)
         return affected_rows > 0
     except Exception as e:
         print(f"更新表 {table_name} 记录失败: {e}")
@@ -580,6 +809,10 @@ def delete_record(table_name, record_id, mode=None):
             conn.close()
             
             if affected_rows > 0:
+                _invalidate_count_cache(table_name)
+                invalidate_price_cache_for_table(table_name)
+                invalidate_search_index_for_table(table_name)
+                invalidate_indicator_status_for_table(table_name)
                 # 翻译删除的记录字段名为中文
                 translated_deleted_record = translate_record_data(deleted_record)
                 return True, translated_deleted_record
@@ -604,14 +837,9 @@ def restore_deleted_record(table_name, deleted_data, mode=None):
 
 # 检查表是否存在
 def table_exists(table_name, mode=None):
-    """检查表是否存在，支持不同模式数据库"""
+    """检查表是否存在，支持不同模式数据库（使用表结构缓存）"""
     try:
-        conn = get_db_connection(mode)  # 传入模式参数
-        cursor = conn.cursor()
-        cursor.execute("SHOW TABLES LIKE %s", (table_name,))
-        result = cursor.fetchone()
-        conn.close()
-        return result is not None
+        return schema_table_exists(table_name)
     except Exception as e:
         print(f"检查表 {table_name} 是否存在失败: {e}")
         return False
@@ -653,6 +881,9 @@ def delete_multiple_records(table_name, record_ids, mode=None):
         affected_rows = cursor.rowcount
         conn.close()
         
+        if affected_rows > 0:
+            _invalidate_count_cache(table_name)
+            invalidate_search_index_for_table(table_name)
         return affected_rows
     except Exception as e:
         print(f"批量删除表 {table_name} 记录失败: {e}")
@@ -687,13 +918,9 @@ def duplicate_record(table_name, record_id, mode=None):
 
 # 获取表的所有列名
 def get_table_columns(table_name, mode=None):
-    """获取表的所有列名，支持不同模式数据库"""
+    """获取表的所有列名，支持不同模式数据库（使用表结构缓存）"""
     try:
-        conn = get_db_connection(mode)  # 传入模式参数
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"DESCRIBE `{table_name}`")
-        columns_info = cursor.fetchall()
-        conn.close()
+        columns_info = get_table_columns_info(table_name)
         
         # 返回英文列名
         return [col['Field'] for col in columns_info]  # col['Field'] 是列名
@@ -708,12 +935,8 @@ def validate_record_data(table_name, record_data, mode=None):
         # 将中文字段名转换为英文
         english_record_data = reverse_translate_record_data(record_data)
         
-        # 获取表的列信息
-        conn = get_db_connection(mode)  # 传入模式参数
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"DESCRIBE `{table_name}`")
-        columns_info = cursor.fetchall()
-        conn.close()
+        # 获取表的列信息（使用表结构缓存）
+        columns_info = get_table_columns_info(table_name)
         
         errors = []
         
@@ -777,8 +1000,7 @@ def get_table_statistics(table_name, mode=None):
         total_records = cursor.fetchone()["total_records"]
         
         # 获取数值列的统计信息
-        cursor.execute(f"DESCRIBE `{table_name}`")
-        columns_info = cursor.fetchall()
+        columns_info = get_table_columns_info(table_name)
         
         numeric_stats = {}
         for col in columns_info:
@@ -1,6 +1,8 @@
 from dash import html, dash_table, dcc
 import dash_bootstrap_components as dbc
 
+from utils.excel_export import create_export_download
+
 def history_data_layout():
     return html.Div([
         dbc.Row([
@@ -59,7 +61,14 @@ def history_data_layout():
                                 size="sm",
                                 disabled=True
                             ),
-                        ])
+                            dbc.Button(
+                                html.Span([html.I(className="fas fa-file-excel me-1"), "导出Excel"]),
+                                id="btn-export-history",
+                                color="success",
+                                size="sm"
+                            ),
+                        ]),
+                        create_export_download("download-history-table")
                     ], width=12, md=4, className="mb-3"),
                     
                     dbc.Col([
@@ -82,7 +91,7 @@ def history_data_layout():
                                 html.Li("✏️ 直接点击表格单元格编辑，点击其他地方自动保存到对应数据库"),
                                 html.Li("🗑️ 点击操作列删除记录，点击撤回按钮恢复删除"),
                                 html.Li("➕ 在最后一行（新增行）输入数据添加新记录到当前数据库"),
-                                html.Li("🔍 使用搜索框在当前数据中进行模糊搜索，数值字段支持小数"),
+                                html.Li("🔍 使用搜索框在当前数据中进行模糊搜索，数值字段支持小数；表头下方的筛选行支持按列筛选（如 > 100）"),
                             ], className="mb-0 small")
                         ], color="info", className="py-2")
                     ], width=12, className="mb-3")
@@ -96,9 +105,16 @@ def history_data_layout():
                             columns=[],
                             data=[],
                             editable=True,  # 启用编辑功能
+                            # 分页、排序、筛选在服务端按页查询，不再把整张表发送到浏览器
+                            page_action="custom",
+                            page_current=0,
                             page_size=15,
-                            filter_action="native",
-                            sort_action="native",
+                            page_count=1,
+                            filter_action="custom",
+                            filter_query="",
+                            sort_action="custom",
+                            sort_mode="single",
+                            sort_by=[],
                             style_table={'overflowX': 'auto', 'minHeight': '400px'},
                             style_header={
                                 'backgroundColor': '#f8f9fa',
@@ -170,27 +186,17 @@ def history_data_layout():
                             markdown_options={"html": True},
                             # 编辑配置
                             row_deletable=False,  # 禁用默认删除功能，使用自定义删除
-                            export_format="xlsx",
-                            export_headers="display"
+                            # 表格只有当前页数据，导出由"导出Excel"按钮在服务端按当前条件导出全部记录
                         ),
                         width=12
                     )
                 ]),
 
-                # 分页和统计信息
+                # 统计信息（分页控件由表格自带）
                 dbc.Row([
                     dbc.Col([
                         html.Div(id="data-stats", className="text-muted small mt-2")
-                    ], width=12, md=6),
-                    dbc.Col([
-                        dbc.Pagination(
-                            id="table-pagination",
-                            max_value=5,
-                            first_last=True,
-                            previous_next=True,
-                            className="pagination pagination-sm justify-content-end mt-2"
-                        ),
-                    ], width=12, md=6)
+                    ], width=12)
                 ]),
 
                 # 操作反馈提示
@@ -208,6 +214,7 @@ def history_data_layout():
         dcc.Store(id='current-mode', data='steel_cage'),
         dcc.Store(id='deleted-record-store', data={}),  # 存储最近删除的记录
         dcc.Store(id='current-table-name', data=''),  # 存储当前表名
+        dcc.Store(id='table-query-store', data={}),  # 当前表的查询条件（表名、搜索词），驱动分页加载
 
     ])
     
\ No newline at end of file
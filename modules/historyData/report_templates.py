@@ -0,0 +1,71 @@
+# modules/historyData/report_templates.py
+"""
+施工历史数据表的 Excel 导出模板
+
+表格在服务端分页，浏览器中只有当前页，DataTable 自带的导出只能导出这一页。
+这里按表格当前的排序、筛选和搜索条件从数据库逐批读取全部记录，由 utils.excel_export
+流式写入（只写工作簿，逐行写盘）。列宽按表头和前 HISTORY_EXPORT_WIDTH_SAMPLE 条记录
+估算，全部记录只查询、遍历一遍。
+"""
+
+import os
+
+from utils.excel_export import MAX_COLUMN_WIDTH, MIN_COLUMN_WIDTH, header, register_export_template, row
+
+from .data import get_table_meta, iter_table_rows
+
+# 模板名
+HISTORY_TABLE_TEMPLATE = 'history_table'
+
+# 表格中隐藏、导出时同样不包含的字段
+HIDDEN_FIELDS = ('timestamp',)
+
+# 估算列宽时读取的记录数
+HISTORY_EXPORT_WIDTH_SAMPLE = int(os.getenv('HISTORY_EXPORT_WIDTH_SAMPLE', '200'))
+
+
+def _export_fields(meta):
+    return [field for field in meta['fields'] if field not in HIDDEN_FIELDS]
+
+
+def history_table_layout(report_data):
+    """
+    report_data: {'table_name', 'mode', 'search_term', 'sort_by', 'filter_query'}
+    """
+    table_name = report_data['table_name']
+    mode = report_data.get('mode')
+    meta = get_table_meta(table_name, mode)
+    if not meta:
+        return
+
+    fields = _export_fields(meta)
+    yield header(*[meta['display_names'][field] for field in fields])
+    for record in iter_table_rows(
+            table_name, sort_by=report_data.get('sort_by'), filter_query=report_data.get('filter_query'),
+            search_term=report_data.get('search_term'), mode=mode):
+        yield row(*[record.get(field) for field in fields])
+
+
+def history_table_column_widths(report_data):
+    """按表头和前若干条记录估算列宽，返回 {列号: 列宽}"""
+    table_name = report_data['table_name']
+    mode = report_data.get('mode')
+    meta = get_table_meta(table_name, mode)
+    if not meta:
+        return {}
+
+    fields = _export_fields(meta)
+    max_lengths = [len(str(meta['display_names'][field])) for field in fields]
+    for record in iter_table_rows(
+            table_name, sort_by=report_data.get('sort_by'), filter_query=report_data.get('filter_query'),
+            search_term=report_data.get('search_term'), mode=mode, limit=HISTORY_EXPORT_WIDTH_SAMPLE):
+        for index, field in enumerate(fields):
+            value = record.get(field)
+            if value is not None:
+                max_lengths[index] = max(max_lengths[index], len(str(value)))
+    return {col: max(min(length + 2, MAX_COLUMN_WIDTH), MIN_COLUMN_WIDTH)
+            for col, length in enumerate(max_lengths, 1)}
+
+
+register_export_template(HISTORY_TABLE_TEMPLATE, "施工历史数据", history_table_layout,
+                         column_widths=history_table_column_widths)
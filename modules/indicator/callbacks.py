@@ -2,6 +2,7 @@
 from dash import Input, Output, State, callback_context, html, ALL, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+import numpy as np
 
 import json
 from decimal import Decimal, ROUND_HALF_UP
@@ -24,6 +25,44 @@ def format_number(num):
 PRIMARY_COLOR = "#2C3E50"  # 深蓝色作为主色
 SECONDARY_COLOR = "#18BC9C"  # 青绿色作为次要色
 
+# 各施工模式的（人工, 材料, 机械）参考单价，用于综合指标测算，
+# 以及复合指标中缺少分项单价的项目按比例拆分成本
+MODE_REFERENCE_PRICES = {
+    'steel_cage': (1094.076898, 639.0420914, 559.4738383),
+    'steel_lining': (310.2688249, 145.2414511, 61.40375302),
+}
+
+# 复合指标已选项目中的分项单价字段（顺序与 MODE_REFERENCE_PRICES 一致）
+ITEM_PRICE_FIELDS = ('labor_price', 'material_price', 'machinery_price')
+
+
+def composite_cost_breakdown(table_data, mode):
+    """
+    向量化计算复合指标已选项目的（人工, 材料, 机械）成本合计
+
+    每个项目按自身的分项单价拆分成本；表格中的单价被修改过时按比例缩放分项单价，
+    缺少分项单价（旧数据）或分项单价全为 0 的项目按施工模式的参考单价比例拆分。
+    """
+    quantities = np.array([float(item.get('quantity') or 0) for item in table_data])
+    unit_prices = np.array([float(item.get('unit_price') or 0) for item in table_data])
+    components = np.array([
+        [float(item[field]) if item.get(field) is not None else np.nan for field in ITEM_PRICE_FIELDS]
+        for item in table_data
+    ]).reshape(len(table_data), len(ITEM_PRICE_FIELDS))
+
+    component_totals = components.sum(axis=1)
+    fallback = np.isnan(component_totals) | (component_totals <= 0)
+
+    reference = np.array(MODE_REFERENCE_PRICES.get(mode, MODE_REFERENCE_PRICES['steel_cage']))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = components / component_totals[:, None]
+    ratios[fallback] = reference / reference.sum()
+
+    costs = (quantities * unit_prices)[:, None] * ratios
+    labor, material, machinery = costs.sum(axis=0)
+    return labor, material, machinery
+
+
 def register_indicator_callbacks(app):
     """注册指标测算模块的回调函数"""
     
@@ -478,6 +517,9 @@ def register_indicator_callbacks(app):
                         'unit': indicator['unit'],
                         'quantity': 1,
                         'unit_price': total_price,
+                        'labor_price': indicator['unit_prices']['labor'],
+                        'material_price': indicator['unit_prices']['material'],
+                        'machinery_price': indicator['unit_prices']['machinery'],
                         'subtotal': total_price
                     }
                     
@@ -530,43 +572,8 @@ def register_indicator_callbacks(app):
         if not n_clicks or not table_data:
             return no_update
         
-        # 初始化成本变量
-        total_material_cost = 0
-        total_labor_cost = 0
-        total_machinery_cost = 0
-        
-        # 根据工程类型设置单价比例
-        if mode == 'steel_cage':  # 钢筋笼模式
-            labor_unit_price = 1094.076898		
-            material_unit_price = 639.0420914
-            machinery_unit_price = 559.4738383
-            total_unit_price = labor_unit_price + material_unit_price + machinery_unit_price
-        elif mode == 'steel_lining':  # 钢衬里模式
-            labor_unit_price = 310.2688249
-            material_unit_price = 145.2414511
-            machinery_unit_price = 61.40375302
-            total_unit_price = labor_unit_price + material_unit_price + machinery_unit_price
-        else:
-            # 默认使用钢筋笼价格
-            labor_unit_price = 1094.076898
-            material_unit_price = 639.0420914
-            machinery_unit_price = 559.4738383
-            total_unit_price = labor_unit_price + material_unit_price + machinery_unit_price
-        
-        # 计算各个构件的成本
-        for item in table_data:
-            quantity = float(item['quantity'])
-            unit_price = float(item['unit_price'])
-            
-            # 按照单价比例分配各项成本
-            item_total = quantity * unit_price
-            item_labor_cost = item_total * (labor_unit_price / total_unit_price)
-            item_material_cost = item_total * (material_unit_price / total_unit_price)
-            item_machinery_cost = item_total * (machinery_unit_price / total_unit_price)
-            
-            total_labor_cost += item_labor_cost
-            total_material_cost += item_material_cost
-            total_machinery_cost += item_machinery_cost
+        # 按各项目的分项单价拆分成本
+        total_labor_cost, total_material_cost, total_machinery_cost = composite_cost_breakdown(table_data, mode)
         
         total_cost = total_material_cost + total_labor_cost + total_machinery_cost
         
@@ -644,20 +651,10 @@ def register_indicator_callbacks(app):
         if not n_clicks or not project_size:
             return no_update
         
-        # 根据工程类型设置单价
-        if project_type == 'steel_cage':  # 钢筋笼模式
-            labor_unit_price = 1094.076898
-            material_unit_price = 639.0420914
-            machinery_unit_price = 559.4738383
-        elif project_type == 'steel_lining':  # 钢衬里模式
-            labor_unit_price = 310.2688249
-            material_unit_price = 145.2414511
-            machinery_unit_price = 61.40375302
-        else:
-            # 默认使用钢筋笼价格
-            labor_unit_price = 1094.076898
-            material_unit_price = 639.0420914
-            machinery_unit_price = 559.4738383
+        # 根据工程类型设置单价（默认使用钢筋笼价格）
+        labor_unit_price, material_unit_price, machinery_unit_price = MODE_REFERENCE_PRICES.get(
+            project_type, MODE_REFERENCE_PRICES['steel_cage']
+        )
 
         # 计算各项成本（工程规模 × 单价）
         material_cost = material_unit_price * project_size
@@ -1,29 +1,22 @@
 """数据库查询模块"""
 import mysql.connector
 from typing import List, Dict, Optional, Any
-import os
-from dotenv import load_dotenv
 from datetime import datetime
-
-# 加载环境变量
-load_dotenv()
+from utils.db_pool import get_connection as get_pooled_connection
+from utils.search_index import search_indicator_index
 
 def get_db_connection():
     """获取数据库连接"""
     try:
-        return mysql.connector.connect(
-            host='localhost',      # 直接使用字面值或从环境变量获取
-            user='dash',          # 数据库用户名
-            password='123456',    # 数据库密码
-            database='dash_project'# 数据库名
-        )
+        # 从共享连接池借出连接（连接参数从环境变量读取），写操作需显式提交
+        return get_pooled_connection(autocommit=False)
     except mysql.connector.Error as err:
         print(f"数据库连接错误: {err}")
         raise
 
 def search_indicators(mode: str, search_term: str) -> List[Dict]:
     """
-    搜索指标
+    搜索指标（使用进程内搜索索引，索引不可用时回退到数据库查询）
     Args:
         mode: 施工模式 ('steel_cage' 或 'steel_lining')
         search_term: 搜索关键词
@@ -32,6 +25,14 @@ def search_indicators(mode: str, search_term: str) -> List[Dict]:
     """
     table = 'price_baseline_1' if mode == 'steel_cage' else 'price_baseline_2'
     
+    try:
+        return search_indicator_index(table, search_term, limit=10)
+    except Exception as e:
+        print(f"搜索索引不可用，回退到数据库查询: {str(e)}")
+        return _search_indicators_from_db(table, search_term)
+
+def _search_indicators_from_db(table: str, search_term: str) -> List[Dict]:
+    """在价格基准表 table 中用 LIKE 查询指标"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
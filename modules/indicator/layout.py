@@ -37,7 +37,7 @@ def create_base_indicator_card():
                     type='text',
                     placeholder='输入关键字搜索指标...',
                     autoComplete='off',
-                    debounce=True,
+                    debounce=250,  # 停止输入 250 毫秒后再搜索
                     className="mb-2"
                 ),
                 
@@ -144,7 +144,7 @@ def create_composite_indicator_card():
                     type='text',
                     placeholder='输入关键字搜索...',
                     autoComplete='off',
-                    debounce=True,
+                    debounce=250,  # 停止输入 250 毫秒后再搜索
                     className="mb-2"
                 ),
                 
@@ -0,0 +1,226 @@
+# modules/management/log_queries.py
+"""
+操作日志 / 登录日志的分页查询
+
+日志表会持续增长，日志页面不再一次读取 1000 条再在浏览器中分页：
+
+- 键集分页：按 (created_at, id) 倒序，每页以上一页最后一行作为游标继续读取，
+  翻页成本与页码无关；没有游标（直接跳页）时才退化为 OFFSET
+- 不统计总数：每次多读一行判断是否还有下一页，避免在大表上执行 COUNT(*)
+- 预加载用户：joinedload 一次取回日志及其用户名，不再逐行懒加载 log.user
+- 全文检索：关键字通过 operation_logs 上的 FULLTEXT (ngram) 索引匹配，
+  索引不可用或关键字短于 ngram 长度时回退到 LIKE
+
+全文索引随表结构创建（models.OperationLog.__table_args__ / dash_project.sql），运行时只检测
+是否存在，不在请求中建索引：在已有数据的表上第一次添加 FULLTEXT 索引会重建整张表，期间
+阻塞日志写入。已有数据库请在维护窗口手动执行：
+
+    ALTER TABLE operation_logs ADD FULLTEXT INDEX ft_operation_logs_search
+        (operation_desc, module, operation_type) WITH PARSER ngram;
+
+执行后各进程在 LOG_FULLTEXT_CHECK_INTERVAL 秒内检测到索引并改用全文检索。
+"""
+
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload, load_only
+
+from models import db, OperationLog, User
+from .management_layout import LOG_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 日志全文索引名及其覆盖的列（需与 MATCH() 中的列一致）
+LOG_FULLTEXT_INDEX = 'ft_operation_logs_search'
+LOG_FULLTEXT_COLUMNS = ('operation_desc', 'module', 'operation_type')
+
+# ngram 分词长度（MySQL ngram_token_size，默认 2），更短的关键字无法命中全文索引
+LOG_NGRAM_TOKEN_SIZE = int(os.getenv('LOG_NGRAM_TOKEN_SIZE', '2'))
+
+# 全文索引存在性的重新检测间隔（秒）
+LOG_FULLTEXT_CHECK_INTERVAL = int(os.getenv('LOG_FULLTEXT_CHECK_INTERVAL', '300'))
+
+# 登录相关的日志类型
+LOGIN_OPERATION_TYPES = ('LOGIN', 'LOGOUT', 'LOGIN_FAILED')
+
+# (是否可用, 检测时间)
+_fulltext_state = (None, 0)
+
+
+def log_fulltext_index_available():
+    """日志全文索引是否存在（只检测不创建，结果缓存 LOG_FULLTEXT_CHECK_INTERVAL 秒）"""
+    global _fulltext_state
+    available, checked_at = _fulltext_state
+    now = time.time()
+    if available is not None and now - checked_at < LOG_FULLTEXT_CHECK_INTERVAL:
+        return available
+
+    try:
+        exists = bool(db.session.execute(text("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs' AND INDEX_NAME = :name
+        """), {'name': LOG_FULLTEXT_INDEX}).scalar())
+        if not exists and available is not False:
+            logger.warning(f"日志全文索引 {LOG_FULLTEXT_INDEX} 不存在，搜索将使用 LIKE"
+                           f"（添加方法见 modules/management/log_queries.py）")
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"检测日志全文索引失败，本次搜索使用 LIKE: {e}")
+        exists = False
+    _fulltext_state = (exists, now)
+    return exists
+
+
+def _fulltext_condition(search_value):
+    """关键字的 FULLTEXT 匹配条件；无法使用全文索引时返回 None"""
+    phrase = search_value.replace('"', ' ').strip()
+    if len(phrase) < LOG_NGRAM_TOKEN_SIZE or not log_fulltext_index_available():
+        return None
+    return text(
+        f"MATCH ({', '.join(LOG_FULLTEXT_COLUMNS)}) AGAINST (:log_search IN BOOLEAN MODE)"
+    ).bindparams(log_search=f'"{phrase}"')
+
+
+def _operation_search_filter(search_value):
+    condition = _fulltext_condition(search_value)
+    if condition is not None:
+        return condition
+    search_term = f"%{search_value}%"
+    return db.or_(
+        OperationLog.operation_desc.like(search_term),
+        OperationLog.module.like(search_term),
+        OperationLog.operation_type.like(search_term)
+    )
+
+
+def _login_search_filter(search_value):
+    # 用户表很小，先把匹配的用户名解析为 ID，避免与日志表做 LIKE 关联
+    user_ids = [row.id for row in User.query.options(load_only(User.id))
+                .filter(User.username.like(f"%{search_value}%")).all()]
+    conditions = [OperationLog.ip_address.like(f"{search_value}%")]
+    if user_ids:
+        conditions.append(OperationLog.user_id.in_(user_ids))
+    desc_condition = _fulltext_condition(search_value)
+    conditions.append(desc_condition if desc_condition is not None
+                      else OperationLog.operation_desc.like(f"%{search_value}%"))
+    return db.or_(*conditions)
+
+
+def _encode_cursor(log):
+    return [log.created_at.isoformat() if log.created_at else None, log.id]
+
+
+def _keyset_filter(cursor):
+    """(created_at, id) 倒序下"位于游标之后"的条件"""
+    created_at, log_id = cursor
+    if created_at is None:
+        # created_at 为空的行排在最后，只按 id 继续
+        return db.and_(OperationLog.created_at.is_(None), OperationLog.id < log_id)
+    created_at = datetime.fromisoformat(created_at)
+    return db.or_(
+        OperationLog.created_at < created_at,
+        db.and_(OperationLog.created_at == created_at, OperationLog.id < log_id),
+        OperationLog.created_at.is_(None)
+    )
+
+
+def query_log_page(kind, page_current=0, cursors=None, page_size=LOG_PAGE_SIZE,
+                   search_value=None, level=None, module=None, status=None):
+    """
+    读取一页日志
+
+    Args:
+        kind (str): 'operation' 操作日志 / 'login' 登录日志
+        page_current (int): 页码（从 0 开始）
+        cursors (dict): {页码: 该页最后一行的游标}，由上一次调用返回
+        page_size (int): 每页条数
+        search_value (str): 搜索关键字
+        level / module / status (str): 筛选条件，'all' 或空表示不筛选
+
+    Returns:
+        tuple: (日志对象列表, 是否还有下一页, 更新后的 cursors)
+    """
+    cursors = dict(cursors or {})
+    page_current = max(int(page_current or 0), 0)
+
+    query = OperationLog.query.options(
+        joinedload(OperationLog.user).load_only(User.id, User.username)
+    )
+    if kind == 'login':
+        query = query.filter(OperationLog.operation_type.in_(LOGIN_OPERATION_TYPES))
+    else:
+        query = query.filter(~OperationLog.operation_type.in_(['LOGIN', 'LOGOUT']))
+
+    if search_value and search_value.strip():
+        search_value = search_value.strip()
+        query = query.filter(_login_search_filter(search_value) if kind == 'login'
+                             else _operation_search_filter(search_value))
+    if level and level != 'all':
+        query = query.filter(OperationLog.level == level)
+    if module and module != 'all':
+        query = query.filter(OperationLog.module == module)
+    if status and status != 'all':
+        query = query.filter(OperationLog.status == status)
+
+    query = query.order_by(OperationLog.created_at.desc(), OperationLog.id.desc())
+
+    previous = cursors.get(str(page_current - 1)) if page_current > 0 else None
+    if previous:
+        query = query.filter(_keyset_filter(previous))
+    elif page_current > 0:
+        query = query.offset(page_current * page_size)
+
+    logs = query.limit(page_size + 1).all()
+    has_more = len(logs) > page_size
+    logs = logs[:page_size]
+    if logs:
+        cursors[str(page_current)] = _encode_cursor(logs[-1])
+    return logs, has_more, cursors
+
+
+def format_operation_log(log):
+    """操作日志行 -> 表格数据"""
+    target_info = ""
+    if log.target_type and log.target_id:
+        target_info = f"{log.target_type}:{log.target_id}"
+    elif log.error_message:
+        target_info = log.error_message[:50] + "..." if len(log.error_message) > 50 else log.error_message
+
+    return {
+        'id': log.id,
+        'operation_desc': log.operation_desc,
+        'username': log.user.username if log.user else 'System',
+        'module': log.module,
+        'operation_type': log.operation_type,
+        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
+        'level': log.level,
+        'status': log.status,
+        'ip_address': log.ip_address or '',
+        'target_info': target_info
+    }
+
+
+def format_login_log(log):
+    """登录日志行 -> 表格数据"""
+    if log.error_message:
+        target_info = log.error_message
+    elif log.status == 'success':
+        target_info = "登录成功" if log.operation_type == 'LOGIN' else "退出成功"
+    else:
+        target_info = "登录失败"
+
+    return {
+        'id': log.id,
+        'operation_desc': log.operation_desc,
+        'username': log.user.username if log.user else 'Unknown',
+        'operation_type': log.operation_type,
+        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
+        'ip_address': log.ip_address or '',
+        'status': log.status,
+        'user_agent': (log.user_agent[:50] + "...") if log.user_agent and len(log.user_agent) > 50 else (log.user_agent or ''),
+        'target_info': target_info
+    }
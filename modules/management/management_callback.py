@@ -6,6 +6,9 @@ import pandas as pd
 from datetime import datetime
 
 from flask_login import current_user
+from utils.log_retention import get_rollup_totals, rebuild_daily_rollups_async, run_log_maintenance
+from utils.operation_log_writer import flush_operation_logs
+from utils.permission_cache import invalidate_permission_cache
 # 导入现有的数据库模型
 try:
     from models import db, User, Role, Permission,Task
@@ -18,6 +21,7 @@ except ImportError:
 
 try:
     from models import OperationLog
+    from .log_queries import query_log_page, format_operation_log, format_login_log
 except ImportError:
     print("无法导入OperationLog模型")
     OperationLog = None
@@ -807,6 +811,7 @@ def management_callbacks(app):
                     success_message = "权限添加成功"
                 
                 db.session.commit()
+                invalidate_permission_cache(reason="权限已修改")
                 
                 # 返回成功提示和更新后的权限列表
                 alert = dbc.Alert(success_message, color="success", duration=4000)
@@ -944,6 +949,7 @@ def management_callbacks(app):
                     user.roles = new_roles
                 
                 db.session.commit()
+                invalidate_permission_cache(reason="用户角色分配已修改")
                 
                 # 返回成功提示和更新后的用户列表
                 alert = dbc.Alert("角色分配成功", color="success", duration=4000)
@@ -1072,6 +1078,7 @@ def management_callbacks(app):
                 
                 db.session.add(role)
                 db.session.commit()
+                invalidate_permission_cache(reason="角色已创建")
                 
                 # 返回成功提示并更新角色选项
                 alert = dbc.Alert("角色创建成功", color="success", duration=4000)
@@ -1123,6 +1130,7 @@ def management_callbacks(app):
                         db.session.delete(user)
                 
                 db.session.commit()
+                invalidate_permission_cache(reason="用户已删除")
                 alert = dbc.Alert(f"成功删除 {len(deleted_ids)} 个用户", color="success", duration=4000)
                 
                 # 重新获取用户数据
@@ -1190,6 +1198,7 @@ def management_callbacks(app):
                         deleted_count += 1
                 
                 db.session.commit()
+                invalidate_permission_cache(reason="权限已删除")
                 
                 if deleted_count > 0 and skipped_count > 0:
                     alert = dbc.Alert(f"成功删除 {deleted_count} 个权限，跳过 {skipped_count} 个正在使用的权限", color="warning", duration=4000)
@@ -1700,46 +1709,25 @@ def management_callbacks(app):
         else:
             return {"display": "none"}, {"display": "block"}
 
-    # 1.4 页面加载时获取操作日志数据
+    # 1.4 操作日志分页加载（首次加载、翻页、搜索、筛选、刷新）
     @app.callback(
-        Output('operation-logs-datatable', 'data'),
-        [Input('operation-log-table-container', 'children')]
+        [Output('operation-logs-datatable', 'data'),
+         Output('operation-logs-datatable', 'page_count'),
+         Output('operation-logs-datatable', 'page_current'),
+         Output('operation-logs-cursor-store', 'data')],
+        [Input('operation-log-table-container', 'children'),
+         Input('operation-logs-datatable', 'page_current'),
+         Input('operation-log-search-btn', 'n_clicks'),
+         Input('operation-log-refresh-btn', 'n_clicks'),
+         Input('operation-log-level-filter', 'value'),
+         Input('operation-log-module-filter', 'value')],
+        [State('operation-log-search-input', 'value'),
+         State('operation-logs-cursor-store', 'data')]
     )
-    def load_operation_logs_data(children):
-        """加载操作日志数据"""
-        if OperationLog and db:
-            try:
-                # 获取除登录日志外的所有操作日志
-                logs = OperationLog.query.filter(
-                    ~OperationLog.operation_type.in_(['LOGIN', 'LOGOUT'])
-                ).order_by(OperationLog.created_at.desc()).limit(1000).all()
-                
-                logs_data = []
-                for log in logs:
-                    # 构建目标信息
-                    target_info = ""
-                    if log.target_type and log.target_id:
-                        target_info = f"{log.target_type}:{log.target_id}"
-                    elif log.error_message:
-                        target_info = log.error_message[:50] + "..." if len(log.error_message) > 50 else log.error_message
-                    
-                    logs_data.append({
-                        'id': log.id,
-                        'operation_desc': log.operation_desc,
-                        'username': log.user.username if log.user else 'System',
-                        'module': log.module,
-                        'operation_type': log.operation_type,
-                        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
-                        'level': log.level,
-                        'status': log.status,
-                        'ip_address': log.ip_address or '',
-                        'target_info': target_info
-                    })
-                return logs_data
-            except Exception as e:
-                print(f"获取操作日志数据失败: {e}")
-                return []
-        else:
+    def load_operation_logs_page(children, page_current, search_clicks, refresh_clicks,
+                                 level_filter, module_filter, search_value, cursors):
+        """按页加载操作日志"""
+        if not (OperationLog and db):
             # 返回示例数据
             return [
                 {
@@ -1754,49 +1742,47 @@ def management_callbacks(app):
                     'ip_address': '192.168.1.100',
                     'target_info': '用户创建成功'
                 }
-            ]
+            ], 1, 0, {}
+        
+        ctx = callback_context
+        triggered = ctx.triggered[0]['prop_id'] if ctx.triggered else ''
+        # 翻页以外的触发（搜索、筛选、刷新）都回到第一页并清空游标
+        if not triggered.startswith('operation-logs-datatable.'):
+            page_current, cursors = 0, {}
+        
+        try:
+            if triggered.startswith('operation-log-refresh-btn'):
+                # 先写入队列中尚未落库的日志，刷新时能看到最新记录
+                flush_operation_logs()
+            
+            logs, has_more, cursors = query_log_page(
+                'operation', page_current, cursors, search_value=search_value,
+                level=level_filter, module=module_filter
+            )
+            page_count = page_current + (2 if has_more else 1)
+            return [format_operation_log(log) for log in logs], page_count, page_current, cursors
+        except Exception as e:
+            print(f"获取操作日志数据失败: {e}")
+            return [], 1, 0, {}
 
-    # 1.5 页面加载时获取登录日志数据
+    # 1.5 登录日志分页加载（首次加载、翻页、搜索、筛选、刷新）
     @app.callback(
-        Output('login-logs-datatable', 'data'),
-        [Input('login-log-table-container', 'children')]
+        [Output('login-logs-datatable', 'data'),
+         Output('login-logs-datatable', 'page_count'),
+         Output('login-logs-datatable', 'page_current'),
+         Output('login-logs-cursor-store', 'data')],
+        [Input('login-log-table-container', 'children'),
+         Input('login-logs-datatable', 'page_current'),
+         Input('login-log-search-btn', 'n_clicks'),
+         Input('login-log-refresh-btn', 'n_clicks'),
+         Input('login-log-status-filter', 'value')],
+        [State('login-log-search-input', 'value'),
+         State('login-logs-cursor-store', 'data')]
     )
-    def load_login_logs_data(children):
-        """加载登录日志数据"""
-        if OperationLog and db:
-            try:
-                # 只获取登录相关的日志
-                logs = OperationLog.query.filter(
-                    OperationLog.operation_type.in_(['LOGIN', 'LOGOUT', 'LOGIN_FAILED'])
-                ).order_by(OperationLog.created_at.desc()).limit(1000).all()
-                
-                logs_data = []
-                for log in logs:
-                    # 构建目标信息
-                    target_info = ""
-                    if log.error_message:
-                        target_info = log.error_message
-                    elif log.status == 'success':
-                        target_info = "登录成功" if log.operation_type == 'LOGIN' else "退出成功"
-                    else:
-                        target_info = "登录失败"
-                    
-                    logs_data.append({
-                        'id': log.id,
-                        'operation_desc': log.operation_desc,
-                        'username': log.user.username if log.user else 'Unknown',
-                        'operation_type': log.operation_type,
-                        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
-                        'ip_address': log.ip_address or '',
-                        'status': log.status,
-                        'user_agent': (log.user_agent[:50] + "...") if log.user_agent and len(log.user_agent) > 50 else (log.user_agent or ''),
-                        'target_info': target_info
-                    })
-                return logs_data
-            except Exception as e:
-                print(f"获取登录日志数据失败: {e}")
-                return []
-        else:
+    def load_login_logs_page(children, page_current, search_clicks, refresh_clicks,
+                             status_filter, search_value, cursors):
+        """按页加载登录日志"""
+        if not (OperationLog and db):
             # 返回示例数据
             return [
                 {
@@ -1810,145 +1796,27 @@ def management_callbacks(app):
                     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                     'target_info': '登录成功'
                 }
-            ]
-
-    # 3.3 操作日志搜索和筛选
-    @app.callback(
-        Output('operation-logs-datatable', 'data', allow_duplicate=True),
-        [Input('operation-log-search-btn', 'n_clicks'),
-         Input('operation-log-refresh-btn', 'n_clicks'),
-         Input('operation-log-level-filter', 'value'),
-         Input('operation-log-module-filter', 'value')],
-        [State('operation-log-search-input', 'value')],
-        prevent_initial_call=True
-    )
-    def search_or_filter_operation_logs(search_clicks, refresh_clicks, level_filter, module_filter, search_value):
-        """搜索和筛选操作日志"""
-        ctx = callback_context
-        if not ctx.triggered:
-            return no_update
-        
-        if OperationLog and db:
-            try:
-                # 构建查询条件
-                query = OperationLog.query.filter(
-                    ~OperationLog.operation_type.in_(['LOGIN', 'LOGOUT'])
-                )
-                
-                # 添加搜索条件
-                if search_value:
-                    search_term = f"%{search_value}%"
-                    query = query.filter(
-                        db.or_(
-                            OperationLog.operation_desc.like(search_term),
-                            OperationLog.module.like(search_term),
-                            OperationLog.operation_type.like(search_term)
-                        )
-                    )
-                
-                # 添加级别筛选
-                if level_filter and level_filter != 'all':
-                    query = query.filter(OperationLog.level == level_filter)
-                
-                # 添加模块筛选
-                if module_filter and module_filter != 'all':
-                    query = query.filter(OperationLog.module == module_filter)
-                
-                logs = query.order_by(OperationLog.created_at.desc()).limit(1000).all()
-                
-                logs_data = []
-                for log in logs:
-                    target_info = ""
-                    if log.target_type and log.target_id:
-                        target_info = f"{log.target_type}:{log.target_id}"
-                    elif log.error_message:
-                        target_info = log.error_message[:50] + "..." if len(log.error_message) > 50 else log.error_message
-                    
-                    logs_data.append({
-                        'id': log.id,
-                        'operation_desc': log.operation_desc,
-                        'username': log.user.username if log.user else 'System',
-                        'module': log.module,
-                        'operation_type': log.operation_type,
-                        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
-                        'level': log.level,
-                        'status': log.status,
-                        'ip_address': log.ip_address or '',
-                        'target_info': target_info
-                    })
-                return logs_data
-            except Exception as e:
-                print(f"操作日志查询失败: {e}")
-                return no_update
+            ], 1, 0, {}
         
-        return no_update
-
-    # 3.4 登录日志搜索和筛选
-    @app.callback(
-        Output('login-logs-datatable', 'data', allow_duplicate=True),
-        [Input('login-log-search-btn', 'n_clicks'),
-         Input('login-log-refresh-btn', 'n_clicks'),
-         Input('login-log-status-filter', 'value')],
-        [State('login-log-search-input', 'value')],
-        prevent_initial_call=True
-    )
-    def search_or_filter_login_logs(search_clicks, refresh_clicks, status_filter, search_value):
-        """搜索和筛选登录日志"""
         ctx = callback_context
-        if not ctx.triggered:
-            return no_update
-        
-        if OperationLog and db:
-            try:
-                # 构建查询条件
-                query = OperationLog.query.filter(
-                    OperationLog.operation_type.in_(['LOGIN', 'LOGOUT', 'LOGIN_FAILED'])
-                )
-                
-                # 添加搜索条件
-                if search_value:
-                    search_term = f"%{search_value}%"
-                    query = query.join(User, OperationLog.user_id == User.id, isouter=True).filter(
-                        db.or_(
-                            User.username.like(search_term),
-                            OperationLog.ip_address.like(search_term),
-                            OperationLog.operation_desc.like(search_term)
-                        )
-                    )
-                
-                # 添加状态筛选
-                if status_filter and status_filter != 'all':
-                    query = query.filter(OperationLog.status == status_filter)
-                
-                logs = query.order_by(OperationLog.created_at.desc()).limit(1000).all()
-                
-                logs_data = []
-                for log in logs:
-                    target_info = ""
-                    if log.error_message:
-                        target_info = log.error_message
-                    elif log.status == 'success':
-                        target_info = "登录成功" if log.operation_type == 'LOGIN' else "退出成功"
-                    else:
-                        target_info = "登录失败"
-                    
-                    logs_data.append({
-                        'id': log.id,
-                        'operation_desc': log.operation_desc,
-                        'username': log.user.username if log.user else 'Unknown',
-                        'operation_type': log.operation_type,
-                        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
-                        'ip_address': log.ip_address or '',
-                        'status': log.status,
-                        'user_agent': (log.user_agent[:50] + "...") if log.user_agent and len(log.user_agent) > 50 else (log.user_agent or ''),
-                        'target_info': target_info
-                    })
-                return logs_data
-            except Exception as e:
-                print(f"登录日志查询失败: {e}")
-                return no_update
-        
-        return no_update
+        triggered = ctx.triggered[0]['prop_id'] if ctx.triggered else ''
+        # 翻页以外的触发（搜索、筛选、刷新）都回到第一页并清空游标
+        if not triggered.startswith('login-logs-datatable.'):
+            page_current, cursors = 0, {}
+        
+        try:
+            if triggered.startswith('login-log-refresh-btn'):
+                # 先写入队列中尚未落库的日志，刷新时能看到最新记录
+                flush_operation_logs()
+            
+            logs, has_more, cursors = query_log_page(
+                'login', page_current, cursors, search_value=search_value, status=status_filter
+            )
+            page_count = page_current + (2 if has_more else 1)
+            return [format_login_log(log) for log in logs], page_count, page_current, cursors
+        except Exception as e:
+            print(f"获取登录日志数据失败: {e}")
+            return [], 1, 0, {}
 
     # 4.3 操作日志刷新成功提示
     @app.callback(
@@ -1974,10 +1842,50 @@ def management_callbacks(app):
             return dbc.Alert("登录日志已更新", color="info", duration=3000)
         return no_update
 
+    # 近7天日志统计（读取每日汇总，不扫描原始日志）
+    @app.callback(
+        Output('operation-log-stats', 'children'),
+        [Input('operation-log-table-container', 'children'),
+         Input('operation-log-refresh-btn', 'n_clicks')]
+    )
+    def load_operation_log_stats(children, refresh_clicks):
+        """显示近7天按级别、模块、操作类型的日志统计"""
+        ctx = callback_context
+        if ctx.triggered and ctx.triggered[0]['prop_id'].startswith('operation-log-refresh-btn'):
+            # 刷新时先把今天的日志计入汇总（不归档）
+            flush_operation_logs()
+            run_log_maintenance(retention_months=0)
+        
+        level_totals = get_rollup_totals('level', days=7)
+        if not level_totals:
+            return html.Small("暂无日志统计数据", className="text-muted")
+        
+        total = sum(count for _, count in level_totals)
+        problems = sum(count for level, count in level_totals if level in ('warning', 'error', 'critical'))
+        
+        def top_items(dimension, limit=5):
+            return html.Div([
+                dbc.Badge(f"{value or '未知'}: {count}", color="light", text_color="dark", className="me-1 mb-1")
+                for value, count in get_rollup_totals(dimension, days=7)[:limit]
+            ])
+        
+        def stat_card(title, body):
+            return dbc.Col(dbc.Card(dbc.CardBody([
+                html.Small(title, className="text-muted d-block mb-1"),
+                body
+            ]), className="h-100"), width=3)
+        
+        return dbc.Row([
+            stat_card("近7天日志总数", html.H4(f"{total:,}", className="mb-0")),
+            stat_card("警告/错误", html.H4(f"{problems:,}", className="mb-0 text-danger")),
+            stat_card("活跃模块", top_items('module')),
+            stat_card("常见操作", top_items('operation_type')),
+        ], className="g-2")
+
     # 清理操作日志
     @app.callback(
         [Output('operation-log-alert-area', 'children'),
-         Output('operation-logs-datatable', 'data', allow_duplicate=True)],
+         Output('operation-logs-datatable', 'page_current', allow_duplicate=True)],
         [Input('operation-log-clear-btn', 'n_clicks')],
         prevent_initial_call=True
     )
@@ -1994,44 +1902,23 @@ def management_callbacks(app):
                 thirty_days_ago = datetime.utcnow() - timedelta(days=30)
                 
                 # 删除30天前的非关键日志
-                deleted_count = OperationLog.query.filter(
-                    db.and_(
-                        OperationLog.created_at < thirty_days_ago,
-                        ~OperationLog.operation_type.in_(['LOGIN', 'LOGOUT']),
-                        OperationLog.level.in_(['debug', 'info'])  # 只删除非重要日志
-                    )
-                ).delete()
+                cleanup_filter = db.and_(
+                    OperationLog.created_at < thirty_days_ago,
+                    ~OperationLog.operation_type.in_(['LOGIN', 'LOGOUT']),
+                    OperationLog.level.in_(['debug', 'info'])  # 只删除非重要日志
+                )
+                oldest_deleted = db.session.query(db.func.min(OperationLog.created_at)).filter(cleanup_filter).scalar()
+                deleted_count = OperationLog.query.filter(cleanup_filter).delete()
                 
                 db.session.commit()
+
+                # 每日汇总仍包含已删除的日志，从最早删除的那天起重新统计（后台执行）
+                if deleted_count and oldest_deleted:
+                    rebuild_daily_rollups_async(oldest_deleted.date())
                 
-                # 重新获取日志数据
-                logs = OperationLog.query.filter(
-                    ~OperationLog.operation_type.in_(['LOGIN', 'LOGOUT'])
-                ).order_by(OperationLog.created_at.desc()).limit(1000).all()
-                
-                logs_data = []
-                for log in logs:
-                    target_info = ""
-                    if log.target_type and log.target_id:
-                        target_info = f"{log.target_type}:{log.target_id}"
-                    elif log.error_message:
-                        target_info = log.error_message[:50] + "..." if len(log.error_message) > 50 else log.error_message
-                    
-                    logs_data.append({
-                        'id': log.id,
-                        'operation_desc': log.operation_desc,
-                        'username': log.user.username if log.user else 'System',
-                        'module': log.module,
-                        'operation_type': log.operation_type,
-                        'created_at': log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
-                        'level': log.level,
-                        'status': log.status,
-                        'ip_address': log.ip_address or '',
-                        'target_info': target_info
-                    })
-                
+                # 回到第一页，由分页回调重新加载
                 alert = dbc.Alert(f"已清理 {deleted_count} 条历史日志", color="success", duration=4000)
-                return alert, logs_data
+                return alert, 0
                 
             except Exception as e:
                 db.session.rollback()
@@ -3,6 +3,7 @@ import dash
 from dash import dcc, html, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
+import os
 
 # 配置颜色常量
 PRIMARY_COLOR = "#007bff"
@@ -11,6 +12,9 @@ ACCENT_COLOR = "#28a745"
 BG_COLOR = "#f8f9fa"
 CARD_BG = "#ffffff"
 
+# 日志表格每页条数（服务端分页）
+LOG_PAGE_SIZE = int(os.getenv('LOG_PAGE_SIZE', '20'))
+
 def create_management_layout():
     """创建管理模块的主布局"""
     return html.Div(
@@ -994,6 +998,9 @@ def create_log_management_content():
                 ])
             ]),
             dbc.CardBody([
+                # 近7天日志统计（读取每日汇总表）
+                html.Div(id="operation-log-stats", className="mb-3"),
+                
                 # 日志类型选择标签页
                 dbc.Tabs([
                     dbc.Tab(label='操作日志', tab_id='operation-logs', label_style={"fontWeight": "bold"}),
@@ -1078,6 +1085,9 @@ def create_log_management_content():
                     ], className="mb-3"),
                     
                     # 操作日志表格
+                    # 键集分页游标（页码 -> 该页最后一行）
+                    dcc.Store(id="operation-logs-cursor-store", data={}),
+                    
                     html.Div(id="operation-log-table-container", children=[
                         get_operation_log_datatable()
                     ]),
@@ -1135,6 +1145,9 @@ def create_log_management_content():
                     ], className="mb-3"),
                     
                     # 登录日志表格
+                    # 键集分页游标（页码 -> 该页最后一行）
+                    dcc.Store(id="login-logs-cursor-store", data={}),
+                    
                     html.Div(id="login-log-table-container", children=[
                         get_login_log_datatable()
                     ]),
@@ -1222,9 +1235,11 @@ def get_operation_log_datatable(logs_data=None):
         ],
         row_selectable="multi",
         selected_rows=[],
-        page_size=10,
-        sort_action="native",
-        filter_action="native",
+        # 服务端分页：每次只加载一页，按时间倒序
+        page_action="custom",
+        page_current=0,
+        page_count=1,
+        page_size=LOG_PAGE_SIZE,
         row_deletable=False,  # 日志不允许删除
         tooltip_data=[
             {
@@ -1291,9 +1306,11 @@ def get_login_log_datatable(logs_data=None):
         ],
         row_selectable="multi",
         selected_rows=[],
-        page_size=10,
-        sort_action="native",
-        filter_action="native",
+        # 服务端分页：每次只加载一页，按时间倒序
+        page_action="custom",
+        page_current=0,
+        page_count=1,
+        page_size=LOG_PAGE_SIZE,
         row_deletable=False,  # 日志不允许删除
         tooltip_data=[
             {
@@ -0,0 +1,277 @@
+# modules/pricePrediction/batch_prediction.py
+"""
+批量 / 多场景预测
+
+上传 CSV/Excel（每行一个场景）或对某个工程量做参数扫描，一次调用
+CostPredictionSystem.predict_batch() 对全部场景进行聚类匹配、工程量估算、
+特征计算和各模型预测，结果以表格显示并可导出为 Excel。
+"""
+
+import io
+import logging
+from datetime import datetime
+
+import dash
+import dash_bootstrap_components as dbc
+import numpy as np
+import pandas as pd
+from dash import dcc, html, dash_table
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from config import PRIMARY_COLOR
+from utils.file_handlers import parse_uploaded_file
+from .training_jobs import get_predictor_nonblocking
+
+logger = logging.getLogger(__name__)
+
+MODE_DISPLAY_NAMES = {
+    'steel_cage': '钢筋笼施工模式',
+    'steel_lining': '钢衬里施工模式',
+}
+
+# 各模式可用于参数扫描的工程量
+SWEEP_PARAMETERS = {
+    'steel_cage': ['钢筋总吨数', '套筒数量', '塔吊租赁工程量', '吊索具数量', '措施费工程量'],
+    'steel_lining': ['拼装场地总工程量', '制作胎具总工程量', '钢支墩埋件总工程量', '扶壁柱总工程量',
+                     '走道板操作平台总工程量', '钢网梁总工程量', '措施费工程量'],
+}
+
+# 单次参数扫描允许的最大场景数
+MAX_SWEEP_STEPS = 500
+
+
+def build_parameter_sweep(base_inputs, param, start, stop, steps):
+    """
+    生成参数扫描场景：param 在 [start, stop] 之间等距取 steps 个值，其余参数取 base_inputs
+
+    Returns:
+        pandas.DataFrame: 每行一个场景
+    """
+    steps = int(steps)
+    if steps < 1 or steps > MAX_SWEEP_STEPS:
+        raise ValueError(f"扫描步数必须在 1 到 {MAX_SWEEP_STEPS} 之间")
+    if float(start) > float(stop):
+        raise ValueError("扫描起始值不能大于结束值")
+
+    values = np.linspace(float(start), float(stop), steps)
+    scenarios = pd.DataFrame([dict(base_inputs or {})] * steps)
+    scenarios[param] = values
+    scenarios.insert(0, '场景名称', [f"{param}={value:g}" for value in values])
+    return scenarios
+
+
+def read_scenario_file(contents, filename):
+    """读取上传的场景文件（CSV/Excel），去除全空的行和列"""
+    if not filename.lower().endswith(('.csv', '.xls', '.xlsx')):
+        raise ValueError("仅支持 CSV 或 Excel 格式的场景文件")
+
+    df = parse_uploaded_file(contents, filename)
+    if '错误' in df.columns:
+        raise ValueError(df['错误'].iloc[0])
+
+    df = df.dropna(how='all').dropna(axis=1, how='all')
+    df.columns = [str(col).strip() for col in df.columns]
+    if df.empty:
+        raise ValueError("场景文件中没有数据")
+    return df.reset_index(drop=True)
+
+
+def export_batch_results_to_excel(results, method_status, mode):
+    """将批量预测结果和方法状态写入 Excel，返回文件内容"""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        results.to_excel(writer, sheet_name='预测结果', index=False)
+        status_df = pd.DataFrame([
+            {'预测方法': key, '状态': info.get('final_status'), '说明': info.get('message')}
+            for key, info in (method_status or {}).items()
+        ])
+        status_df.to_excel(writer, sheet_name='预测方法状态', index=False)
+        pd.DataFrame([
+            {'项目': '预测模式', '值': MODE_DISPLAY_NAMES.get(mode, mode)},
+            {'项目': '场景数', '值': len(results)},
+            {'项目': '生成时间', '值': datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+        ]).to_excel(writer, sheet_name='说明', index=False)
+    return output.getvalue()
+
+
+def _to_records(df):
+    """DataFrame 转为可 JSON 序列化的记录（NaN 转为 None）"""
+    return df.astype(object).where(pd.notna(df), None).to_dict('records')
+
+
+def create_batch_prediction_section():
+    """创建批量 / 多场景预测区域"""
+    return dbc.Card([
+        dbc.CardHeader(html.H5("批量 / 多场景预测", className="mb-0", style={"color": PRIMARY_COLOR})),
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col([
+                    dbc.Label("预测模式"),
+                    dbc.RadioItems(
+                        id="batch-prediction-mode",
+                        options=[{'label': name, 'value': mode} for mode, name in MODE_DISPLAY_NAMES.items()],
+                        value='steel_cage',
+                        inline=True
+                    ),
+                ], width=12, className="mb-3"),
+            ]),
+            dbc.Row([
+                # 上传场景文件
+                dbc.Col([
+                    dbc.Label("上传场景文件（CSV/Excel，每行一个场景，列名为工程量参数）"),
+                    dcc.Upload(
+                        id="batch-prediction-upload",
+                        children=html.Div([html.I(className="fas fa-upload me-2"), "拖放或点击选择文件"]),
+                        style={
+                            'width': '100%', 'height': '60px', 'lineHeight': '60px',
+                            'borderWidth': '1px', 'borderStyle': 'dashed', 'borderRadius': '5px',
+                            'textAlign': 'center', 'cursor': 'pointer'
+                        },
+                        multiple=False
+                    ),
+                ], width=6),
+                # 参数扫描
+                dbc.Col([
+                    dbc.Label("参数扫描（以已上传的第一个场景为基准）"),
+                    dbc.InputGroup([
+                        dcc.Dropdown(id="batch-sweep-parameter", placeholder="扫描参数",
+                                     style={'minWidth': '160px'}),
+                        dbc.Input(id="batch-sweep-start", type="number", placeholder="起始值"),
+                        dbc.Input(id="batch-sweep-stop", type="number", placeholder="结束值"),
+                        dbc.Input(id="batch-sweep-steps", type="number", placeholder="步数", value=10,
+                                  min=1, max=MAX_SWEEP_STEPS),
+                        dbc.Button("生成场景", id="batch-sweep-generate-btn", color="secondary"),
+                    ]),
+                ], width=6),
+            ], className="mb-3"),
+            html.Div(id="batch-prediction-scenario-info", className="mb-2"),
+            html.Div([
+                dbc.Button([html.I(className="fas fa-play me-2"), "批量预测"],
+                           id="batch-prediction-run-btn", color="primary", className="me-2"),
+                dbc.Button([html.I(className="fas fa-save me-2"), "导出Excel"],
+                           id="batch-prediction-export-btn", color="success", disabled=True),
+            ], className="mb-3"),
+            dcc.Loading(html.Div(id="batch-prediction-status")),
+            dash_table.DataTable(
+                id="batch-prediction-table",
+                page_size=20,
+                sort_action="native",
+                style_table={'overflowX': 'auto'},
+                style_cell={'textAlign': 'center', 'minWidth': '100px'},
+                style_header={'backgroundColor': PRIMARY_COLOR, 'color': 'white', 'fontWeight': 'bold'},
+            ),
+            dcc.Download(id="download-batch-prediction"),
+            dcc.Store(id="batch-prediction-scenarios"),
+            dcc.Store(id="batch-prediction-results"),
+        ])
+    ], className="mt-4 shadow-sm")
+
+
+def register_batch_prediction_callbacks(app):
+    """注册批量预测相关回调"""
+
+    @app.callback(
+        Output("batch-sweep-parameter", "options"),
+        Input("batch-prediction-mode", "value")
+    )
+    def update_sweep_parameters(mode):
+        return [{'label': param, 'value': param} for param in SWEEP_PARAMETERS.get(mode, [])]
+
+    @app.callback(
+        [Output("batch-prediction-scenarios", "data"),
+         Output("batch-prediction-scenario-info", "children")],
+        [Input("batch-prediction-upload", "contents"),
+         Input("batch-sweep-generate-btn", "n_clicks")],
+        [State("batch-prediction-upload", "filename"),
+         State("batch-sweep-parameter", "value"),
+         State("batch-sweep-start", "value"),
+         State("batch-sweep-stop", "value"),
+         State("batch-sweep-steps", "value"),
+         State("batch-prediction-scenarios", "data")],
+        prevent_initial_call=True
+    )
+    def load_scenarios(contents, n_clicks, filename, sweep_param, start, stop, steps, current_scenarios):
+        triggered = dash.callback_context.triggered[0]['prop_id'].split('.')[0]
+        try:
+            if triggered == "batch-prediction-upload":
+                if not contents:
+                    raise PreventUpdate
+                scenarios = read_scenario_file(contents, filename)
+                source = f"已从 {filename} 读取"
+            else:
+                if not sweep_param or start is None or stop is None or not steps:
+                    return dash.no_update, dbc.Alert("请选择扫描参数并填写起始值、结束值和步数", color="warning")
+                base_inputs = {}
+                if current_scenarios:
+                    base_inputs = {k: v for k, v in current_scenarios[0].items() if k != '场景名称'}
+                scenarios = build_parameter_sweep(base_inputs, sweep_param, start, stop, steps)
+                source = f"已生成 {sweep_param} 参数扫描"
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            logger.error(f"加载批量预测场景失败: {e}", exc_info=True)
+            return dash.no_update, dbc.Alert(f"加载场景失败: {e}", color="danger")
+
+        info = dbc.Alert(f"{source}：共 {len(scenarios)} 个场景，参数列：{', '.join(map(str, scenarios.columns))}",
+                         color="info")
+        return _to_records(scenarios), info
+
+    @app.callback(
+        [Output("batch-prediction-results", "data"),
+         Output("batch-prediction-table", "data"),
+         Output("batch-prediction-table", "columns"),
+         Output("batch-prediction-status", "children"),
+         Output("batch-prediction-export-btn", "disabled")],
+        Input("batch-prediction-run-btn", "n_clicks"),
+        [State("batch-prediction-scenarios", "data"),
+         State("batch-prediction-mode", "value")],
+        prevent_initial_call=True
+    )
+    def run_batch_prediction(n_clicks, scenarios, mode):
+        if not scenarios:
+            return None, [], [], dbc.Alert("请先上传场景文件或生成参数扫描场景", color="warning"), True
+
+        predictor, training_job_id = get_predictor_nonblocking(mode)
+        if predictor is None or not predictor.is_trained:
+            return None, [], [], dbc.Alert([
+                html.I(className="fas fa-spinner fa-spin me-2"),
+                f"预测模型正在后台训练（{MODE_DISPLAY_NAMES.get(mode, mode)}），训练完成后请再次点击批量预测。"
+            ], color="info"), True
+
+        # 综合指标显示状态可能已被修改，刷新状态（无需重新训练）
+        predictor.load_comprehensive_indicators_status()
+        batch_result = predictor.predict_batch(pd.DataFrame(scenarios), {})
+        if 'error' in batch_result:
+            return None, [], [], dbc.Alert(batch_result['error'], color="danger"), True
+
+        results = batch_result['结果']
+        records = _to_records(results)
+        columns = [{'name': str(col), 'id': str(col)} for col in results.columns]
+
+        hidden = [f"{key}：{info['message']}" for key, info in batch_result['预测方法状态'].items()
+                  if not info['shown']]
+        status = [dbc.Alert(f"批量预测完成：{batch_result['场景数']} 个场景", color="success")]
+        if hidden:
+            status.append(dbc.Alert(["以下预测结果未显示：", html.Ul([html.Li(item) for item in hidden])],
+                                    color="warning"))
+
+        store_data = {'mode': mode, 'results': records, 'method_status': batch_result['预测方法状态']}
+        return store_data, records, columns, status, False
+
+    @app.callback(
+        Output("download-batch-prediction", "data"),
+        Input("batch-prediction-export-btn", "n_clicks"),
+        State("batch-prediction-results", "data"),
+        prevent_initial_call=True
+    )
+    def export_batch_prediction(n_clicks, store_data):
+        if not store_data or not store_data.get('results'):
+            raise PreventUpdate
+
+        mode = store_data.get('mode')
+        excel_data = export_batch_results_to_excel(
+            pd.DataFrame(store_data['results']), store_data.get('method_status'), mode)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{MODE_DISPLAY_NAMES.get(mode, mode)}批量预测结果_{timestamp}.xlsx"
+        return dcc.send_bytes(excel_data, filename)
@@ -17,6 +17,16 @@ import traceback  # 新增：用于错误追踪
 # 导入预测系统类
 from .data import CostPredictionSystem
 from .change import process_and_update_databases
+from .model_registry import model_registry
+from .training_jobs import (
+    get_predictor_nonblocking,
+    submit_training_job,
+    register_training_job_monitor_callbacks,
+)
+from .batch_prediction import register_batch_prediction_callbacks
+from .report_templates import (
+    CUSTOM_MODE_TEMPLATE, STEEL_CAGE_TEMPLATE, STEEL_LINING_TEMPLATE, format_prediction_status_for_export
+)
 from .indicator_mapping import (
     INDICATOR_FIELD_MAPPING,
     get_all_indicators_for_mode,
@@ -31,18 +41,15 @@ from .modals import (
     create_steel_lining_parameter_modal,
 )
 
-# 导入MySQL配置和连接函数
-# MySQL数据库连接配置
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4',
-    'autocommit': True  # 默认启用自动提交
-}
+# 导入MySQL配置和连接函数（共享连接池，见 utils/db_pool.py）
+from utils.db_pool import get_connection as get_pooled_connection
+from utils.price_cache import invalidate_price_cache
+from utils.search_index import invalidate_search_index
+from utils.excel_export import create_export_task, register_export_download
+from utils.result_store import get_result, store_result
+from utils.indicator_status_cache import get_basic_indicator_status
 
-# 在MYSQL_CONFIG之后添加表名映射
+# 表名映射
 TABLE_NAME_MAPPING = {
     '价格基准1': 'price_baseline_1',
     '价格基准2': 'price_baseline_2',
@@ -54,9 +61,9 @@ def get_english_table_name(chinese_name):
     """将中文表名转换为英文表名"""
     return TABLE_NAME_MAPPING.get(chinese_name, chinese_name)
 def get_connection():
-    """获取MySQL数据库连接"""
+    """获取MySQL数据库连接（从共享连接池借出，close() 时归还）"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         return conn
     except Exception as e:
         print(f"MySQL连接失败: {e}")
@@ -67,11 +74,6 @@ logger.setLevel(logging.INFO)
 
 PRIMARY_COLOR = "#2C3E50"
 
-global_predictors = {
-    'steel_cage': None,
-    'steel_lining': None,
-}
-
 def safe_float(value):
     try:
         if value is None or str(value).strip() == "" :
@@ -81,32 +83,16 @@ def safe_float(value):
         return 0.0
 
 def initialize_prediction_system(mode):
-    """初始化或重新初始化指定模式的全局预测系统"""
-    global global_predictors
-    if global_predictors[mode] is None:
-        logger.info(f"初始化/重新初始化机器学习预测系统 for mode: {mode}...")
-        try:
-            current_predictor = CostPredictionSystem(mode=mode)
-            if current_predictor.load_data_from_database(mode):
-                if current_predictor.train_system():
-                    global_predictors[mode] = current_predictor
-                    logger.info(f"✓ 机器学习预测系统初始化/重新初始化成功 for mode: {mode}")
-                    return True
-                else:
-                    logger.error(f"✗ 机器学习模型训练失败 for mode: {mode}")
-                    global_predictors[mode] = None
-                    return False
-            else:
-                logger.error(f"✗ 历史数据加载失败 for mode: {mode}")
-                global_predictors[mode] = None
-                return False
-        except Exception as e:
-            logger.error(f"✗ 预测系统初始化/重新初始化异常 for mode: {mode}: {e}", exc_info=True)
-            global_predictors[mode] = None
-            return False
-    else:
-        logger.info(f"机器学习预测系统已初始化 for mode: {mode}，跳过重复初始化。")
-    return True
+    """确保指定模式的预测系统已训练（由模型注册表按数据指纹决定是否重新训练）"""
+    try:
+        predictor = model_registry.get_predictor(mode)
+        if predictor is not None and predictor.is_trained:
+            return True
+        logger.error(f"✗ 预测系统初始化失败 for mode: {mode}")
+        return False
+    except Exception as e:
+        logger.error(f"✗ 预测系统初始化异常 for mode: {mode}: {e}", exc_info=True)
+        return False
 
 def save_report_to_database(report_data, report_type):
     """
@@ -475,62 +461,6 @@ def extract_main_prediction_result(prediction_data):
     }
 
 
-def format_prediction_status_for_export(prediction_results):
-    """
-    为导出功能格式化预测状态信息
-    
-    Args:
-        prediction_results (dict): 完整的预测结果
-        
-    Returns:
-        dict: 格式化的状态信息，适合导出到Excel
-    """
-    if not prediction_results:
-        return {
-            "状态概览": "预测结果为空",
-            "可用方法数量": 0,
-            "算法状态": "未知",
-            "显示权限": "未知"
-        }
-    
-    # 提取状态信息
-    method_status = prediction_results.get("预测方法状态", {})
-    algorithm_status = prediction_results.get("算法执行状态", {})
-    display_status = prediction_results.get("显示权限状态", {})
-    
-    # 统计方法状态
-    status_counts = {
-        'fully_available': 0,
-        'execute_only': 0, 
-        'display_error': 0,
-        'fully_disabled': 0
-    }
-    
-    for method_info in method_status.values():
-        final_status = method_info.get('final_status', 'unknown')
-        if final_status in status_counts:
-            status_counts[final_status] += 1
-    
-    # 格式化输出
-    formatted_status = {
-        "状态概览": f"完全可用:{status_counts['fully_available']}个, 可执行但显示禁用:{status_counts['execute_only']}个, 显示启用但执行失败:{status_counts['display_error']}个, 完全禁用:{status_counts['fully_disabled']}个",
-        "可用方法数量": status_counts['fully_available'],
-        "算法执行能力": "可用" if algorithm_status.get('can_execute_ai', False) else "不可用",
-        "算法状态详情": algorithm_status.get('message', '未知'),
-        "启用算法数量": algorithm_status.get('enabled_count', 0),
-        "总算法数量": algorithm_status.get('total_count', 0)
-    }
-    
-    # 添加各方法的详细状态
-    for method_key, method_info in method_status.items():
-        method_name = method_info.get('name', method_key)
-        formatted_status[f"{method_name}_状态"] = method_info.get('final_status', 'unknown')
-        formatted_status[f"{method_name}_执行消息"] = method_info.get('execution_message', '')
-        formatted_status[f"{method_name}_显示消息"] = method_info.get('display_message', '')
-    
-    return formatted_status
-
-
 def create_best_algorithm_params_section(ml_prediction_results):
     """
     创建最佳算法参数信息展示部分
@@ -665,8 +595,13 @@ def register_price_prediction_callbacks(app):
     
     """注册价格预测页面的回调函数"""
 
-    initialize_prediction_system('steel_cage')
-    initialize_prediction_system('steel_lining')
+    # 启动时在后台预热预测模型（优先读取磁盘上的模型文件），不阻塞应用启动
+    submit_training_job('steel_cage', force_check=False)
+    submit_training_job('steel_lining', force_check=False)
+
+    register_training_job_monitor_callbacks(app, "steel-cage-training")
+    register_training_job_monitor_callbacks(app, "steel-lining-training")
+    register_batch_prediction_callbacks(app)
 
 
     @app.callback(
@@ -972,7 +907,8 @@ def register_price_prediction_callbacks(app):
         [Output("steel-reinforcement-calculation-result5", "children"),
          Output('cost-comparison-container2', 'style'),
          Output('cost-comparison-table2', 'children'),
-         Output("steel-cage-report-data", "data")],
+         Output("steel-cage-report-data", "data"),
+         Output("steel-cage-training-job-store", "data")],
         Input("confirm-steel-reinforcement", "n_clicks"),
         [State('tower-crane-category-param', 'value'),
          State('steel-production-category-param', 'value'),
@@ -1031,12 +967,14 @@ def register_price_prediction_callbacks(app):
                 )
             logger.info("钢筋笼模式的关键因素数据库已更新。")
 
-            global global_predictors
-            global_predictors['steel_cage'] = None
-            init_success = initialize_prediction_system('steel_cage')
-            if not init_success:
-                error_message = "机器学习预测系统重新初始化失败，请检查数据或配置（钢筋笼模式）。"
-                return html.Div(dbc.Alert(error_message, color="danger")), {"display": "block"}, "", {}
+            # 从模型注册表获取预测系统；尚未训练时提交后台训练任务，不阻塞当前请求
+            predictor, training_job_id = get_predictor_nonblocking('steel_cage')
+            if predictor is None:
+                training_message = html.Div(dbc.Alert([
+                    html.I(className="fas fa-spinner fa-spin me-2"),
+                    "预测模型正在后台训练（钢筋笼模式），训练完成后请再次点击确定。"
+                ], color="info"))
+                return training_message, {"display": "block"}, "", None, [training_job_id]
         except Exception as e:
             logger.error(f"更新数据或重新初始化钢筋笼模式预测系统异常: {e}", exc_info=True)
             
@@ -1055,7 +993,7 @@ def register_price_prediction_callbacks(app):
                 "措施费": measures_cost_value
             }
             
-            return error_display, {"display": "block"}, "", error_report_data
+            return error_display, {"display": "block"}, "", store_result(error_report_data), dash.no_update
         quantities = collect_user_quantities(
             tower_crane_qty_category, steel_production_qty_category,
             lifting_equipment_qty_category, sleeve_qty_category,
@@ -1068,11 +1006,13 @@ def register_price_prediction_callbacks(app):
         measures_cost_value = quantities.get('措施费工程量', 0.0)
         ml_prediction_results = None
 
-        if global_predictors['steel_cage'] and global_predictors['steel_cage'].is_trained:
+        if predictor and predictor.is_trained:
+            # 综合指标显示状态可能已被修改，刷新状态（无需重新训练）
+            predictor.load_comprehensive_indicators_status()
             try:
                 user_inputs_for_ml = prepare_ml_inputs(quantities)
                 if user_inputs_for_ml:
-                    ml_results_from_system = global_predictors['steel_cage'].predict(user_inputs_for_ml, {})
+                    ml_results_from_system = predictor.predict(user_inputs_for_ml, {})
 
                     # 【修复】只为数值类型的预测结果添加措施费
                     if "机器学习预测结果" in ml_results_from_system and ml_results_from_system["机器学习预测结果"]:
@@ -1116,7 +1056,7 @@ def register_price_prediction_callbacks(app):
         # 生成用户友好的确认消息
         confirmation_message = generate_prediction_confirmation_message(ml_prediction_results, "钢筋笼")
         
-        # 新增：保存报告数据到Store - 适配新的数据结构
+        # 报告数据保存在服务端结果缓存，Store 中只保存结果 ID
         report_data = {
             "模式": "钢筋笼施工模式",
             "生成时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -1134,14 +1074,15 @@ def register_price_prediction_callbacks(app):
             "最佳算法信息": ml_prediction_results.get("最佳算法信息", {})
         }
 
-        return confirmation_message, results_container_style, detailed_results_table, report_data
+        return confirmation_message, results_container_style, detailed_results_table, store_result(report_data), dash.no_update
 
 
     @app.callback(
         [Output('steel-lining-calculation-result-output', 'children'),
          Output('steel-lining-cost-comparison-container', 'style'),
          Output('steel-lining-cost-comparison-table', 'children'),
-         Output("steel-lining-report-data", "data")],
+         Output("steel-lining-report-data", "data"),
+         Output("steel-lining-training-job-store", "data")],
         Input("confirm-steel-lining", "n_clicks"),
         [State("assembly-site-category-param", "value"),
          State("fixture-making-category-param", "value"),
@@ -1208,15 +1149,17 @@ def register_price_prediction_callbacks(app):
             )
             logger.info("钢衬里模式的关键因素数据库已更新。")
 
-            global global_predictors
-            global_predictors['steel_lining'] = None
-            init_success = initialize_prediction_system('steel_lining')
-            if not init_success:
-                error_message = "机器学习预测系统重新初始化失败，请检查数据或配置（钢衬里模式）。"
-                return html.Div(dbc.Alert(error_message, color="danger")), {"display": "block"}, "", {}
+            # 从模型注册表获取预测系统；尚未训练时提交后台训练任务，不阻塞当前请求
+            predictor, training_job_id = get_predictor_nonblocking('steel_lining')
+            if predictor is None:
+                training_message = html.Div(dbc.Alert([
+                    html.I(className="fas fa-spinner fa-spin me-2"),
+                    "预测模型正在后台训练（钢衬里模式），训练完成后请再次点击确定。"
+                ], color="info"))
+                return training_message, {"display": "block"}, "", None, [training_job_id]
         except Exception as e:
             logger.error(f"更新数据或重新初始化钢衬里模式预测系统异常: {e}", exc_info=True)
-            return html.Div(dbc.Alert(f"预测失败：更新数据或模型训练出错 - {e}", color="danger")), {"display": "block"}, "", {}
+            return html.Div(dbc.Alert(f"预测失败：更新数据或模型训练出错 - {e}", color="danger")), {"display": "block"}, "", None, dash.no_update
 
         quantities = {}
 
@@ -1252,9 +1195,11 @@ def register_price_prediction_callbacks(app):
 
         ml_prediction_results = None
 
-        if global_predictors['steel_lining'] and global_predictors['steel_lining'].is_trained:
+        if predictor and predictor.is_trained:
+            # 综合指标显示状态可能已被修改，刷新状态（无需重新训练）
+            predictor.load_comprehensive_indicators_status()
             try:
-                ml_results_from_system = global_predictors['steel_lining'].predict(quantities, {})
+                ml_results_from_system = predictor.predict(quantities, {})
 
                 # 【修复】只为数值类型的预测结果添加措施费
                 if "机器学习预测结果" in ml_results_from_system and ml_results_from_system["机器学习预测结果"]:
@@ -1296,7 +1241,7 @@ def register_price_prediction_callbacks(app):
         # 生成用户友好的确认消息
         confirmation_message = generate_prediction_confirmation_message(ml_prediction_results, "钢衬里")
 
-        # 新增：保存报告数据到Store - 适配新的数据结构
+        # 报告数据保存在服务端结果缓存，Store 中只保存结果 ID
         report_data = {
             "模式": "钢衬里施工模式",
             "生成时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -1314,7 +1259,7 @@ def register_price_prediction_callbacks(app):
             "最佳算法信息": ml_prediction_results.get("最佳算法信息", {})
         }
         
-        return confirmation_message, results_container_style, detailed_results_table, report_data
+        return confirmation_message, results_container_style, detailed_results_table, store_result(report_data), dash.no_update
 
 
     @app.callback(
@@ -1482,6 +1427,8 @@ def register_price_prediction_callbacks(app):
 
             if changes_detected:
                 conn.commit()
+                invalidate_price_cache(f"{current_mode} 单价已修改")
+                invalidate_search_index(reason=f"{current_mode} 价格基准已修改")
                 feedback_messages.insert(0, dbc.Alert(f"数据已成功保存到 '{current_mode}' MySQL数据库。", color="success"))
             else:
                 feedback_messages.append(dbc.Alert("没有检测到有效的数据更改以保存。", color="info", duration=3000))
@@ -1953,7 +1900,7 @@ def register_price_prediction_callbacks(app):
             results_container_style = {"display": "block"}
 
 
-            # 新增：保存报告数据到Store
+            # 报告数据保存在服务端结果缓存，Store 中只保存结果 ID
             report_data = {
                 "模式": "自定义模式",
                 "生成时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -1962,7 +1909,7 @@ def register_price_prediction_callbacks(app):
                 "估算工程量": calculation_result["estimated_quantities"],
                 "估算价格": calculation_result["estimated_prices"]
             }
-            return success_message, results_container_style, detailed_results_table, report_data
+            return success_message, results_container_style, detailed_results_table, store_result(report_data)
             
         except Exception as e:
             logger.error(f"自定义模式计算异常: {e}", exc_info=True)
@@ -2503,550 +2450,34 @@ def register_price_prediction_callbacks(app):
         return html.Div(summary_content)
     
 
-# 在 register_price_prediction_callbacks(app) 函数的最后，添加以下三个回调函数
-    # 它们应该与其他回调函数有相同的缩进级别
+    # ========== 报告导出：回调只登记导出任务，文件由 /exports/<token> 流式下载 ==========
+    for download_id in ("download-steel-cage-report", "download-steel-lining-report",
+                        "download-custom-mode-report"):
+        register_export_download(app, download_id)
+
+    def _create_report_export(result_id, template_name, filename_prefix, mode_label):
+        report_data = get_result(result_id)
+        if not report_data:
+            logger.warning(f"{mode_label}预测结果不存在或已过期，无法导出: {result_id}")
+            raise PreventUpdate
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            return create_export_task(template_name, report_data, f"{filename_prefix}_{timestamp}.xlsx")
+        except Exception as e:
+            logger.error(f"导出{mode_label}Excel报告失败: {e}", exc_info=True)
+            raise PreventUpdate
+
     @app.callback(
         Output("download-steel-cage-report", "data"),
         Input("export-steel-cage-report-btn", "n_clicks"),
         State("steel-cage-report-data", "data"),
         prevent_initial_call=True
     )
-    def export_steel_cage_excel(n_clicks, report_data):
-        """导出钢筋笼模式报告为Excel并保存到数据库"""
-        if not n_clicks or not report_data:
-            raise PreventUpdate
-
-            
-        try:
-            from openpyxl import Workbook
-            from openpyxl.chart import PieChart, Reference
-            from openpyxl.chart.label import DataLabelList
-            from openpyxl.utils import get_column_letter
-            import tempfile
-            import os
-            
-            # 数据完整性检查
-            if not report_data:
-                raise Exception("报告数据为空，无法生成Excel文件")
-            
-            quantities = report_data.get('工程量数据', {})
-            ml_prediction_results = report_data.get('预测结果', {})
-            measures_cost_value = report_data.get('措施费', 0)
-            
-            # 获取预测结果
-            ml_predictions = ml_prediction_results.get("机器学习预测结果", {}) if ml_prediction_results else {}
-            ratio_prediction = ml_prediction_results.get("比率法预测总价") if ml_prediction_results else None
-            estimated_costs = ml_prediction_results.get("估算的各项成本 (用于ML的特征)", {}) if ml_prediction_results else {}
-            
-            # 计算总预测价格
-            ensemble_prediction = ml_predictions.get('集成平均预测') if ml_predictions else None
-            total_cost = ensemble_prediction or ratio_prediction or 0
-            
-            # 创建工作簿
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "钢筋笼模式预测报告"
-            
-            # 设置标题
-            ws['A1'] = "钢筋笼施工模式智能预测分析报告"
-            ws['A1'].font = ws['A1'].font.copy(bold=True, size=16)
-            ws.merge_cells('A1:E1')
-            
-            # 基本信息
-            row = 3
-            ws[f'A{row}'] = "报告概述"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            ws[f'A{row}'] = "施工模式:"
-            ws[f'B{row}'] = report_data.get('模式', '钢筋笼施工模式')
-            row += 1
-            ws[f'A{row}'] = "生成时间:"
-            ws[f'B{row}'] = report_data.get('生成时间', '')
-            row += 1
-            ws[f'A{row}'] = "预测总价(元):"
-            ws[f'B{row}'] = f"{total_cost:,.0f}"
-            row += 2
-            
-            # 工程量数据
-            ws[f'A{row}'] = "工程量数据详情"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            # 工程量表头
-            quantity_headers = ['工程量项目', '数量', '单位', '备注']
-            for col, header in enumerate(quantity_headers, 1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = cell.font.copy(bold=True)
-            row += 1
-            
-            # 工程量数据
-            quantity_items = [
-                ('钢筋总吨数', quantities.get('钢筋总吨数', 0), '吨'),
-                ('塔吊租赁工程量', quantities.get('塔吊租赁工程量', 0), '台班'),
-                ('吊索具数量', quantities.get('吊索具数量', 0), '套'),
-                ('套筒数量', quantities.get('套筒数量', 0), '个'),
-            ]
-            
-            for item_name, quantity, unit in quantity_items:
-                ws[f'A{row}'] = item_name
-                ws[f'B{row}'] = f"{quantity:.2f}"
-                ws[f'C{row}'] = unit
-                ws[f'D{row}'] = "用户输入或智能估算"
-                row += 1
-            
-            if measures_cost_value > 0:
-                ws[f'A{row}'] = "措施费"
-                ws[f'B{row}'] = f"{measures_cost_value:,.2f}"
-                ws[f'C{row}'] = "元"
-                ws[f'D{row}'] = "额外费用"
-                row += 1
-            row += 1
-            
-            # 预测结果
-            ws[f'A{row}'] = "预测结果分析"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            # 结果表头
-            result_headers = ['预测方法', '预测总价(元)', '可信度', '备注']
-            for col, header in enumerate(result_headers, 1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = cell.font.copy(bold=True)
-            row += 1
-            
-# 预测结果数据 - 适配新的状态结构
-            prediction_status = report_data.get('预测方法状态', {})
-            
-            # AI预测结果处理
-            main_ai_result = report_data.get('主要AI预测', {})
-            ai_status = main_ai_result.get('status', 'unknown')
-            ai_value = main_ai_result.get('value')
-            
-            if ai_status == 'success' and isinstance(ai_value, (int, float)):
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = f"{ai_value:,.0f}"
-                ws[f'C{row}'] = "高"
-                ws[f'D{row}'] = "多算法集成结果，预测成功"
-                row += 1
-            elif ai_status == 'display_disabled':
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = "显示被禁用"
-                ws[f'C{row}'] = "不适用"
-                ws[f'D{row}'] = main_ai_result.get('message', '显示权限被禁用')
-                row += 1
-            elif ai_status == 'error':
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = "预测失败"
-                ws[f'C{row}'] = "低"
-                ws[f'D{row}'] = f"错误: {main_ai_result.get('message', '未知错误')}"
-                row += 1
-            else:
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = "不可用"
-                ws[f'C{row}'] = "无"
-                ws[f'D{row}'] = f"状态: {ai_status}, 消息: {main_ai_result.get('message', '未知状态')}"
-                row += 1
-            
-            # 比率法预测结果处理
-            main_ratio_result = report_data.get('主要比率法预测', {})
-            ratio_status = main_ratio_result.get('status', 'unknown')
-            ratio_value = main_ratio_result.get('value')
-            
-            if ratio_status == 'success' and isinstance(ratio_value, (int, float)):
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = f"{ratio_value:,.0f}"
-                ws[f'C{row}'] = "中"
-                ws[f'D{row}'] = "传统估算方法，预测成功"
-                row += 1
-            elif ratio_status == 'display_disabled':
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = "显示被禁用"
-                ws[f'C{row}'] = "不适用"
-                ws[f'D{row}'] = main_ratio_result.get('message', '显示权限被禁用')
-                row += 1
-            elif ratio_status == 'error':
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = "预测失败"
-                ws[f'C{row}'] = "低"
-                ws[f'D{row}'] = f"错误: {main_ratio_result.get('message', '未知错误')}"
-                row += 1
-            else:
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = "不可用"
-                ws[f'C{row}'] = "无"
-                ws[f'D{row}'] = f"状态: {ratio_status}, 消息: {main_ratio_result.get('message', '未知状态')}"
-                row += 1
-            row += 1
-            
-            # ===== 新增：最佳模型分析 =====
-            if ml_predictions and ratio_prediction:
-                ws[f'A{row}'] = "最佳模型分析"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 找出最佳模型（最接近比率法的模型）
-                optimal_model_key = None
-                algorithm_names = {
-                    'LinearRegression': '线性回归算法',
-                    'DecisionTree': '决策树算法',
-                    'RandomForest': '随机森林算法',
-                    'SupportVectorRegression': '支持向量机算法',
-                    'NeuralNetwork': '神经网络算法',
-                    "岭回归 (RidgeCV)": "岭回归算法"
-                }
-                min_diff_to_ratio = float('inf')  # 添加这行：初始化变量
-                for model_key_iter, model_pred_val in ml_predictions.items():
-                    if (model_key_iter != '集成平均预测' and 
-                        model_pred_val is not None and 
-                        isinstance(model_pred_val, (int, float))):
-                            diff = abs(model_pred_val - ratio_prediction)
-                            if diff < min_diff_to_ratio:
-                                min_diff_to_ratio = diff
-                                optimal_model_key = model_key_iter
-                
-                if optimal_model_key and ml_predictions.get(optimal_model_key) is not None:
-                    model_pred_val = ml_predictions[optimal_model_key]
-                    # 添加类型检查，确保预测值是数值类型
-                    if isinstance(model_pred_val, (int, float)):
-                        deviation_val = model_pred_val - ratio_prediction if ratio_prediction else 0
-                        deviation_pct = (deviation_val / ratio_prediction * 100) if ratio_prediction != 0 else 0
-                        
-                        ws[f'A{row}'] = "最佳单一模型:"
-                        ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                        ws[f'B{row}'] = f"{algorithm_names.get(optimal_model_key, optimal_model_key)}"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "最佳模型预测价格:"
-                        ws[f'B{row}'] = f"{model_pred_val:,.0f} 元"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "与比率法偏差:"
-                        ws[f'B{row}'] = f"{deviation_val:,.0f} 元 ({deviation_pct:.1f}%)"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "模型特点:"
-                        ws[f'B{row}'] = "基于历史项目数据训练，最接近传统比率法预测"
-                        row += 1
-                    else:
-                        # 如果最佳模型被停用，跳过计算或设置默认值
-                        deviation_val = 0
-                        deviation_pct = 0
-                row += 1
-           # ===== 新增：算法执行状态分析 =====
-            algorithm_status = report_data.get('算法执行状态', {})
-            if algorithm_status:
-                ws[f'A{row}'] = "算法执行状态分析"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                ws[f'A{row}'] = "AI算法可用性:"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                can_execute = algorithm_status.get('can_execute_ai', False)
-                ws[f'B{row}'] = "可用" if can_execute else "不可用"
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "启用算法数量:"
-                enabled_count = algorithm_status.get('enabled_count', 0)
-                total_count = algorithm_status.get('total_count', 0)
-                ws[f'B{row}'] = f"{enabled_count}/{total_count}"
-                row += 1
-                
-                ws[f'A{row}'] = "算法状态消息:"
-                ws[f'B{row}'] = algorithm_status.get('message', '无消息')
-                row += 1
-                
-                ws[f'A{row}'] = "可用算法列表:"
-                enabled_algorithms = algorithm_status.get('enabled_algorithms', [])
-                ws[f'B{row}'] = ', '.join(enabled_algorithms) if enabled_algorithms else '无可用算法'
-                row += 1
-                row += 1
-            
-            # ===== 新增：预测方法详细状态 =====
-            method_status = report_data.get('预测方法状态', {})
-            if method_status:
-                ws[f'A{row}'] = "预测方法详细状态"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 状态表头
-                status_headers = ['预测方法', '最终状态', '可执行', '可显示', '执行消息', '显示消息']
-                for col, header in enumerate(status_headers, 1):
-                    cell = ws.cell(row=row, column=col, value=header)
-                    cell.font = cell.font.copy(bold=True)
-                row += 1
-                
-                # 状态详情
-                status_mapping = {
-                    'fully_available': '完全可用',
-                    'execute_only': '可执行但显示禁用',
-                    'display_error': '显示启用但执行失败',
-                    'fully_disabled': '完全禁用',
-                    'unknown': '状态未知'
-                }
-                
-                for method_key, method_info in method_status.items():
-                    method_name = method_info.get('name', method_key)
-                    final_status = method_info.get('final_status', 'unknown')
-                    can_execute = method_info.get('can_execute', False)
-                    can_display = method_info.get('can_display', False)
-                    execution_msg = method_info.get('execution_message', '')
-                    display_msg = method_info.get('display_message', '')
-                    
-                    ws[f'A{row}'] = method_name
-                    ws[f'B{row}'] = status_mapping.get(final_status, final_status)
-                    ws[f'C{row}'] = "是" if can_execute else "否"
-                    ws[f'D{row}'] = "是" if can_display else "否"
-                    ws[f'E{row}'] = execution_msg[:50] + "..." if len(execution_msg) > 50 else execution_msg
-                    ws[f'F{row}'] = display_msg[:50] + "..." if len(display_msg) > 50 else display_msg
-                    row += 1
-                row += 1
-            
-            # ===== 新增：综合状态汇总 =====
-            prediction_status_summary = format_prediction_status_for_export(report_data.get('预测结果', {}))
-            if prediction_status_summary:
-                ws[f'A{row}'] = "综合状态汇总"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                ws[f'A{row}'] = "状态概览:"
-                ws[f'B{row}'] = prediction_status_summary.get('状态概览', '无信息')
-                row += 1
-                
-                ws[f'A{row}'] = "完全可用方法数:"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = str(prediction_status_summary.get('可用方法数量', 0))
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "算法执行能力:"
-                ws[f'B{row}'] = prediction_status_summary.get('算法执行能力', '未知')
-                row += 1
-                
-                ws[f'A{row}'] = "系统建议:"
-                if prediction_status_summary.get('可用方法数量', 0) == 4:
-                    suggestion = "系统运行正常，所有预测方法都可用，可进行全面分析"
-                elif prediction_status_summary.get('可用方法数量', 0) > 0:
-                    suggestion = "系统部分正常，建议检查相关配置以启用更多预测方法"
-                else:
-                    suggestion = "系统存在问题，建议检查算法配置和综合指标设置"
-                ws[f'B{row}'] = suggestion
-                row += 1
-                row += 1
-           
-            # ===== 新增：预测可信度评估 =====
-            if ensemble_prediction and ratio_prediction:
-                ws[f'A{row}'] = "预测可信度评估"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 计算差异百分比
-                diff_pct = abs(ensemble_prediction - ratio_prediction) / max(ensemble_prediction, ratio_prediction) * 100 if max(ensemble_prediction, ratio_prediction) != 0 else 0
-                
-                if diff_pct < 10:
-                    confidence = "高"
-                    recommendation = "两种方法预测总价接近，建议采用集成平均预测值。"
-                elif diff_pct < 20:
-                    confidence = "中"
-                    recommendation = "两种方法预测总价存在一定差异，建议结合项目特点综合判断。"
-                else:
-                    confidence = "低"
-                    recommendation = "两种方法预测总价差异较大，建议重新检查输入数据或寻求专家意见。"
-                
-                ws[f'A{row}'] = "机器学习集成预测:"
-                ws[f'B{row}'] = f"{ensemble_prediction:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "比率法预测:"
-                ws[f'B{row}'] = f"{ratio_prediction:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "预测差异:"
-                ws[f'B{row}'] = f"{diff_pct:.1f}%"
-                row += 1
-                
-                ws[f'A{row}'] = "可信度等级:"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = confidence
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "专业建议:"
-                ws[f'B{row}'] = recommendation
-                row += 1
-                row += 1
-            
-            # ===== 新增：预测总价区间建议 =====
-            if ensemble_prediction and ratio_prediction:
-                ws[f'A{row}'] = "预测总价区间建议"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                mid_value = (ensemble_prediction + ratio_prediction) / 2
-                min_value = min(ensemble_prediction, ratio_prediction)
-                max_value = max(ensemble_prediction, ratio_prediction)
-                buffer_10 = mid_value * 1.1
-                buffer_15 = mid_value * 1.15
-                
-                ws[f'A{row}'] = "预测总价中值:"
-                ws[f'B{row}'] = f"{mid_value:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "预测总价范围:"
-                ws[f'B{row}'] = f"{min_value:,.0f} - {max_value:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "建议预算(含10%缓冲):"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = f"{buffer_10:,.0f} 元"
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "保守预算(含15%缓冲):"
-                ws[f'B{row}'] = f"{buffer_15:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "预算说明:"
-                ws[f'B{row}'] = "建议在预测总价基础上增加10-15%的风险缓冲"
-                row += 1
-                row += 1
-            
-            # 成本构成分析（如果有估算的各项成本数据）
-            chart_data = []
-            if estimated_costs and any(cost > 0 for cost in estimated_costs.values()):
-                ws[f'A{row}'] = "成本构成分析"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 成本构成表头
-                cost_headers = ['成本项目', '预测成本(元)', '占总成本(%)', '备注']
-                for col, header in enumerate(cost_headers, 1):
-                    cell = ws.cell(row=row, column=col, value=header)
-                    cell.font = cell.font.copy(bold=True)
-                row += 1
-                
-                chart_start_row = row
-                total_estimated_cost = sum(estimated_costs.values())
-                
-                for cost_name, cost in estimated_costs.items():
-                    if cost > 0:
-                        percentage = (cost / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
-                        ws[f'A{row}'] = cost_name
-                        ws[f'B{row}'] = f"{cost:,.2f}"
-                        ws[f'C{row}'] = f"{percentage:.1f}%"
-                        ws[f'D{row}'] = "ML模型估算"
-                        chart_data.append([cost_name, cost])
-                        row += 1
-                
-                # 添加措施费到成本构成
-                if measures_cost_value > 0:
-                    percentage = (measures_cost_value / total_cost * 100) if total_cost > 0 else 0
-                    ws[f'A{row}'] = "措施费"
-                    ws[f'B{row}'] = f"{measures_cost_value:,.2f}"
-                    ws[f'C{row}'] = f"{percentage:.1f}%"
-                    ws[f'D{row}'] = "额外费用"
-                    chart_data.append(["措施费", measures_cost_value])
-                    row += 1
-                
-                chart_end_row = row - 1
-                row += 2
-                
-                # 创建成本构成饼图
-                if chart_data and len(chart_data) > 1:
-                    ws[f'A{row}'] = "成本构成分析图表"
-                    ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                    row += 1
-                    
-                    # 准备图表数据区域
-                    chart_data_start = row
-                    ws[f'A{row}'] = "成本项目"
-                    ws[f'B{row}'] = "预测成本"
-                    row += 1
-                    
-                    for cost_name, cost in chart_data:
-                        ws[f'A{row}'] = cost_name
-                        ws[f'B{row}'] = cost
-                        row += 1
-                    
-                    chart_data_end = row - 1
-                    
-                    try:
-                        # 创建饼图
-                        chart = PieChart()
-                        chart.title = "钢筋笼模式成本构成分析"
-                        
-                        labels = Reference(ws, min_col=1, min_row=chart_data_start+1, max_row=chart_data_end)
-                        data = Reference(ws, min_col=2, min_row=chart_data_start, max_row=chart_data_end)
-                        
-                        chart.add_data(data, titles_from_data=True)
-                        chart.set_categories(labels)
-                        
-                        # 设置图表样式
-                        chart.width = 20
-                        chart.height = 15
-                        chart.dataLabels = DataLabelList()
-                        chart.dataLabels.showPercent = True
-                        chart.dataLabels.showVal = False
-                        chart.dataLabels.showCatName = True
-                        chart.dataLabels.position = 'bestFit'
-                        
-                        # 添加图表到工作表
-                        ws.add_chart(chart, f"H{chart_data_start}")
-                        
-                    except Exception as chart_error:
-                        logger.warning(f"创建钢筋笼模式图表时出错，跳过图表生成: {chart_error}")
-                        ws[f'H{chart_data_start}'] = "图表生成失败，请检查数据完整性"
-            
-            # 调整列宽
-            for col_num in range(1, ws.max_column + 1):
-                column_letter = get_column_letter(col_num)
-                max_length = 0
-                for row_num in range(1, ws.max_row + 1):
-                    cell = ws.cell(row=row_num, column=col_num)
-                    if hasattr(cell, 'value') and cell.value is not None and str(cell.value).strip():
-                        try:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                        except:
-                            pass
-                adjusted_width = max(min(max_length + 2, 50), 10)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # 保存到临时文件并读取
-            excel_data = None
-            temp_file_path = None
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                    temp_file_path = tmp_file.name
-                    wb.save(tmp_file.name)
-                
-                wb.close()
-                
-                with open(temp_file_path, 'rb') as f:
-                    excel_data = f.read()
-                    
-            finally:
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.unlink(temp_file_path)
-                    except Exception as e:
-                        logger.warning(f"删除临时文件时出错: {e}")
-            
-            if excel_data is None:
-                raise Exception("无法读取Excel文件内容")
-            
-            # 生成文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"钢筋笼模式预测报告_{timestamp}.xlsx"
-
-            return dcc.send_bytes(excel_data, filename)
-            
-        except Exception as e:
-            logger.error(f"导出钢筋笼模式Excel报告或保存数据失败: {e}", exc_info=True)
+    def export_steel_cage_excel(n_clicks, result_id):
+        """导出钢筋笼模式报告为Excel"""
+        if not n_clicks:
             raise PreventUpdate
-
+        return _create_report_export(result_id, STEEL_CAGE_TEMPLATE, "钢筋笼模式预测报告", "钢筋笼模式")
 
     @app.callback(
         Output("download-steel-lining-report", "data"),
@@ -3054,980 +2485,32 @@ def register_price_prediction_callbacks(app):
         State("steel-lining-report-data", "data"),
         prevent_initial_call=True
     )
-    def export_steel_lining_excel(n_clicks, report_data):
+    def export_steel_lining_excel(n_clicks, result_id):
         """导出钢衬里模式报告为Excel（合并表格+扇形图）"""
-        if not n_clicks or not report_data:
-            raise PreventUpdate      
-        try:
-            from openpyxl import Workbook
-            from openpyxl.chart import PieChart, Reference
-            from openpyxl.chart.label import DataLabelList
-            from openpyxl.utils import get_column_letter
-            import tempfile
-            import os
-            
-            # 数据完整性检查
-            if not report_data:
-                raise Exception("报告数据为空，无法生成Excel文件")
-            
-            quantities = report_data.get('工程量数据', {})
-            ml_prediction_results = report_data.get('预测结果', {})
-            measures_cost_value = report_data.get('措施费', 0)
-            
-            # 获取预测结果
-            ml_predictions = ml_prediction_results.get("机器学习预测结果", {}) if ml_prediction_results else {}
-            ratio_prediction = ml_prediction_results.get("比率法预测总价") if ml_prediction_results else None
-            estimated_costs = ml_prediction_results.get("估算的各项成本 (用于ML的特征)", {}) if ml_prediction_results else {}
-            
-            # 计算总预测价格
-            ensemble_prediction = ml_predictions.get('集成平均预测') if ml_predictions else None
-            total_cost = ensemble_prediction or ratio_prediction or 0
-            
-            # 创建工作簿
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "钢衬里模式预测报告"
-            
-            # 设置标题
-            ws['A1'] = "钢衬里施工模式智能预测分析报告"
-            ws['A1'].font = ws['A1'].font.copy(bold=True, size=16)
-            ws.merge_cells('A1:E1')
-            
-            # 基本信息
-            row = 3
-            ws[f'A{row}'] = "报告概述"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            ws[f'A{row}'] = "施工模式:"
-            ws[f'B{row}'] = report_data.get('模式', '钢衬里施工模式')
-            row += 1
-            ws[f'A{row}'] = "生成时间:"
-            ws[f'B{row}'] = report_data.get('生成时间', '')
-            row += 1
-            ws[f'A{row}'] = "预测总价(元):"
-            ws[f'B{row}'] = f"{total_cost:,.0f}"
-            row += 2
-            
-            # 工程量数据
-            ws[f'A{row}'] = "工程量数据详情"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            # 工程量表头
-            quantity_headers = ['工程量项目', '数量', '单位', '备注']
-            for col, header in enumerate(quantity_headers, 1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = cell.font.copy(bold=True)
-            row += 1
-            
-            # 工程量数据
-            quantity_items = [
-                ('拼装场地总工程量', quantities.get('拼装场地总工程量', 0), '立方米'),
-                ('制作胎具总工程量', quantities.get('制作胎具总工程量', 0), '吨'),
-                ('钢支墩埋件总工程量', quantities.get('钢支墩埋件总工程量', 0), '吨'),
-                ('扶壁柱总工程量', quantities.get('扶壁柱总工程量', 0), '吨'),
-                ('走道板操作平台总工程量', quantities.get('走道板操作平台总工程量', 0), '吨'),
-                ('钢网梁总工程量', quantities.get('钢网梁总工程量', 0), '吨'),
-            ]
-            
-            for item_name, quantity, unit in quantity_items:
-                ws[f'A{row}'] = item_name
-                ws[f'B{row}'] = f"{quantity:.2f}"
-                ws[f'C{row}'] = unit
-                ws[f'D{row}'] = "用户输入或智能估算"
-                row += 1
-            
-            if measures_cost_value > 0:
-                ws[f'A{row}'] = "措施费"
-                ws[f'B{row}'] = f"{measures_cost_value:,.2f}"
-                ws[f'C{row}'] = "元"
-                ws[f'D{row}'] = "额外费用"
-                row += 1
-            row += 1
-            
-            # 预测结果
-            ws[f'A{row}'] = "预测结果分析"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            # 结果表头
-            result_headers = ['预测方法', '预测总价(元)', '可信度', '备注']
-            for col, header in enumerate(result_headers, 1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = cell.font.copy(bold=True)
-            row += 1
-            
-# 预测结果数据 - 适配新的状态结构（钢衬里模式）
-            prediction_status = report_data.get('预测方法状态', {})
-            
-            # AI预测结果处理
-            main_ai_result = report_data.get('主要AI预测', {})
-            ai_status = main_ai_result.get('status', 'unknown')
-            ai_value = main_ai_result.get('value')
-            
-            if ai_status == 'success' and isinstance(ai_value, (int, float)):
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = f"{ai_value:,.0f}"
-                ws[f'C{row}'] = "高"
-                ws[f'D{row}'] = "钢衬里模式多算法集成结果，预测成功"
-                row += 1
-            elif ai_status == 'display_disabled':
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = "显示被禁用"
-                ws[f'C{row}'] = "不适用"
-                ws[f'D{row}'] = main_ai_result.get('message', '钢衬里模式AI预测显示权限被禁用')
-                row += 1
-            elif ai_status == 'error':
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = "预测失败"
-                ws[f'C{row}'] = "低"
-                ws[f'D{row}'] = f"钢衬里模式AI预测错误: {main_ai_result.get('message', '未知错误')}"
-                row += 1
-            else:
-                ws[f'A{row}'] = "AI预测（机器学习集成）"
-                ws[f'B{row}'] = "不可用"
-                ws[f'C{row}'] = "无"
-                ws[f'D{row}'] = f"钢衬里模式AI预测状态: {ai_status}, 消息: {main_ai_result.get('message', '未知状态')}"
-                row += 1
-            
-            # 比率法预测结果处理
-            main_ratio_result = report_data.get('主要比率法预测', {})
-            ratio_status = main_ratio_result.get('status', 'unknown')
-            ratio_value = main_ratio_result.get('value')
-            
-            if ratio_status == 'success' and isinstance(ratio_value, (int, float)):
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = f"{ratio_value:,.0f}"
-                ws[f'C{row}'] = "中"
-                ws[f'D{row}'] = "钢衬里模式传统估算方法，预测成功"
-                row += 1
-            elif ratio_status == 'display_disabled':
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = "显示被禁用"
-                ws[f'C{row}'] = "不适用"
-                ws[f'D{row}'] = main_ratio_result.get('message', '钢衬里模式比率法预测显示权限被禁用')
-                row += 1
-            elif ratio_status == 'error':
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = "预测失败"
-                ws[f'C{row}'] = "低"
-                ws[f'D{row}'] = f"钢衬里模式比率法预测错误: {main_ratio_result.get('message', '未知错误')}"
-                row += 1
-            else:
-                ws[f'A{row}'] = "比率法预测"
-                ws[f'B{row}'] = "不可用"
-                ws[f'C{row}'] = "无"
-                ws[f'D{row}'] = f"钢衬里模式比率法预测状态: {ratio_status}, 消息: {main_ratio_result.get('message', '未知状态')}"
-                row += 1
-            row += 1
-            
-            # ===== 新增：钢衬里模式算法执行状态分析 =====
-            algorithm_status = report_data.get('算法执行状态', {})
-            if algorithm_status:
-                ws[f'A{row}'] = "钢衬里模式算法执行状态分析"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                ws[f'A{row}'] = "AI算法可用性:"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                can_execute = algorithm_status.get('can_execute_ai', False)
-                ws[f'B{row}'] = "可用" if can_execute else "不可用"
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "启用算法数量:"
-                enabled_count = algorithm_status.get('enabled_count', 0)
-                total_count = algorithm_status.get('total_count', 0)
-                ws[f'B{row}'] = f"{enabled_count}/{total_count}"
-                row += 1
-                
-                ws[f'A{row}'] = "算法状态消息:"
-                ws[f'B{row}'] = algorithm_status.get('message', '无消息')
-                row += 1
-                
-                ws[f'A{row}'] = "可用算法列表:"
-                enabled_algorithms = algorithm_status.get('enabled_algorithms', [])
-                ws[f'B{row}'] = ', '.join(enabled_algorithms) if enabled_algorithms else '钢衬里模式无可用算法'
-                row += 1
-                
-                ws[f'A{row}'] = "钢衬里模式特殊说明:"
-                ws[f'B{row}'] = "钢衬里模式使用与钢筋笼模式相同的算法配置，但数据特征不同"
-                row += 1
-                row += 1
-            
-            # ===== 新增：钢衬里模式预测方法详细状态 =====
-            method_status = report_data.get('预测方法状态', {})
-            if method_status:
-                ws[f'A{row}'] = "钢衬里模式预测方法详细状态"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 状态表头
-                status_headers = ['预测方法', '最终状态', '可执行', '可显示', '执行消息', '显示消息']
-                for col, header in enumerate(status_headers, 1):
-                    cell = ws.cell(row=row, column=col, value=header)
-                    cell.font = cell.font.copy(bold=True)
-                row += 1
-                
-                # 状态详情
-                status_mapping = {
-                    'fully_available': '完全可用',
-                    'execute_only': '可执行但显示禁用',
-                    'display_error': '显示启用但执行失败',
-                    'fully_disabled': '完全禁用',
-                    'unknown': '状态未知'
-                }
-                
-                for method_key, method_info in method_status.items():
-                    method_name = method_info.get('name', method_key)
-                    final_status = method_info.get('final_status', 'unknown')
-                    can_execute = method_info.get('can_execute', False)
-                    can_display = method_info.get('can_display', False)
-                    execution_msg = method_info.get('execution_message', '')
-                    display_msg = method_info.get('display_message', '')
-                    
-                    ws[f'A{row}'] = f"钢衬里-{method_name}"
-                    ws[f'B{row}'] = status_mapping.get(final_status, final_status)
-                    ws[f'C{row}'] = "是" if can_execute else "否"
-                    ws[f'D{row}'] = "是" if can_display else "否"
-                    ws[f'E{row}'] = execution_msg[:50] + "..." if len(execution_msg) > 50 else execution_msg
-                    ws[f'F{row}'] = display_msg[:50] + "..." if len(display_msg) > 50 else display_msg
-                    row += 1
-                row += 1
-            
-            # ===== 新增：钢衬里模式综合状态汇总 =====
-            prediction_status_summary = format_prediction_status_for_export(report_data.get('预测结果', {}))
-            if prediction_status_summary:
-                ws[f'A{row}'] = "钢衬里模式综合状态汇总"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                ws[f'A{row}'] = "状态概览:"
-                ws[f'B{row}'] = prediction_status_summary.get('状态概览', '无信息')
-                row += 1
-                
-                ws[f'A{row}'] = "完全可用方法数:"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = str(prediction_status_summary.get('可用方法数量', 0))
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "算法执行能力:"
-                ws[f'B{row}'] = prediction_status_summary.get('算法执行能力', '未知')
-                row += 1
-                
-                ws[f'A{row}'] = "钢衬里模式特征:"
-                ws[f'B{row}'] = "基于拼装场地、制作胎具、钢支墩埋件、扶壁柱、走道板平台、钢网梁等六大要素"
-                row += 1
-                
-                ws[f'A{row}'] = "系统建议:"
-                if prediction_status_summary.get('可用方法数量', 0) == 4:
-                    suggestion = "钢衬里模式系统运行正常，所有预测方法都可用，可进行全面分析"
-                elif prediction_status_summary.get('可用方法数量', 0) > 0:
-                    suggestion = "钢衬里模式系统部分正常，建议检查相关配置以启用更多预测方法"
-                else:
-                    suggestion = "钢衬里模式系统存在问题，建议检查算法配置和综合指标设置"
-                ws[f'B{row}'] = suggestion
-                row += 1
-                
-                ws[f'A{row}'] = "数据来源说明:"
-                ws[f'B{row}'] = "钢衬里模式使用 key_factors_2 和 price_baseline_2 表的历史数据"
-                row += 1
-                row += 1
-
-            # ===== 钢衬里模式特有的成本构成分析 =====
-            if estimated_costs and any(cost > 0 for cost in estimated_costs.values()):
-                ws[f'A{row}'] = "钢衬里模式成本构成详情"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 钢衬里模式特有的成本项分析
-                steel_lining_cost_items = [
-                    "拼装场地费用", "制作胎具费用", "钢支墩、埋件费用", 
-                    "扶壁柱费用", "走道板及操作平台费用", "钢网架费用"
-                ]
-                
-                ws[f'A{row}'] = "成本项目类型:"
-                ws[f'B{row}'] = "钢衬里施工六大费用要素"
-                row += 1
-                
-                ws[f'A{row}'] = "主要成本构成:"
-                cost_breakdown = []
-                total_estimated_cost = sum(estimated_costs.values())
-                
-                for item in steel_lining_cost_items:
-                    if item in estimated_costs and estimated_costs[item] > 0:
-                        percentage = (estimated_costs[item] / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
-                        cost_breakdown.append(f"{item}: {percentage:.1f}%")
-                
-                ws[f'B{row}'] = "; ".join(cost_breakdown) if cost_breakdown else "成本构成数据不完整"
-                row += 1
-                
-                ws[f'A{row}'] = "成本分析建议:"
-                if cost_breakdown:
-                    # 找出占比最大的成本项
-                    max_cost_item = max(steel_lining_cost_items, 
-                                      key=lambda x: estimated_costs.get(x, 0), 
-                                      default="未知")
-                    max_cost_value = estimated_costs.get(max_cost_item, 0)
-                    max_percentage = (max_cost_value / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
-                    
-                    if max_percentage > 40:
-                        suggestion = f"建议重点关注{max_cost_item}的成本控制，该项占总成本{max_percentage:.1f}%"
-                    elif max_percentage > 25:
-                        suggestion = f"{max_cost_item}是主要成本项(占{max_percentage:.1f}%)，需适当关注"
-                    else:
-                        suggestion = "钢衬里模式各成本项分布相对均衡，建议整体优化"
-                else:
-                    suggestion = "成本分析数据不足，建议完善工程量输入"
-                    
-                ws[f'B{row}'] = suggestion
-                row += 1
-                row += 1
-
-            
-            
-            # ===== 新增：最佳模型分析 =====
-            if ml_predictions and ratio_prediction:
-                ws[f'A{row}'] = "最佳模型分析"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 找出最佳模型（最接近比率法的模型）
-                optimal_model_key = None
-                algorithm_names = {
-                    'LinearRegression': '线性回归算法',
-                    'DecisionTree': '决策树算法',
-                    'RandomForest': '随机森林算法',
-                    'SupportVectorRegression': '支持向量机算法',
-                    'NeuralNetwork': '神经网络算法',
-                    "岭回归 (RidgeCV)": "岭回归算法"
-                }
-                min_diff_to_ratio = float('inf')  # 添加这行：初始化变量
-                for model_key_iter, model_pred_val in ml_predictions.items():
-                    if (model_key_iter != '集成平均预测' and 
-                        model_pred_val is not None and 
-                        isinstance(model_pred_val, (int, float))):  # 添加类型检查
-                        diff = abs(model_pred_val - ratio_prediction)
-                        if diff < min_diff_to_ratio:
-                            min_diff_to_ratio = diff
-                            optimal_model_key = model_key_iter
-                
-                if optimal_model_key and ml_predictions.get(optimal_model_key) is not None:
-                    model_pred_val = ml_predictions[optimal_model_key]
-                    if isinstance(model_pred_val, (int, float)):
-                        deviation_val = model_pred_val - ratio_prediction if ratio_prediction else 0
-                        deviation_pct = (deviation_val / ratio_prediction * 100) if ratio_prediction != 0 else 0
-                        
-                        ws[f'A{row}'] = "最佳单一模型:"
-                        ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                        ws[f'B{row}'] = f"{algorithm_names.get(optimal_model_key, optimal_model_key)}"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "最佳模型预测价格:"
-                        ws[f'B{row}'] = f"{model_pred_val:,.0f} 元"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "与比率法偏差:"
-                        ws[f'B{row}'] = f"{deviation_val:,.0f} 元 ({deviation_pct:.1f}%)"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "模型特点:"
-                        ws[f'B{row}'] = "基于历史项目数据训练，最接近传统比率法预测"
-                        row += 1
-                row += 1
-            
-            # ===== 新增：预测可信度评估 =====
-            if ensemble_prediction and ratio_prediction:
-                ws[f'A{row}'] = "预测可信度评估"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 计算差异百分比
-                diff_pct = abs(ensemble_prediction - ratio_prediction) / max(ensemble_prediction, ratio_prediction) * 100 if max(ensemble_prediction, ratio_prediction) != 0 else 0
-                
-                if diff_pct < 10:
-                    confidence = "高"
-                    recommendation = "两种方法预测总价接近，建议采用集成平均预测值。"
-                elif diff_pct < 20:
-                    confidence = "中"
-                    recommendation = "两种方法预测总价存在一定差异，建议结合项目特点综合判断。"
-                else:
-                    confidence = "低"
-                    recommendation = "两种方法预测总价差异较大，建议重新检查输入数据或寻求专家意见。"
-                
-                ws[f'A{row}'] = "机器学习集成预测:"
-                ws[f'B{row}'] = f"{ensemble_prediction:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "比率法预测:"
-                ws[f'B{row}'] = f"{ratio_prediction:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "预测差异:"
-                ws[f'B{row}'] = f"{diff_pct:.1f}%"
-                row += 1
-                
-                ws[f'A{row}'] = "可信度等级:"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = confidence
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "专业建议:"
-                ws[f'B{row}'] = recommendation
-                row += 1
-                row += 1
-            
-            # ===== 新增：预测总价区间建议 =====
-            if ensemble_prediction and ratio_prediction:
-                ws[f'A{row}'] = "预测总价区间建议"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                mid_value = (ensemble_prediction + ratio_prediction) / 2
-                min_value = min(ensemble_prediction, ratio_prediction)
-                max_value = max(ensemble_prediction, ratio_prediction)
-                buffer_10 = mid_value * 1.1
-                buffer_15 = mid_value * 1.15
-                
-                ws[f'A{row}'] = "预测总价中值:"
-                ws[f'B{row}'] = f"{mid_value:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "预测总价范围:"
-                ws[f'B{row}'] = f"{min_value:,.0f} - {max_value:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "建议预算(含10%缓冲):"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = f"{buffer_10:,.0f} 元"
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "保守预算(含15%缓冲):"
-                ws[f'B{row}'] = f"{buffer_15:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "预算说明:"
-                ws[f'B{row}'] = "建议在预测总价基础上增加10-15%的风险缓冲"
-                row += 1
-                row += 1
-            
-            # 成本构成分析（如果有估算的各项成本数据）
-            chart_data = []
-            if estimated_costs and any(cost > 0 for cost in estimated_costs.values()):
-                ws[f'A{row}'] = "成本构成分析"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 成本构成表头
-                cost_headers = ['成本项目', '预测成本(元)', '占总成本(%)', '备注']
-                for col, header in enumerate(cost_headers, 1):
-                    cell = ws.cell(row=row, column=col, value=header)
-                    cell.font = cell.font.copy(bold=True)
-                row += 1
-                
-                chart_start_row = row
-                total_estimated_cost = sum(estimated_costs.values())
-                
-                for cost_name, cost in estimated_costs.items():
-                    if cost > 0:
-                        percentage = (cost / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
-                        ws[f'A{row}'] = cost_name
-                        ws[f'B{row}'] = f"{cost:,.2f}"
-                        ws[f'C{row}'] = f"{percentage:.1f}%"
-                        ws[f'D{row}'] = "ML模型估算"
-                        chart_data.append([cost_name, cost])
-                        row += 1
-                
-                # 添加措施费到成本构成
-                if measures_cost_value > 0:
-                    percentage = (measures_cost_value / total_cost * 100) if total_cost > 0 else 0
-                    ws[f'A{row}'] = "措施费"
-                    ws[f'B{row}'] = f"{measures_cost_value:,.2f}"
-                    ws[f'C{row}'] = f"{percentage:.1f}%"
-                    ws[f'D{row}'] = "额外费用"
-                    chart_data.append(["措施费", measures_cost_value])
-                    row += 1
-                
-                chart_end_row = row - 1
-                row += 2
-                
-                # 创建成本构成饼图
-                if chart_data and len(chart_data) > 1:
-                    ws[f'A{row}'] = "成本构成分析图表"
-                    ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                    row += 1
-                    
-                    # 准备图表数据区域
-                    chart_data_start = row
-                    ws[f'A{row}'] = "成本项目"
-                    ws[f'B{row}'] = "预测成本"
-                    row += 1
-                    
-                    for cost_name, cost in chart_data:
-                        ws[f'A{row}'] = cost_name
-                        ws[f'B{row}'] = cost
-                        row += 1
-                    
-                    chart_data_end = row - 1
-                    
-                    try:
-                        # 创建钢衬里模式专用饼图
-                        chart = PieChart()
-                        chart.title = "钢衬里模式成本构成分析"
-                        
-                        labels = Reference(ws, min_col=1, min_row=chart_data_start+1, max_row=chart_data_end)
-                        data = Reference(ws, min_col=2, min_row=chart_data_start, max_row=chart_data_end)
-                        
-                        chart.add_data(data, titles_from_data=True)
-                        chart.set_categories(labels)
-                        
-                        # 钢衬里模式图表样式设置
-                        chart.width = 20
-                        chart.height = 15
-                        chart.dataLabels = DataLabelList()
-                        chart.dataLabels.showPercent = True
-                        chart.dataLabels.showVal = False
-                        chart.dataLabels.showCatName = True
-                        chart.dataLabels.position = 'bestFit'
-                        
-                        # 添加图表到工作表
-                        ws.add_chart(chart, f"H{chart_data_start}")
-                        
-                        # 添加钢衬里模式图表说明
-                        ws[f"H{chart_data_start + 20}"] = "图表说明：钢衬里模式基于六大费用要素的成本分布"
-                        
-                    except Exception as chart_error:
-                        logger.warning(f"创建钢衬里模式图表时出错，跳过图表生成: {chart_error}")
-                        ws[f'H{chart_data_start}'] = "钢衬里模式图表生成失败，请检查数据完整性"
-                        ws[f'H{chart_data_start + 1}'] = "可能原因：成本数据不完整或Excel组件限制"
-            
-            # 调整列宽
-            for col_num in range(1, ws.max_column + 1):
-                column_letter = get_column_letter(col_num)
-                max_length = 0
-                for row_num in range(1, ws.max_row + 1):
-                    cell = ws.cell(row=row_num, column=col_num)
-                    if hasattr(cell, 'value') and cell.value is not None and str(cell.value).strip():
-                        try:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                        except:
-                            pass
-                adjusted_width = max(min(max_length + 2, 50), 10)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # 保存到临时文件并读取
-            excel_data = None
-            temp_file_path = None
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                    temp_file_path = tmp_file.name
-                    wb.save(tmp_file.name)
-                
-                wb.close()
-                
-                with open(temp_file_path, 'rb') as f:
-                    excel_data = f.read()
-                    
-            finally:
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.unlink(temp_file_path)
-                    except Exception as e:
-                        logger.warning(f"删除临时文件时出错: {e}")
-            
-            if excel_data is None:
-                raise Exception("无法读取Excel文件内容")
-            
-            # 生成钢衬里模式专用文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"钢衬里模式预测报告_{timestamp}.xlsx"
-
-            return dcc.send_bytes(excel_data, filename)
-            
-        except Exception as e:
-            logger.error(f"导出钢衬里模式Excel报告或保存数据失败: {e}", exc_info=True)
+        if not n_clicks:
             raise PreventUpdate
-        
+        return _create_report_export(result_id, STEEL_LINING_TEMPLATE, "钢衬里模式预测报告", "钢衬里模式")
+
     @app.callback(
         Output("download-custom-mode-report", "data"),
         Input("export-custom-mode-report-btn", "n_clicks"),
         State("custom-mode-report-data", "data"),
         prevent_initial_call=True
     )
-    def export_custom_mode_excel(n_clicks, report_data):
+    def export_custom_mode_excel(n_clicks, result_id):
         """导出自定义模式报告为Excel（合并表格+扇形图）"""
-        if not n_clicks or not report_data:
-            raise PreventUpdate      
-        try:
-            from openpyxl import Workbook
-            from openpyxl.chart import PieChart, Reference
-            from openpyxl.chart.label import DataLabelList
-            from openpyxl.utils import get_column_letter
-            import tempfile
-            import os
-            
-            # 数据完整性检查
-            if not report_data:
-                raise Exception("报告数据为空，无法生成Excel文件")
-            
-            total_prediction = report_data.get('预测结果', {})
-            total_cost = total_prediction.get('total_predicted_cost', 0)
-            input_params = report_data.get('输入参数', [])
-            param_costs = total_prediction.get('param_costs', {})
-            
-            # 检查关键数据
-            if total_cost <= 0:
-                logger.warning("预测总价为0或负数，可能影响报告质量")
-            
-            if not input_params:
-                logger.warning("输入参数为空，报告内容可能不完整")
-            
-            if not param_costs:
-                logger.warning("参数成本数据为空，无法生成成本分析")
-            
-            # 创建工作簿
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "自定义模式预测报告"
-            
-            # 设置标题
-            ws['A1'] = "自定义模式智能预测分析报告"
-            ws['A1'].font = ws['A1'].font.copy(bold=True, size=16)
-            ws.merge_cells('A1:E1')
-            
-            # 基本信息
-            row = 3
-            ws[f'A{row}'] = "报告概述"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            ws[f'A{row}'] = "施工模式:"
-            ws[f'B{row}'] = report_data.get('模式', '自定义模式')
-            row += 1
-            ws[f'A{row}'] = "生成时间:"
-            ws[f'B{row}'] = report_data.get('生成时间', '')
-            row += 1
-            
-            total_prediction = report_data.get('预测结果', {})
-            total_cost = total_prediction.get('total_predicted_cost', 0)
-            ws[f'A{row}'] = "预测总价(元):"
-            ws[f'B{row}'] = f"{total_cost:,.0f}"
-            row += 2
-            
-            # 输入参数
-            ws[f'A{row}'] = "输入参数详情"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            # 参数表头
-            param_headers = ['参数名称', '工程量', '工程量占比(%)', '价格量(元)', '价格占比(%)', '关键因素']
-            for col, header in enumerate(param_headers, 1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = cell.font.copy(bold=True)
-            row += 1
-            
-            # 参数数据
-            if input_params:
-                for param in input_params:
-                    ws[f'A{row}'] = param.get('name', '未知参数')
-                    ws[f'B{row}'] = f"{param.get('quantity', 0):.2f}"
-                    ws[f'C{row}'] = f"{param.get('quantity_ratio', 0):.2f}"
-                    ws[f'D{row}'] = f"{param.get('price_amount', 0):,.2f}"
-                    ws[f'E{row}'] = f"{param.get('price_ratio', 0):.2f}"
-                    ws[f'F{row}'] = param.get('key_factor', '')
-                    row += 1
-            else:
-                # 如果没有输入参数，添加提示信息
-                ws[f'A{row}'] = "暂无输入参数"
-                ws[f'B{row}'] = "0.00"
-                ws[f'C{row}'] = "0.00"
-                ws[f'D{row}'] = "0.00"
-                ws[f'E{row}'] = "0.00"
-                ws[f'F{row}'] = "请检查参数输入"
-                row += 1
-            row += 1
-            
-            # ===== 新增：自定义模式预测方法说明 =====
-            ws[f'A{row}'] = "预测方法说明"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            ws[f'A{row}'] = "预测模式:"
-            ws[f'B{row}'] = "自定义参数智能估算"
-            row += 1
-            
-            ws[f'A{row}'] = "计算方法:"
-            ws[f'B{row}'] = "基于用户输入参数和占比关系进行成本估算"
-            row += 1
-            
-            ws[f'A{row}'] = "预测总价:"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-            ws[f'B{row}'] = f"{total_cost:,.0f} 元"
-            ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-            row += 1
-            
-            ws[f'A{row}'] = "可信度评估:"
-            if total_cost > 0 and input_params and len(input_params) >= 2:
-                confidence = "中等"
-                suggestion = "基于用户自定义参数，建议结合项目实际情况验证"
-            elif total_cost > 0:
-                confidence = "较低"
-                suggestion = "参数较少，建议增加更多参数提高预测准确性"
-            else:
-                confidence = "低"
-                suggestion = "预测总价异常，请检查参数输入的合理性"
-            
-            ws[f'B{row}'] = confidence
-            row += 1
-            
-            ws[f'A{row}'] = "专业建议:"
-            ws[f'B{row}'] = suggestion
-            row += 2
-            
-            # ===== 新增：自定义模式预算建议 =====
-            if total_cost > 0:
-                ws[f'A{row}'] = "预算建议"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                buffer_10 = total_cost * 1.1
-                buffer_15 = total_cost * 1.15
-                buffer_20 = total_cost * 1.2
-                
-                ws[f'A{row}'] = "基准预算:"
-                ws[f'B{row}'] = f"{total_cost:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "建议预算(含10%缓冲):"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                ws[f'B{row}'] = f"{buffer_10:,.0f} 元"
-                ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-                row += 1
-                
-                ws[f'A{row}'] = "保守预算(含15%缓冲):"
-                ws[f'B{row}'] = f"{buffer_15:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "风险预算(含20%缓冲):"
-                ws[f'B{row}'] = f"{buffer_20:,.0f} 元"
-                row += 1
-                
-                ws[f'A{row}'] = "缓冲说明:"
-                ws[f'B{row}'] = "自定义模式建议增加15-20%缓冲以应对不确定性"
-                row += 2
-            
-            # 预测结果
-            ws[f'A{row}'] = "预测结果分析"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-            row += 1
-            
-            # 结果表头
-            result_headers = ['参数名称', '预测成本(元)', '占总成本(%)', '备注']
-            for col, header in enumerate(result_headers, 1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = cell.font.copy(bold=True)
-            row += 1
-            
-            # 结果数据
-            chart_data = []  # 初始化图表数据列表
-            chart_start_row = row  # 记录图表数据开始行
-            
-            if param_costs and any(cost > 0 for cost in param_costs.values()):
-                for param_name, cost in param_costs.items():
-                    if cost > 0:
-                        percentage = (cost / total_cost * 100) if total_cost > 0 else 0
-                        ws[f'A{row}'] = param_name
-                        ws[f'B{row}'] = f"{cost:,.2f}"
-                        ws[f'C{row}'] = f"{percentage:.1f}%"
-                        ws[f'D{row}'] = "智能估算"
-                        chart_data.append([param_name, cost])
-                        row += 1
-            else:
-                # 如果没有成本数据，添加提示信息
-                ws[f'A{row}'] = "暂无成本预测数据"
-                ws[f'B{row}'] = "0.00"
-                ws[f'C{row}'] = "0.0%"
-                ws[f'D{row}'] = "请检查参数配置"
-                row += 1
-            
-            # 总计行
-            ws[f'A{row}'] = "总计"
-            ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-            ws[f'B{row}'] = f"{total_cost:,.0f}"
-            ws[f'B{row}'].font = ws[f'B{row}'].font.copy(bold=True)
-            ws[f'C{row}'] = "100.0%"
-            ws[f'C{row}'].font = ws[f'C{row}'].font.copy(bold=True)
-            ws[f'D{row}'] = "预测总价"
-            ws[f'D{row}'].font = ws[f'D{row}'].font.copy(bold=True)
-            chart_end_row = row - 1
-            row += 2
-            
-            # 创建成本构成饼图 - 只有在有有效数据时才创建
-            if chart_data and len(chart_data) > 1 and total_cost > 0:
-                ws[f'A{row}'] = "成本构成分析图表"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 准备图表数据区域
-                chart_data_start = row
-                ws[f'A{row}'] = "参数名称"
-                ws[f'B{row}'] = "预测成本"
-                row += 1
-                
-                for param_name, cost in chart_data:
-                    ws[f'A{row}'] = param_name
-                    ws[f'B{row}'] = cost
-                    row += 1
-                
-                chart_data_end = row - 1
-                
-                try:
-                    # 创建饼图
-                    chart = PieChart()
-                    chart.title = "成本构成分析"
-                    
-                    labels = Reference(ws, min_col=1, min_row=chart_data_start+1, max_row=chart_data_end)
-                    data = Reference(ws, min_col=2, min_row=chart_data_start, max_row=chart_data_end)
-                    
-                    chart.add_data(data, titles_from_data=True)
-                    chart.set_categories(labels)
-                    
-                    # 设置图表样式 - 放大图表并优化标签
-                    chart.width = 20  # 放大宽度
-                    chart.height = 15  # 放大高度
-                    chart.dataLabels = DataLabelList()
-                    chart.dataLabels.showPercent = True
-                    chart.dataLabels.showVal = False  # 不显示具体数值，避免重叠
-                    chart.dataLabels.showCatName = True  # 显示类别名称
-                    chart.dataLabels.position = 'bestFit'  # 自动最佳位置
-                    
-                    # 添加图表到工作表
-                    ws.add_chart(chart, f"H{chart_data_start}")
-                    
-                except Exception as chart_error:
-                    logger.warning(f"创建图表时出错，跳过图表生成: {chart_error}")
-                    # 添加提示信息
-                    ws[f'H{chart_data_start}'] = "图表生成失败，请检查数据完整性"
-                
-                # 添加智能分析建议
-                row += 2
-                ws[f'A{row}'] = "智能分析建议"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                
-                # 找出成本最高的参数
-                if param_costs:
-                    try:
-                        max_cost_param = max(param_costs.items(), key=lambda x: x[1] if x[1] > 0 else 0)
-                        max_cost_percentage = (max_cost_param[1] / total_cost * 100) if total_cost > 0 else 0
-                        
-                        ws[f'A{row}'] = "主要成本项:"
-                        ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                        ws[f'B{row}'] = f"{max_cost_param[0]} (占{max_cost_percentage:.1f}%)"
-                        row += 1
-                        
-                        ws[f'A{row}'] = "成本优化建议:"
-                        ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                        if max_cost_percentage > 50:
-                            suggestion = "主要成本项占比较高，建议重点关注该项目的成本控制"
-                        elif max_cost_percentage > 30:
-                            suggestion = "成本分布相对集中，建议平衡各项成本投入"
-                        else:
-                            suggestion = "成本分布较为均衡，建议保持当前配置"
-                        ws[f'B{row}'] = suggestion
-                        row += 1
-                        
-                        # 自定义模式特有的建议
-                        ws[f'A{row}'] = "自定义模式建议:"
-                        ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True)
-                        ws[f'B{row}'] = "建议结合实际项目经验，对关键参数进行细化和验证"
-                        row += 1
-                        
-                    except Exception as analysis_error:
-                        logger.warning(f"生成分析建议时出错: {analysis_error}")
-                        ws[f'A{row}'] = "分析建议生成失败，请检查数据完整性"
-                        row += 1
-            else:
-                # 如果没有足够的数据创建图表，添加说明
-                ws[f'A{row}'] = "数据不足，无法生成成本构成图表"
-                ws[f'A{row}'].font = ws[f'A{row}'].font.copy(bold=True, size=14)
-                row += 1
-                ws[f'A{row}'] = "建议："
-                ws[f'B{row}'] = "1. 检查输入参数是否完整"
-                row += 1
-                ws[f'A{row}'] = ""
-                ws[f'B{row}'] = "2. 确保至少有2个有效的成本项目"
-                row += 1
-                ws[f'A{row}'] = ""
-                ws[f'B{row}'] = "3. 检查预测总价是否大于0"
-                row += 1
-            
-            # 调整列宽 - 修复这里的问题
-            for col_num in range(1, ws.max_column + 1):
-                column_letter = get_column_letter(col_num)  # 直接使用 get_column_letter 函数
-                max_length = 0
-                for row_num in range(1, ws.max_row + 1):
-                    cell = ws.cell(row=row_num, column=col_num)
-                    # 检查单元格是否是合并单元格的一部分
-                    if hasattr(cell, 'value') and cell.value is not None and str(cell.value).strip():
-                        try:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                        except:
-                            pass
-                # 设置最小宽度为10，最大宽度为50
-                adjusted_width = max(min(max_length + 2, 50), 10)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # 保存到临时文件并读取
-            excel_data = None
-            temp_file_path = None
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                    temp_file_path = tmp_file.name
-                    wb.save(tmp_file.name)
-                
-                # 确保工作簿已关闭
-                wb.close()
-                
-                # 读取文件内容
-                with open(temp_file_path, 'rb') as f:
-                    excel_data = f.read()
-                    
-            finally:
-                # 安全删除临时文件
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.unlink(temp_file_path)
-                    except PermissionError:
-                        # 如果无法删除，记录警告但不影响主要功能
-                        logger.warning(f"无法删除临时文件: {temp_file_path}")
-                    except Exception as e:
-                        logger.warning(f"删除临时文件时出错: {e}")
-            
-            if excel_data is None:
-                raise Exception("无法读取Excel文件内容")
-            
-            # 生成文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"自定义模式预测报告_{timestamp}.xlsx"
-        
-            return dcc.send_bytes(excel_data, filename)
-            
-        except Exception as e:
-            logger.error(f"导出自定义模式Excel报告或保存数据失败: {e}", exc_info=True)
+        if not n_clicks:
             raise PreventUpdate
-        
+        return _create_report_export(result_id, CUSTOM_MODE_TEMPLATE, "自定义模式预测报告", "自定义模式")
 
 
     # ========== 新增：保存数据到数据库的回调函数 ==========
+
+    def _expired_result_alert():
+        return dbc.Alert([
+            html.I(className="fas fa-exclamation-triangle me-2"),
+            "预测结果已过期，请重新预测后再保存。"
+        ], color="warning", duration=6000)
     
     @app.callback(
         Output("steel-cage-save-feedback", "children"),
@@ -4035,11 +2518,15 @@ def register_price_prediction_callbacks(app):
         State("steel-cage-report-data", "data"),
         prevent_initial_call=True
     )
-    def save_steel_cage_data_to_database(n_clicks, report_data):
+    def save_steel_cage_data_to_database(n_clicks, result_id):
         """保存钢筋笼模式数据到数据库"""
-        if not n_clicks or not report_data:
+        if not n_clicks or not result_id:
             raise PreventUpdate
-        
+
+        report_data = get_result(result_id)
+        if not report_data:
+            return _expired_result_alert()
+
         try:
             # 调用已有的保存函数
             save_success = save_report_to_database(report_data, "steel_cage")
@@ -4068,11 +2555,15 @@ def register_price_prediction_callbacks(app):
         State("steel-lining-report-data", "data"),
         prevent_initial_call=True
     )
-    def save_steel_lining_data_to_database(n_clicks, report_data):
+    def save_steel_lining_data_to_database(n_clicks, result_id):
         """保存钢衬里模式数据到数据库"""
-        if not n_clicks or not report_data:
+        if not n_clicks or not result_id:
             raise PreventUpdate
-        
+
+        report_data = get_result(result_id)
+        if not report_data:
+            return _expired_result_alert()
+
         try:
             # 调用已有的保存函数
             save_success = save_report_to_database(report_data, "steel_lining")
@@ -4101,11 +2592,15 @@ def register_price_prediction_callbacks(app):
         State("custom-mode-report-data", "data"),
         prevent_initial_call=True
     )
-    def save_custom_mode_data_to_database(n_clicks, report_data):
+    def save_custom_mode_data_to_database(n_clicks, result_id):
         """保存自定义模式数据到数据库"""
-        if not n_clicks or not report_data:
+        if not n_clicks or not result_id:
             raise PreventUpdate
-        
+
+        report_data = get_result(result_id)
+        if not report_data:
+            return _expired_result_alert()
+
         try:
             # 调用已有的保存函数
             save_success = save_report_to_database(report_data, "custom_mode")
@@ -4221,50 +2716,17 @@ def register_price_prediction_callbacks(app):
 
     def get_indicator_status_from_db():
         """
-        从basic_indicators表查询所有指标的状态 - 增强版本
-        
+        获取basic_indicators表中所有指标的状态
+
+        状态来自进程内指标状态缓存（见 utils/indicator_status_cache.py），
+        数据管理模块修改基础指标后缓存会失效并重新加载。
+
         Returns:
             dict: {指标名称: 状态} 的字典，状态为 'enabled' 或 'disabled'
         """
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # 查询所有指标的名称和状态
-            query = """
-            SELECT name, status FROM basic_indicators 
-            WHERE status IN ('enabled', 'disabled')
-            ORDER BY name
-            """
-            
-            cursor.execute(query)
-            results = cursor.fetchall()
-            
-            # 构建状态字典
-            status_dict = {}
-            for row in results:
-                indicator_name = row['name']
-                status = row['status']
-                status_dict[indicator_name] = status
-                
-            logger.info(f"成功查询到 {len(status_dict)} 个指标的状态信息")
-            
-            # 添加详细的调试信息
-            for indicator_name, status in status_dict.items():
-                logger.info(f"指标 '{indicator_name}' 状态: {status}")
-                
-            return status_dict
-            
-        except mysql.connector.Error as e:
-            logger.error(f"查询指标状态时MySQL错误: {e}")
-            return {}
-        except Exception as e:
-            logger.error(f"查询指标状态时发生错误: {e}")
-            return {}
-        finally:
-            if conn:
-                conn.close()
+        status_dict = get_basic_indicator_status()
+        logger.debug(f"获取到 {len(status_dict)} 个指标的状态信息")
+        return status_dict
 
     def get_field_status_for_mode(mode):
         """
@@ -4292,7 +2754,7 @@ def register_price_prediction_callbacks(app):
             # 获取该指标在数据库中的状态
             db_status = indicator_status.get(indicator_name, 'enabled')  # 默认启用
             
-            logger.info(f"指标 '{indicator_name}' 在数据库中的状态: {db_status}")
+            logger.debug(f"指标 '{indicator_name}' 在数据库中的状态: {db_status}")
             
             # 为该指标下的所有字段设置状态
             fields = config.get('fields', [])
@@ -4306,7 +2768,7 @@ def register_price_prediction_callbacks(app):
                         'section_title': section_title,
                         'message': f'已禁用 - 若启用请到数据管理模块打开「{indicator_name}」指标'
                     }
-                    logger.info(f"字段 {field_id} 被设置为禁用状态（对应指标: {indicator_name}）")
+                    logger.debug(f"字段 {field_id} 被设置为禁用状态（对应指标: {indicator_name}）")
                 else:
                     field_status[field_id] = {
                         'status': 'enabled',
@@ -4314,13 +2776,13 @@ def register_price_prediction_callbacks(app):
                         'section_title': section_title,
                         'message': ''
                     }
-                    logger.info(f"字段 {field_id} 被设置为启用状态（对应指标: {indicator_name}）")
+                    logger.debug(f"字段 {field_id} 被设置为启用状态（对应指标: {indicator_name}）")
         
         logger.info(f"为模式 {mode} 生成了 {len(field_status)} 个字段的状态信息")
         
         # 添加详细的字段状态日志
         for field_id, status_info in field_status.items():
-            logger.info(f"字段状态详情 - {field_id}: {status_info}")
+            logger.debug(f"字段状态详情 - {field_id}: {status_info}")
         # ===== 新增：添加算法状态影响的额外检查 =====
         try:
             # 检查算法执行能力对字段状态的影响
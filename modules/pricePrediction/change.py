@@ -1,22 +1,17 @@
+import hashlib
+
 import pandas as pd
 import mysql.connector
-from sqlalchemy import create_engine
-import urllib.parse
-
-# 导入MySQL配置和连接函数
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4',
-    'autocommit': True  # 默认启用自动提交
-}
+
+# 导入MySQL配置和连接函数（共享连接池，见 utils/db_pool.py）
+from utils.db_pool import get_engine, get_connection as get_pooled_connection
+from utils.schema_cache import invalidate_schema_cache
+from utils.search_index import invalidate_search_index_for_table
 
 def get_connection():
-    """获取MySQL数据库连接"""
+    """获取MySQL数据库连接（从共享连接池借出，close() 时归还）"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         return conn
     except Exception as e:
         print(f"MySQL连接失败: {e}")
@@ -52,21 +47,169 @@ def load_table_from_db(table_name: str):
 
 def get_sqlalchemy_engine():
     """
-    创建SQLAlchemy引擎用于pandas的to_sql方法
+    获取SQLAlchemy引擎用于pandas的to_sql方法（共享连接池引擎，不再每次新建）
     """
     try:
-        # URL编码密码以处理特殊字符
-        password = urllib.parse.quote_plus(MYSQL_CONFIG['password'])
-        
-        # 构建连接字符串
-        connection_string = f"mysql+pymysql://{MYSQL_CONFIG['user']}:{password}@{MYSQL_CONFIG['host']}/{MYSQL_CONFIG['database']}?charset={MYSQL_CONFIG['charset']}"
-        
-        engine = create_engine(connection_string)
-        return engine
+        return get_engine()
     except Exception as e:
         print(f"创建SQLAlchemy引擎失败: {e}")
         return None
 
+# 记录每个汇总表上次同步时源数据指纹的状态表
+SUMMARY_SYNC_STATE_TABLE = 'summary_sync_state'
+
+# 汇总表中保存每行内容哈希的列，用于判断哪些项目需要重新写入
+ROW_HASH_COLUMN = '_row_hash'
+
+# 批量写入 / 删除时每批的行数
+UPSERT_BATCH_SIZE = 500
+
+# 等待同一汇总表的其他同步任务完成的最长时间（秒）
+SUMMARY_LOCK_TIMEOUT = 30
+
+
+def _to_db_value(value):
+    """将 pandas/numpy 值转换为 mysql.connector 可接受的 Python 值"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _batched(items, size=UPSERT_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _compute_source_fingerprint(cursor, table_names, params):
+    """源表校验和与处理参数组成的指纹，任一源表内容变化时指纹随之变化"""
+    parts = [repr(params)]
+    for table_name in table_names:
+        cursor.execute(f"CHECKSUM TABLE `{table_name}`")
+        row = cursor.fetchone()
+        parts.append(f"{table_name}:{row[1] if row else None}")
+    return hashlib.md5("|".join(parts).encode('utf-8')).hexdigest()
+
+
+def _ensure_sync_state_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{SUMMARY_SYNC_STATE_TABLE}` (
+            `output_table` VARCHAR(64) NOT NULL PRIMARY KEY,
+            `source_fingerprint` CHAR(32) NOT NULL,
+            `rows_written` INT NOT NULL DEFAULT 0,
+            `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def _get_table_columns(cursor, table_name):
+    """获取表的列名和数据类型，表不存在时返回空字典"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (table_name,))
+    return {name: data_type.lower() for name, data_type in cursor.fetchall()}
+
+
+def _get_column_definitions(cursor, table_name):
+    """获取表的列名和完整列类型（如 varchar(100)、decimal(10,2)）"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table_name,))
+    return dict(cursor.fetchall())
+
+
+def _add_missing_columns(cursor, output_table_name, source_table_name, df_columns, existing_columns):
+    """
+    补充汇总表缺少的列，返回新增的列名
+
+    源表或处理结果中新出现的列按源表的列类型追加，源表中没有的计算列使用 DOUBLE。
+    """
+    missing = [col for col in df_columns if col not in existing_columns]
+    if not missing:
+        return []
+    source_types = _get_column_definitions(cursor, source_table_name)
+    for col in missing:
+        cursor.execute(f"ALTER TABLE `{output_table_name}` ADD COLUMN `{col}` "
+                       f"{source_types.get(col, 'DOUBLE')} NULL")
+    return missing
+
+
+def _ensure_summary_table(cursor, output_table_name, source_table_name, df_columns, key_column):
+    """
+    确保汇总表存在、以项目列为唯一键，且包含当前处理结果的全部列
+
+    按源表结构创建汇总表，补充源表中没有的列和行哈希列；汇总表已存在时，
+    源表或处理结果中新增的列每次同步都会补到汇总表上。
+    旧版本用 to_sql(if_exists='replace') 生成的无键汇总表会被重建一次。
+    """
+    columns = _get_table_columns(cursor, output_table_name)
+    if columns and ROW_HASH_COLUMN not in columns:
+        print(f"汇总表 '{output_table_name}' 为旧版本结构（无唯一键），重建为带键的汇总表。")
+        cursor.execute(f"DROP TABLE `{output_table_name}`")
+        columns = {}
+
+    if columns:
+        added = _add_missing_columns(cursor, output_table_name, source_table_name, df_columns, columns)
+        if added:
+            print(f"汇总表 '{output_table_name}' 新增列: {added}")
+            invalidate_schema_cache(f"汇总表 {output_table_name} 新增列")
+        return
+
+    cursor.execute(f"CREATE TABLE `{output_table_name}` LIKE `{source_table_name}`")
+    columns = _get_table_columns(cursor, output_table_name)
+    _add_missing_columns(cursor, output_table_name, source_table_name, df_columns, columns)
+    cursor.execute(f"ALTER TABLE `{output_table_name}` ADD COLUMN `{ROW_HASH_COLUMN}` VARCHAR(20) NULL")
+
+    key_type = _get_table_columns(cursor, output_table_name).get(key_column, '')
+    key_expr = f"`{key_column}`(191)" if key_type.endswith(('text', 'blob')) else f"`{key_column}`"
+    cursor.execute(f"ALTER TABLE `{output_table_name}` ADD UNIQUE KEY `uk_summary_project` ({key_expr})")
+    invalidate_schema_cache(f"创建汇总表 {output_table_name}")
+
+
+def _upsert_summary_rows(cursor, output_table_name, df):
+    """用批量 INSERT ... ON DUPLICATE KEY UPDATE 写入（或更新）汇总行"""
+    columns = list(df.columns)
+    column_list = ", ".join(f"`{col}`" for col in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    updates = ", ".join(f"`{col}` = VALUES(`{col}`)" for col in columns)
+    query = (f"INSERT INTO `{output_table_name}` ({column_list}) VALUES ({placeholders}) "
+             f"ON DUPLICATE KEY UPDATE {updates}")
+
+    rows = [tuple(_to_db_value(v) for v in row) for row in df.itertuples(index=False, name=None)]
+    for batch in _batched(rows):
+        cursor.executemany(query, batch)
+    return len(rows)
+
+
+def _delete_summary_rows(cursor, output_table_name, key_column, keys):
+    """批量删除源表中已不存在的项目"""
+    keys = list(keys)
+    for batch in _batched(keys):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM `{output_table_name}` WHERE `{key_column}` IN ({placeholders})",
+                       tuple(_to_db_value(k) for k in batch))
+    return len(keys)
+
+
+def _update_target_column_in_place(cursor, table_name, key_column, target_column, df_before, df_after):
+    """输出表即源表时，只对汇总值发生变化的项目执行批量 UPDATE"""
+    before = df_before.set_index(key_column)[target_column]
+    after = df_after.set_index(key_column)[target_column]
+    before = pd.to_numeric(before.reindex(after.index), errors='coerce')
+    after_numeric = pd.to_numeric(after, errors='coerce')
+    changed = after_numeric.ne(before) & ~(after_numeric.isna() & before.isna())
+
+    rows = [(_to_db_value(value), _to_db_value(key)) for key, value in after[changed].items()]
+    query = f"UPDATE `{table_name}` SET `{target_column}` = %s WHERE `{key_column}` = %s"
+    for batch in _batched(rows):
+        cursor.executemany(query, batch)
+    return len(rows)
+
+
 def process_and_update_databases(
     table1_name: str,
     project_col_db1: str,
@@ -80,7 +223,12 @@ def process_and_update_databases(
     if_exists_behavior: str = 'replace'
 ) -> bool:
     """
-    从MySQL数据库读取数据，处理数据，并将结果写入指定表中。
+    从MySQL数据库读取数据，处理数据，并将结果增量写入指定表中。
+
+    源表（table1、table2）与上次同步相比没有变化时直接跳过；否则重新读取并汇总两张源表
+    （汇总计算仍是全量的），只把结果发生变化的项目用批量 INSERT ... ON DUPLICATE KEY UPDATE
+    写入以项目列为唯一键的汇总表，不再删除重建整张表，并发请求也不会读到正在重建的表。
+    同一汇总表同一时间只有一个同步任务，等待同步锁超时时跳过本次同步并返回 False。
 
     参数:
         table1_name (str): 第一个源数据表的名称。
@@ -89,95 +237,179 @@ def process_and_update_databases(
         material_quantity_col_db1 (str): table1中表示模块化施工材料工程量的列名。
         target_param_category_value (str): table1中参数类别列要筛选的值 (例如 '钢筋吨数')。
         table2_name (str): 第二个目标数据表的名称。
-        project_col_db2 (str): table2中表示项目的列名 (用于匹配)。
+        project_col_db2 (str): table2中表示项目的列名 (用于匹配)，同时作为汇总表的唯一键。
         target_sum_col_db2 (str): table2中需要更新的总数/吨数列名。
         output_table_name (str): 保存更新后数据的表名。
-        if_exists_behavior (str): 当输出表已存在时的行为 ('fail', 'replace', 'append')。
-                                 默认为 'replace'。
+        if_exists_behavior (str): 'replace' 时删除汇总表中源表已不存在的项目；
+                                 'append' 时保留这些项目；'fail' 时汇总表已存在且不是
+                                 由本函数维护的则失败。默认为 'replace'。
 
     返回:
         bool: 如果成功完成则返回 True，否则返回 False。
     """
     print("--- 开始数据处理 ---")
+    lock_name = f"summary:{output_table_name}"
+    params = (table1_name, project_col_db1, param_category_col_db1, material_quantity_col_db1,
+              target_param_category_value, table2_name, project_col_db2, target_sum_col_db2,
+              output_table_name, if_exists_behavior)
 
-    # --- 步骤 1: 从表1读取数据并处理 ---
-    print(f"正在从MySQL数据库表 '{table1_name}' 读取数据...")
-    df1 = load_table_from_db(table1_name)
+    conn = None
+    locked = False
+    try:
+        conn = get_pooled_connection(autocommit=False)
+        cursor = conn.cursor()
 
-    required_cols_df1 = [project_col_db1, param_category_col_db1, material_quantity_col_db1]
-    for col in required_cols_df1:
-        if col not in df1.columns:
-            print(f"错误: 列 '{col}' 在表 '{table1_name}' 中未找到。")
-            print(f"可用列为: {df1.columns.tolist()}")
+        # 同一汇总表同一时间只允许一个同步任务，其他请求等待后直接命中"未变化"
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (lock_name, SUMMARY_LOCK_TIMEOUT))
+        locked = cursor.fetchone()[0] == 1
+        if not locked:
+            # 不在没有锁的情况下写入：其他同步任务仍在进行，下次同步会按指纹补上本次变化
+            print(f"警告: 等待汇总表 '{output_table_name}' 的同步锁超时，跳过本次同步。")
             return False
 
-    df1_filtered = df1[df1[param_category_col_db1] == target_param_category_value]
-    if df1_filtered.empty:
-        print(f"警告: 在表 '{table1_name}' 中未找到参数类别为 '{target_param_category_value}' 的数据。")
-    
-    df1_extracted = df1_filtered[[project_col_db1, material_quantity_col_db1]].copy()
-    df1_extracted[material_quantity_col_db1] = pd.to_numeric(df1_extracted[material_quantity_col_db1], errors='coerce')
-    df1_extracted.dropna(subset=[material_quantity_col_db1], inplace=True)
+        _ensure_sync_state_table(cursor)
+        source_tables = [table1_name, table2_name]
+        fingerprint = _compute_source_fingerprint(cursor, source_tables, params)
+        cursor.execute(f"SELECT `source_fingerprint` FROM `{SUMMARY_SYNC_STATE_TABLE}` WHERE `output_table` = %s",
+                       (output_table_name,))
+        state_row = cursor.fetchone()
+        output_exists = bool(_get_table_columns(cursor, output_table_name))
+        if state_row and state_row[0] == fingerprint and output_exists:
+            conn.commit()
+            print(f"源数据未变化，跳过汇总表 '{output_table_name}' 的更新。")
+            return True
 
-    if df1_extracted.empty:
-        print(f"警告: 筛选和转换后，从 '{table1_name}' 中没有有效的 '{material_quantity_col_db1}' 数据用于聚合。")
-        project_material_sum = pd.DataFrame(columns=[project_col_db1, 'calculated_sum'])
-    else:
-        project_material_sum = df1_extracted.groupby(project_col_db1)[material_quantity_col_db1].sum().reset_index()
-        project_material_sum.rename(columns={material_quantity_col_db1: 'calculated_sum'}, inplace=True)
+        # --- 步骤 1: 从表1读取目标参数类别的数据并聚合 ---
+        print(f"正在从MySQL数据库表 '{table1_name}' 读取数据...")
+        table1_columns = _get_table_columns(cursor, table1_name)
+        for col in [project_col_db1, param_category_col_db1, material_quantity_col_db1]:
+            if col not in table1_columns:
+                print(f"错误: 列 '{col}' 在表 '{table1_name}' 中未找到。")
+                print(f"可用列为: {list(table1_columns)}")
+                return False
 
-    print("--- 从表1计算得到的项目材料总量 ---")
-    print(project_material_sum if not project_material_sum.empty else "无数据可聚合。")
-    print("\n")
+        df1_extracted = pd.read_sql(
+            f"SELECT `{project_col_db1}`, `{material_quantity_col_db1}` FROM `{table1_name}` "
+            f"WHERE `{param_category_col_db1}` = %s",
+            conn, params=(target_param_category_value,))
+        if df1_extracted.empty:
+            print(f"警告: 在表 '{table1_name}' 中未找到参数类别为 '{target_param_category_value}' 的数据。")
 
-    # --- 步骤 2: 从表2读取数据 ---
-    print(f"正在从MySQL数据库表 '{table2_name}' 读取数据...")
-    df2 = load_table_from_db(table2_name)
+        df1_extracted[material_quantity_col_db1] = pd.to_numeric(df1_extracted[material_quantity_col_db1], errors='coerce')
+        df1_extracted.dropna(subset=[material_quantity_col_db1], inplace=True)
 
-    # 检查项目列和目标更新列是否存在于df2
-    if project_col_db2 not in df2.columns:
-        print(f"错误: 项目匹配列 '{project_col_db2}' 在表 '{table2_name}' 中未找到。")
-        print(f"可用列为: {df2.columns.tolist()}")
-        return False
-    if target_sum_col_db2 not in df2.columns:
-        print(f"警告: 目标更新列 '{target_sum_col_db2}' 在表 '{table2_name}' 中未找到。将创建此列。")
-        df2[target_sum_col_db2] = pd.NA
+        if df1_extracted.empty:
+            print(f"警告: 筛选和转换后，从 '{table1_name}' 中没有有效的 '{material_quantity_col_db1}' 数据用于聚合。")
+            project_material_sum = pd.DataFrame(columns=[project_col_db1, 'calculated_sum'])
+        else:
+            project_material_sum = df1_extracted.groupby(project_col_db1)[material_quantity_col_db1].sum().reset_index()
+            project_material_sum.rename(columns={material_quantity_col_db1: 'calculated_sum'}, inplace=True)
 
-    # --- 步骤 3: 将计算结果合并到表2的数据中 ---
-    df2_updated = pd.merge(df2, project_material_sum, left_on=project_col_db2, right_on=project_col_db1, how='left')
+        print(f"--- 从表1计算得到 {len(project_material_sum)} 个项目的材料总量 ---")
 
-    # --- 步骤 4: 更新目标列 ---
-    update_mask = df2_updated['calculated_sum'].notna()
-    df2_updated.loc[update_mask, target_sum_col_db2] = df2_updated['calculated_sum']
+        # --- 步骤 2: 从表2读取数据 ---
+        print(f"正在从MySQL数据库表 '{table2_name}' 读取数据...")
+        df2 = pd.read_sql(f"SELECT * FROM `{table2_name}`", conn)
 
-    # 移除合并时产生的辅助列
-    if project_col_db1 in df2_updated.columns and project_col_db1 != project_col_db2:
-        df2_updated.drop(columns=[project_col_db1], inplace=True)
-    if 'calculated_sum' in df2_updated.columns:
-        df2_updated.drop(columns=['calculated_sum'], inplace=True)
+        if project_col_db2 not in df2.columns:
+            print(f"错误: 项目匹配列 '{project_col_db2}' 在表 '{table2_name}' 中未找到。")
+            print(f"可用列为: {df2.columns.tolist()}")
+            return False
+        if target_sum_col_db2 not in df2.columns:
+            print(f"警告: 目标更新列 '{target_sum_col_db2}' 在表 '{table2_name}' 中未找到。将创建此列。")
+            df2[target_sum_col_db2] = pd.NA
 
-    print("--- 更新后的数据预览 (准备写入数据库) ---")
-    print(df2_updated.head())
-    print("\n")
+        # 汇总表以项目列为唯一键：跳过没有项目标识的行，重复项目保留最后一行
+        missing_key = df2[project_col_db2].isna()
+        if missing_key.any():
+            print(f"警告: 表 '{table2_name}' 中有 {int(missing_key.sum())} 行缺少 '{project_col_db2}'，已跳过。")
+        df2 = df2[~missing_key]
+        duplicated = df2[project_col_db2].duplicated(keep='last')
+        if duplicated.any():
+            print(f"警告: 表 '{table2_name}' 中有 {int(duplicated.sum())} 个重复的 '{project_col_db2}'，保留最后一行。")
+        df2 = df2[~duplicated].reset_index(drop=True)
 
-    # --- 步骤 5: 将更新后的数据保存到MySQL数据库的表中 ---
-    try:
-        engine = get_sqlalchemy_engine()
-        if engine is None:
-            print("无法创建数据库引擎，保存失败。")
-            return False
-            
-        df2_updated.to_sql(output_table_name, engine, if_exists=if_exists_behavior, index=False, method='multi')
-        print(f"处理完成！更新后的数据已保存到MySQL数据库的表 '{output_table_name}' 中。")
-        if if_exists_behavior == 'replace' and output_table_name == table2_name:
-            print(f"警告: 原有表 '{table2_name}' 在MySQL数据库中已被替换。")
+        # --- 步骤 3: 将计算结果合并到表2的数据中 ---
+        df2_updated = pd.merge(df2, project_material_sum, left_on=project_col_db2, right_on=project_col_db1, how='left')
+
+        # --- 步骤 4: 更新目标列 ---
+        update_mask = df2_updated['calculated_sum'].notna()
+        df2_updated.loc[update_mask, target_sum_col_db2] = df2_updated['calculated_sum']
+
+        # 移除合并时产生的辅助列
+        if project_col_db1 in df2_updated.columns and project_col_db1 != project_col_db2:
+            df2_updated.drop(columns=[project_col_db1], inplace=True)
+        if 'calculated_sum' in df2_updated.columns:
+            df2_updated.drop(columns=['calculated_sum'], inplace=True)
+
+        # --- 步骤 5: 增量写入MySQL数据库 ---
+        if output_table_name == table2_name:
+            # 输出表即源表：只更新汇总值变化的项目
+            if target_sum_col_db2 not in _get_table_columns(cursor, table2_name):
+                cursor.execute(f"ALTER TABLE `{table2_name}` ADD COLUMN `{target_sum_col_db2}` DOUBLE NULL")
+                invalidate_schema_cache(f"表 {table2_name} 新增列 {target_sum_col_db2}")
+            written = _update_target_column_in_place(
+                cursor, table2_name, project_col_db2, target_sum_col_db2, df2, df2_updated)
+            removed = 0
+        else:
+            if if_exists_behavior == 'fail' and output_exists and \
+                    ROW_HASH_COLUMN not in _get_table_columns(cursor, output_table_name):
+                print(f"错误: 表 '{output_table_name}' 已存在。")
+                return False
+
+            # 建表 / 加列属于 DDL，会隐式提交；放在写入之前，后续写入、删除和同步状态在同一事务中提交
+            _ensure_summary_table(cursor, output_table_name, table2_name, df2_updated.columns, project_col_db2)
+
+            df2_updated[ROW_HASH_COLUMN] = pd.util.hash_pandas_object(df2_updated, index=False).astype(str).to_numpy()
+            existing = pd.read_sql(
+                f"SELECT `{project_col_db2}`, `{ROW_HASH_COLUMN}` FROM `{output_table_name}`", conn)
+            existing_hashes = dict(zip(existing[project_col_db2], existing[ROW_HASH_COLUMN]))
+
+            # 只写入新增项目和内容变化的项目
+            changed = [existing_hashes.get(key) != row_hash for key, row_hash
+                       in zip(df2_updated[project_col_db2], df2_updated[ROW_HASH_COLUMN])]
+            written = _upsert_summary_rows(cursor, output_table_name, df2_updated[changed])
+
+            removed = 0
+            if if_exists_behavior != 'append':
+                stale_keys = set(existing_hashes) - set(df2_updated[project_col_db2])
+                removed = _delete_summary_rows(cursor, output_table_name, project_col_db2, stale_keys)
+
+        # 写入后重新计算指纹（输出表即源表时，源表内容刚被更新）
+        fingerprint = _compute_source_fingerprint(cursor, source_tables, params)
+        cursor.execute(f"""
+            INSERT INTO `{SUMMARY_SYNC_STATE_TABLE}` (`output_table`, `source_fingerprint`, `rows_written`)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE `source_fingerprint` = VALUES(`source_fingerprint`),
+                                    `rows_written` = VALUES(`rows_written`)
+        """, (output_table_name, fingerprint, written))
+        conn.commit()
+
+        print(f"处理完成！表 '{output_table_name}' 更新 {written} 个项目，删除 {removed} 个项目"
+              f"（共 {len(df2_updated)} 个项目）。")
         return True
+
     except mysql.connector.Error as e:
         print(f"MySQL数据库错误 (写入表 '{output_table_name}'): {e}")
+        if conn:
+            conn.rollback()
         return False
     except Exception as e:
         print(f"保存到MySQL数据库表 '{output_table_name}' 时出错: {e}")
+        if conn:
+            conn.rollback()
         return False
+    finally:
+        if conn:
+            if locked:
+                try:
+                    release_cursor = conn.cursor()
+                    release_cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+                    release_cursor.fetchone()
+                    release_cursor.close()
+                except Exception as e:
+                    print(f"释放汇总表同步锁失败: {e}")
+            conn.close()
 
 def create_sample_tables_for_testing():
     """
@@ -236,6 +468,7 @@ def create_sample_tables_for_testing():
         )
         
         conn.commit()
+        invalidate_search_index_for_table('price_baseline_1', "示例数据已重建")
         print("示例表和数据创建完成。")
         
     except mysql.connector.Error as e:
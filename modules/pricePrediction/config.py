@@ -1,3 +1,5 @@
+import os
+
 # ==================== 价格预测模块配置 ====================
 #STEEL_CAGE_PRICE_DB = r"E:\1codefiles\python\Dash_app\project_20250703_V9\project_20250524_V5.1\project_20250427_V3\Data.db"
 #STEEL_CAGE_KEY_FACTORS_DB = r"E:\1codefiles\python\Dash_app\project_20250703_V9\project_20250524_V5.1\project_20250427_V3\Data.db"
@@ -51,4 +53,22 @@ STEEL_LINING_ML_FEATURES = [
     "扶壁柱费用",
     "走道板及操作平台费用",
     "钢网架费用"
-]
\ No newline at end of file
+]
+
+# ==================== 模型训练并行配置 ====================
+# 是否并行训练各机器学习模型（False 时按顺序逐个训练）
+ML_TRAINING_PARALLEL = os.getenv('ML_TRAINING_PARALLEL', 'true').lower() == 'true'
+# 并行训练的线程数（5 个模型同时训练时无需超过 5）
+ML_TRAINING_MAX_WORKERS = int(os.getenv('ML_TRAINING_MAX_WORKERS', '5'))
+# 单个模型训练超时时间（秒），超时的模型将被跳过
+ML_TRAINING_MODEL_TIMEOUT = float(os.getenv('ML_TRAINING_MODEL_TIMEOUT', '300'))
+# 随机森林使用的 CPU 核数（-1 表示全部核心）
+RANDOM_FOREST_N_JOBS = int(os.getenv('RANDOM_FOREST_N_JOBS', '-1'))
+
+# ==================== 增量更新配置 ====================
+# 新增历史项目时是否增量更新聚类和规则库（False 时始终全量重新训练）
+INCREMENTAL_UPDATE_ENABLED = os.getenv('INCREMENTAL_UPDATE_ENABLED', 'true').lower() == 'true'
+# 自上次全量聚类以来新增行数占比超过该值时，重新执行全量聚类
+INCREMENTAL_RECLUSTER_ROW_RATIO = float(os.getenv('INCREMENTAL_RECLUSTER_ROW_RATIO', '0.5'))
+# 簇中心（标准化后）相对上次全量聚类的最大偏移超过该值时，重新执行全量聚类
+INCREMENTAL_RECLUSTER_CENTER_SHIFT = float(os.getenv('INCREMENTAL_RECLUSTER_CENTER_SHIFT', '0.5'))
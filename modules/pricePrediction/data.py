@@ -3,6 +3,8 @@
 import pandas as pd
 import numpy as np
 import mysql.connector  # 替换sqlite3
+from utils.db_pool import get_connection as get_pooled_connection
+from utils.indicator_status_cache import get_cached_algorithm_configs, get_comprehensive_indicator_status
 from sklearn.linear_model import RidgeCV, LinearRegression
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
@@ -10,11 +12,13 @@ from sklearn.svm import SVR
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
 import warnings
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 logger = logging.getLogger(__name__)
 warnings.filterwarnings('ignore')
@@ -26,15 +30,6 @@ from .translation import (
     PRICE_PREDICTION_TABLE_TRANSLATIONS
 )
 
-MYSQL_CONFIG = {
-    'host': 'localhost',  # 修改为您的MySQL服务器地址
-    'user': 'dash',  # 修改为您的MySQL用户名
-    'password': '123456',  # 修改为您的MySQL密码
-    'database': 'dash_project',  # 修改为您的MySQL数据库名
-    'charset': 'utf8mb4',
-    'autocommit': True  # 默认启用自动提交
-}
-
 
 # 算法名称映射配置
 ALGORITHM_NAME_MAPPING = {
@@ -79,9 +74,9 @@ def get_model_key_from_db_name(db_name):
 
 
 def get_connection():
-    """获取MySQL数据库连接"""
+    """获取MySQL数据库连接（从共享连接池借出，close() 时归还）"""
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        conn = get_pooled_connection()
         return conn
     except Exception as e:
         print(f"MySQL连接失败: {e}")
@@ -90,11 +85,31 @@ def get_connection():
 # 导入配置
 from .config import (
     STEEL_CAGE_COL_MAPPING, STEEL_CAGE_ML_FEATURES,
-    STEEL_LINING_COL_MAPPING, STEEL_LINING_ML_FEATURES
+    STEEL_LINING_COL_MAPPING, STEEL_LINING_ML_FEATURES,
+    ML_TRAINING_PARALLEL, ML_TRAINING_MAX_WORKERS, ML_TRAINING_MODEL_TIMEOUT,
+    RANDOM_FOREST_N_JOBS,
+    INCREMENTAL_RECLUSTER_ROW_RATIO, INCREMENTAL_RECLUSTER_CENTER_SHIFT
 )
+from .rule_stats import RuleStatistics, RuleObservation, RULE_MEAN, RULE_MEDIAN
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+# 预测时需要估算的全部工程量列（按模式取历史数据中存在的列）
+ESTIMATED_QUANTITY_COLUMNS = [
+    '拼装场地总工程量', '制作胎具总工程量', '钢支墩埋件总工程量', '扶壁柱总工程量',
+    '走道板操作平台总工程量', '钢网梁总工程量',
+    '钢筋总吨数', '塔吊租赁工程量', '吊索具数量', '套筒数量',
+    '钢支墩埋件混凝土剔凿总工程量', '钢支墩埋件混凝土回填总工程量',
+    '钢支墩埋件安装总工程量', '钢支墩埋件制作总工程量',
+    '扶壁柱安装总工程量', '扶壁柱拆除总工程量', '扶壁柱构件使用折旧总工程量',
+    '走道板操作平台制作总工程量', '走道板操作平台搭设总工程量', '走道板操作平台拆除总工程量',
+    '钢网架制作总工程量', '钢网架安装总工程量', '钢网架拆除总工程量',
+]
+
+# 模型预测值的合理范围（超出范围视为无效预测）
+PREDICTION_VALID_RANGE = (0, 5000000000)
+
+
 class CostPredictionSystem:
     """钢筋笼/钢衬里施工成本预测系统"""
 
@@ -113,6 +128,11 @@ class CostPredictionSystem:
         self.global_rules = {}
         self.use_clustering = True
         self.n_clusters = 2
+        # 增量更新：规则统计量、在线聚类器及上次全量聚类的基准
+        self.global_rule_stats = RuleStatistics()
+        self.cluster_rule_stats = {}
+        self.cluster_updater = None
+        self.cluster_baseline = None
 
         # 机器学习模型
         self.models = {}
@@ -170,6 +190,10 @@ class CostPredictionSystem:
         # 新增：算法参数缓存
         self.algorithm_parameters_cache = {}
         self.parameters_loaded = False
+        # 模型并行训练配置
+        self.parallel_training = ML_TRAINING_PARALLEL
+        self.training_max_workers = ML_TRAINING_MAX_WORKERS
+        self.model_training_timeout = ML_TRAINING_MODEL_TIMEOUT
 
 
     def load_algorithm_parameters_from_db(self):
@@ -511,7 +535,8 @@ class CostPredictionSystem:
                 random_state=42,
                 n_estimators=forest_params.get('n_estimators', 10),
                 max_depth=forest_params.get('max_depth', 2),
-                max_features=max_features
+                max_features=max_features,
+                n_jobs=RANDOM_FOREST_N_JOBS
             ))
         ])
         
@@ -563,54 +588,33 @@ class CostPredictionSystem:
         return models_config
 
     def load_algorithm_configs(self):
-        """从数据库加载算法配置信息"""
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # 查询当前模式下的算法配置
-            query = """
-            SELECT algorithm_name, status, parameters, model_description, application_scenario
-            FROM algorithm_configs 
-            WHERE construction_mode = %s OR construction_mode = 'general'
-            ORDER BY algorithm_name
-            """
-            
-            cursor.execute(query, (self.mode,))
-            results = cursor.fetchall()
-            
-            self.algorithm_configs = {}
-            self.enabled_algorithms = {}
-            
-            for row in results:
-                algorithm_name = row['algorithm_name']
-                self.algorithm_configs[algorithm_name] = {
-                    'status': row['status'],
-                    'parameters': row['parameters'],
-                    'description': row['model_description'],
-                    'scenario': row['application_scenario']
-                }
-                
-                # 如果算法启用，加入启用列表
-                if row['status'] == 'enabled':
-                    self.enabled_algorithms[algorithm_name] = True
-                    
-            self.algorithm_status_loaded = True
-            self.logger.info(f"成功加载 {len(self.algorithm_configs)} 个算法配置")
-            self.logger.info(f"启用的算法: {list(self.enabled_algorithms.keys())}")
-            
-            return True
-            
-        except mysql.connector.Error as e:
-            self.logger.error(f"加载算法配置失败: {e}")
-            return False
-        except Exception as e:
-            self.logger.error(f"加载算法配置时发生错误: {e}")
+        """加载算法配置信息（来自进程内指标状态缓存，算法配置修改后缓存失效）"""
+        results = get_cached_algorithm_configs(self.mode)
+        if results is None:
+            self.logger.error("加载算法配置失败")
             return False
-        finally:
-            if conn:
-                conn.close()
+
+        self.algorithm_configs = {}
+        self.enabled_algorithms = {}
+
+        for row in results:
+            algorithm_name = row['algorithm_name']
+            self.algorithm_configs[algorithm_name] = {
+                'status': row['status'],
+                'parameters': row['parameters'],
+                'description': row['model_description'],
+                'scenario': row['application_scenario']
+            }
+
+            # 如果算法启用，加入启用列表
+            if row['status'] == 'enabled':
+                self.enabled_algorithms[algorithm_name] = True
+
+        self.algorithm_status_loaded = True
+        self.logger.info(f"成功加载 {len(self.algorithm_configs)} 个算法配置")
+        self.logger.info(f"启用的算法: {list(self.enabled_algorithms.keys())}")
+
+        return True
     
     def get_enabled_algorithm_names(self):
         """获取启用的算法名称列表"""
@@ -900,6 +904,51 @@ class CostPredictionSystem:
             self.is_trained = False
             return False
 
+    # 训练完成后需要持久化的属性（拟合好的模型、聚类器和规则库）
+    TRAINED_STATE_ATTRS = (
+        'df_historical', 'models', 'scaler_cluster', 'kmeans',
+        'cluster_rules', 'global_rules', 'use_clustering', 'n_clusters',
+        'algorithm_parameters_cache', 'parameters_loaded',
+        'global_rule_stats', 'cluster_rule_stats', 'cluster_updater', 'cluster_baseline',
+    )
+
+    def get_trained_state(self):
+        """
+        导出训练后的状态，用于保存到磁盘
+
+        Returns:
+            dict: 训练状态字典；系统未训练时返回 None
+        """
+        if not self.is_trained:
+            return None
+        state = {attr: getattr(self, attr) for attr in self.TRAINED_STATE_ATTRS}
+        state['mode'] = self.mode
+        return state
+
+    def restore_trained_state(self, state):
+        """
+        从训练状态字典恢复系统，无需重新加载数据和训练
+
+        Args:
+            state (dict): get_trained_state() 导出的状态
+
+        Returns:
+            bool: 恢复成功返回True
+        """
+        if not state or state.get('mode') != self.mode:
+            self.logger.warning(f"训练状态与当前模式不匹配，无法恢复 for {self.mode}")
+            return False
+
+        for attr in self.TRAINED_STATE_ATTRS:
+            if attr in state:
+                setattr(self, attr, state[attr])
+
+        # 算法启用状态和综合指标状态仍从数据库实时加载
+        self.load_comprehensive_indicators_status()
+        self.is_trained = True
+        self.logger.info(f"已从持久化状态恢复预测系统 for {self.mode}，模型数: {len(self.models)}")
+        return True
+
     # 新增：参数配置对比方法（用于验证）
 
     def log_parameter_comparison(self):
@@ -935,6 +984,8 @@ class CostPredictionSystem:
     def _perform_clustering(self):
         # 聚类特征需要根据模式进行调整
         cluster_features = [f for f in self.cluster_features_for_matching if f in self.df_historical.columns]
+        self.cluster_updater = None
+        self.cluster_baseline = {'rows': len(self.df_historical), 'new_rows': 0, 'centers': None}
 
         if not cluster_features or len(self.df_historical) < self.n_clusters * 2:
             self.logger.warning(f"警告：数据点过少或聚类特征缺失 ({len(self.df_historical)}), 无法有效聚类 for {self.mode}，将使用全局平均规则")
@@ -966,6 +1017,17 @@ class CostPredictionSystem:
             self.logger.error(f"执行KMeans聚类出错 for {self.mode}: {e}. 回退到全局规则。", exc_info=True)
             self.use_clustering = False
             self.df_historical['cluster_label'] = 0
+            return
+
+        # 以全量聚类结果为起点创建在线聚类器，新增项目时用 partial_fit 更新簇中心
+        try:
+            updater = MiniBatchKMeans(n_clusters=kmeans.n_clusters, init=kmeans.cluster_centers_,
+                                      n_init=1, random_state=42)
+            updater.partial_fit(X_scaled_for_clustering)
+            self.cluster_updater = updater
+            self.cluster_baseline['centers'] = kmeans.cluster_centers_.copy()
+        except Exception as e:
+            self.logger.warning(f"创建增量聚类器失败 for {self.mode}: {e}，新增数据时将全量重新聚类")
 
     def _build_rules(self):
         if self.df_historical is None or self.df_historical.empty:
@@ -973,120 +1035,232 @@ class CostPredictionSystem:
             return
 
         # 计算全局平均规则（作为后备）
-        self.global_rules = self._calculate_rules_for_df(self.df_historical)
-        self.logger.debug(f"Global rules for {self.mode}: {json.dumps(self.global_rules, indent=2)}")
+        self.global_rule_stats = self._rule_statistics_for_df(self.df_historical)
 
         # 如果使用聚类，为每个簇计算规则
+        self.cluster_rule_stats = {}
         if self.use_clustering and 'cluster_label' in self.df_historical.columns:
-            for cluster_id in self.df_historical['cluster_label'].unique():
+            for cluster_id in self.df_historical['cluster_label'].dropna().unique():
                 df_cluster = self.df_historical[self.df_historical['cluster_label'] == cluster_id]
-                if len(df_cluster) > 0:
-                    self.cluster_rules[cluster_id] = self._calculate_rules_for_df(df_cluster)
-                    self.logger.debug(f"Cluster {cluster_id} rules for {self.mode}: {json.dumps(self.cluster_rules[cluster_id], indent=2)}")
-                else:
-                    self.cluster_rules[cluster_id] = self.global_rules.copy()
-        else:
-            self.cluster_rules[0] = self.global_rules.copy()
+                self.cluster_rule_stats[int(cluster_id)] = self._rule_statistics_for_df(df_cluster)
 
+        self._rebuild_rules_from_statistics()
+        self.logger.debug(f"Global rules for {self.mode}: {json.dumps(self.global_rules, indent=2, default=str)}")
         self.logger.info(f"规则库建立完成 for {self.mode}")
 
+    def _rebuild_rules_from_statistics(self):
+        """由全局和各簇的统计量重新生成规则字典"""
+        self.global_rules = self.global_rule_stats.to_rules()
+        if self.use_clustering and self.cluster_rule_stats:
+            self.cluster_rules = {
+                cluster_id: stats.to_rules() for cluster_id, stats in self.cluster_rule_stats.items()
+            }
+        else:
+            self.cluster_rules = {0: self.global_rules.copy()}
+
+    def _rule_statistics_for_df(self, df):
+        """计算一组数据行的规则统计量"""
+        return RuleStatistics.from_observations(self._rule_observations(df), len(df))
+
     def _calculate_rules_for_df(self, df):
-        rules = {}
-        # 目标总价平均值
-        rules['avg_target_cost'] = df[self.target_column].mean()
+        return self._rule_statistics_for_df(df).to_rules()
 
-        # 比率法因子
-        if self.ratio_method_factor_col in df.columns:
-            valid_factor_data = df[self.ratio_method_factor_col].replace([np.inf, -np.inf], np.nan).dropna()
-            rules[self.ratio_method_factor_col] = valid_factor_data.mean() if not valid_factor_data.empty else 0.0
-        else:
-            rules[self.ratio_method_factor_col] = 0.0
+    def _rule_observations(self, df):
+        """
+        拆解出每条规则的逐行观测值
 
-        # 为所有相关列添加平均数量
-        all_relevant_quantity_columns = [
-            '拼装场地总工程量', '制作胎具总工程量', '钢支墩埋件总工程量', '扶壁柱总工程量',
-            '走道板操作平台总工程量', '钢网梁总工程量',
-            '钢筋总吨数', '塔吊租赁工程量', '吊索具数量', '套筒数量',
-            '钢支墩埋件混凝土剔凿总工程量', '钢支墩埋件混凝土回填总工程量',
-            '钢支墩埋件安装总工程量', '钢支墩埋件制作总工程量',
-            '扶壁柱安装总工程量', '扶壁柱拆除总工程量', '扶壁柱构件使用折旧总工程量',
-            '走道板操作平台制作总工程量', '走道板操作平台搭设总工程量', '走道板操作平台拆除总工程量',
-            '钢网架制作总工程量', '钢网架安装总工程量', '钢网架拆除总工程量',
-        ]
-        existing_relevant_quantity_columns = [col for col in all_relevant_quantity_columns if col in df.columns]
+        规则 = 观测值的均值（或中位数），因此新增数据行时只需累加这些观测值，
+        见 rule_stats.RuleStatistics。
+        """
+        observations = []
+
+        def observe(key, values, kind=RULE_MEAN, default=0.0):
+            observations.append(RuleObservation(key, kind, pd.to_numeric(values, errors='coerce'), default))
 
-        for qty_col in existing_relevant_quantity_columns:
-            rules[f'avg_qty_{qty_col}'] = df[qty_col].mean() if not df[qty_col].empty else 0.0
-            self.logger.debug(f"学习到 '{qty_col}' 的平均数量: {rules[f'avg_qty_{qty_col}']:.2f}")
+        # 目标总价平均值
+        observe('avg_target_cost', df[self.target_column], default=np.nan)
 
-        self.logger.debug(f"计算 '{self.ratio_method_factor_col}' for {self.mode}。")
+        # 比率法因子
         if self.mode == 'steel_cage':
             core_costs_sum_temp = df['成本_塔吊租赁'] + df['成本_钢筋生产线'] + df['成本_吊索具'] + df['成本_套筒']
-            self.logger.debug(f"核心成本临时求和统计 (steel_cage): {core_costs_sum_temp.describe()}")
-            self.logger.debug(f"项目总价统计 (steel_cage): {df[self.target_column].describe()}")
             mask = (df[self.target_column] != 0) & (~np.isnan(df[self.target_column])) & (~np.isnan(core_costs_sum_temp))
-            if mask.sum() > 0:
-                calculated_ratio = (core_costs_sum_temp[mask] / df[self.target_column][mask]).mean()
-                self.logger.debug(f"计算出的比率因子 (steel_cage): {calculated_ratio}")
-                rules[self.ratio_method_factor_col] = calculated_ratio
-            else:
+            if mask.sum() == 0:
                 self.logger.warning(f"无法计算有效比率因子 (steel_cage)：分母为零或数据无效。")
-                rules[self.ratio_method_factor_col] = 0.0
-        elif self.mode == 'steel_lining':
-            if self.ratio_method_factor_col in df.columns:
-                self.logger.debug(f"钢衬里模式已在预处理中计算 '{self.ratio_method_factor_col}'。其统计信息:\n{df[self.ratio_method_factor_col].describe()}")
-            else:
-                self.logger.error(f"钢衬里模式 '{self.ratio_method_factor_col}' 列不存在！")
+            observe(self.ratio_method_factor_col, core_costs_sum_temp[mask] / df[self.target_column][mask])
+        elif self.ratio_method_factor_col in df.columns:
+            observe(self.ratio_method_factor_col,
+                    df[self.ratio_method_factor_col].replace([np.inf, -np.inf], np.nan))
+        else:
+            self.logger.error(f"'{self.ratio_method_factor_col}' 列不存在 for {self.mode}！")
+            observe(self.ratio_method_factor_col, [])
+
+        # 为所有相关列添加平均数量
+        for qty_col in [col for col in ESTIMATED_QUANTITY_COLUMNS if col in df.columns]:
+            observe(f'avg_qty_{qty_col}', df[qty_col], default=np.nan)
 
         # 工程量之间的比率
         if self.core_quantity_key in df.columns:
-            quantities_to_learn_ratios = []
             if self.mode == 'steel_cage':
-                quantities_to_learn_ratios.extend([
-                    '塔吊租赁工程量', '吊索具数量', '套筒数量'
-                ])
-                for feature in self.cluster_features_for_matching:
-                    if feature != self.core_quantity_key:
-                        quantities_to_learn_ratios.append(feature)
-            elif self.mode == 'steel_lining':
-                quantities_to_learn_ratios.extend([
+                quantities_to_learn_ratios = ['塔吊租赁工程量', '吊索具数量', '套筒数量']
+            else:
+                quantities_to_learn_ratios = [
                     '制作胎具总工程量', '钢支墩埋件总工程量', '扶壁柱总工程量',
                     '走道板操作平台总工程量', '钢网梁总工程量',
-                ])
-                for feature in self.cluster_features_for_matching:
-                    if feature != self.core_quantity_key:
-                        quantities_to_learn_ratios.append(feature)
+                ]
+            quantities_to_learn_ratios.extend(self.cluster_features_for_matching)
+            quantities_to_learn_ratios = list(dict.fromkeys(
+                q for q in quantities_to_learn_ratios if q in df.columns and q != self.core_quantity_key))
 
-            quantities_to_learn_ratios = list(set([q for q in quantities_to_learn_ratios if q in df.columns and q != self.core_quantity_key]))
-            
             for qty_col in quantities_to_learn_ratios:
-                valid_df = df[(df[self.core_quantity_key] > 0) & (df[qty_col].notna())].copy()
-                if not valid_df.empty:
-                    rules[f'avg_qty_ratio_{qty_col}_per_{self.core_quantity_key}'] = \
-                        (pd.to_numeric(valid_df[qty_col], errors='coerce') / \
-                         pd.to_numeric(valid_df[self.core_quantity_key], errors='coerce')).mean()
-                    self.logger.debug(f"学习到 '{qty_col}' 相对于 '{self.core_quantity_key}' 的平均比率: {rules[f'avg_qty_ratio_{qty_col}_per_{self.core_quantity_key}']:.2f}")
-                else:
-                    rules[f'avg_qty_ratio_{qty_col}_per_{self.core_quantity_key}'] = 0.0
-                    self.logger.warning(f"无法学习 '{qty_col}' 相对于 '{self.core_quantity_key}' 的平均比率：核心量为零或数据无效。")
+                valid_df = df[(df[self.core_quantity_key] > 0) & (df[qty_col].notna())]
+                observe(f'avg_qty_ratio_{qty_col}_per_{self.core_quantity_key}',
+                        pd.to_numeric(valid_df[qty_col], errors='coerce') /
+                        pd.to_numeric(valid_df[self.core_quantity_key], errors='coerce'))
 
-        # 每个ML特征的平均单位成本
+        # 每个ML特征的平均单位成本（中位数）
         for ml_feature, qty_col in self.ml_feature_to_qty_map.items():
+            key = f'avg_unit_cost_{ml_feature}'
             if ml_feature in df.columns and qty_col in df.columns:
-                valid_df = df[(df[ml_feature] > 0) & (df[qty_col] > 0)].copy()
-                if not valid_df.empty:
-                    unit_cost = (pd.to_numeric(valid_df[ml_feature], errors='coerce') / 
-                                 pd.to_numeric(valid_df[qty_col], errors='coerce')).median()
-                    rules[f'avg_unit_cost_{ml_feature}'] = unit_cost
-                    self.logger.debug(f"学习到 '{ml_feature}' 的平均单位成本: {unit_cost:.2f} 元/{qty_col}")
-                else:
-                    rules[f'avg_unit_cost_{ml_feature}'] = 0.0
-                    self.logger.warning(f"无法学习 '{ml_feature}' 的平均单位成本：费用或工程量为零/无效。")
+                valid_df = df[(df[ml_feature] > 0) & (df[qty_col] > 0)]
+                observe(key, pd.to_numeric(valid_df[ml_feature], errors='coerce') /
+                        pd.to_numeric(valid_df[qty_col], errors='coerce'), kind=RULE_MEDIAN)
             else:
-                rules[f'avg_unit_cost_{ml_feature}'] = 0.0
                 self.logger.warning(f"无法学习 '{ml_feature}' 的平均单位成本：费用列或工程量列缺失。")
+                observe(key, [], kind=RULE_MEDIAN)
+
+        return observations
+
+    # ================== 增量更新 ==================
+
+    def incremental_update(self, df_raw):
+        """
+        根据数据源表的最新内容增量更新聚类、规则库和模型
+
+        只处理"仅追加新行"的情况：新行用 MiniBatchKMeans.partial_fit 分配到已有的簇，
+        规则由累计统计量直接更新，不再基于全部历史数据重算；簇中心偏移或新增行占比
+        超过阈值时才执行一次全量聚类。机器学习模型数据量很小，仍在更新后的数据上重新拟合。
+
+        Args:
+            df_raw (pandas.DataFrame): 数据源表（key_factors_1 / key_factors_2）的全部行
+
+        Returns:
+            dict: 更新摘要；已有行被修改或删除、无法增量更新时返回 None（调用方应全量重新训练）
+        """
+        if not self.is_trained or self.df_historical is None or not self.global_rule_stats.rows:
+            return None
+
+        df_latest = self._preprocess_data(df_raw)
+        df_new = self._find_appended_rows(df_latest)
+        if df_new is None:
+            self.logger.info(f"历史数据存在修改或删除，需要全量重新训练 for {self.mode}")
+            return None
+
+        start = time.time()
+        summary = {'new_rows': len(df_new), 'reclustered': False}
+
+        if not df_new.empty:
+            df_new = df_new.copy()
+            df_new['cluster_label'] = self._assign_clusters_incrementally(df_new)
+            self.df_historical = pd.concat([self.df_historical, df_new], ignore_index=True)
+
+            if self._needs_full_reclustering(len(df_new)):
+                self.logger.info(f"簇分布漂移超过阈值，执行全量聚类 for {self.mode}")
+                self._perform_clustering()
+                self._build_rules()
+                summary['reclustered'] = True
+            else:
+                self._update_rule_statistics(df_new)
+                self._rebuild_rules_from_statistics()
+
+        # 重新拟合模型（同时应用最新的算法参数和启用状态）
+        self.load_algorithm_parameters_from_db()
+        self.load_comprehensive_indicators_status()
+        self.models = {}
+        self._train_ml_models()
+
+        summary['seconds'] = time.time() - start
+        self.logger.info(f"增量更新完成 for {self.mode}: 新增 {summary['new_rows']} 行，"
+                         f"全量聚类: {summary['reclustered']}，耗时 {summary['seconds']:.2f}s")
+        return summary
+
+    def incremental_update_from_database(self, table_name=None):
+        """读取数据源表并调用 incremental_update()"""
+        table_name = table_name or self.key_factors_table
+        conn = get_connection()
+        try:
+            df_raw = pd.read_sql_query(f"SELECT * FROM `{table_name}`", conn)
+        finally:
+            conn.close()
+        return self.incremental_update(df_raw)
+
+    def _find_appended_rows(self, df_latest):
+        """
+        对比最新数据与已训练的历史数据，找出新追加的行
+
+        Returns:
+            pandas.DataFrame: 新增的行；已有行被修改或删除（或列结构变化）时返回 None
+        """
+        columns = [col for col in df_latest.columns if col != 'cluster_label']
+        if set(columns) != set(self.df_historical.columns) - {'cluster_label'}:
+            return None
 
-        return rules
+        old_hashes = pd.util.hash_pandas_object(self.df_historical[columns], index=False)
+        new_hashes = pd.util.hash_pandas_object(df_latest[columns], index=False)
+        old_counts = old_hashes.value_counts()
+        new_counts = new_hashes.value_counts()
+        if (old_counts > new_counts.reindex(old_counts.index, fill_value=0)).any():
+            return None
+
+        # 同一行内容重复出现时，超出原有次数的部分视为新增
+        occurrence = new_hashes.groupby(new_hashes).cumcount()
+        known = new_hashes.map(old_counts).fillna(0)
+        return df_latest[(occurrence >= known).to_numpy()]
+
+    def _assign_clusters_incrementally(self, df_new):
+        """把新增项目分配到已有的簇，并用 partial_fit 更新簇中心"""
+        labels = pd.Series(np.nan if self.use_clustering else 0, index=df_new.index)
+        if not self.use_clustering or self.kmeans is None or self.scaler_cluster is None:
+            return labels
+
+        cluster_features = [f for f in self.cluster_features_for_matching if f in df_new.columns]
+        X_new = df_new[cluster_features].dropna()
+        if X_new.empty:
+            return labels
+
+        X_scaled = self.scaler_cluster.transform(X_new)
+        labels.loc[X_new.index] = self.kmeans.predict(X_scaled)
+        if self.cluster_updater is not None:
+            self.cluster_updater.partial_fit(X_scaled)
+            self.kmeans = self.cluster_updater
+        return labels
+
+    def _needs_full_reclustering(self, new_rows):
+        """判断增量更新后是否需要全量重新聚类"""
+        baseline = self.cluster_baseline or {}
+        baseline['new_rows'] = baseline.get('new_rows', 0) + new_rows
+        self.cluster_baseline = baseline
+
+        if not self.use_clustering:
+            # 之前数据太少无法聚类，数据量够了就执行聚类
+            return len(self.df_historical) >= self.n_clusters * 2
+        if self.cluster_updater is None or baseline.get('centers') is None:
+            return True
+
+        row_ratio = baseline['new_rows'] / max(baseline.get('rows', 0), 1)
+        center_shift = float(np.max(np.linalg.norm(
+            self.cluster_updater.cluster_centers_ - baseline['centers'], axis=1)))
+        self.logger.info(f"簇漂移检查 for {self.mode}: 新增行占比 {row_ratio:.2f}，簇中心最大偏移 {center_shift:.3f}")
+        return row_ratio > INCREMENTAL_RECLUSTER_ROW_RATIO or center_shift > INCREMENTAL_RECLUSTER_CENTER_SHIFT
+
+    def _update_rule_statistics(self, df_new):
+        """把新增项目的观测值累加到全局和所属簇的规则统计量"""
+        self.global_rule_stats.add(self._rule_observations(df_new), len(df_new))
+        if not self.use_clustering:
+            return
+        for cluster_id in df_new['cluster_label'].dropna().unique():
+            df_cluster = df_new[df_new['cluster_label'] == cluster_id]
+            stats = self.cluster_rule_stats.setdefault(int(cluster_id), RuleStatistics())
+            stats.add(self._rule_observations(df_cluster), len(df_cluster))
 
     def _get_corresponding_quantity_column(self, ml_feature):
         """根据ML特征找到对应的工程量列名"""
@@ -1165,22 +1339,68 @@ class CostPredictionSystem:
         # 【修改】使用数据库参数配置创建模型
         models_config = self._create_models_with_db_params()
 
-        # 训练每个模型
+        # 只训练启用的算法
+        enabled_models = {}
         for model_name, pipeline in models_config.items():
-            # 检查算法是否启用
             db_algorithm_name = get_db_algorithm_name(model_name)
-            
             if db_algorithm_name and self.is_algorithm_enabled(db_algorithm_name):
+                enabled_models[model_name] = pipeline
+            else:
+                self.logger.info(f"  🚫 {model_name} 已停用，跳过训练")
+
+        start = time.time()
+        if self.parallel_training and len(enabled_models) > 1:
+            self._fit_models_parallel(enabled_models, X_cleaned, y_cleaned)
+        else:
+            for model_name, pipeline in enabled_models.items():
                 try:
-                    pipeline.fit(X_cleaned, y_cleaned)
+                    elapsed = self._fit_pipeline(pipeline, X_cleaned, y_cleaned)
                     self.models[model_name] = pipeline
-                    self.logger.info(f"  ✅ {model_name} 训练成功 (使用数据库参数配置)")
+                    self.logger.info(f"  ✅ {model_name} 训练成功 (使用数据库参数配置, {elapsed:.2f}s)")
                 except Exception as e:
                     self.logger.error(f"  ❌ {model_name} 训练失败: {e}")
-            else:
-                self.logger.info(f"  🚫 {model_name} 已停用，跳过训练")
 
-        self.logger.info(f"机器学习模型训练完成 for {self.mode}，成功训练 {len(self.models)} 个模型")
+        self.logger.info(f"机器学习模型训练完成 for {self.mode}，成功训练 {len(self.models)} 个模型，"
+                         f"总耗时 {time.time() - start:.2f}s")
+
+    @staticmethod
+    def _fit_pipeline(pipeline, X, y):
+        """拟合单个模型管道，返回耗时（秒）"""
+        start = time.time()
+        pipeline.fit(X, y)
+        return time.time() - start
+
+    def _fit_models_parallel(self, enabled_models, X, y):
+        """
+        在线程池中同时训练所有启用的模型
+
+        总耗时取决于最慢的模型而不是所有模型之和。超过 model_training_timeout
+        的模型会被跳过（线程无法被强制终止，会在后台自行结束，但结果不再使用）。
+        """
+        max_workers = max(1, min(self.training_max_workers, len(enabled_models)))
+        self.logger.info(f"并行训练 {len(enabled_models)} 个模型 for {self.mode}，线程数: {max_workers}")
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"fit-{self.mode}")
+        try:
+            futures = {
+                model_name: executor.submit(self._fit_pipeline, pipeline, X, y)
+                for model_name, pipeline in enabled_models.items()
+            }
+            deadline = time.time() + self.model_training_timeout
+
+            for model_name, future in futures.items():
+                try:
+                    elapsed = future.result(timeout=max(0.0, deadline - time.time()))
+                    self.models[model_name] = enabled_models[model_name]
+                    self.logger.info(f"  ✅ {model_name} 训练成功 (使用数据库参数配置, {elapsed:.2f}s)")
+                except FutureTimeoutError:
+                    future.cancel()
+                    self.logger.error(f"  ⏱️ {model_name} 训练超时 (>{self.model_training_timeout:.0f}s)，跳过该模型")
+                except Exception as e:
+                    self.logger.error(f"  ❌ {model_name} 训练失败: {e}")
+        finally:
+            # 不等待超时仍在运行的线程
+            executor.shutdown(wait=False)
 
     def predict(self, user_inputs, unit_prices_from_db):
         """
@@ -1497,6 +1717,230 @@ class CostPredictionSystem:
             self.logger.error(f"预测过程出错 for {self.mode}: {e}", exc_info=True)
             return {"error": f"预测过程异常 for {self.mode}: {e}"}
 
+    # ================== 批量 / 多场景预测 ==================
+
+    def predict_batch(self, scenarios, unit_prices_from_db=None):
+        """
+        批量预测多个场景的项目总成本（向量化版本）
+
+        与 predict() 的计算口径一致，但聚类匹配、工程量估算、特征计算和各模型预测
+        都在 N×F 矩阵上一次完成：每个模型只调用一次 predict，而不是每个场景调用一次。
+
+        Parameters:
+        - scenarios: pandas.DataFrame 或 list[dict]，每行一个场景，列名为工程量参数
+        - unit_prices_from_db: dict, 保留参数，与 predict() 保持一致
+
+        Returns:
+        - dict: {
+              "结果": DataFrame（场景输入 + 规则来源 + 各方法预测值），
+              "估算的工程量": DataFrame,
+              "估算的各项成本 (用于ML的特征)": DataFrame,
+              "预测方法状态": {method_key: {...}},
+              "场景数": int
+          }
+          出错时返回 {"error": ...}
+        """
+        if not self.is_trained:
+            return {"error": f"系统尚未训练，请先调用 train_system() for {self.mode}"}
+
+        try:
+            scenario_df = pd.DataFrame(scenarios).reset_index(drop=True)
+            if scenario_df.empty:
+                return {"error": "没有可预测的场景，请至少提供一行参数。"}
+
+            inputs = scenario_df.apply(pd.to_numeric, errors='coerce')
+            n = len(inputs)
+
+            # 1. 主工程量：优先使用核心工程量，否则取第一个大于0的聚类特征
+            main_quantity = self._batch_column(inputs, self.core_quantity_key, default=np.nan)
+            for feature in self.cluster_features_for_matching:
+                if feature == self.core_quantity_key:
+                    continue
+                candidate = self._batch_column(inputs, feature, default=np.nan)
+                fill_mask = np.isnan(main_quantity) & (candidate > 0)
+                main_quantity = np.where(fill_mask, candidate, main_quantity)
+            main_quantity = np.where(np.isnan(main_quantity) | (main_quantity <= 0), 0.0, main_quantity)
+            if not (main_quantity > 0).all():
+                self.logger.warning(f"{int((main_quantity <= 0).sum())} 个场景缺少有效的核心工程量 for {self.mode}，使用平均工程量估算。")
+
+            # 2. 匹配集群规则并估算工程量
+            cluster_labels = self._match_cluster_labels_batch(main_quantity)
+            estimated = self._estimate_quantities_batch(inputs, main_quantity, cluster_labels)
+
+            # 3. 计算 ML 特征（与 predict 一致：按估算的核心工程量重新匹配集群）
+            core_estimated = estimated[self.core_quantity_key].to_numpy() if self.core_quantity_key in estimated else np.zeros(n)
+            feature_labels = self._match_cluster_labels_batch(core_estimated)
+            features = pd.DataFrame(index=range(n))
+            for ml_feature in self.ml_features:
+                qty_col = self.ml_feature_to_qty_map.get(ml_feature)
+                qty = estimated[qty_col].to_numpy() if qty_col in estimated else np.zeros(n)
+                unit_cost = np.nan_to_num(self._batch_rule_values(feature_labels, f'avg_unit_cost_{ml_feature}'))
+                features[ml_feature] = qty * unit_cost
+
+            measures_cost = np.nan_to_num(self._batch_column(inputs, '措施费工程量', default=0.0))
+
+            # 4. AI 预测：每个启用的模型对整个特征矩阵预测一次
+            predictions = {}
+            ai_error = None
+            if self.can_execute_ai_prediction():
+                model_columns = []
+                for model_name, model in self.models.items():
+                    try:
+                        pred = np.asarray(model.predict(features[self.ml_features]), dtype=float)
+                        valid = (pred > PREDICTION_VALID_RANGE[0]) & (pred < PREDICTION_VALID_RANGE[1])
+                        if not valid.all():
+                            self.logger.warning(f"⚠️ {model_name} 有 {int((~valid).sum())} 个场景预测值超出合理范围")
+                        model_columns.append(model_name)
+                        predictions[model_name] = np.where(valid, pred, np.nan)
+                    except Exception as e:
+                        self.logger.error(f"❌ {model_name} 批量预测失败: {e}")
+                        predictions[model_name] = np.full(n, np.nan)
+
+                if model_columns:
+                    stacked = np.column_stack([predictions[name] for name in model_columns])
+                    valid_counts = (~np.isnan(stacked)).sum(axis=1)
+                    ensemble = np.where(valid_counts > 0,
+                                        np.nansum(stacked, axis=1) / np.maximum(valid_counts, 1), np.nan)
+                else:
+                    ensemble = np.full(n, np.nan)
+                predictions['集成平均预测'] = ensemble
+            else:
+                ai_error = self.check_algorithm_execution_capability()['message']
+                self.logger.warning(f"⚠️ AI批量预测跳过执行 for {self.mode}: {ai_error}")
+
+            # 5. 比率法预测
+            ratio_raw = None
+            if self.can_execute_ratio_prediction():
+                percentage = self._batch_rule_values(cluster_labels, self.ratio_method_factor_col)
+                percentage = np.where(np.isnan(percentage) | (percentage <= 0), 0.8, percentage)
+                core_costs_sum = features[self.ml_features].sum(axis=1).to_numpy()
+                ratio_raw = np.where(core_costs_sum > 0, core_costs_sum / percentage, 0.0)
+
+            # 6. 按显示权限组装结果表
+            results = scenario_df.copy()
+            results['匹配到的规则来源'] = self._batch_rule_sources(cluster_labels)
+
+            method_columns = {
+                'ml_prediction_raw': {f"{name}-原始值": values for name, values in predictions.items()},
+                'ml_prediction_final': {f"{name}-最终值": values + measures_cost for name, values in predictions.items()},
+                'ratio_method_raw': {'比率法-原始值': ratio_raw} if ratio_raw is not None else {},
+                'ratio_method_final': {'比率法-最终值': ratio_raw + measures_cost} if ratio_raw is not None else {},
+            }
+
+            method_status = {}
+            for method_key, columns in method_columns.items():
+                combined_status = self.get_combined_prediction_status(method_key)
+                shown = combined_status['final_status'] == 'fully_available' and bool(columns)
+                if shown:
+                    for column, values in columns.items():
+                        results[column] = np.round(values, 2)
+
+                if shown:
+                    message = "正常"
+                elif method_key.startswith('ml_prediction') and ai_error:
+                    message = ai_error
+                elif not columns:
+                    message = combined_status['execution_status']['message']
+                else:
+                    message = combined_status['display_status']['message']
+
+                method_status[method_key] = {
+                    'final_status': combined_status['final_status'],
+                    'shown': shown,
+                    'columns': list(columns) if shown else [],
+                    'message': message
+                }
+
+            self.logger.info(f"✅ 批量预测完成 for {self.mode}: {n} 个场景")
+            return {
+                "结果": results,
+                "估算的工程量": estimated,
+                "估算的各项成本 (用于ML的特征)": features,
+                "预测方法状态": method_status,
+                "场景数": n
+            }
+
+        except Exception as e:
+            self.logger.error(f"批量预测过程出错 for {self.mode}: {e}", exc_info=True)
+            return {"error": f"批量预测过程异常 for {self.mode}: {e}"}
+
+    @staticmethod
+    def _batch_column(inputs, column, default):
+        """取出场景表中的一列为浮点数组，缺少该列时返回默认值数组"""
+        if column in inputs.columns:
+            return inputs[column].to_numpy(dtype=float)
+        return np.full(len(inputs), default, dtype=float)
+
+    def _rules_for_label(self, label):
+        """集群标签对应的规则；-1 表示全局平均规则"""
+        if label < 0:
+            return self.global_rules
+        return self.cluster_rules.get(label, self.global_rules)
+
+    def _batch_rule_values(self, labels, key):
+        """按每个场景匹配到的规则取出 key 对应的值，缺失时为 NaN"""
+        lookup = {}
+        for label in np.unique(labels):
+            value = self._rules_for_label(int(label)).get(key)
+            try:
+                lookup[label] = float(value) if value is not None else np.nan
+            except (TypeError, ValueError):
+                lookup[label] = np.nan
+        return np.array([lookup[label] for label in labels], dtype=float)
+
+    def _batch_rule_sources(self, labels):
+        """每个场景的规则来源说明"""
+        return [f"簇 {label}" if label >= 0 else "全局平均" for label in labels]
+
+    def _match_cluster_labels_batch(self, main_quantities):
+        """
+        批量匹配集群：一次 transform + 一次 KMeans.predict
+
+        Returns:
+        - numpy.ndarray: 每个场景的集群标签，-1 表示使用全局平均规则
+        """
+        main_quantities = np.asarray(main_quantities, dtype=float)
+        labels = np.full(len(main_quantities), -1, dtype=int)
+        mask = main_quantities > 0
+        if not (self.use_clustering and self.kmeans and self.scaler_cluster) or not mask.any():
+            return labels
+
+        cluster_input = {}
+        for feature in self.cluster_features_for_matching:
+            if feature == self.core_quantity_key:
+                cluster_input[feature] = main_quantities[mask]
+            else:
+                ratio = self.global_rules.get(f'avg_qty_ratio_{feature}_per_{self.core_quantity_key}')
+                cluster_input[feature] = main_quantities[mask] * ratio if ratio is not None else 0.0
+
+        try:
+            scaled = self.scaler_cluster.transform(pd.DataFrame(cluster_input)[self.cluster_features_for_matching])
+            labels[mask] = self.kmeans.predict(scaled)
+        except Exception as e:
+            self.logger.warning(f"批量聚类匹配失败 for {self.mode}: {e}. 使用全局平均规则。")
+        return labels
+
+    def _estimate_quantities_batch(self, inputs, main_quantity, cluster_labels):
+        """按匹配到的规则批量估算工程量（口径同 _estimate_quantities_based_on_rules）"""
+        estimated = pd.DataFrame(index=range(len(inputs)))
+        has_main = main_quantity > 0
+
+        for qty_col in self._get_relevant_quantity_columns():
+            user_val = self._batch_column(inputs, qty_col, default=np.nan)
+            has_user = ~np.isnan(user_val) & (user_val > 0)
+
+            if qty_col == self.core_quantity_key:
+                by_main = main_quantity
+            else:
+                ratio = self._batch_rule_values(cluster_labels, f'avg_qty_ratio_{qty_col}_per_{self.core_quantity_key}')
+                by_main = np.where(np.isnan(ratio), np.nan, main_quantity * np.nan_to_num(ratio))
+            average = np.nan_to_num(self._batch_rule_values(cluster_labels, f'avg_qty_{qty_col}'))
+            by_main = np.where(np.isnan(by_main), average, by_main)
+
+            estimated[qty_col] = np.where(has_user, user_val, np.where(has_main, by_main, average))
+
+        return estimated
+
     def _add_measures_cost_to_predictions(self, ml_predictions, measures_cost_value):
         """
         为机器学习预测结果添加措施费的辅助方法（独立版本）
@@ -1557,20 +2001,14 @@ class CostPredictionSystem:
 
         return selected_rules
 
+    def _get_relevant_quantity_columns(self):
+        """历史数据中存在、需要估算的工程量列"""
+        return [col for col in ESTIMATED_QUANTITY_COLUMNS if col in self.df_historical.columns]
+
     def _estimate_quantities_based_on_rules(self, user_inputs, main_quantity_input, rules):
         estimated_quantities = {}
 
-        all_relevant_quantity_columns = [
-            '拼装场地总工程量', '制作胎具总工程量', '钢支墩埋件总工程量', '扶壁柱总工程量',
-            '走道板操作平台总工程量', '钢网梁总工程量',
-            '钢筋总吨数', '塔吊租赁工程量', '吊索具数量', '套筒数量',
-            '钢支墩埋件混凝土剔凿总工程量', '钢支墩埋件混凝土回填总工程量',
-            '钢支墩埋件安装总工程量', '钢支墩埋件制作总工程量',
-            '扶壁柱安装总工程量', '扶壁柱拆除总工程量', '扶壁柱构件使用折旧总工程量',
-            '走道板操作平台制作总工程量', '走道板操作平台搭设总工程量', '走道板操作平台拆除总工程量',
-            '钢网架制作总工程量', '钢网架安装总工程量', '钢网架拆除总工程量',
-        ]
-        relevant_quantity_columns = [col for col in all_relevant_quantity_columns if col in self.df_historical.columns]
+        relevant_quantity_columns = self._get_relevant_quantity_columns()
 
         for qty_col in relevant_quantity_columns:
             user_val = user_inputs.get(qty_col)
@@ -1641,7 +2079,7 @@ class CostPredictionSystem:
                 else:
                     pred = model.predict(feature_df)[0]
 
-                if 0 < pred < 5000000000:
+                if PREDICTION_VALID_RANGE[0] < pred < PREDICTION_VALID_RANGE[1]:
                     predictions[model_name] = pred
                     self.logger.debug(f"✅ {model_name} 预测成功: {pred:.2f}")
                 else:
@@ -2020,52 +2458,19 @@ class CostPredictionSystem:
 def get_comprehensive_indicators_status(mode='steel_cage'):
     """
     查询comprehensive_indicators表中指定模式的状态信息
-    
+
+    状态来自进程内指标状态缓存（见 utils/indicator_status_cache.py），
+    数据管理模块修改综合指标后缓存会失效并重新加载。
+
     Args:
         mode (str): 施工模式 ('steel_cage' 或 'steel_lining')
-    
+
     Returns:
         dict: {指标编码: 状态信息} 的字典
     """
-    conn = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-        SELECT code, name, calculation_method, indicator_type, status, calculation_logic
-        FROM comprehensive_indicators 
-        WHERE construction_mode = %s
-        ORDER BY id
-        """
-        
-        cursor.execute(query, (mode,))
-        results = cursor.fetchall()
-        
-        status_dict = {}
-        for row in results:
-            status_dict[row['code']] = {
-                'name': row['name'],
-                'calculation_method': row['calculation_method'],
-                'indicator_type': row['indicator_type'], 
-                'status': row['status'],
-                'calculation_logic': row.get('calculation_logic', ''),
-                'enabled': row['status'] == 'enabled'
-            }
-        
-        # 使用 logging 模块而不是 logger
-        logging.info(f"成功查询到 {len(status_dict)} 个综合指标的状态信息 for mode: {mode}")
-        return status_dict
-        
-    except mysql.connector.Error as e:
-        logging.error(f"查询综合指标状态失败 for mode {mode}: {e}")
-        return {}
-    except Exception as e:
-        logging.error(f"查询综合指标状态时发生错误 for mode {mode}: {e}")
-        return {}
-    finally:
-        if conn:
-            conn.close()
+    status_dict = get_comprehensive_indicator_status(mode)
+    logging.debug(f"获取到 {len(status_dict)} 个综合指标的状态信息 for mode: {mode}")
+    return status_dict
 
 def check_prediction_method_availability(mode='steel_cage'):
     """
@@ -2108,7 +2513,7 @@ def check_prediction_method_availability(mode='steel_cage'):
             'indicator_code': indicator_code
         }
     
-    logging.info(f"预测方法可用性检查完成 for mode {mode}: {availability}")
+    logging.debug(f"预测方法可用性检查完成 for mode {mode}: {availability}")
     return availability
 
 def get_prediction_status_summary(mode='steel_cage'):
@@ -15,6 +15,9 @@ from .modals import (
     create_custom_mode_parameter_modal,
     create_steel_reinforcement_parameter_modal  # 添加这个导入
 )
+from .training_jobs import create_training_job_monitor
+from .batch_prediction import create_batch_prediction_section
+from utils.excel_export import create_export_download
 
 def create_price_prediction_layout():
     """创建价格预测计算模式页面布局 - 结果表格在配置界面后面"""
@@ -92,9 +95,13 @@ def create_price_prediction_layout():
             dbc.Button("刷新", id="refresh-price-prediction", color="secondary", className="ms-auto")
         ], className="d-flex justify-content-end mt-4"),
 
+        # ========== 批量 / 多场景预测区域 ==========
+        create_batch_prediction_section(),
+
         # ========== 钢筋笼模式结果显示区域 ==========
         html.Div([
             html.Div(id="steel-reinforcement-calculation-result5", className="table-responsive", style={'margin': '0', 'paddingTop': '0'}),
+            create_training_job_monitor("steel-cage-training"),
             html.Div(id="cost-comparison-container2", style={"display": "none"}, className="mt-5"),
             html.Div(id="cost-comparison-table2", className="table-responsive"),
             # 新增：导出按钮区域
@@ -117,12 +124,13 @@ def create_price_prediction_layout():
             html.Div(id="steel-cage-save-feedback", className="mt-3"),
             
             # 新增：下载组件
-            dcc.Download(id="download-steel-cage-report")
+            create_export_download("download-steel-cage-report")
         ], id="steel-cage-results-section", style={"display": "none"}),
 
         # ========== 钢衬里模式结果显示区域 ==========
         html.Div([
             html.Div(id="steel-lining-calculation-result-output", className="table-responsive"),
+            create_training_job_monitor("steel-lining-training"),
             html.Div(id="steel-lining-cost-comparison-container", style={"display": "none"}, className="mt-5"),
             html.Div(id="steel-lining-cost-comparison-table", className="table-responsive"),
             # 新增：导出按钮区域
@@ -145,7 +153,7 @@ def create_price_prediction_layout():
             html.Div(id="steel-lining-save-feedback", className="mt-3"),
             
             # 新增：下载组件
-            dcc.Download(id="download-steel-lining-report")
+            create_export_download("download-steel-lining-report")
         ], id="steel-lining-results-section", style={"display": "none"}),
             
         # ========== 自定义模式结果显示区域 ==========
@@ -173,7 +181,7 @@ def create_price_prediction_layout():
             html.Div(id="custom-mode-save-feedback", className="mt-3"),
             
             # 新增：下载组件
-            dcc.Download(id="download-custom-mode-report")
+            create_export_download("download-custom-mode-report")
         ], id="custom-mode-results-section", style={"display": "none"}),
 
         # 修复：添加所有必需的模态窗口
@@ -185,9 +193,9 @@ def create_price_prediction_layout():
 
 
         # ========== 数据存储组件 ==========
-        dcc.Store(id="steel-cage-report-data"),      # 存储钢筋笼预测报告数据
-        dcc.Store(id="steel-lining-report-data"),    # 存储钢衬里预测报告数据  
-        dcc.Store(id="custom-mode-report-data"),     # 存储自定义模式预测报告数据
+        dcc.Store(id="steel-cage-report-data"),      # 钢筋笼预测报告的结果 ID（报告数据保存在服务端）
+        dcc.Store(id="steel-lining-report-data"),    # 钢衬里预测报告的结果 ID
+        dcc.Store(id="custom-mode-report-data"),     # 自定义模式预测报告的结果 ID
         # ========== 状态存储组件 ==========
         dcc.Store(id="steel-cage-field-status-store"),      # 存储钢筋笼字段状态
         dcc.Store(id="steel-lining-field-status-store"),    # 存储钢衬里字段状态  
@@ -0,0 +1,252 @@
+# modules/pricePrediction/model_registry.py
+"""
+预测模型注册表
+
+按施工模式缓存已训练的 CostPredictionSystem 实例，只有当训练数据源
+（key_factors_1 / key_factors_2）、algorithm_parameters 或 algorithm_configs
+发生变化时才重新训练。变化检测依赖一个廉价的数据指纹（行数、校验和、最大更新时间），
+避免每次点击"确定"都重新加载数据、聚类、建规则并重新拟合全部模型。
+训练结果同时持久化到磁盘（见 model_store），指纹相同时直接读取文件恢复。
+数据源表只是追加了新项目时，在已有模型的副本上增量更新聚类和规则库，不做全量重训。
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+from .config import INCREMENTAL_UPDATE_ENABLED
+from .data import CostPredictionSystem, get_connection
+from .model_store import load_predictor, save_predictor
+
+logger = logging.getLogger(__name__)
+
+# 各模式对应的训练数据源表
+MODE_SOURCE_TABLES = {
+    'steel_cage': 'key_factors_1',
+    'steel_lining': 'key_factors_2',
+}
+
+# 两次指纹检查之间的最小间隔（秒），并发请求在此间隔内直接复用已有模型
+FINGERPRINT_CHECK_INTERVAL = 5
+
+
+def compute_training_fingerprint(mode):
+    """
+    计算指定模式训练输入的数据指纹
+
+    指纹由以下部分组成：
+    - 训练数据源表的行数与 CHECKSUM TABLE 校验和
+    - algorithm_parameters 的行数与最大 updated_at
+    - 当前模式 algorithm_configs 的行数、最大 updated_at 与启用状态
+
+    Args:
+        mode (str): 施工模式 ('steel_cage' 或 'steel_lining')
+
+    Returns:
+        str: 指纹字符串；查询失败时返回 None
+    """
+    source_table = MODE_SOURCE_TABLES.get(mode)
+    if source_table is None:
+        raise ValueError(f"Unsupported mode: {mode}")
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        parts = []
+
+        cursor.execute(f"SELECT COUNT(*) FROM `{source_table}`")
+        parts.append(cursor.fetchone()[0])
+
+        cursor.execute(f"CHECKSUM TABLE `{source_table}`")
+        checksum_row = cursor.fetchone()
+        parts.append(checksum_row[1] if checksum_row else None)
+
+        cursor.execute("SELECT COUNT(*), MAX(updated_at) FROM algorithm_parameters")
+        parts.extend(cursor.fetchone())
+
+        cursor.execute("""
+            SELECT COUNT(*), MAX(updated_at),
+                   GROUP_CONCAT(CONCAT(algorithm_name, ':', status) ORDER BY algorithm_name)
+            FROM algorithm_configs
+            WHERE construction_mode = %s OR construction_mode = 'general'
+        """, (mode,))
+        parts.extend(cursor.fetchone())
+
+        cursor.close()
+        return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+    except Exception as e:
+        logger.warning(f"计算训练数据指纹失败 for mode {mode}: {e}")
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+
+def _report_progress(progress_callback, percent, message):
+    """调用进度回调（如果提供），回调异常不影响训练流程"""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(percent, message)
+    except Exception as e:
+        logger.debug(f"进度回调失败: {e}")
+
+
+class ModelRegistry:
+    """按模式缓存已训练预测系统的注册表（线程安全）"""
+
+    def __init__(self, check_interval=FINGERPRINT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._mode_locks = {mode: threading.Lock() for mode in MODE_SOURCE_TABLES}
+
+    def _train(self, mode, progress_callback=None):
+        """加载历史数据并训练新的预测系统，失败时返回 None"""
+        predictor = CostPredictionSystem(mode=mode)
+        _report_progress(progress_callback, 30, "正在加载历史数据")
+        if not predictor.load_data_from_database(mode):
+            logger.error(f"✗ 历史数据加载失败 for mode: {mode}")
+            return None
+        _report_progress(progress_callback, 50, "正在训练聚类、规则库和机器学习模型")
+        if not predictor.train_system():
+            logger.error(f"✗ 机器学习模型训练失败 for mode: {mode}")
+            return None
+        return predictor
+
+    def _update_incrementally(self, mode, predictor, progress_callback=None):
+        """
+        在已训练预测系统的副本上增量更新（只追加了新行时），失败或不适用时返回 None
+
+        使用副本是为了不影响正在用旧模型处理请求的其他线程。
+        """
+        if not INCREMENTAL_UPDATE_ENABLED:
+            return None
+        _report_progress(progress_callback, 40, "正在增量更新聚类和规则库")
+        try:
+            updated = copy.deepcopy(predictor)
+            summary = updated.incremental_update_from_database(MODE_SOURCE_TABLES[mode])
+        except Exception as e:
+            logger.warning(f"增量更新失败，改为全量训练 for mode: {mode}: {e}", exc_info=True)
+            return None
+        return updated if summary is not None else None
+
+    def get_cached_predictor(self, mode):
+        """获取已缓存的预测系统（不访问数据库、不触发训练），未训练时返回 None"""
+        entry = self._entries.get(mode)
+        return entry['predictor'] if entry else None
+
+    def is_check_due(self, mode):
+        """判断指定模式是否需要重新比对数据指纹"""
+        entry = self._entries.get(mode)
+        return entry is None or time.time() - entry['checked_at'] >= self.check_interval
+
+    def get_predictor(self, mode, force_check=False, progress_callback=None):
+        """
+        获取指定模式的已训练预测系统，必要时重新训练
+
+        Args:
+            mode (str): 施工模式
+            force_check (bool): 为 True 时忽略检查间隔，立即比对数据指纹
+            progress_callback (callable): 进度回调 progress_callback(percent, message)，可选
+
+        Returns:
+            CostPredictionSystem: 已训练的预测系统；训练失败时返回 None
+        """
+        if mode not in self._mode_locks:
+            raise ValueError(f"Unsupported mode: {mode}")
+
+        entry = self._entries.get(mode)
+        now = time.time()
+        if (entry and not force_check and
+                now - entry['checked_at'] < self.check_interval):
+            return entry['predictor']
+
+        with self._mode_locks[mode]:
+            # 双重检查：等待锁期间其他线程可能已完成检查或训练
+            entry = self._entries.get(mode)
+            now = time.time()
+            if (entry and not force_check and
+                    now - entry['checked_at'] < self.check_interval):
+                return entry['predictor']
+
+            _report_progress(progress_callback, 10, "正在检查训练数据是否变化")
+            fingerprint = compute_training_fingerprint(mode)
+
+            if entry and (fingerprint is None or fingerprint == entry['fingerprint']):
+                # 数据未变化（或指纹暂不可用）时复用已训练的模型
+                entry['checked_at'] = now
+                return entry['predictor']
+
+            start = time.time()
+            # 优先从磁盘加载同一数据指纹下已训练的模型（其他 worker 或上次运行保存）
+            _report_progress(progress_callback, 20, "正在查找已保存的模型文件")
+            predictor = load_predictor(mode, fingerprint)
+
+            if predictor is None and entry is not None:
+                predictor = self._update_incrementally(mode, entry['predictor'], progress_callback)
+                if predictor is not None:
+                    _report_progress(progress_callback, 90, "正在保存模型文件")
+                    save_predictor(predictor, fingerprint)
+
+            if predictor is None:
+                reason = "首次训练" if entry is None else "训练数据或算法配置已变化"
+                logger.info(f"🔄 {reason}，重新训练预测系统 for mode: {mode}")
+                try:
+                    predictor = self._train(mode, progress_callback)
+                except Exception as e:
+                    logger.error(f"✗ 预测系统训练异常 for mode: {mode}: {e}", exc_info=True)
+                    predictor = None
+                if predictor is not None:
+                    _report_progress(progress_callback, 90, "正在保存模型文件")
+                    save_predictor(predictor, fingerprint)
+
+            if predictor is None:
+                # 训练失败时保留旧模型，避免服务中断
+                if entry:
+                    entry['checked_at'] = now
+                    return entry['predictor']
+                return None
+
+            self._entries[mode] = {
+                'predictor': predictor,
+                'fingerprint': fingerprint,
+                'trained_at': time.time(),
+                'checked_at': time.time(),
+                'train_seconds': time.time() - start,
+            }
+            logger.info(f"✓ 预测系统就绪 for mode: {mode}，耗时 {time.time() - start:.2f}s")
+            return predictor
+
+    def invalidate(self, mode=None):
+        """使指定模式（或全部模式）的缓存模型失效，下次获取时重新训练"""
+        modes = [mode] if mode else list(self._mode_locks)
+        for m in modes:
+            with self._mode_locks[m]:
+                self._entries.pop(m, None)
+        logger.info(f"预测模型缓存已失效: {modes}")
+
+    def get_status(self):
+        """获取注册表中各模式的模型状态，用于调试和显示"""
+        status = {}
+        for mode in self._mode_locks:
+            entry = self._entries.get(mode)
+            status[mode] = {
+                'trained': entry is not None,
+                'fingerprint': entry['fingerprint'] if entry else None,
+                'trained_at': entry['trained_at'] if entry else None,
+                'train_seconds': entry['train_seconds'] if entry else None,
+            }
+        return status
+
+
+# 全局模型注册表（进程内共享）
+model_registry = ModelRegistry()
+
+
+def get_predictor(mode, force_check=False):
+    """获取指定模式的已训练预测系统（模块级便捷函数）"""
+    return model_registry.get_predictor(mode, force_check=force_check)
@@ -0,0 +1,134 @@
+# modules/pricePrediction/model_store.py
+"""
+预测模型磁盘持久化
+
+将训练好的 CostPredictionSystem 状态（self.models 中的拟合管道、scaler_cluster、
+kmeans、cluster_rules、global_rules 等）保存为带版本号的磁盘文件，
+文件名由施工模式和训练数据指纹组成。进程重启或多个 worker 启动时，
+只需读取文件即可恢复模型，不必重新从 MySQL 加载数据并训练。
+"""
+
+import glob
+import logging
+import os
+import tempfile
+
+import joblib
+
+from .data import CostPredictionSystem
+
+logger = logging.getLogger(__name__)
+
+# 持久化格式版本，CostPredictionSystem 的状态结构变化时需递增
+ARTIFACT_VERSION = 2
+
+# 模型文件目录，可通过环境变量 PREDICTION_MODEL_DIR 覆盖
+MODEL_ARTIFACT_DIR = os.getenv(
+    'PREDICTION_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'model_artifacts')
+)
+
+# 每个模式保留的历史模型文件数量
+MAX_ARTIFACTS_PER_MODE = 3
+
+
+def get_artifact_path(mode, fingerprint):
+    """获取指定模式和数据指纹对应的模型文件路径"""
+    return os.path.join(MODEL_ARTIFACT_DIR, f"{mode}_v{ARTIFACT_VERSION}_{fingerprint}.joblib")
+
+
+def save_predictor(predictor, fingerprint):
+    """
+    将已训练的预测系统保存到磁盘
+
+    先写入临时文件再原子替换，避免多个 worker 同时读到写了一半的文件。
+
+    Args:
+        predictor (CostPredictionSystem): 已训练的预测系统
+        fingerprint (str): 训练数据指纹
+
+    Returns:
+        str: 保存的文件路径；失败时返回 None
+    """
+    if not fingerprint:
+        return None
+
+    state = predictor.get_trained_state()
+    if state is None:
+        logger.warning(f"预测系统未训练，跳过保存 for mode: {predictor.mode}")
+        return None
+
+    try:
+        os.makedirs(MODEL_ARTIFACT_DIR, exist_ok=True)
+        path = get_artifact_path(predictor.mode, fingerprint)
+        payload = {
+            'artifact_version': ARTIFACT_VERSION,
+            'mode': predictor.mode,
+            'fingerprint': fingerprint,
+            'state': state,
+        }
+
+        fd, tmp_path = tempfile.mkstemp(dir=MODEL_ARTIFACT_DIR, suffix='.tmp')
+        os.close(fd)
+        joblib.dump(payload, tmp_path, compress=3)
+        os.replace(tmp_path, path)
+
+        logger.info(f"✓ 预测模型已保存: {path}")
+        prune_artifacts(predictor.mode, keep=path)
+        return path
+
+    except Exception as e:
+        logger.error(f"保存预测模型失败 for mode {predictor.mode}: {e}", exc_info=True)
+        return None
+
+
+def load_predictor(mode, fingerprint):
+    """
+    从磁盘加载与数据指纹匹配的预测系统
+
+    Args:
+        mode (str): 施工模式
+        fingerprint (str): 训练数据指纹
+
+    Returns:
+        CostPredictionSystem: 恢复后的预测系统；文件不存在或版本不匹配时返回 None
+    """
+    if not fingerprint:
+        return None
+
+    path = get_artifact_path(mode, fingerprint)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        payload = joblib.load(path)
+        if (payload.get('artifact_version') != ARTIFACT_VERSION or
+                payload.get('mode') != mode or
+                payload.get('fingerprint') != fingerprint):
+            logger.warning(f"模型文件版本或指纹不匹配，忽略: {path}")
+            return None
+
+        predictor = CostPredictionSystem(mode=mode)
+        if not predictor.restore_trained_state(payload['state']):
+            return None
+
+        logger.info(f"✓ 已从磁盘加载预测模型: {path}")
+        return predictor
+
+    except Exception as e:
+        logger.warning(f"加载预测模型文件失败 {path}: {e}")
+        return None
+
+
+def prune_artifacts(mode, keep=None):
+    """删除指定模式较旧的模型文件，只保留最近的 MAX_ARTIFACTS_PER_MODE 个"""
+    pattern = os.path.join(MODEL_ARTIFACT_DIR, f"{mode}_v*.joblib")
+    paths = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+    for path in paths[MAX_ARTIFACTS_PER_MODE:]:
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            logger.info(f"已删除过期模型文件: {path}")
+        except OSError as e:
+            logger.warning(f"删除过期模型文件失败 {path}: {e}")
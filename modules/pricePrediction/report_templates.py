@@ -0,0 +1,538 @@
+# modules/pricePrediction/report_templates.py
+"""
+价格预测报告的 Excel 导出模板
+
+钢筋笼、钢衬里两种施工模式的报告结构相同，只在工程量项目、文字前缀和
+少数附加小节上有差异，因此共用同一组小节生成函数，差异通过 MODE_REPORT_CONFIGS 描述；
+自定义模式的报告结构不同，单独一个模板。模板只负责产出行，写入由 utils.excel_export 完成。
+"""
+
+from utils.excel_export import (
+    blank, header, label_value, pie_chart, register_export_template, row, section, title
+)
+
+# 模板名
+STEEL_CAGE_TEMPLATE = 'steel_cage_report'
+STEEL_LINING_TEMPLATE = 'steel_lining_report'
+CUSTOM_MODE_TEMPLATE = 'custom_mode_report'
+
+# 预测方法最终状态的显示名称
+METHOD_STATUS_NAMES = {
+    'fully_available': '完全可用',
+    'execute_only': '可执行但显示禁用',
+    'display_error': '显示启用但执行失败',
+    'fully_disabled': '完全禁用',
+    'unknown': '状态未知'
+}
+
+# 算法名称的中文显示
+ALGORITHM_DISPLAY_NAMES = {
+    'LinearRegression': '线性回归算法',
+    'DecisionTree': '决策树算法',
+    'RandomForest': '随机森林算法',
+    'SupportVectorRegression': '支持向量机算法',
+    'NeuralNetwork': '神经网络算法',
+    "岭回归 (RidgeCV)": "岭回归算法"
+}
+
+# 钢衬里模式的六大费用要素
+STEEL_LINING_COST_ITEMS = [
+    "拼装场地费用", "制作胎具费用", "钢支墩、埋件费用",
+    "扶壁柱费用", "走道板及操作平台费用", "钢网架费用"
+]
+
+# 各施工模式报告的差异配置
+MODE_REPORT_CONFIGS = {
+    'steel_cage': {
+        'title': "钢筋笼施工模式智能预测分析报告",
+        'default_mode_name': '钢筋笼施工模式',
+        'quantity_items': [
+            ('钢筋总吨数', '吨'),
+            ('塔吊租赁工程量', '台班'),
+            ('吊索具数量', '套'),
+            ('套筒数量', '个'),
+        ],
+        # 报告文字前缀（如"钢衬里模式"），钢筋笼模式不加前缀
+        'prefix': '',
+        'method_name_prefix': '',
+        'algorithm_notes': [],
+        'summary_feature': None,
+        'data_source_note': None,
+        'cost_detail_section': False,
+        # 最佳模型分析是否放在综合状态汇总之后
+        'best_model_after_summary': False,
+        'chart_title': "钢筋笼模式成本构成分析",
+        'chart_notes': [],
+    },
+    'steel_lining': {
+        'title': "钢衬里施工模式智能预测分析报告",
+        'default_mode_name': '钢衬里施工模式',
+        'quantity_items': [
+            ('拼装场地总工程量', '立方米'),
+            ('制作胎具总工程量', '吨'),
+            ('钢支墩埋件总工程量', '吨'),
+            ('扶壁柱总工程量', '吨'),
+            ('走道板操作平台总工程量', '吨'),
+            ('钢网梁总工程量', '吨'),
+        ],
+        'prefix': '钢衬里模式',
+        'method_name_prefix': '钢衬里-',
+        'algorithm_notes': [("钢衬里模式特殊说明:", "钢衬里模式使用与钢筋笼模式相同的算法配置，但数据特征不同")],
+        'summary_feature': "基于拼装场地、制作胎具、钢支墩埋件、扶壁柱、走道板平台、钢网梁等六大要素",
+        'data_source_note': "钢衬里模式使用 key_factors_2 和 price_baseline_2 表的历史数据",
+        'cost_detail_section': True,
+        'best_model_after_summary': True,
+        'chart_title': "钢衬里模式成本构成分析",
+        'chart_notes': [(20, "图表说明：钢衬里模式基于六大费用要素的成本分布")],
+    },
+}
+
+
+def format_prediction_status_for_export(prediction_results):
+    """
+    为导出功能格式化预测状态信息
+
+    Args:
+        prediction_results (dict): 完整的预测结果
+
+    Returns:
+        dict: 格式化的状态信息，适合导出到Excel
+    """
+    if not prediction_results:
+        return {
+            "状态概览": "预测结果为空",
+            "可用方法数量": 0,
+            "算法状态": "未知",
+            "显示权限": "未知"
+        }
+
+    # 提取状态信息
+    method_status = prediction_results.get("预测方法状态", {})
+    algorithm_status = prediction_results.get("算法执行状态", {})
+    display_status = prediction_results.get("显示权限状态", {})
+
+    # 统计方法状态
+    status_counts = {
+        'fully_available': 0,
+        'execute_only': 0,
+        'display_error': 0,
+        'fully_disabled': 0
+    }
+
+    for method_info in method_status.values():
+        final_status = method_info.get('final_status', 'unknown')
+        if final_status in status_counts:
+            status_counts[final_status] += 1
+
+    # 格式化输出
+    formatted_status = {
+        "状态概览": f"完全可用:{status_counts['fully_available']}个, 可执行但显示禁用:{status_counts['execute_only']}个, 显示启用但执行失败:{status_counts['display_error']}个, 完全禁用:{status_counts['fully_disabled']}个",
+        "可用方法数量": status_counts['fully_available'],
+        "算法执行能力": "可用" if algorithm_status.get('can_execute_ai', False) else "不可用",
+        "算法状态详情": algorithm_status.get('message', '未知'),
+        "启用算法数量": algorithm_status.get('enabled_count', 0),
+        "总算法数量": algorithm_status.get('total_count', 0)
+    }
+
+    # 添加各方法的详细状态
+    for method_key, method_info in method_status.items():
+        method_name = method_info.get('name', method_key)
+        formatted_status[f"{method_name}_状态"] = method_info.get('final_status', 'unknown')
+        formatted_status[f"{method_name}_执行消息"] = method_info.get('execution_message', '')
+        formatted_status[f"{method_name}_显示消息"] = method_info.get('display_message', '')
+
+    return formatted_status
+
+
+def _truncate(text, limit=50):
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+# ---------- 施工模式报告的各个小节 ----------
+
+def _overview_section(report_data, config, total_cost):
+    yield section("报告概述")
+    yield label_value("施工模式:", report_data.get('模式', config['default_mode_name']))
+    yield label_value("生成时间:", report_data.get('生成时间', ''))
+    yield label_value("预测总价(元):", f"{total_cost:,.0f}")
+    yield blank()
+
+
+def _quantity_section(report_data, config, measures_cost_value):
+    quantities = report_data.get('工程量数据', {})
+    yield section("工程量数据详情")
+    yield header('工程量项目', '数量', '单位', '备注')
+    for item_name, unit in config['quantity_items']:
+        yield row(item_name, f"{quantities.get(item_name, 0):.2f}", unit, "用户输入或智能估算")
+    if measures_cost_value > 0:
+        yield row("措施费", f"{measures_cost_value:,.2f}", "元", "额外费用")
+    yield blank()
+
+
+def _main_prediction_row(method_label, subject, result, success_confidence, success_note):
+    """
+    主要预测结果（AI / 比率法）的一行，按状态给出总价、可信度和备注
+
+    subject 为备注消息的主语（如"钢衬里模式AI预测"），为空时不加主语。
+    """
+    status = result.get('status', 'unknown')
+    value = result.get('value')
+
+    if status == 'success' and isinstance(value, (int, float)):
+        return row(method_label, f"{value:,.0f}", success_confidence, success_note)
+    if status == 'display_disabled':
+        return row(method_label, "显示被禁用", "不适用", result.get('message', f"{subject}显示权限被禁用"))
+    if status == 'error':
+        return row(method_label, "预测失败", "低", f"{subject}错误: {result.get('message', '未知错误')}")
+    return row(method_label, "不可用", "无",
+               f"{subject}状态: {status}, 消息: {result.get('message', '未知状态')}")
+
+
+def _prediction_result_section(report_data, config):
+    prefix = config['prefix']
+    yield section("预测结果分析")
+    yield header('预测方法', '预测总价(元)', '可信度', '备注')
+    yield _main_prediction_row("AI预测（机器学习集成）", f"{prefix}AI预测" if prefix else "",
+                               report_data.get('主要AI预测', {}), "高", f"{prefix}多算法集成结果，预测成功")
+    yield _main_prediction_row("比率法预测", f"{prefix}比率法预测" if prefix else "",
+                               report_data.get('主要比率法预测', {}), "中", f"{prefix}传统估算方法，预测成功")
+    yield blank()
+
+
+def _best_model_section(ml_predictions, ratio_prediction):
+    if not (ml_predictions and ratio_prediction):
+        return
+    yield section("最佳模型分析")
+
+    # 找出最佳模型（最接近比率法的模型）
+    optimal_model_key = None
+    min_diff_to_ratio = float('inf')
+    for model_key, model_pred_val in ml_predictions.items():
+        if (model_key != '集成平均预测' and
+                model_pred_val is not None and
+                isinstance(model_pred_val, (int, float))):
+            diff = abs(model_pred_val - ratio_prediction)
+            if diff < min_diff_to_ratio:
+                min_diff_to_ratio = diff
+                optimal_model_key = model_key
+
+    if optimal_model_key is not None:
+        model_pred_val = ml_predictions[optimal_model_key]
+        deviation_val = model_pred_val - ratio_prediction
+        deviation_pct = deviation_val / ratio_prediction * 100
+
+        yield label_value("最佳单一模型:", ALGORITHM_DISPLAY_NAMES.get(optimal_model_key, optimal_model_key),
+                          emphasize_label=True)
+        yield label_value("最佳模型预测价格:", f"{model_pred_val:,.0f} 元")
+        yield label_value("与比率法偏差:", f"{deviation_val:,.0f} 元 ({deviation_pct:.1f}%)")
+        yield label_value("模型特点:", "基于历史项目数据训练，最接近传统比率法预测")
+    yield blank()
+
+
+def _algorithm_status_section(report_data, config):
+    algorithm_status = report_data.get('算法执行状态', {})
+    if not algorithm_status:
+        return
+    prefix = config['prefix']
+    yield section(f"{prefix}算法执行状态分析")
+    yield label_value("AI算法可用性:", "可用" if algorithm_status.get('can_execute_ai', False) else "不可用",
+                      emphasis=True)
+    yield label_value("启用算法数量:",
+                      f"{algorithm_status.get('enabled_count', 0)}/{algorithm_status.get('total_count', 0)}")
+    yield label_value("算法状态消息:", algorithm_status.get('message', '无消息'))
+    enabled_algorithms = algorithm_status.get('enabled_algorithms', [])
+    yield label_value("可用算法列表:",
+                      ', '.join(enabled_algorithms) if enabled_algorithms else f'{prefix}无可用算法')
+    for label, note in config['algorithm_notes']:
+        yield label_value(label, note)
+    yield blank()
+
+
+def _method_status_section(report_data, config):
+    method_status = report_data.get('预测方法状态', {})
+    if not method_status:
+        return
+    yield section(f"{config['prefix']}预测方法详细状态")
+    yield header('预测方法', '最终状态', '可执行', '可显示', '执行消息', '显示消息')
+    for method_key, method_info in method_status.items():
+        final_status = method_info.get('final_status', 'unknown')
+        yield row(
+            f"{config['method_name_prefix']}{method_info.get('name', method_key)}",
+            METHOD_STATUS_NAMES.get(final_status, final_status),
+            "是" if method_info.get('can_execute', False) else "否",
+            "是" if method_info.get('can_display', False) else "否",
+            _truncate(method_info.get('execution_message', '')),
+            _truncate(method_info.get('display_message', '')),
+        )
+    yield blank()
+
+
+def _status_summary_section(report_data, config):
+    summary = format_prediction_status_for_export(report_data.get('预测结果', {}))
+    if not summary:
+        return
+    prefix = config['prefix']
+    available_count = summary.get('可用方法数量', 0)
+
+    yield section(f"{prefix}综合状态汇总")
+    yield label_value("状态概览:", summary.get('状态概览', '无信息'))
+    yield label_value("完全可用方法数:", str(available_count), emphasis=True)
+    yield label_value("算法执行能力:", summary.get('算法执行能力', '未知'))
+    if config['summary_feature']:
+        yield label_value(f"{prefix}特征:", config['summary_feature'])
+
+    if available_count == 4:
+        suggestion = f"{prefix}系统运行正常，所有预测方法都可用，可进行全面分析"
+    elif available_count > 0:
+        suggestion = f"{prefix}系统部分正常，建议检查相关配置以启用更多预测方法"
+    else:
+        suggestion = f"{prefix}系统存在问题，建议检查算法配置和综合指标设置"
+    yield label_value("系统建议:", suggestion)
+    if config['data_source_note']:
+        yield label_value("数据来源说明:", config['data_source_note'])
+    yield blank()
+
+
+def _steel_lining_cost_detail_section(estimated_costs):
+    """钢衬里模式特有的六大费用要素构成分析"""
+    if not (estimated_costs and any(cost > 0 for cost in estimated_costs.values())):
+        return
+    yield section("钢衬里模式成本构成详情")
+    yield label_value("成本项目类型:", "钢衬里施工六大费用要素")
+
+    total_estimated_cost = sum(estimated_costs.values())
+    cost_breakdown = []
+    for item in STEEL_LINING_COST_ITEMS:
+        if item in estimated_costs and estimated_costs[item] > 0:
+            percentage = (estimated_costs[item] / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
+            cost_breakdown.append(f"{item}: {percentage:.1f}%")
+    yield label_value("主要成本构成:", "; ".join(cost_breakdown) if cost_breakdown else "成本构成数据不完整")
+
+    if cost_breakdown:
+        # 找出占比最大的成本项
+        max_cost_item = max(STEEL_LINING_COST_ITEMS, key=lambda x: estimated_costs.get(x, 0))
+        max_cost_value = estimated_costs.get(max_cost_item, 0)
+        max_percentage = (max_cost_value / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
+        if max_percentage > 40:
+            suggestion = f"建议重点关注{max_cost_item}的成本控制，该项占总成本{max_percentage:.1f}%"
+        elif max_percentage > 25:
+            suggestion = f"{max_cost_item}是主要成本项(占{max_percentage:.1f}%)，需适当关注"
+        else:
+            suggestion = "钢衬里模式各成本项分布相对均衡，建议整体优化"
+    else:
+        suggestion = "成本分析数据不足，建议完善工程量输入"
+    yield label_value("成本分析建议:", suggestion)
+    yield blank()
+
+
+def _confidence_section(ensemble_prediction, ratio_prediction):
+    if not (ensemble_prediction and ratio_prediction):
+        return
+    yield section("预测可信度评估")
+
+    larger = max(ensemble_prediction, ratio_prediction)
+    diff_pct = abs(ensemble_prediction - ratio_prediction) / larger * 100 if larger != 0 else 0
+    if diff_pct < 10:
+        confidence = "高"
+        recommendation = "两种方法预测总价接近，建议采用集成平均预测值。"
+    elif diff_pct < 20:
+        confidence = "中"
+        recommendation = "两种方法预测总价存在一定差异，建议结合项目特点综合判断。"
+    else:
+        confidence = "低"
+        recommendation = "两种方法预测总价差异较大，建议重新检查输入数据或寻求专家意见。"
+
+    yield label_value("机器学习集成预测:", f"{ensemble_prediction:,.0f} 元")
+    yield label_value("比率法预测:", f"{ratio_prediction:,.0f} 元")
+    yield label_value("预测差异:", f"{diff_pct:.1f}%")
+    yield label_value("可信度等级:", confidence, emphasis=True)
+    yield label_value("专业建议:", recommendation)
+    yield blank()
+
+
+def _price_range_section(ensemble_prediction, ratio_prediction):
+    if not (ensemble_prediction and ratio_prediction):
+        return
+    yield section("预测总价区间建议")
+
+    mid_value = (ensemble_prediction + ratio_prediction) / 2
+    min_value = min(ensemble_prediction, ratio_prediction)
+    max_value = max(ensemble_prediction, ratio_prediction)
+
+    yield label_value("预测总价中值:", f"{mid_value:,.0f} 元")
+    yield label_value("预测总价范围:", f"{min_value:,.0f} - {max_value:,.0f} 元")
+    yield label_value("建议预算(含10%缓冲):", f"{mid_value * 1.1:,.0f} 元", emphasis=True)
+    yield label_value("保守预算(含15%缓冲):", f"{mid_value * 1.15:,.0f} 元")
+    yield label_value("预算说明:", "建议在预测总价基础上增加10-15%的风险缓冲")
+    yield blank()
+
+
+def _cost_composition_section(estimated_costs, measures_cost_value, total_cost, config):
+    if not (estimated_costs and any(cost > 0 for cost in estimated_costs.values())):
+        return
+    yield section("成本构成分析")
+    yield header('成本项目', '预测成本(元)', '占总成本(%)', '备注')
+
+    chart_data = []
+    total_estimated_cost = sum(estimated_costs.values())
+    for cost_name, cost in estimated_costs.items():
+        if cost > 0:
+            percentage = (cost / total_estimated_cost * 100) if total_estimated_cost > 0 else 0
+            yield row(cost_name, f"{cost:,.2f}", f"{percentage:.1f}%", "ML模型估算")
+            chart_data.append((cost_name, cost))
+
+    if measures_cost_value > 0:
+        percentage = (measures_cost_value / total_cost * 100) if total_cost > 0 else 0
+        yield row("措施费", f"{measures_cost_value:,.2f}", f"{percentage:.1f}%", "额外费用")
+        chart_data.append(("措施费", measures_cost_value))
+    yield blank()
+    yield blank()
+
+    if len(chart_data) > 1:
+        yield section("成本构成分析图表")
+        yield pie_chart(config['chart_title'], ['成本项目', '预测成本'], chart_data,
+                        notes=config['chart_notes'])
+
+
+def construction_mode_report_layout(mode):
+    """生成指定施工模式（钢筋笼 / 钢衬里）的报告模板"""
+    config = MODE_REPORT_CONFIGS[mode]
+
+    def layout(report_data):
+        ml_prediction_results = report_data.get('预测结果') or {}
+        measures_cost_value = report_data.get('措施费', 0) or 0
+        ml_predictions = ml_prediction_results.get("机器学习预测结果") or {}
+        ratio_prediction = ml_prediction_results.get("比率法预测总价")
+        estimated_costs = ml_prediction_results.get("估算的各项成本 (用于ML的特征)") or {}
+        ensemble_prediction = ml_predictions.get('集成平均预测')
+        total_cost = ensemble_prediction or ratio_prediction or 0
+
+        yield title(config['title'])
+        yield blank()
+        yield from _overview_section(report_data, config, total_cost)
+        yield from _quantity_section(report_data, config, measures_cost_value)
+        yield from _prediction_result_section(report_data, config)
+        if not config['best_model_after_summary']:
+            yield from _best_model_section(ml_predictions, ratio_prediction)
+        yield from _algorithm_status_section(report_data, config)
+        yield from _method_status_section(report_data, config)
+        yield from _status_summary_section(report_data, config)
+        if config['cost_detail_section']:
+            yield from _steel_lining_cost_detail_section(estimated_costs)
+        if config['best_model_after_summary']:
+            yield from _best_model_section(ml_predictions, ratio_prediction)
+        yield from _confidence_section(ensemble_prediction, ratio_prediction)
+        yield from _price_range_section(ensemble_prediction, ratio_prediction)
+        yield from _cost_composition_section(estimated_costs, measures_cost_value, total_cost, config)
+
+    return layout
+
+
+# ---------- 自定义模式报告 ----------
+
+def custom_mode_report_layout(report_data):
+    """自定义模式报告模板"""
+    total_prediction = report_data.get('预测结果') or {}
+    total_cost = total_prediction.get('total_predicted_cost', 0) or 0
+    input_params = report_data.get('输入参数') or []
+    param_costs = total_prediction.get('param_costs') or {}
+
+    yield title("自定义模式智能预测分析报告")
+    yield blank()
+
+    yield section("报告概述")
+    yield label_value("施工模式:", report_data.get('模式', '自定义模式'))
+    yield label_value("生成时间:", report_data.get('生成时间', ''))
+    yield label_value("预测总价(元):", f"{total_cost:,.0f}")
+    yield blank()
+
+    # 输入参数
+    yield section("输入参数详情")
+    yield header('参数名称', '工程量', '工程量占比(%)', '价格量(元)', '价格占比(%)', '关键因素')
+    if input_params:
+        for param in input_params:
+            yield row(param.get('name', '未知参数'),
+                      f"{param.get('quantity', 0):.2f}",
+                      f"{param.get('quantity_ratio', 0):.2f}",
+                      f"{param.get('price_amount', 0):,.2f}",
+                      f"{param.get('price_ratio', 0):.2f}",
+                      param.get('key_factor', ''))
+    else:
+        yield row("暂无输入参数", "0.00", "0.00", "0.00", "0.00", "请检查参数输入")
+    yield blank()
+
+    # 预测方法说明
+    if total_cost > 0 and len(input_params) >= 2:
+        confidence = "中等"
+        suggestion = "基于用户自定义参数，建议结合项目实际情况验证"
+    elif total_cost > 0:
+        confidence = "较低"
+        suggestion = "参数较少，建议增加更多参数提高预测准确性"
+    else:
+        confidence = "低"
+        suggestion = "预测总价异常，请检查参数输入的合理性"
+
+    yield section("预测方法说明")
+    yield label_value("预测模式:", "自定义参数智能估算")
+    yield label_value("计算方法:", "基于用户输入参数和占比关系进行成本估算")
+    yield label_value("预测总价:", f"{total_cost:,.0f} 元", emphasis=True)
+    yield label_value("可信度评估:", confidence)
+    yield label_value("专业建议:", suggestion)
+    yield blank()
+
+    # 预算建议
+    if total_cost > 0:
+        yield section("预算建议")
+        yield label_value("基准预算:", f"{total_cost:,.0f} 元")
+        yield label_value("建议预算(含10%缓冲):", f"{total_cost * 1.1:,.0f} 元", emphasis=True)
+        yield label_value("保守预算(含15%缓冲):", f"{total_cost * 1.15:,.0f} 元")
+        yield label_value("风险预算(含20%缓冲):", f"{total_cost * 1.2:,.0f} 元")
+        yield label_value("缓冲说明:", "自定义模式建议增加15-20%缓冲以应对不确定性")
+        yield blank()
+
+    # 预测结果
+    yield section("预测结果分析")
+    yield header('参数名称', '预测成本(元)', '占总成本(%)', '备注')
+    chart_data = []
+    if any(cost > 0 for cost in param_costs.values()):
+        for param_name, cost in param_costs.items():
+            if cost > 0:
+                percentage = (cost / total_cost * 100) if total_cost > 0 else 0
+                yield row(param_name, f"{cost:,.2f}", f"{percentage:.1f}%", "智能估算")
+                chart_data.append((param_name, cost))
+    else:
+        yield row("暂无成本预测数据", "0.00", "0.0%", "请检查参数配置")
+    yield row("总计", f"{total_cost:,.0f}", "100.0%", "预测总价", styles=['report_emphasis'] * 4)
+    yield blank()
+
+    if len(chart_data) > 1 and total_cost > 0:
+        yield section("成本构成分析图表")
+        yield pie_chart("成本构成分析", ['参数名称', '预测成本'], chart_data)
+        yield blank()
+        yield blank()
+
+        yield section("智能分析建议")
+        max_cost_param = max(param_costs.items(), key=lambda x: x[1] if x[1] > 0 else 0)
+        max_cost_percentage = max_cost_param[1] / total_cost * 100
+        if max_cost_percentage > 50:
+            optimization = "主要成本项占比较高，建议重点关注该项目的成本控制"
+        elif max_cost_percentage > 30:
+            optimization = "成本分布相对集中，建议平衡各项成本投入"
+        else:
+            optimization = "成本分布较为均衡，建议保持当前配置"
+        yield label_value("主要成本项:", f"{max_cost_param[0]} (占{max_cost_percentage:.1f}%)",
+                          emphasize_label=True)
+        yield label_value("成本优化建议:", optimization, emphasize_label=True)
+        yield label_value("自定义模式建议:", "建议结合实际项目经验，对关键参数进行细化和验证",
+                          emphasize_label=True)
+    else:
+        # 数据不足时给出说明
+        yield section("数据不足，无法生成成本构成图表")
+        yield row("建议：", "1. 检查输入参数是否完整")
+        yield row("", "2. 确保至少有2个有效的成本项目")
+        yield row("", "3. 检查预测总价是否大于0")
+
+
+register_export_template(STEEL_CAGE_TEMPLATE, "钢筋笼模式预测报告", construction_mode_report_layout('steel_cage'))
+register_export_template(STEEL_LINING_TEMPLATE, "钢衬里模式预测报告", construction_mode_report_layout('steel_lining'))
+register_export_template(CUSTOM_MODE_TEMPLATE, "自定义模式预测报告", custom_mode_report_layout)
@@ -0,0 +1,81 @@
+# modules/pricePrediction/rule_stats.py
+"""
+规则库的增量统计量
+
+CostPredictionSystem 的规则（平均工程量、工程量比率、比率法因子、平均单位成本等）
+都是若干逐行观测值的均值或中位数。这里为每条规则保存充分统计量：
+均值类规则保存累计和与计数，中位数类规则保存有序样本。
+新增历史项目时只需把新行的观测值累加进来，无需基于全部历史数据重新计算。
+"""
+
+import bisect
+import copy
+from collections import namedtuple
+
+import numpy as np
+
+# 规则的聚合方式
+RULE_MEAN = 'mean'
+RULE_MEDIAN = 'median'
+
+# 一条规则的逐行观测值：key 为规则名，values 为参与计算的观测值，default 为无观测值时的取值
+RuleObservation = namedtuple('RuleObservation', ['key', 'kind', 'values', 'default'])
+
+
+class RuleStatistics:
+    """一组规则（全局或某个簇）的充分统计量"""
+
+    def __init__(self):
+        self.rows = 0
+        self._kinds = {}
+        self._defaults = {}
+        self._sums = {}
+        self._counts = {}
+        self._samples = {}
+
+    def add(self, observations, rows):
+        """
+        累加一批数据行的观测值
+
+        Args:
+            observations (list[RuleObservation]): 逐行观测值
+            rows (int): 这批数据的行数
+        """
+        for obs in observations:
+            self._kinds.setdefault(obs.key, obs.kind)
+            self._defaults.setdefault(obs.key, obs.default)
+
+            values = np.asarray(obs.values, dtype=float).ravel()
+            values = values[~np.isnan(values)]
+
+            if obs.kind == RULE_MEDIAN:
+                samples = self._samples.setdefault(obs.key, [])
+                for value in values:
+                    bisect.insort(samples, float(value))
+            else:
+                self._sums[obs.key] = self._sums.get(obs.key, 0.0) + float(values.sum())
+                self._counts[obs.key] = self._counts.get(obs.key, 0) + len(values)
+
+        self.rows += rows
+
+    def get(self, key):
+        """当前统计量下规则 key 的取值"""
+        if self._kinds.get(key) == RULE_MEDIAN:
+            samples = self._samples.get(key)
+            return float(np.median(samples)) if samples else self._defaults.get(key)
+
+        count = self._counts.get(key, 0)
+        return self._sums[key] / count if count else self._defaults.get(key)
+
+    def to_rules(self):
+        """导出为规则字典（格式与 _calculate_rules_for_df 的结果一致）"""
+        return {key: self.get(key) for key in self._kinds}
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    @classmethod
+    def from_observations(cls, observations, rows):
+        stats = cls()
+        stats.add(observations, rows)
+        return stats
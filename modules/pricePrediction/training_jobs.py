@@ -0,0 +1,242 @@
+# modules/pricePrediction/training_jobs.py
+"""
+后台模型训练任务队列
+
+将 load_data_from_database + train_system 从 Dash 请求线程移到后台线程池中执行，
+每个训练任务有唯一的任务ID以及状态/进度信息，界面通过 dcc.Interval 轮询任务状态，
+训练期间 HTTP worker 可以继续处理其他请求。
+
+使用线程池而非进程池：训练结果需要写回本进程内的模型注册表，
+且 sklearn 的大部分拟合计算会释放 GIL。
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import dash_bootstrap_components as dbc
+from dash import dcc, html
+from dash.dependencies import Input, Output
+
+from .model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+# 训练线程数，可通过环境变量 PREDICTION_TRAINING_WORKERS 覆盖
+TRAINING_MAX_WORKERS = int(os.getenv('PREDICTION_TRAINING_WORKERS', '2'))
+
+# 保留的历史任务数量
+MAX_JOB_HISTORY = 50
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+MODE_DISPLAY_NAMES = {
+    'steel_cage': '钢筋笼',
+    'steel_lining': '钢衬里',
+}
+
+
+class TrainingJobManager:
+    """训练任务管理器：提交任务、跟踪状态和进度"""
+
+    def __init__(self, max_workers=TRAINING_MAX_WORKERS, max_history=MAX_JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='model-training')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(self, mode, force_check=True):
+        """
+        提交训练任务；同一模式已有排队或运行中的任务时直接返回该任务ID
+
+        Args:
+            mode (str): 施工模式
+            force_check (bool): 是否忽略检查间隔立即比对数据指纹
+
+        Returns:
+            str: 任务ID
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job['mode'] == mode and job['status'] in ACTIVE_JOB_STATUSES:
+                    return job['job_id']
+
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'mode': mode,
+                'status': JOB_QUEUED,
+                'progress': 0,
+                'message': '等待训练',
+                'error': None,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+            }
+            self._trim_history()
+
+        self._executor.submit(self._run, job_id, mode, force_check)
+        logger.info(f"已提交训练任务 {job_id} for mode: {mode}")
+        return job_id
+
+    def _trim_history(self):
+        """删除最早的已结束任务，使历史记录不超过上限"""
+        while len(self._jobs) > self.max_history:
+            finished = next((jid for jid, job in self._jobs.items()
+                             if job['status'] not in ACTIVE_JOB_STATUSES), None)
+            if finished is None:
+                break
+            self._jobs.pop(finished)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _run(self, job_id, mode, force_check):
+        self._update(job_id, status=JOB_RUNNING, started_at=time.time(), progress=5, message='开始训练')
+
+        def on_progress(percent, message):
+            self._update(job_id, progress=percent, message=message)
+
+        try:
+            predictor = model_registry.get_predictor(mode, force_check=force_check,
+                                                     progress_callback=on_progress)
+            if predictor is not None and predictor.is_trained:
+                self._update(job_id, status=JOB_SUCCEEDED, progress=100,
+                             message=f'模型已就绪（{len(predictor.models)} 个算法）',
+                             finished_at=time.time())
+            else:
+                self._update(job_id, status=JOB_FAILED, progress=100,
+                             message='训练失败，请检查历史数据或算法配置',
+                             error='predictor unavailable', finished_at=time.time())
+        except Exception as e:
+            logger.error(f"训练任务 {job_id} 异常 for mode {mode}: {e}", exc_info=True)
+            self._update(job_id, status=JOB_FAILED, progress=100,
+                         message=f'训练异常: {e}', error=str(e), finished_at=time.time())
+
+    def get_job(self, job_id):
+        """获取任务状态的副本，任务不存在时返回 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_active_job(self, mode):
+        """获取指定模式正在排队或运行的任务"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job['mode'] == mode and job['status'] in ACTIVE_JOB_STATUSES:
+                    return dict(job)
+        return None
+
+    def list_jobs(self):
+        """按提交顺序列出所有任务"""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+
+# 全局训练任务管理器
+training_job_manager = TrainingJobManager()
+
+
+def submit_training_job(mode, force_check=True):
+    """提交训练任务，返回任务ID"""
+    return training_job_manager.submit(mode, force_check=force_check)
+
+
+def get_training_job_status(job_id):
+    """查询训练任务状态"""
+    return training_job_manager.get_job(job_id)
+
+
+def get_predictor_nonblocking(mode):
+    """
+    非阻塞地获取预测系统
+
+    已有训练好的模型时立即返回（到期时在后台检查数据变化）；
+    尚无模型时提交后台训练任务并返回任务ID，调用方不会被训练阻塞。
+
+    Returns:
+        tuple: (predictor 或 None, 训练任务ID 或 None)
+    """
+    predictor = model_registry.get_cached_predictor(mode)
+    if predictor is not None:
+        if model_registry.is_check_due(mode):
+            submit_training_job(mode, force_check=False)
+        return predictor, None
+
+    return None, submit_training_job(mode, force_check=False)
+
+
+# ==================== 训练进度显示组件 ====================
+
+def create_training_job_monitor(id_prefix, interval_ms=1000):
+    """
+    创建训练任务进度监视组件
+
+    组件包含任务ID存储、轮询定时器和进度显示区域；
+    需配合 register_training_job_monitor_callbacks(app, id_prefix) 使用。
+    向 f"{id_prefix}-job-store" 写入任务ID列表即可开始轮询。
+    """
+    return html.Div([
+        dcc.Store(id=f"{id_prefix}-job-store", data=[]),
+        dcc.Interval(id=f"{id_prefix}-job-interval", interval=interval_ms, disabled=True),
+        html.Div(id=f"{id_prefix}-job-status")
+    ])
+
+
+def render_training_job_status(job):
+    """渲染单个训练任务的进度条和状态信息"""
+    mode_name = MODE_DISPLAY_NAMES.get(job['mode'], job['mode'])
+    color = {
+        JOB_QUEUED: 'secondary',
+        JOB_RUNNING: 'info',
+        JOB_SUCCEEDED: 'success',
+        JOB_FAILED: 'danger',
+    }.get(job['status'], 'secondary')
+
+    elapsed = ''
+    if job['started_at']:
+        end = job['finished_at'] or time.time()
+        elapsed = f"（{end - job['started_at']:.1f}s）"
+
+    return html.Div([
+        html.Small(f"{mode_name}模型训练：{job['message']}{elapsed}", className="text-muted"),
+        dbc.Progress(value=job['progress'], color=color,
+                     striped=job['status'] in ACTIVE_JOB_STATUSES,
+                     animated=job['status'] in ACTIVE_JOB_STATUSES,
+                     className="mb-2", style={'height': '8px'})
+    ])
+
+
+def register_training_job_monitor_callbacks(app, id_prefix):
+    """注册训练任务进度监视组件的轮询回调"""
+
+    @app.callback(
+        [Output(f"{id_prefix}-job-status", "children"),
+         Output(f"{id_prefix}-job-interval", "disabled")],
+        [Input(f"{id_prefix}-job-store", "data"),
+         Input(f"{id_prefix}-job-interval", "n_intervals")]
+    )
+    def poll_training_jobs(job_ids, n_intervals):
+        if not job_ids:
+            return [], True
+
+        jobs = [job for job in (get_training_job_status(jid) for jid in job_ids) if job]
+        if not jobs:
+            return [], True
+
+        all_finished = all(job['status'] not in ACTIVE_JOB_STATUSES for job in jobs)
+        return [render_training_job_status(job) for job in jobs], all_finished
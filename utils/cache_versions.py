@@ -0,0 +1,77 @@
+# utils/cache_versions.py
+"""
+进程内缓存的跨 worker 失效版本号
+
+各进程内缓存（单价表、指标状态等）在 cache_versions 表中各占一行版本号：
+修改数据的一方递增版本号，其他进程定期比对版本号，发现变化即丢弃本地缓存。
+版本表不可用时读取/递增均返回 None，调用方应退化为仅依赖 TTL。
+"""
+
+import logging
+
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# 版本号表
+CACHE_VERSION_TABLE = 'cache_versions'
+
+_version_table_ready = False
+
+
+def _ensure_version_table(cursor):
+    global _version_table_ready
+    if _version_table_ready:
+        return
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{CACHE_VERSION_TABLE}` (
+            `cache_name` VARCHAR(64) NOT NULL PRIMARY KEY,
+            `version` BIGINT NOT NULL DEFAULT 0,
+            `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _version_table_ready = True
+
+
+def read_cache_version(cache_name):
+    """读取缓存 cache_name 的版本号（从未递增过时为 0），失败时返回 None"""
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        _ensure_version_table(cursor)
+        cursor.execute(f"SELECT `version` FROM `{CACHE_VERSION_TABLE}` WHERE `cache_name` = %s",
+                       (cache_name,))
+        row = cursor.fetchone()
+        cursor.close()
+        return row[0] if row else 0
+    except Exception as e:
+        logger.warning(f"读取缓存版本号失败 ({cache_name}): {e}")
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+
+def bump_cache_version(cache_name):
+    """递增缓存 cache_name 的版本号并返回新版本号，失败时返回 None"""
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        _ensure_version_table(cursor)
+        cursor.execute(f"""
+            INSERT INTO `{CACHE_VERSION_TABLE}` (`cache_name`, `version`) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE `version` = `version` + 1
+        """, (cache_name,))
+        cursor.execute(f"SELECT `version` FROM `{CACHE_VERSION_TABLE}` WHERE `cache_name` = %s",
+                       (cache_name,))
+        row = cursor.fetchone()
+        cursor.close()
+        return row[0] if row else None
+    except Exception as e:
+        logger.warning(f"更新缓存版本号失败 ({cache_name}): {e}")
+        return None
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,175 @@
+# utils/db_pool.py
+"""
+共享MySQL连接池
+
+所有模块通过 get_connection() 从同一个连接池获取 mysql.connector 连接，
+不再每次调用都重新建立 TCP 连接和认证握手。连接池基于 SQLAlchemy QueuePool，
+连接参数和池参数从环境变量读取（见 .env）：
+
+    DB_HOST / DB_PORT / DB_USER / DB_PASSWORD / DB_NAME   连接参数
+    DB_POOL_SIZE       常驻连接数（默认 10）
+    DB_MAX_OVERFLOW    高峰期允许额外创建的连接数（默认 20）
+    DB_POOL_RECYCLE    连接最长复用时间，秒（默认 3600，应小于 MySQL wait_timeout）
+    DB_POOL_TIMEOUT    等待空闲连接的超时时间，秒（默认 30）
+    DB_POOL_PRE_PING   取出连接前是否先 ping 检查连接有效性（默认 true）
+
+连接的 close() 会把连接归还连接池而不是真正关闭，调用方原有的
+conn.close() 写法无需修改。
+"""
+
+import logging
+import os
+import threading
+
+import mysql.connector
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+
+# 加载环境变量
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# MySQL数据库连接配置（所有模块共用）
+MYSQL_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', '3306')),
+    'user': os.getenv('DB_USER', 'dash'),
+    'password': os.getenv('DB_PASSWORD', '123456'),
+    'database': os.getenv('DB_NAME', 'dash_project'),
+    'charset': 'utf8mb4',
+    'autocommit': True  # 默认启用自动提交
+}
+
+# 连接池配置
+POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '3600')),
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+    'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# 连接池统计计数
+_pool_counters = {
+    'connects': 0,       # 新建物理连接次数
+    'checkouts': 0,      # 从池中取出连接次数
+    'invalidations': 0,  # 连接失效（ping失败、异常断开）次数
+}
+
+
+def _create_raw_connection():
+    """创建一个新的物理MySQL连接（由连接池在需要时调用）"""
+    return mysql.connector.connect(**MYSQL_CONFIG)
+
+
+def _register_pool_events(engine):
+    """注册连接池事件，用于统计和归还连接时恢复默认设置"""
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        _pool_counters['connects'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _pool_counters['checkouts'] += 1
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        _pool_counters['invalidations'] += 1
+        logger.warning(f"数据库连接已失效并从连接池移除: {exception}")
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        # 以事务模式借出的连接归还时恢复自动提交，避免影响下一个使用者
+        if dbapi_connection is not None and connection_record.info.pop('autocommit_changed', False):
+            try:
+                dbapi_connection.autocommit = True
+            except Exception as e:
+                logger.warning(f"恢复连接自动提交失败，连接将被丢弃: {e}")
+                connection_record.invalidate(e)
+
+
+def get_engine():
+    """
+    获取共享的SQLAlchemy引擎（懒加载，线程安全）
+
+    引擎既可用于 pandas.read_sql / DataFrame.to_sql，也为 get_connection() 提供连接池。
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    "mysql+mysqlconnector://",
+                    creator=_create_raw_connection,
+                    **POOL_CONFIG
+                )
+                _register_pool_events(_engine)
+                logger.info(
+                    f"MySQL连接池已创建: {MYSQL_CONFIG['host']}:{MYSQL_CONFIG['port']}/{MYSQL_CONFIG['database']} "
+                    f"(pool_size={POOL_CONFIG['pool_size']}, max_overflow={POOL_CONFIG['max_overflow']})"
+                )
+    return _engine
+
+
+def get_connection(autocommit=True):
+    """
+    从共享连接池获取MySQL连接
+
+    返回的连接与 mysql.connector 连接用法相同（cursor(dictionary=True)、commit()、
+    rollback() 等），close() 时归还连接池。
+
+    Args:
+        autocommit (bool): 是否自动提交；需要事务时传 False，并自行 commit/rollback
+
+    Returns:
+        连接池代理的 mysql.connector 连接
+    """
+    conn = get_engine().raw_connection()
+    if not autocommit:
+        # autocommit 必须设置在驱动连接上：连接池代理对象上的同名属性不会传给 mysql.connector
+        _driver_connection(conn).autocommit = False
+        conn.info['autocommit_changed'] = True
+    return conn
+
+
+def _driver_connection(conn):
+    """连接池代理背后的 mysql.connector 连接（兼容 SQLAlchemy 1.4 之前的 .connection 属性）"""
+    driver = getattr(conn, 'dbapi_connection', None)
+    return driver if driver is not None else conn.connection
+
+
+def get_pool_status():
+    """
+    获取连接池运行指标
+
+    Returns:
+        dict: 池大小、已借出/空闲连接数、溢出连接数以及累计计数
+    """
+    if _engine is None:
+        return {'initialized': False, **POOL_CONFIG, **_pool_counters}
+
+    pool = _engine.pool
+    return {
+        'initialized': True,
+        'pool_size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': pool.overflow(),
+        'max_overflow': POOL_CONFIG['max_overflow'],
+        'pool_recycle': POOL_CONFIG['pool_recycle'],
+        'pool_timeout': POOL_CONFIG['pool_timeout'],
+        'pool_pre_ping': POOL_CONFIG['pool_pre_ping'],
+        **_pool_counters
+    }
+
+
+def dispose_pool():
+    """关闭连接池中的所有连接（进程 fork 之后或测试时使用）"""
+    if _engine is not None:
+        _engine.dispose()
+        logger.info("MySQL连接池已释放")
@@ -0,0 +1,397 @@
+# utils/excel_export.py
+"""
+流式 Excel 报表导出引擎
+
+报表由"模板"描述：模板是一个生成器函数 layout(report_data)，逐行产出
+Row / PieChartBlock；引擎负责把这些行写入 openpyxl 的只写（write_only）工作簿：
+
+- 只写模式逐行写入磁盘，不在内存中保留整张表，明细再多内存占用也基本不变
+- 标题、小节标题、表头、强调等样式以命名样式注册一次，单元格只引用样式名，
+  不再为每个单元格 font.copy()
+- 列宽在第一遍遍历模板时统计（只保存每列的最大长度），第二遍写入；逐行读取数据库的
+  大表模板可以在注册时提供 column_widths，直接给出列宽，数据只遍历一遍
+
+导出不再经由 Dash 回调把整个文件 base64 传回浏览器：回调只登记一个导出任务并返回下载地址，
+浏览器访问 EXPORT_URL_PREFIX/<token> 时由 Flask 现场生成文件并分块流式返回。
+导出任务以 JSON 文件保存在 EXPORT_TMP_DIR 中，同一台机器上的多个 worker 都能处理下载请求。
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from collections import namedtuple
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# 下载地址前缀
+EXPORT_URL_PREFIX = '/exports'
+
+# 导出任务有效期（秒）
+EXPORT_TOKEN_TTL = int(os.getenv('EXPORT_TOKEN_TTL', '600'))
+
+# 导出任务文件目录
+EXPORT_TMP_DIR = os.getenv('EXPORT_TMP_DIR', os.path.join(tempfile.gettempdir(), 'dash_exports'))
+
+# 流式返回时每块的字节数
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# 列宽范围（与原导出逻辑一致：内容长度 + 2，最小 10，最大 50）
+MIN_COLUMN_WIDTH = 10
+MAX_COLUMN_WIDTH = 50
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# 命名样式
+STYLE_TITLE = 'report_title'
+STYLE_SECTION = 'report_section'
+STYLE_HEADER = 'report_header'
+STYLE_EMPHASIS = 'report_emphasis'
+
+# 样式名 -> 字体参数
+NAMED_STYLE_FONTS = {
+    STYLE_TITLE: {'bold': True, 'size': 16},
+    STYLE_SECTION: {'bold': True, 'size': 14},
+    STYLE_HEADER: {'bold': True},
+    STYLE_EMPHASIS: {'bold': True},
+}
+
+# 一行数据：values 为单元格值列表，styles 为与之对应的样式名列表（None 表示默认样式）
+Row = namedtuple('Row', ['values', 'styles'])
+
+# 饼图块：引擎写入"表头 + 数据行"并在 anchor_column 列创建饼图；
+# notes 为 [(相对表头的行偏移, 文字), ...]，写在 anchor_column 列作为图表说明
+PieChartBlock = namedtuple('PieChartBlock', ['title', 'headers', 'items', 'anchor_column', 'notes'])
+
+# 已注册的报表模板：name -> (工作表名, layout 函数, column_widths 函数或 None)
+_templates = {}
+
+
+# ---------- 模板辅助函数 ----------
+
+def row(*values, styles=None):
+    """普通数据行"""
+    return Row(list(values), list(styles) if styles else [None] * len(values))
+
+
+def blank():
+    """空行"""
+    return Row([], [])
+
+
+def title(text):
+    return Row([text], [STYLE_TITLE])
+
+
+def section(text):
+    return Row([text], [STYLE_SECTION])
+
+
+def header(*labels):
+    return Row(list(labels), [STYLE_HEADER] * len(labels))
+
+
+def label_value(label, value, emphasis=False, emphasize_label=False):
+    """"标签: 值"行；emphasis 同时加粗标签和值，emphasize_label 只加粗标签"""
+    if emphasis:
+        return Row([label, value], [STYLE_EMPHASIS, STYLE_EMPHASIS])
+    return Row([label, value], [STYLE_EMPHASIS if emphasize_label else None, None])
+
+
+def pie_chart(chart_title, headers, items, anchor_column='H', notes=()):
+    """饼图块：items 为 [(类别, 数值), ...]"""
+    return PieChartBlock(chart_title, list(headers), list(items), anchor_column, list(notes))
+
+
+def register_export_template(name, sheet_title, layout, column_widths=None):
+    """
+    注册报表模板；layout(report_data) 逐行产出 Row / PieChartBlock
+
+    column_widths(report_data) 返回 {列号: 列宽} 时不再预先遍历一遍模板统计列宽
+    """
+    _templates[name] = (sheet_title, layout, column_widths)
+
+
+# ---------- 写入 ----------
+
+def _iter_rows(layout, report_data):
+    """把模板产出展开为 (Row, PieChartBlock 或 None)"""
+    for item in layout(report_data):
+        if isinstance(item, PieChartBlock):
+            yield Row(item.headers, [None] * len(item.headers)), item
+            for category, value in item.items:
+                yield Row([category, value], [None, None]), None
+        else:
+            yield item, None
+
+
+def measure_column_widths(layout, report_data):
+    """第一遍：统计每列内容的最大长度，返回 {列号: 列宽}"""
+    from openpyxl.utils import column_index_from_string
+
+    max_lengths = {}
+
+    def measure(col, value):
+        if value is not None and str(value).strip():
+            max_lengths[col] = max(max_lengths.get(col, 0), len(str(value)))
+
+    for data_row, chart_block in _iter_rows(layout, report_data):
+        for col, value in enumerate(data_row.values, 1):
+            measure(col, value)
+        if chart_block is not None:
+            for _, note in chart_block.notes:
+                measure(column_index_from_string(chart_block.anchor_column), note)
+    return {col: max(min(length + 2, MAX_COLUMN_WIDTH), MIN_COLUMN_WIDTH)
+            for col, length in max_lengths.items()}
+
+
+def write_report(layout, report_data, sheet_title, output, column_widths=None):
+    """
+    将模板渲染为只写工作簿并保存到 output（文件路径或二进制文件对象）
+
+    Args:
+        layout (callable): 模板函数
+        report_data (dict): 报告数据
+        sheet_title (str): 工作表名
+        output: 文件路径或可写的二进制文件对象
+        column_widths (callable): 模板提供的列宽函数；为 None 时先遍历一遍模板统计列宽
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.chart import PieChart, Reference
+    from openpyxl.chart.label import DataLabelList
+    from openpyxl.styles import Font, NamedStyle
+    from openpyxl.utils import column_index_from_string, get_column_letter
+
+    if column_widths is not None:
+        widths = column_widths(report_data)
+    else:
+        widths = measure_column_widths(layout, report_data)
+
+    wb = Workbook(write_only=True)
+    for style_name, font_kwargs in NAMED_STYLE_FONTS.items():
+        wb.add_named_style(NamedStyle(name=style_name, font=Font(**font_kwargs)))
+
+    ws = wb.create_sheet(title=sheet_title)
+    # 只写模式下列宽必须在写入第一行之前设置
+    for col, width in widths.items():
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    # 只写模式不能回头修改已写入的行，图表说明等"后续行"的单元格先登记在这里：{行号: {列号: 值}}
+    pending_cells = {}
+
+    def append_row(row_number, values, styles):
+        cells = []
+        for value, style_name in zip(values, styles):
+            if style_name is None:
+                cells.append(value)
+            else:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style_name
+                cells.append(cell)
+        for col, value in sorted(pending_cells.pop(row_number, {}).items()):
+            cells.extend([None] * (col - 1 - len(cells)))
+            if col > len(cells):
+                cells.append(value)
+            elif cells[col - 1] is None:
+                cells[col - 1] = value
+        ws.append(cells)
+
+    current_row = 0
+    for data_row, chart_block in _iter_rows(layout, report_data):
+        current_row += 1
+        if chart_block is not None:
+            anchor_col = column_index_from_string(chart_block.anchor_column)
+            for offset, note in chart_block.notes:
+                pending_cells.setdefault(current_row + offset, {})[anchor_col] = note
+        append_row(current_row, data_row.values, data_row.styles)
+
+        if chart_block is not None and chart_block.items:
+            header_row = current_row
+            data_end_row = header_row + len(chart_block.items)
+            try:
+                chart = PieChart()
+                chart.title = chart_block.title
+                labels = Reference(ws, min_col=1, min_row=header_row + 1, max_row=data_end_row)
+                data = Reference(ws, min_col=2, min_row=header_row, max_row=data_end_row)
+                chart.add_data(data, titles_from_data=True)
+                chart.set_categories(labels)
+                chart.width = 20
+                chart.height = 15
+                chart.dataLabels = DataLabelList()
+                chart.dataLabels.showPercent = True
+                chart.dataLabels.showVal = False
+                chart.dataLabels.showCatName = True
+                chart.dataLabels.position = 'bestFit'
+                ws.add_chart(chart, f"{chart_block.anchor_column}{header_row}")
+            except Exception as chart_error:
+                logger.warning(f"创建图表 '{chart_block.title}' 时出错，跳过图表生成: {chart_error}")
+
+    # 补齐仍未写入的图表说明行
+    while pending_cells:
+        current_row += 1
+        append_row(current_row, [], [])
+
+    wb.save(output)
+
+
+def render_template_to_bytes(name, report_data):
+    """按模板名渲染报表并返回文件内容（用于测试或小文件场景）"""
+    import io
+
+    sheet_title, layout, column_widths = _templates[name]
+    output = io.BytesIO()
+    write_report(layout, report_data, sheet_title, output, column_widths)
+    return output.getvalue()
+
+
+# ---------- 导出任务与下载 ----------
+
+def _task_path(token):
+    return os.path.join(EXPORT_TMP_DIR, f"{token}.json")
+
+
+def _cleanup_expired_tasks():
+    """删除过期的导出任务文件"""
+    now = time.time()
+    try:
+        for filename in os.listdir(EXPORT_TMP_DIR):
+            path = os.path.join(EXPORT_TMP_DIR, filename)
+            if filename.endswith('.json') and now - os.path.getmtime(path) > EXPORT_TOKEN_TTL:
+                os.remove(path)
+    except OSError as e:
+        logger.debug(f"清理过期导出任务失败: {e}")
+
+
+def create_export_task(template_name, report_data, filename):
+    """
+    登记导出任务，返回下载地址
+
+    Args:
+        template_name (str): 已注册的模板名
+        report_data (dict): 报告数据（需可 JSON 序列化）
+        filename (str): 下载文件名
+
+    Returns:
+        str: 下载地址
+    """
+    if template_name not in _templates:
+        raise ValueError(f"未注册的导出模板: {template_name}")
+
+    os.makedirs(EXPORT_TMP_DIR, exist_ok=True)
+    _cleanup_expired_tasks()
+
+    token = uuid.uuid4().hex
+    task = {'template': template_name, 'report_data': report_data, 'filename': filename,
+            'created_at': time.time()}
+    with open(_task_path(token), 'w', encoding='utf-8') as f:
+        json.dump(task, f, ensure_ascii=False, default=str)
+    return f"{EXPORT_URL_PREFIX}/{token}"
+
+
+def load_export_task(token):
+    """读取未过期的导出任务，不存在或已过期时返回 None"""
+    if not token.isalnum():
+        return None
+    path = _task_path(token)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            task = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - task.get('created_at', 0) > EXPORT_TOKEN_TTL:
+        return None
+    return task
+
+
+def _stream_file(path):
+    """分块读取文件并在读完后删除"""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.unlink(path)
+        except OSError as e:
+            logger.warning(f"删除临时导出文件时出错: {e}")
+
+
+def register_export_route(server):
+    """在 Flask 应用上注册导出下载路由（重复调用时只注册一次）"""
+    from flask import Response, abort
+    from flask_login import login_required
+
+    endpoint = 'excel_export_download'
+    if endpoint in server.view_functions:
+        return
+
+    @login_required
+    def download_export(token):
+        task = load_export_task(token)
+        if task is None or task['template'] not in _templates:
+            abort(404)
+
+        sheet_title, layout, column_widths = _templates[task['template']]
+        fd, path = tempfile.mkstemp(suffix='.xlsx', dir=EXPORT_TMP_DIR)
+        os.close(fd)
+        try:
+            start = time.time()
+            write_report(layout, task['report_data'], sheet_title, path, column_widths)
+            logger.info(f"导出报表 '{task['filename']}' 生成完成，耗时 {time.time() - start:.2f}s")
+        except Exception as e:
+            os.unlink(path)
+            logger.error(f"生成导出报表失败: {e}", exc_info=True)
+            abort(500)
+
+        filename = task['filename']
+        headers = {
+            'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}",
+            'Content-Length': str(os.path.getsize(path)),
+            'Cache-Control': 'no-store',
+        }
+        return Response(_stream_file(path), mimetype=XLSX_MIMETYPE, headers=headers, direct_passthrough=True)
+
+    server.add_url_rule(f"{EXPORT_URL_PREFIX}/<token>", endpoint, download_export)
+
+
+# ---------- Dash 组件 ----------
+
+def create_export_download(component_id):
+    """
+    导出下载组件：回调向 component_id 的 data 写入下载地址即可触发浏览器下载
+
+    需配合 register_export_download(app, component_id) 使用。
+    """
+    from dash import dcc, html
+
+    return html.Div([
+        dcc.Store(id=component_id),
+        html.Div(id=f"{component_id}-trigger", style={'display': 'none'})
+    ])
+
+
+def register_export_download(app, component_id):
+    """注册导出下载组件的客户端回调，并确保下载路由已注册"""
+    from dash.dependencies import Input, Output
+
+    register_export_route(app.server)
+    app.clientside_callback(
+        """
+        function(url) {
+            if (url) {
+                window.location.href = url;
+            }
+            return '';
+        }
+        """,
+        Output(f"{component_id}-trigger", "children"),
+        Input(component_id, "data"),
+        prevent_initial_call=True
+    )
@@ -0,0 +1,226 @@
+# utils/formula_engine.py
+"""
+复合指标 / 综合指标公式校验
+
+复合指标的 formula 与综合指标的 calculation_logic 使用同一套表达式语法：
+
+- {CODE}          引用其他指标
+- QTY_xxx         工程量参数
+- INPUT_xxx       用户输入参数
+- RULE(name)      规则参数
+- CALL f(...)     调用外部函数（如 ML 模型）
+- + - * / ** ^ 括号、数字，以及 min / max / abs / round / sqrt / IF(cond, a, b)
+
+本模块只负责保存指标前的校验，不对公式求值：parse_formula() 把引用替换为占位变量，
+用 ast 按白名单检查语法，提取引用的指标代码和输入参数，并按表达式文本缓存
+（FORMULA_PARSE_CACHE_SIZE）。
+
+FormulaGraph 把一组指标公式按 {CODE} 引用组织成依赖图并拓扑排序，存在循环引用时
+抛出 FormulaError；check_indicator_formula() 用它检查新公式加入已启用的
+复合/综合指标后是否形成循环引用。
+"""
+
+import ast
+import logging
+import os
+import re
+from collections import deque
+from functools import lru_cache
+
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# 已解析表达式的缓存条数
+FORMULA_PARSE_CACHE_SIZE = int(os.getenv('FORMULA_PARSE_CACHE_SIZE', '2048'))
+
+_REF_PATTERN = re.compile(r'\{\s*([^{}]+?)\s*\}')
+_RULE_PATTERN = re.compile(r'\bRULE\s*\(\s*([^()]+?)\s*\)')
+_PARAM_PATTERN = re.compile(r'\b(?:QTY|INPUT)_\w+')
+_CALL_PATTERN = re.compile(r'\bCALL\s+(?=[A-Za-z_]\w*\s*\()')
+
+# 表达式中可直接使用的内置函数名
+BUILTIN_FUNCTIONS = frozenset({'min', 'max', 'abs', 'round', 'sqrt', 'IF'})
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd,
+    ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq,
+)
+
+
+class FormulaError(ValueError):
+    """公式语法错误或循环依赖"""
+
+
+class ParsedFormula:
+    """一条已校验的表达式"""
+
+    __slots__ = ('expression', 'refs', 'inputs', 'functions')
+
+    def __init__(self, expression, refs, inputs, functions):
+        self.expression = expression
+        # 引用的指标代码
+        self.refs = refs
+        # 需要的 QTY_ / INPUT_ / RULE() 输入键
+        self.inputs = inputs
+        # 外部函数名（CALL f(...)）
+        self.functions = functions
+
+
+def _substitute(expression):
+    """把 {CODE}、RULE()、QTY_/INPUT_ 替换为占位变量，返回 (Python 表达式, 占位变量集合, 引用, 输入)"""
+    names = {}
+    refs = []
+    inputs = []
+
+    def placeholder(key, bucket):
+        if key not in bucket:
+            bucket.append(key)
+        for var, existing in names.items():
+            if existing == key:
+                return var
+        var = f"_v{len(names)}"
+        names[var] = key
+        return var
+
+    text = _REF_PATTERN.sub(lambda m: f" {placeholder(m.group(1), refs)} ", expression)
+    text = _RULE_PATTERN.sub(lambda m: f" {placeholder(f'RULE({m.group(1)})', inputs)} ", text)
+    text = _PARAM_PATTERN.sub(lambda m: f" {placeholder(m.group(0), inputs)} ", text)
+    text = _CALL_PATTERN.sub('', text)
+    text = text.replace('^', '**')
+    return text.strip(), set(names), tuple(refs), tuple(inputs)
+
+
+@lru_cache(maxsize=FORMULA_PARSE_CACHE_SIZE)
+def parse_formula(expression):
+    """
+    解析并校验一条表达式（按表达式文本缓存）
+
+    Raises:
+        FormulaError: 表达式为空、语法错误或包含不支持的语法
+    """
+    if not expression or not str(expression).strip():
+        raise FormulaError("公式不能为空")
+
+    text, names, refs, inputs = _substitute(str(expression).strip())
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError as e:
+        raise FormulaError(f"公式语法错误: {e.msg}") from None
+
+    functions = []
+    call_targets = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(f"公式中包含不支持的语法: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise FormulaError(f"公式中包含不支持的常量: {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.keywords or node.func.id.startswith('_'):
+                raise FormulaError("函数调用格式错误")
+            if node.func.id not in BUILTIN_FUNCTIONS and node.func.id not in functions:
+                functions.append(node.func.id)
+        elif isinstance(node, ast.Name) and node.id not in names and id(node) not in call_targets:
+            raise FormulaError(f"未知的标识符: {node.id}")
+
+    return ParsedFormula(str(expression).strip(), refs, inputs, tuple(functions))
+
+
+class FormulaGraph:
+    """一组指标公式的依赖图"""
+
+    def __init__(self, formulas, strict=True):
+        """
+        Args:
+            formulas (dict): {指标代码: 表达式}
+            strict (bool): True 时任何公式校验失败都抛出 FormulaError；
+                False 时跳过该指标并记录在 self.errors 中
+        """
+        self.errors = {}
+        self.nodes = {}
+        for code, expression in formulas.items():
+            try:
+                self.nodes[code] = parse_formula(expression)
+            except FormulaError as e:
+                if strict:
+                    raise FormulaError(f"{code}: {e}") from None
+                self.errors[code] = str(e)
+
+        # 指标 -> 直接依赖它的下游指标
+        self._dependents = {code: [] for code in self.nodes}
+        for code, parsed in self.nodes.items():
+            for ref in parsed.refs:
+                if ref in self.nodes:
+                    self._dependents[ref].append(code)
+
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        """Kahn 算法拓扑排序，存在循环引用时抛出 FormulaError"""
+        indegree = {
+            code: sum(1 for ref in set(parsed.refs) if ref in self.nodes)
+            for code, parsed in self.nodes.items()
+        }
+        ready = deque(code for code, degree in indegree.items() if degree == 0)
+        order = []
+        while ready:
+            code = ready.popleft()
+            order.append(code)
+            for dependent in self._dependents[code]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.nodes):
+            cyclic = sorted(code for code, degree in indegree.items() if degree > 0)
+            raise FormulaError(f"指标之间存在循环引用: {', '.join(cyclic)}")
+        return order
+
+
+def _load_indicator_formulas(construction_mode=None):
+    """读取已启用的复合指标 formula 与综合指标 calculation_logic"""
+    formulas = {}
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        for table, column in (('composite_indicators', 'formula'),
+                              ('comprehensive_indicators', 'calculation_logic')):
+            query = f"SELECT code, {column} FROM {table} WHERE status = 'enabled'"
+            params = ()
+            if construction_mode:
+                query += " AND construction_mode = %s"
+                params = (construction_mode,)
+            cursor.execute(query, params)
+            for code, expression in cursor.fetchall():
+                if code and expression and str(expression).strip():
+                    formulas[code] = expression
+        cursor.close()
+    finally:
+        if conn:
+            conn.close()
+    return formulas
+
+
+def check_indicator_formula(code, expression, construction_mode=None):
+    """
+    校验一条指标公式：语法、自引用，以及加入现有指标后是否形成循环引用
+
+    Returns:
+        ParsedFormula: 解析结果
+
+    Raises:
+        FormulaError: 校验失败
+    """
+    parsed = parse_formula(expression)
+    if code and code in parsed.refs:
+        raise FormulaError(f"指标不能引用自身: {{{code}}}")
+    if code and parsed.refs:
+        try:
+            formulas = _load_indicator_formulas(construction_mode)
+        except Exception as e:
+            logger.warning(f"读取指标公式失败，跳过循环引用检查: {e}")
+            return parsed
+        formulas[code] = expression
+        FormulaGraph(formulas, strict=False)
+    return parsed
@@ -0,0 +1,206 @@
+# utils/indicator_status_cache.py
+"""
+指标状态进程内缓存
+
+预测模态窗口每次打开都要按 basic_indicators 的启用状态决定哪些输入框可用、按
+algorithm_configs 检查算法能否执行，每次预测也要按 comprehensive_indicators 的状态
+决定哪些预测结果可以显示。这三张表很小且只在数据管理模块中修改，这里一次读取后缓存：
+
+- TTL：缓存超过 INDICATOR_STATUS_CACHE_TTL 秒后自动重新加载
+- 显式失效：数据管理模块新增、修改、删除指标或修改算法配置后调用 invalidate_indicator_status_cache()
+- 跨 worker：失效时递增 cache_versions 表中的版本号，其他进程每隔
+  INDICATOR_STATUS_VERSION_CHECK_INTERVAL 秒比对一次版本号，发现变化即重新加载
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .cache_versions import bump_cache_version, read_cache_version
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# cache_versions 表中的缓存名
+INDICATOR_STATUS_CACHE_NAME = 'indicator_status'
+
+# 修改后需要使指标状态缓存失效的表
+INDICATOR_SOURCE_TABLES = {'basic_indicators', 'comprehensive_indicators', 'algorithm_configs'}
+
+# 缓存有效期（秒）
+INDICATOR_STATUS_CACHE_TTL = int(os.getenv('INDICATOR_STATUS_CACHE_TTL', '300'))
+
+# 跨进程版本号检查间隔（秒）
+INDICATOR_STATUS_VERSION_CHECK_INTERVAL = int(os.getenv('INDICATOR_STATUS_VERSION_CHECK_INTERVAL', '5'))
+
+
+class IndicatorStatusCache:
+    """基础指标、综合指标状态与算法配置缓存（线程安全）"""
+
+    def __init__(self, ttl=INDICATOR_STATUS_CACHE_TTL,
+                 version_check_interval=INDICATOR_STATUS_VERSION_CHECK_INTERVAL):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._lock = threading.RLock()
+        self._basic = None
+        self._comprehensive = {}
+        self._algorithms = None
+        self._loaded_at = 0
+        self._version = None
+        self._version_checked_at = 0
+        self._stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    def _load(self):
+        """读取指标状态和算法配置；指标表读取失败时保留旧缓存（如果有）"""
+        version = read_cache_version(INDICATOR_STATUS_CACHE_NAME)
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT name, status FROM basic_indicators
+                WHERE status IN ('enabled', 'disabled')
+                ORDER BY name
+            """)
+            basic = {row['name']: row['status'] for row in cursor.fetchall()}
+
+            cursor.execute("""
+                SELECT construction_mode, code, name, calculation_method, indicator_type, status, calculation_logic
+                FROM comprehensive_indicators
+                ORDER BY id
+            """)
+            comprehensive = {}
+            for row in cursor.fetchall():
+                comprehensive.setdefault(row['construction_mode'], {})[row['code']] = {
+                    'name': row['name'],
+                    'calculation_method': row['calculation_method'],
+                    'indicator_type': row['indicator_type'],
+                    'status': row['status'],
+                    'calculation_logic': row.get('calculation_logic', ''),
+                    'enabled': row['status'] == 'enabled'
+                }
+
+            # 算法配置表不存在或读取失败时只影响算法检查，不影响指标状态
+            try:
+                cursor.execute("""
+                    SELECT construction_mode, algorithm_name, status, parameters,
+                           model_description, application_scenario
+                    FROM algorithm_configs
+                    ORDER BY algorithm_name
+                """)
+                algorithms = cursor.fetchall()
+            except Exception as e:
+                logger.error(f"加载算法配置失败: {e}")
+                algorithms = None
+            cursor.close()
+        except Exception as e:
+            logger.error(f"加载指标状态失败: {e}")
+            return
+        finally:
+            if conn:
+                conn.close()
+
+        now = time.time()
+        self._basic = basic
+        self._comprehensive = comprehensive
+        self._algorithms = algorithms
+        self._loaded_at = now
+        self._version = version
+        self._version_checked_at = now
+        self._stats['loads'] += 1
+        logger.info(f"指标状态缓存已加载: {len(basic)} 个基础指标, "
+                    f"{sum(len(v) for v in comprehensive.values())} 个综合指标")
+
+    def _ensure_loaded(self):
+        now = time.time()
+        if self._basic is not None and now - self._loaded_at < self.ttl:
+            if now - self._version_checked_at < self.version_check_interval:
+                self._stats['hits'] += 1
+                return
+            self._version_checked_at = now
+            version = read_cache_version(INDICATOR_STATUS_CACHE_NAME)
+            if version is None or version == self._version:
+                self._stats['hits'] += 1
+                return
+            logger.info(f"指标状态缓存版本已变化 ({self._version} -> {version})，重新加载")
+        self._load()
+
+    def get_basic_status(self):
+        """{基础指标名称: 'enabled'/'disabled'}（返回副本）"""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._basic or {})
+
+    def get_comprehensive_status(self, mode):
+        """{综合指标编码: 状态信息}（返回副本）"""
+        with self._lock:
+            self._ensure_loaded()
+            return {code: dict(info) for code, info in self._comprehensive.get(mode, {}).items()}
+
+    def get_algorithm_configs(self, mode):
+        """
+        施工模式 mode 与通用（general）的算法配置行，按算法名排序（返回副本）
+
+        Returns:
+            list 或 None: 算法配置读取失败时为 None
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._algorithms is None:
+                return None
+            return [dict(row) for row in self._algorithms if row['construction_mode'] in (mode, 'general')]
+
+    def invalidate(self, reason=None, broadcast=True):
+        """使缓存失效；broadcast 为 True 时同时通知其他进程"""
+        with self._lock:
+            self._basic = None
+            self._comprehensive = {}
+            self._algorithms = None
+            self._stats['invalidations'] += 1
+        if broadcast:
+            bump_cache_version(INDICATOR_STATUS_CACHE_NAME)
+        logger.info(f"指标状态缓存已失效{f'（{reason}）' if reason else ''}")
+
+    def get_status(self):
+        """获取缓存状态，用于调试和显示"""
+        with self._lock:
+            return {
+                'loaded': self._basic is not None,
+                'basic_count': len(self._basic or {}),
+                'comprehensive_modes': list(self._comprehensive),
+                'age_seconds': time.time() - self._loaded_at if self._basic is not None else None,
+                'version': self._version,
+                'ttl': self.ttl,
+                **self._stats
+            }
+
+
+# 全局指标状态缓存（进程内共享）
+indicator_status_cache = IndicatorStatusCache()
+
+
+def get_basic_indicator_status():
+    """获取缓存的基础指标状态"""
+    return indicator_status_cache.get_basic_status()
+
+
+def get_comprehensive_indicator_status(mode):
+    """获取指定施工模式缓存的综合指标状态"""
+    return indicator_status_cache.get_comprehensive_status(mode)
+
+
+def get_cached_algorithm_configs(mode):
+    """获取指定施工模式缓存的算法配置行（读取失败时为 None）"""
+    return indicator_status_cache.get_algorithm_configs(mode)
+
+
+def invalidate_indicator_status_cache(reason=None):
+    """使指标状态缓存失效（本进程立即生效，其他进程在下次版本检查时生效）"""
+    indicator_status_cache.invalidate(reason=reason)
+
+
+def invalidate_indicator_status_for_table(table_name, reason=None):
+    """表 table_name 被修改时，如果它是指标表则使缓存失效"""
+    if table_name in INDICATOR_SOURCE_TABLES:
+        invalidate_indicator_status_cache(reason or f"{table_name} 已修改")
@@ -0,0 +1,97 @@
+# utils/layout_cache.py
+"""
+标签页布局缓存
+
+切换标签页时只调用当前标签页的布局工厂函数，并把生成的静态布局树按
+（标签页, 权限集合）缓存起来，之后切换到同一标签页直接返回缓存的组件树。
+布局中依赖数据库的动态内容（如自定义模式列表）由各模块在布局渲染后的回调中加载，
+因此缓存的布局树本身不包含会过期的数据。
+
+- TTL：缓存超过 LAYOUT_CACHE_TTL 秒后重新调用工厂函数（0 表示不缓存）
+- 显式失效：调用 invalidate_layout_cache()，可只清除指定标签页
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 布局缓存有效期（秒）
+LAYOUT_CACHE_TTL = int(os.getenv('LAYOUT_CACHE_TTL', '3600'))
+
+
+def _permission_key(permissions):
+    """把权限列表转换为可哈希的缓存键"""
+    if not permissions:
+        return frozenset()
+    return frozenset(str(p) for p in permissions)
+
+
+class LayoutCache:
+    """按（标签页, 权限集合）缓存布局组件树（线程安全）"""
+
+    def __init__(self, ttl=LAYOUT_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stats = {'hits': 0, 'builds': 0, 'invalidations': 0}
+
+    def get_or_build(self, tab_id, permissions, factory):
+        """
+        获取标签页布局，未缓存或已过期时调用 factory() 生成
+
+        Args:
+            tab_id (str): 标签页 ID
+            permissions (list): 当前用户的权限列表
+            factory (callable): 无参数的布局工厂函数
+
+        Returns:
+            Dash 组件树
+        """
+        key = (tab_id, _permission_key(permissions))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._stats['hits'] += 1
+                return entry[1]
+
+        # 工厂函数在锁外调用，避免一个慢布局阻塞其他标签页
+        layout = factory()
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (time.time(), layout)
+                self._stats['builds'] += 1
+        return layout
+
+    def invalidate(self, tab_id=None):
+        """清除缓存；指定 tab_id 时只清除该标签页的布局"""
+        with self._lock:
+            if tab_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == tab_id]:
+                    del self._entries[key]
+            self._stats['invalidations'] += 1
+        logger.info(f"布局缓存已失效{f'（{tab_id}）' if tab_id else ''}")
+
+    def get_stats(self):
+        """缓存状态，用于调试和监控"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), ttl=self.ttl)
+
+
+# 全局布局缓存（进程内共享）
+layout_cache = LayoutCache()
+
+
+def get_cached_layout(tab_id, permissions, factory):
+    """获取缓存的标签页布局（模块级便捷函数）"""
+    return layout_cache.get_or_build(tab_id, permissions, factory)
+
+
+def invalidate_layout_cache(tab_id=None):
+    """使布局缓存失效（模块级便捷函数）"""
+    layout_cache.invalidate(tab_id)
@@ -0,0 +1,381 @@
+# utils/log_retention.py
+"""
+操作日志保留、归档与每日汇总
+
+operation_logs 只增不减：登录、验证码失败、管理操作都会写入一行。这里提供定期维护：
+
+- 每日汇总：按天统计各模块、级别、用户、操作类型的日志条数，写入
+  operation_log_daily_stats 表；管理页面的统计视图只读汇总表，不再扫描原始日志。
+  每次维护从汇总表中最后一天（含）重新统计到今天，当天数据随维护周期更新；
+  在页面上手动清理原始日志后调用 rebuild_daily_rollups() 从最早删除的那天起重新统计
+- 按月归档：早于 LOG_RETENTION_MONTHS 个月的日志按自然月导出为 gzip 压缩的 JSON Lines
+  文件（LOG_ARCHIVE_DIR/operation_logs_YYYYMM.jsonl.gz），写入成功后再按主键分批删除。
+  归档前先完成该月的每日汇总，删除原始日志不影响统计
+- 单实例执行：多个 worker 通过 MySQL GET_LOCK 互斥，同一时间只有一个进程在维护
+
+operation_logs 上有外键和 FULLTEXT 索引，MySQL 分区表不支持这两者，所以"分区"以自然月
+为单位在应用层完成（导出 + 删除），不修改表结构。
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# 原始日志保留的月数（不含当月）
+LOG_RETENTION_MONTHS = int(os.getenv('LOG_RETENTION_MONTHS', '6'))
+
+# 归档文件目录
+LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'log_archive')
+
+# 归档导出和删除的批大小
+LOG_ARCHIVE_BATCH_SIZE = int(os.getenv('LOG_ARCHIVE_BATCH_SIZE', '5000'))
+
+# 定期维护间隔（小时），0 表示不启动后台维护线程
+LOG_MAINTENANCE_INTERVAL_HOURS = float(os.getenv('LOG_MAINTENANCE_INTERVAL_HOURS', '6'))
+
+# 删除原始日志后重建汇总时，等待定期维护释放锁的最长时间（秒）
+LOG_ROLLUP_LOCK_TIMEOUT = int(os.getenv('LOG_ROLLUP_LOCK_TIMEOUT', '30'))
+
+# 每日汇总表
+LOG_ROLLUP_TABLE = 'operation_log_daily_stats'
+
+# 汇总维度：维度名 -> operation_logs 中的列
+LOG_ROLLUP_DIMENSIONS = {
+    'module': 'module',
+    'level': 'level',
+    'user': 'user_id',
+    'operation_type': 'operation_type',
+}
+
+# 多进程互斥锁名
+_MAINTENANCE_LOCK_NAME = 'operation_log_maintenance'
+
+_ARCHIVE_COLUMNS = (
+    'id', 'operation_type', 'operation_desc', 'module', 'target_type', 'target_id', 'level', 'status',
+    'ip_address', 'user_agent', 'request_url', 'request_method', 'old_values', 'new_values',
+    'error_message', 'created_at', 'user_id',
+)
+
+_rollup_table_ready = False
+
+
+def _ensure_rollup_table(cursor):
+    global _rollup_table_ready
+    if _rollup_table_ready:
+        return
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{LOG_ROLLUP_TABLE}` (
+            `stat_date` DATE NOT NULL,
+            `dimension` VARCHAR(32) NOT NULL,
+            `dim_value` VARCHAR(64) NOT NULL,
+            `log_count` INT NOT NULL DEFAULT 0,
+            `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (`stat_date`, `dimension`, `dim_value`),
+            KEY `ix_{LOG_ROLLUP_TABLE}_dimension` (`dimension`, `stat_date`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin
+    """)
+    _rollup_table_ready = True
+
+
+def _month_start(day, months_back=0):
+    """day 所在月往前 months_back 个月的第一天"""
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+# ---------- 每日汇总 ----------
+
+def refresh_daily_rollups(cursor, start_date=None):
+    """
+    重新统计 start_date（含）到今天的每日汇总
+
+    Args:
+        cursor: 数据库游标（调用方负责提交）
+        start_date (date): 起始日期；为 None 时从汇总表最后一天开始，汇总表为空时从最早的日志开始
+
+    Returns:
+        date 或 None: 实际的起始日期，没有日志时为 None
+    """
+    _ensure_rollup_table(cursor)
+    if start_date is None:
+        cursor.execute(f"SELECT MAX(stat_date) FROM `{LOG_ROLLUP_TABLE}`")
+        start_date = cursor.fetchone()[0]
+    if start_date is None:
+        cursor.execute("SELECT MIN(created_at) FROM operation_logs")
+        earliest = cursor.fetchone()[0]
+        if earliest is None:
+            return None
+        start_date = earliest.date()
+
+    start = datetime.combine(start_date, datetime.min.time())
+    cursor.execute(f"DELETE FROM `{LOG_ROLLUP_TABLE}` WHERE stat_date >= %s", (start_date,))
+    for dimension, column in LOG_ROLLUP_DIMENSIONS.items():
+        cursor.execute(f"""
+            INSERT INTO `{LOG_ROLLUP_TABLE}` (stat_date, dimension, dim_value, log_count)
+            SELECT DATE(created_at), %s, COALESCE(CAST({column} AS CHAR), ''), COUNT(*)
+            FROM operation_logs
+            WHERE created_at >= %s
+            GROUP BY DATE(created_at), {column}
+        """, (dimension, start))
+    return start_date
+
+
+def _release_lock(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (_MAINTENANCE_LOCK_NAME,))
+        cursor.fetchone()
+        cursor.close()
+    except Exception:
+        pass
+
+
+def rebuild_daily_rollups(start_date, lock_timeout=LOG_ROLLUP_LOCK_TIMEOUT):
+    """
+    原始日志被删除后，重新统计 start_date（含）以来的每日汇总
+
+    在独立事务中执行，并与定期维护使用同一把锁。等不到锁时删除 start_date 以来的汇总行，
+    下一次定期维护会从汇总表最后一天起重新统计，汇总不会一直多计已删除的日志。
+
+    Returns:
+        bool: 是否已重新统计
+    """
+    conn = None
+    locked = False
+    try:
+        conn = get_connection(autocommit=False)
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (_MAINTENANCE_LOCK_NAME, lock_timeout))
+        locked = cursor.fetchone()[0] == 1
+        if not locked:
+            _ensure_rollup_table(cursor)
+            cursor.execute(f"DELETE FROM `{LOG_ROLLUP_TABLE}` WHERE stat_date >= %s", (start_date,))
+            conn.commit()
+            logger.warning(f"等待日志维护锁超时，已清除 {start_date} 以来的日志汇总，下次维护时重新统计")
+            return False
+        refresh_daily_rollups(cursor, start_date)
+        conn.commit()
+        logger.info(f"已重新统计 {start_date} 以来的日志汇总")
+        return True
+    except Exception as e:
+        logger.error(f"重新统计日志汇总失败: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            if locked:
+                _release_lock(conn)
+            conn.close()
+
+
+def get_daily_rollups(dimension, days=7):
+    """
+    读取最近 days 天（含今天）某个维度的每日汇总
+
+    Returns:
+        list: [{'stat_date': date, 'dim_value': str, 'log_count': int}, ...]，失败时返回空列表
+    """
+    if dimension not in LOG_ROLLUP_DIMENSIONS:
+        raise ValueError(f"未知的汇总维度: {dimension}")
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        _ensure_rollup_table(cursor)
+        cursor.execute(f"""
+            SELECT stat_date, dim_value, log_count FROM `{LOG_ROLLUP_TABLE}`
+            WHERE dimension = %s AND stat_date >= %s
+            ORDER BY stat_date, dim_value
+        """, (dimension, date.today() - timedelta(days=days - 1)))
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    except Exception as e:
+        logger.error(f"读取日志汇总失败: {e}")
+        return []
+    finally:
+        if conn:
+            conn.close()
+
+
+def get_rollup_totals(dimension, days=7):
+    """最近 days 天某个维度各取值的日志总数，按条数倒序：[(取值, 条数), ...]"""
+    totals = {}
+    for row in get_daily_rollups(dimension, days):
+        totals[row['dim_value']] = totals.get(row['dim_value'], 0) + row['log_count']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+# ---------- 按月归档 ----------
+
+def _archive_path(month):
+    return os.path.join(LOG_ARCHIVE_DIR, f"operation_logs_{month:%Y%m}.jsonl.gz")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def archive_month(cursor, conn, month):
+    """
+    把 month 所在自然月的日志导出到压缩文件并从 operation_logs 删除
+
+    文件先写到临时路径，全部导出后再改名；同一月份已有归档文件时追加序号，不覆盖。
+
+    Returns:
+        int: 归档的日志条数
+    """
+    month_end = _month_start(month, -1)
+    os.makedirs(LOG_ARCHIVE_DIR, exist_ok=True)
+    path = _archive_path(month)
+    suffix = 1
+    while os.path.exists(path):
+        path = _archive_path(month).replace('.jsonl.gz', f'_{suffix}.jsonl.gz')
+        suffix += 1
+    temp_path = f"{path}.tmp"
+
+    archived_ids = []
+    last_id = 0
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+        while True:
+            cursor.execute(f"""
+                SELECT {', '.join(_ARCHIVE_COLUMNS)} FROM operation_logs
+                WHERE created_at >= %s AND created_at < %s AND id > %s
+                ORDER BY id LIMIT %s
+            """, (month, month_end, last_id, LOG_ARCHIVE_BATCH_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for row in rows:
+                archive.write(json.dumps(dict(zip(_ARCHIVE_COLUMNS, row)), ensure_ascii=False,
+                                         default=_json_default))
+                archive.write('\n')
+                archived_ids.append(row[0])
+            last_id = rows[-1][0]
+
+    if not archived_ids:
+        os.remove(temp_path)
+        return 0
+    os.replace(temp_path, path)
+
+    for i in range(0, len(archived_ids), LOG_ARCHIVE_BATCH_SIZE):
+        batch = archived_ids[i:i + LOG_ARCHIVE_BATCH_SIZE]
+        cursor.execute(
+            f"DELETE FROM operation_logs WHERE id IN ({', '.join(['%s'] * len(batch))})", batch
+        )
+        conn.commit()
+    logger.info(f"已归档 {month:%Y-%m} 的 {len(archived_ids)} 条操作日志到 {path}")
+    return len(archived_ids)
+
+
+def archive_expired_months(cursor, conn, retention_months=LOG_RETENTION_MONTHS):
+    """归档早于保留期的全部自然月，返回 {月份: 条数}"""
+    cutoff = _month_start(date.today(), retention_months)
+    cursor.execute("SELECT MIN(created_at) FROM operation_logs WHERE created_at < %s", (cutoff,))
+    earliest = cursor.fetchone()[0]
+    archived = {}
+    if earliest is None:
+        return archived
+    month = _month_start(earliest.date())
+    while month < cutoff:
+        count = archive_month(cursor, conn, month)
+        if count:
+            archived[f"{month:%Y-%m}"] = count
+        month = _month_start(month, -1)
+    return archived
+
+
+# ---------- 维护入口 ----------
+
+def run_log_maintenance(retention_months=LOG_RETENTION_MONTHS):
+    """
+    执行一次日志维护：先更新每日汇总，再归档过期月份
+
+    Returns:
+        dict: {'rollup_from': 起始日期, 'archived': {月份: 条数}}；其他进程正在维护时返回 None
+    """
+    conn = None
+    locked = False
+    try:
+        conn = get_connection(autocommit=False)
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (_MAINTENANCE_LOCK_NAME,))
+        locked = cursor.fetchone()[0] == 1
+        if not locked:
+            logger.info("其他进程正在维护操作日志，跳过本次维护")
+            return None
+
+        rollup_from = refresh_daily_rollups(cursor)
+        conn.commit()
+
+        archived = {}
+        if retention_months > 0:
+            # 汇总覆盖到保留期之前的数据后才归档，删除的日志已计入汇总
+            archived = archive_expired_months(cursor, conn, retention_months)
+        conn.commit()
+        return {'rollup_from': rollup_from, 'archived': archived}
+    except Exception as e:
+        logger.error(f"操作日志维护失败: {e}")
+        if conn:
+            conn.rollback()
+        return None
+    finally:
+        if conn:
+            if locked:
+                _release_lock(conn)
+            conn.close()
+
+
+class LogMaintenanceScheduler:
+    """后台定期执行日志维护"""
+
+    def __init__(self, interval_hours=LOG_MAINTENANCE_INTERVAL_HOURS):
+        self.interval = interval_hours * 3600
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.last_result = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.last_result = run_log_maintenance()
+            self._stopping.wait(self.interval)
+
+    def start(self):
+        """启动后台线程（已启动或间隔为 0 时不重复启动）"""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='operation-log-maintenance', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+
+# 全局日志维护调度器（进程内共享）
+log_maintenance_scheduler = LogMaintenanceScheduler()
+
+
+def start_log_maintenance():
+    """启动后台日志维护（模块级便捷函数）"""
+    log_maintenance_scheduler.start()
+
+
+def rebuild_daily_rollups_async(start_date):
+    """在后台线程中调用 rebuild_daily_rollups()，用于页面回调中删除日志之后"""
+    threading.Thread(target=rebuild_daily_rollups, args=(start_date,),
+                     name='operation-log-rollup-rebuild', daemon=True).start()
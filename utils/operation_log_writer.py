@@ -0,0 +1,193 @@
+# utils/operation_log_writer.py
+"""
+操作日志异步批量写入
+
+OperationLog.log_operation 原先在请求内执行 db.session.add + commit，登录、验证码校验
+等路径上每条日志都要等待一次 MySQL 提交，写入失败时还会回滚调用方的会话。
+现在 log_operation 只把日志行放入进程内队列，由后台线程批量写入：
+
+- 批量：队列中累计 OPLOG_BATCH_SIZE 条，或距离上次写入超过 OPLOG_FLUSH_INTERVAL_MS
+  毫秒时，用一条 executemany 写入 operation_logs
+- 有界缓冲：队列最多保存 OPLOG_QUEUE_MAX 条；队列满时按 OPLOG_OVERFLOW_POLICY 处理：
+  drop   丢弃新日志并计数（默认，不阻塞请求）
+  block  最多等待 OPLOG_BLOCK_TIMEOUT_MS 毫秒，仍然满则丢弃
+- 关闭时：进程退出前（atexit）把队列中剩余日志全部写入
+
+写入使用 utils/db_pool 的独立连接，不再占用调用方的 SQLAlchemy 会话。
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# 每批写入的最大条数
+OPLOG_BATCH_SIZE = int(os.getenv('OPLOG_BATCH_SIZE', '100'))
+
+# 最长写入间隔（毫秒）
+OPLOG_FLUSH_INTERVAL_MS = int(os.getenv('OPLOG_FLUSH_INTERVAL_MS', '500'))
+
+# 队列容量
+OPLOG_QUEUE_MAX = int(os.getenv('OPLOG_QUEUE_MAX', '10000'))
+
+# 队列满时的处理策略：drop / block
+OPLOG_OVERFLOW_POLICY = os.getenv('OPLOG_OVERFLOW_POLICY', 'drop').lower()
+
+# block 策略下的最长等待时间（毫秒）
+OPLOG_BLOCK_TIMEOUT_MS = int(os.getenv('OPLOG_BLOCK_TIMEOUT_MS', '200'))
+
+# 写入 operation_logs 的列（顺序与 enqueue 的行字典键一致）
+OPLOG_COLUMNS = (
+    'user_id', 'operation_type', 'operation_desc', 'module', 'target_type', 'target_id',
+    'level', 'status', 'ip_address', 'old_values', 'new_values', 'error_message', 'created_at',
+)
+
+_INSERT_SQL = (
+    f"INSERT INTO operation_logs ({', '.join(OPLOG_COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * len(OPLOG_COLUMNS))})"
+)
+
+
+class OperationLogWriter:
+    """操作日志后台批量写入器（线程安全）"""
+
+    def __init__(self, batch_size=OPLOG_BATCH_SIZE, flush_interval_ms=OPLOG_FLUSH_INTERVAL_MS,
+                 queue_max=OPLOG_QUEUE_MAX, overflow_policy=OPLOG_OVERFLOW_POLICY,
+                 block_timeout_ms=OPLOG_BLOCK_TIMEOUT_MS):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout_ms / 1000.0
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, row):
+        """
+        把一条日志放入写入队列
+
+        Args:
+            row (dict): 以 OPLOG_COLUMNS 为键的日志行
+
+        Returns:
+            bool: 是否成功入队（队列满被丢弃时为 False）
+        """
+        self._ensure_started()
+        try:
+            if self.overflow_policy == 'block':
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._stats['dropped'] += 1
+            if self._stats['dropped'] % 100 == 1:
+                logger.warning(f"操作日志队列已满，已丢弃 {self._stats['dropped']} 条日志")
+            return False
+        self._stats['enqueued'] += 1
+        return True
+
+    def _drain(self):
+        """从队列取出至多 batch_size 条日志"""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        if not batch:
+            return
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.executemany(_INSERT_SQL, [tuple(row.get(col) for col in OPLOG_COLUMNS) for row in batch])
+            conn.commit()
+            cursor.close()
+            self._stats['written'] += len(batch)
+            self._stats['batches'] += 1
+        except Exception as e:
+            self._stats['failed'] += len(batch)
+            logger.error(f"批量写入操作日志失败（{len(batch)} 条）: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def _run(self):
+        """后台线程：凑够一批或等待超时后写入"""
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._write_lock:
+                self._write(batch)
+
+    def flush(self):
+        """立即写入队列中的全部日志（在调用线程中执行）"""
+        with self._write_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                self._write(batch)
+
+    def shutdown(self, timeout=5.0):
+        """停止后台线程并写入剩余日志"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=timeout)
+        self.flush()
+
+    def get_stats(self):
+        """写入器状态，用于调试和监控"""
+        return dict(self._stats, queued=self._queue.qsize())
+
+
+# 全局操作日志写入器（进程内共享）
+operation_log_writer = OperationLogWriter()
+
+atexit.register(operation_log_writer.shutdown)
+
+
+def enqueue_operation_log(row):
+    """把一条日志放入写入队列（模块级便捷函数）"""
+    return operation_log_writer.enqueue(row)
+
+
+def flush_operation_logs():
+    """立即写入队列中的全部日志（模块级便捷函数）"""
+    operation_log_writer.flush()
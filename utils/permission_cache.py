@@ -0,0 +1,160 @@
+# utils/permission_cache.py
+"""
+用户权限集合缓存
+
+User.has_permission 等方法原先逐个遍历 user.roles 及每个角色的 permissions，
+标签页权限检查、权限装饰器在一次请求中会重复调用多次。这里为每个用户用一条
+关联查询一次性解析出角色代码和权限代码集合并缓存：
+
+- 请求内：解析结果记录在 flask.g 上，同一请求内的多次检查不再访问缓存锁或数据库
+- 进程内：按用户 ID 缓存，超过 PERMISSION_CACHE_TTL 秒后重新加载
+- 显式失效：系统管理模块修改角色分配、角色、权限后调用 invalidate_permission_cache()，
+  递增 cache_versions 表中的版本号，其他进程每隔 PERMISSION_VERSION_CHECK_INTERVAL 秒
+  比对一次版本号，发现变化即清空本地缓存
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import g, has_request_context
+
+from .cache_versions import bump_cache_version, read_cache_version
+
+logger = logging.getLogger(__name__)
+
+# cache_versions 表中的缓存名
+PERMISSION_CACHE_NAME = 'user_permissions'
+
+# 缓存有效期（秒）
+PERMISSION_CACHE_TTL = int(os.getenv('PERMISSION_CACHE_TTL', '300'))
+
+# 跨进程版本号检查间隔（秒）
+PERMISSION_VERSION_CHECK_INTERVAL = int(os.getenv('PERMISSION_VERSION_CHECK_INTERVAL', '5'))
+
+# 用户的角色代码与权限代码集合
+PermissionSet = namedtuple('PermissionSet', ['roles', 'permissions'])
+
+EMPTY_PERMISSION_SET = PermissionSet(frozenset(), frozenset())
+
+
+def _load_permission_set(user_id):
+    """一条关联查询解析用户的全部角色代码和权限代码"""
+    # 延迟导入，避免 models 与本模块循环导入
+    from models import db, user_roles, role_permissions, Role, Permission
+
+    rows = (
+        db.session.query(Role.code, Permission.code)
+        .select_from(user_roles)
+        .join(Role, Role.id == user_roles.c.role_id)
+        .outerjoin(role_permissions, role_permissions.c.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == role_permissions.c.permission_id)
+        .filter(user_roles.c.user_id == user_id)
+        .all()
+    )
+    roles = frozenset(role_code for role_code, _ in rows)
+    permissions = frozenset(perm_code for _, perm_code in rows if perm_code)
+    return PermissionSet(roles, permissions)
+
+
+class PermissionCache:
+    """按用户 ID 缓存权限集合（线程安全）"""
+
+    def __init__(self, ttl=PERMISSION_CACHE_TTL,
+                 version_check_interval=PERMISSION_VERSION_CHECK_INTERVAL):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._version_checked_at = 0
+        self._stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    def _check_version(self, now):
+        """定期比对跨进程版本号，版本变化时清空本地缓存（调用方持有锁）"""
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        version = read_cache_version(PERMISSION_CACHE_NAME)
+        if version is None or version == self._version:
+            return
+        if self._version is not None:
+            logger.info(f"权限缓存版本已变化 ({self._version} -> {version})，清空缓存")
+        self._entries.clear()
+        self._version = version
+
+    def get(self, user_id):
+        """获取用户的权限集合，未缓存或已过期时从数据库加载"""
+        now = time.time()
+        with self._lock:
+            self._check_version(now)
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._stats['hits'] += 1
+                return entry[1]
+
+        try:
+            permission_set = _load_permission_set(user_id)
+        except Exception as e:
+            logger.error(f"加载用户 {user_id} 的权限失败: {e}")
+            return EMPTY_PERMISSION_SET
+
+        with self._lock:
+            self._entries[user_id] = (time.time(), permission_set)
+            self._stats['loads'] += 1
+        return permission_set
+
+    def invalidate(self, user_id=None, reason=None, broadcast=True):
+        """使缓存失效；不指定 user_id 时清空全部用户，broadcast 为 True 时同时通知其他进程"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+            self._stats['invalidations'] += 1
+        if broadcast:
+            version = bump_cache_version(PERMISSION_CACHE_NAME)
+            if version is not None:
+                with self._lock:
+                    self._version = version
+        logger.info(f"权限缓存已失效{f'（{reason}）' if reason else ''}")
+
+    def get_stats(self):
+        """缓存状态，用于调试和监控"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), version=self._version, ttl=self.ttl)
+
+
+# 全局权限缓存（进程内共享）
+permission_cache = PermissionCache()
+
+
+def get_permission_set(user_id):
+    """
+    获取用户的权限集合（请求内复用同一结果）
+
+    Args:
+        user_id (int): 用户 ID
+
+    Returns:
+        PermissionSet: roles 为角色代码集合，permissions 为权限代码集合
+    """
+    if user_id is None:
+        return EMPTY_PERMISSION_SET
+
+    if not has_request_context():
+        return permission_cache.get(user_id)
+
+    resolved = g.setdefault('_permission_sets', {})
+    if user_id not in resolved:
+        resolved[user_id] = permission_cache.get(user_id)
+    return resolved[user_id]
+
+
+def invalidate_permission_cache(user_id=None, reason=None):
+    """使权限缓存失效（本进程立即生效，其他进程在下次版本检查时生效）"""
+    permission_cache.invalidate(user_id=user_id, reason=reason)
+    if has_request_context():
+        g.pop('_permission_sets', None)
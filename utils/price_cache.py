@@ -0,0 +1,190 @@
+# utils/price_cache.py
+"""
+施工参数单价表进程内缓存
+
+construction_parameter_table 只有一百多行且很少修改，但 get_price_data、calculate_cost、
+价格查询和参数计算几乎每次交互都会重新读取。这里整表读取一次后按施工模式分区缓存，
+单价查询直接命中内存：
+
+- TTL：缓存超过 PRICE_CACHE_TTL 秒后自动重新加载
+- 显式失效：编辑单价表的入口调用 invalidate_price_cache()
+- 跨 worker：失效时递增 cache_versions 表中的版本号，其他进程每隔
+  PRICE_CACHE_VERSION_CHECK_INTERVAL 秒比对一次版本号，发现变化即重新加载；
+  版本表不可用时退化为仅依赖 TTL
+"""
+
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from .cache_versions import bump_cache_version, read_cache_version
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# 被缓存的单价表
+PRICE_TABLE_NAME = 'construction_parameter_table'
+
+# 修改后需要使单价缓存失效的表
+PRICE_SOURCE_TABLES = {PRICE_TABLE_NAME}
+
+# 缓存有效期（秒）
+PRICE_CACHE_TTL = int(os.getenv('PRICE_CACHE_TTL', '300'))
+
+# 跨进程版本号检查间隔（秒）
+PRICE_CACHE_VERSION_CHECK_INTERVAL = int(os.getenv('PRICE_CACHE_VERSION_CHECK_INTERVAL', '5'))
+
+# 是否使用数据库版本号在多个 worker 之间同步失效
+PRICE_CACHE_SHARED_VERSION = os.getenv('PRICE_CACHE_SHARED_VERSION', 'true').lower() == 'true'
+
+
+class PriceTableCache:
+    """按施工模式分区的单价表缓存（线程安全）"""
+
+    def __init__(self, ttl=PRICE_CACHE_TTL, version_check_interval=PRICE_CACHE_VERSION_CHECK_INTERVAL,
+                 shared_version=PRICE_CACHE_SHARED_VERSION):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.shared_version = shared_version
+        self._lock = threading.RLock()
+        self._table = None
+        self._by_mode = {}
+        self._derived = {}
+        self._loaded_at = 0
+        self._version = None
+        self._version_checked_at = 0
+        self._stats = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    # ---------- 跨进程版本号 ----------
+
+    def _read_shared_version(self):
+        """读取数据库中的缓存版本号，失败时返回 None"""
+        return read_cache_version(PRICE_TABLE_NAME) if self.shared_version else None
+
+    def _bump_shared_version(self):
+        """递增数据库中的缓存版本号，通知其他进程重新加载"""
+        return bump_cache_version(PRICE_TABLE_NAME) if self.shared_version else None
+
+    # ---------- 加载与读取 ----------
+
+    def _load(self):
+        """整表读取单价数据并按施工模式分区"""
+        version = self._read_shared_version()
+        conn = get_connection()
+        try:
+            df = pd.read_sql(f"SELECT * FROM `{PRICE_TABLE_NAME}` ORDER BY `sequence_number`", conn)
+        finally:
+            conn.close()
+
+        by_mode = {}
+        if 'mode' in df.columns:
+            for mode, group in df.groupby(df['mode'].astype(str).str.strip(), sort=False):
+                by_mode[mode] = group.reset_index(drop=True)
+
+        now = time.time()
+        self._table = df
+        self._by_mode = by_mode
+        self._derived = {}
+        self._loaded_at = now
+        self._version = version
+        self._version_checked_at = now
+        self._stats['loads'] += 1
+        logger.info(f"单价表缓存已加载: {len(df)} 行, {len(by_mode)} 个施工模式")
+
+    def _ensure_loaded(self):
+        now = time.time()
+        if self._table is not None and now - self._loaded_at < self.ttl:
+            if now - self._version_checked_at < self.version_check_interval:
+                self._stats['hits'] += 1
+                return
+            self._version_checked_at = now
+            version = self._read_shared_version()
+            if version is None or version == self._version:
+                self._stats['hits'] += 1
+                return
+            logger.info(f"单价表缓存版本已变化 ({self._version} -> {version})，重新加载")
+        self._load()
+
+    def get_table(self, mode=None):
+        """
+        获取单价表
+
+        Args:
+            mode (str): 施工模式；为 None 时返回整张表
+
+        Returns:
+            pandas.DataFrame: 缓存的单价数据（只读，需要修改时请先 copy()）
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if mode is None:
+                return self._table
+            return self._by_mode.get(str(mode).strip(), self._table.iloc[0:0])
+
+    def get_derived(self, mode, name, builder):
+        """
+        获取基于单价表构建的派生对象（如名称索引），随单价表一起缓存和失效
+
+        Args:
+            mode (str): 施工模式；为 None 时基于整张表构建
+            name (str): 派生对象名称
+            builder (callable): builder(DataFrame) -> 派生对象
+        """
+        with self._lock:
+            table = self.get_table(mode)
+            key = (mode, name)
+            if key not in self._derived:
+                self._derived[key] = builder(table)
+            return self._derived[key]
+
+    def invalidate(self, reason=None, broadcast=True):
+        """使缓存失效；broadcast 为 True 时同时通知其他进程"""
+        with self._lock:
+            self._table = None
+            self._by_mode = {}
+            self._derived = {}
+            self._stats['invalidations'] += 1
+        if broadcast:
+            self._bump_shared_version()
+        logger.info(f"单价表缓存已失效{f'（{reason}）' if reason else ''}")
+
+    def get_status(self):
+        """获取缓存状态，用于调试和显示"""
+        with self._lock:
+            return {
+                'loaded': self._table is not None,
+                'rows': len(self._table) if self._table is not None else 0,
+                'modes': list(self._by_mode),
+                'age_seconds': time.time() - self._loaded_at if self._table is not None else None,
+                'version': self._version,
+                'ttl': self.ttl,
+                **self._stats
+            }
+
+
+# 全局单价表缓存（进程内共享）
+price_table_cache = PriceTableCache()
+
+
+def get_price_table(mode=None):
+    """获取指定施工模式（或全部）的缓存单价表"""
+    return price_table_cache.get_table(mode)
+
+
+def invalidate_price_cache(reason=None):
+    """使单价表缓存失效（本进程立即生效，其他进程在下次版本检查时生效）"""
+    price_table_cache.invalidate(reason=reason)
+
+
+def invalidate_price_cache_for_table(table_name, reason=None):
+    """表 table_name 被修改时，如果它是单价来源表则使缓存失效"""
+    if table_name in PRICE_SOURCE_TABLES:
+        invalidate_price_cache(reason or f"{table_name} 已修改")
+
+
+def get_price_cache_status():
+    """获取单价表缓存状态"""
+    return price_table_cache.get_status()
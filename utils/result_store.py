@@ -0,0 +1,103 @@
+# utils/result_store.py
+"""
+服务端预测结果缓存
+
+预测回调生成的 report_data（工程量、各模型预测值、状态信息、最佳算法参数等）
+不再整体放进浏览器端的 dcc.Store：结果保存在服务端，dcc.Store 中只保存一个短结果 ID，
+导出、保存到数据库等回调凭 ID 取回结果，避免每次往返都序列化并传输整个报告。
+
+- TTL：结果保存超过 RESULT_STORE_TTL 秒后失效
+- LRU：条目数超过 RESULT_STORE_MAX_ENTRIES 时淘汰最久未使用的结果
+
+缓存位于进程内，多 worker 部署时需要会话粘滞（同一用户的请求落在同一 worker），
+结果过期或未命中时调用方应提示用户重新预测。
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# 结果有效期（秒）
+RESULT_STORE_TTL = int(os.getenv('RESULT_STORE_TTL', '3600'))
+
+# 最多保存的结果数
+RESULT_STORE_MAX_ENTRIES = int(os.getenv('RESULT_STORE_MAX_ENTRIES', '500'))
+
+
+class ResultStore:
+    """按结果 ID 保存预测结果的 TTL + LRU 缓存（线程安全）"""
+
+    def __init__(self, ttl=RESULT_STORE_TTL, max_entries=RESULT_STORE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'puts': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _purge_expired(self, now):
+        expired = [key for key, (stored_at, _) in self._entries.items() if now - stored_at > self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+    def put(self, data):
+        """
+        保存结果并返回结果 ID
+
+        Args:
+            data (dict): 预测结果
+
+        Returns:
+            str: 结果 ID
+        """
+        result_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            self._entries[result_id] = (now, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+            self._stats['puts'] += 1
+        return result_id
+
+    def get(self, result_id):
+        """按 ID 取回结果，不存在或已过期时返回 None"""
+        if not result_id or not isinstance(result_id, str):
+            return None
+        with self._lock:
+            entry = self._entries.get(result_id)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self._entries.pop(result_id, None)
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(result_id)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def discard(self, result_id):
+        with self._lock:
+            self._entries.pop(result_id, None)
+
+    def get_stats(self):
+        """缓存状态，用于调试和监控"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+# 全局结果缓存（进程内共享）
+result_store = ResultStore()
+
+
+def store_result(data):
+    """保存结果并返回结果 ID（模块级便捷函数）"""
+    return result_store.put(data)
+
+
+def get_result(result_id):
+    """按 ID 取回结果（模块级便捷函数）"""
+    return result_store.get(result_id)
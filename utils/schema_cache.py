@@ -0,0 +1,288 @@
+# utils/schema_cache.py
+"""
+数据库表结构元数据缓存
+
+施工数据、数据管理等模块在一次用户操作中会多次执行 SHOW TABLES / DESCRIBE
+（检查表是否存在、取列名、取列类型等）。这里用两条 information_schema 查询一次性
+加载当前数据库所有表及其列定义并缓存：
+
+- TTL：缓存超过 SCHEMA_CACHE_TTL 秒后重新加载
+- DDL 失效：建表、删表、改表结构后调用 invalidate_schema_cache()，同时递增
+  cache_versions 表中的版本号，其他进程每隔 SCHEMA_VERSION_CHECK_INTERVAL 秒比对一次
+- 派生缓存：其他模块由表结构派生的缓存通过 register_schema_listener() 登记清理函数，
+  表结构缓存失效（本进程 DDL 或其他进程版本号变化）时一并清理
+- 记录数：get_table_row_counts() 用一条 UNION ALL 查询统计多张表的精确记录数并缓存
+  TABLE_ROW_COUNT_TTL 秒，本进程写表后调用 invalidate_table_row_count() 使计数失效
+
+列信息与 DESCRIBE 的返回格式一致（Field / Type / Null / Key / Default / Extra），
+调用方可以直接替换原有的 DESCRIBE 结果。
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .cache_versions import bump_cache_version, read_cache_version
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# cache_versions 表中的缓存名
+SCHEMA_CACHE_NAME = 'schema'
+
+# 表结构缓存有效期（秒）
+SCHEMA_CACHE_TTL = int(os.getenv('SCHEMA_CACHE_TTL', '300'))
+
+# 跨进程版本号检查间隔（秒）
+SCHEMA_VERSION_CHECK_INTERVAL = int(os.getenv('SCHEMA_VERSION_CHECK_INTERVAL', '5'))
+
+# 表记录数缓存有效期（秒）
+TABLE_ROW_COUNT_TTL = int(os.getenv('TABLE_ROW_COUNT_TTL', '60'))
+
+# 应用内部维护的基础设施表（缓存版本号、汇总同步状态、日志每日汇总），不作为业务数据表展示
+INTERNAL_TABLES = frozenset({
+    'cache_versions',             # utils/cache_versions.py
+    'summary_sync_state',         # modules/pricePrediction/change.py
+    'operation_log_daily_stats',  # utils/log_retention.py
+})
+
+
+class SchemaCache:
+    """当前数据库的表和列定义缓存（线程安全）"""
+
+    def __init__(self, ttl=SCHEMA_CACHE_TTL, version_check_interval=SCHEMA_VERSION_CHECK_INTERVAL,
+                 row_count_ttl=TABLE_ROW_COUNT_TTL):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.row_count_ttl = row_count_ttl
+        self._lock = threading.RLock()
+        self._tables = None
+        self._loaded_at = 0
+        self._version = None
+        self._version_checked_at = 0
+        self._row_counts = {}
+        self._listeners = []
+        self._stats = {'hits': 0, 'loads': 0, 'invalidations': 0, 'count_queries': 0}
+
+    def _load(self):
+        """两条 information_schema 查询加载全部表和列；失败时保留旧缓存（如果有）"""
+        version = read_cache_version(SCHEMA_CACHE_NAME)
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT TABLE_NAME FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+                ORDER BY TABLE_NAME
+            """)
+            tables = {row['TABLE_NAME']: [] for row in cursor.fetchall()}
+
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY,
+                       COLUMN_DEFAULT, EXTRA
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)
+            for row in cursor.fetchall():
+                if row['TABLE_NAME'] not in tables:
+                    continue
+                tables[row['TABLE_NAME']].append({
+                    'Field': row['COLUMN_NAME'],
+                    'Type': row['COLUMN_TYPE'],
+                    'Null': row['IS_NULLABLE'],
+                    'Key': row['COLUMN_KEY'],
+                    'Default': row['COLUMN_DEFAULT'],
+                    'Extra': row['EXTRA'],
+                })
+            cursor.close()
+        except Exception as e:
+            logger.error(f"加载数据库表结构失败: {e}")
+            return
+        finally:
+            if conn:
+                conn.close()
+
+        now = time.time()
+        self._tables = tables
+        self._loaded_at = now
+        self._version = version
+        self._version_checked_at = now
+        self._stats['loads'] += 1
+        logger.info(f"表结构缓存已加载: {len(tables)} 张表")
+
+    def _ensure_loaded(self):
+        now = time.time()
+        if self._tables is not None and now - self._loaded_at < self.ttl:
+            if now - self._version_checked_at < self.version_check_interval:
+                self._stats['hits'] += 1
+                return
+            self._version_checked_at = now
+            version = read_cache_version(SCHEMA_CACHE_NAME)
+            if version is None or version == self._version:
+                self._stats['hits'] += 1
+                return
+            logger.info(f"表结构缓存版本已变化 ({self._version} -> {version})，重新加载")
+            self._row_counts.clear()
+            self._notify_listeners()
+        self._load()
+
+    def add_listener(self, callback):
+        """登记表结构缓存失效时调用的清理函数（无参数）"""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def _notify_listeners(self):
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"清理表结构派生缓存失败: {e}")
+
+    def get_table_names(self):
+        """当前数据库所有表名（按名称排序）"""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._tables or {})
+
+    def table_exists(self, table_name):
+        with self._lock:
+            self._ensure_loaded()
+            return table_name in (self._tables or {})
+
+    def get_columns(self, table_name):
+        """表的列定义（DESCRIBE 格式的字典列表，返回副本），表不存在时返回空列表"""
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(col) for col in (self._tables or {}).get(table_name, [])]
+
+    def get_row_counts(self, table_names):
+        """
+        获取多张表的精确记录数
+
+        缓存未命中的表用一条 UNION ALL 查询统计，不存在的表记为 0。
+
+        Returns:
+            dict: {表名: 记录数}
+        """
+        now = time.time()
+        counts = {}
+        missing = []
+        with self._lock:
+            self._ensure_loaded()
+            existing = self._tables or {}
+            for table_name in table_names:
+                if table_name not in existing:
+                    counts[table_name] = 0
+                    continue
+                entry = self._row_counts.get(table_name)
+                if entry and now - entry[0] < self.row_count_ttl:
+                    counts[table_name] = entry[1]
+                else:
+                    missing.append(table_name)
+
+        if missing:
+            conn = None
+            try:
+                conn = get_connection()
+                cursor = conn.cursor()
+                query = " UNION ALL ".join(
+                    f"SELECT %s, COUNT(*) FROM `{table_name}`" for table_name in missing
+                )
+                cursor.execute(query, missing)
+                fetched = {name: count for name, count in cursor.fetchall()}
+                cursor.close()
+                self._stats['count_queries'] += 1
+            except Exception as e:
+                logger.error(f"统计表记录数失败: {e}")
+                fetched = {}
+            finally:
+                if conn:
+                    conn.close()
+
+            now = time.time()
+            with self._lock:
+                for table_name in missing:
+                    counts[table_name] = fetched.get(table_name, 0)
+                    if table_name in fetched:
+                        self._row_counts[table_name] = (now, fetched[table_name])
+        return counts
+
+    def invalidate_row_count(self, table_name=None):
+        """使记录数缓存失效；不指定 table_name 时清空全部"""
+        with self._lock:
+            if table_name is None:
+                self._row_counts.clear()
+            else:
+                self._row_counts.pop(table_name, None)
+
+    def invalidate(self, reason=None, broadcast=True):
+        """使表结构缓存失效；broadcast 为 True 时同时通知其他进程"""
+        with self._lock:
+            self._tables = None
+            self._row_counts.clear()
+            self._stats['invalidations'] += 1
+        self._notify_listeners()
+        if broadcast:
+            bump_cache_version(SCHEMA_CACHE_NAME)
+        logger.info(f"表结构缓存已失效{f'（{reason}）' if reason else ''}")
+
+    def get_status(self):
+        """获取缓存状态，用于调试和显示"""
+        with self._lock:
+            return {
+                'loaded': self._tables is not None,
+                'table_count': len(self._tables or {}),
+                'age_seconds': time.time() - self._loaded_at if self._tables is not None else None,
+                'version': self._version,
+                'ttl': self.ttl,
+                'cached_row_counts': len(self._row_counts),
+                **self._stats
+            }
+
+
+# 全局表结构缓存（进程内共享）
+schema_cache = SchemaCache()
+
+
+def get_table_names():
+    """获取缓存的表名列表"""
+    return schema_cache.get_table_names()
+
+
+def table_exists(table_name):
+    """检查表是否存在（使用缓存）"""
+    return schema_cache.table_exists(table_name)
+
+
+def get_table_columns_info(table_name):
+    """获取表的列定义（DESCRIBE 格式，使用缓存）"""
+    return schema_cache.get_columns(table_name)
+
+
+def get_table_column_names(table_name):
+    """获取表的列名列表（使用缓存）"""
+    return [col['Field'] for col in schema_cache.get_columns(table_name)]
+
+
+def get_table_row_counts(table_names):
+    """获取多张表的记录数（使用缓存）"""
+    return schema_cache.get_row_counts(table_names)
+
+
+def invalidate_table_row_count(table_name=None):
+    """表数据被修改后使其记录数缓存失效"""
+    schema_cache.invalidate_row_count(table_name)
+
+
+def register_schema_listener(callback):
+    """登记表结构缓存失效时调用的清理函数（由表结构派生的缓存使用）"""
+    schema_cache.add_listener(callback)
+
+
+def invalidate_schema_cache(reason=None):
+    """建表、删表、修改表结构后使缓存失效（本进程立即生效，其他进程在下次版本检查时生效）"""
+    schema_cache.invalidate(reason=reason)
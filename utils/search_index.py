@@ -0,0 +1,397 @@
+# utils/search_index.py
+"""
+指标搜索的进程内索引
+
+指标测算页的搜索框每次输入都执行 parameter_category LIKE '%关键字%'，前置通配符
+无法使用 B-tree 索引，每次都要扫描整张价格基准表。这里把 price_baseline_1/2 读入内存，
+为每张表建立：
+
+- 前缀树：指标名称（parameter_category）及其分词的前缀 -> 条目，用于"以关键字开头"的匹配
+- 字符 n-gram 倒排表：单字和二字组 -> 条目，中文没有空格分词，任意子串都能由
+  二字组倒排表求交集后再校验得到
+
+与原 SQL 搜索一致，只匹配指标名称，不匹配编码和工程名称。basic_indicators 中的
+指标名称（去掉"单价""综合单价"等后缀）作为别名挂到名称包含它的价格基准条目上，
+按基础指标名称也能搜到对应构件。
+
+价格基准表没有主键，编码（sequence_number）可以为空或重复，条目按整行内容加
+重复序号标识：编码为空的行照常可搜，内容相同的行各自保留。
+
+排序：名称完全匹配 > 名称前缀 > 名称子串 > 别名匹配，
+同分时名称较短、原表顺序靠前的优先。
+
+刷新：
+- TTL：超过 SEARCH_INDEX_TTL 秒后重新读取数据，只对新增、修改、删除的条目增量更新索引
+- 显式失效：修改价格基准表或基础指标后调用 invalidate_search_index_for_table()，
+  同时递增 cache_versions 表中的版本号，其他进程每隔 SEARCH_INDEX_VERSION_CHECK_INTERVAL
+  秒比对一次版本号
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+
+from .cache_versions import bump_cache_version, read_cache_version
+from .db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# cache_versions 表中的缓存名
+SEARCH_INDEX_CACHE_NAME = 'indicator_search'
+
+# 可搜索的价格基准表
+SEARCH_SOURCE_TABLES = ('price_baseline_1', 'price_baseline_2')
+
+# 提供别名的基础指标表
+ALIAS_SOURCE_TABLE = 'basic_indicators'
+
+# 索引有效期（秒）
+SEARCH_INDEX_TTL = int(os.getenv('SEARCH_INDEX_TTL', '600'))
+
+# 跨进程版本号检查间隔（秒）
+SEARCH_INDEX_VERSION_CHECK_INTERVAL = int(os.getenv('SEARCH_INDEX_VERSION_CHECK_INTERVAL', '5'))
+
+# 基础指标名称转换为别名时去掉的后缀
+_ALIAS_SUFFIXES = ('综合单价', '租赁单价', '单价', '费用', '费')
+
+# 分词分隔符（空白与常见标点）
+_TOKEN_SPLIT = re.compile(r'[\s,，、;；:：/()（）\[\]【】\-_]+')
+
+# 各字段的匹配得分
+_SCORE_NAME_EXACT = 100
+_SCORE_NAME_PREFIX = 80
+_SCORE_NAME_TOKEN_PREFIX = 60
+_SCORE_NAME_SUBSTRING = 50
+_SCORE_ALIAS = 20
+
+
+def normalize(text):
+    """统一大小写和全角空格，去掉首尾空白"""
+    return str(text or '').replace('　', ' ').strip().lower()
+
+
+def _tokens(text):
+    """字段文本本身及其分词（用于前缀树）"""
+    tokens = {text} if text else set()
+    tokens.update(token for token in _TOKEN_SPLIT.split(text) if token)
+    return tokens
+
+
+def _grams(text):
+    """单字与二字组"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def _alias_stem(name):
+    stem = normalize(name)
+    for suffix in _ALIAS_SUFFIXES:
+        if stem.endswith(suffix) and len(stem) > len(suffix) + 1:
+            return stem[:-len(suffix)]
+    return stem
+
+
+class _PrefixTrie:
+    """前缀树：每个节点记录经过该前缀的条目 ID"""
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, word, doc_id):
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(doc_id)
+
+    def remove(self, word, doc_id):
+        node = self._root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return
+            node.get(None, set()).discard(doc_id)
+
+    def lookup(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get(None, set())
+
+
+class TableSearchIndex:
+    """一张价格基准表的搜索索引"""
+
+    def __init__(self):
+        self._docs = {}
+        self._signatures = {}
+        self._trie = _PrefixTrie()
+        self._grams = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _fields(self, doc):
+        return {
+            'name': normalize(doc['name']),
+            'aliases': tuple(normalize(alias) for alias in doc.get('aliases', ())),
+        }
+
+    def _index_words(self, fields):
+        words = set(_tokens(fields['name']))
+        for alias in fields['aliases']:
+            words.update(_tokens(alias))
+        return words
+
+    def _add(self, doc_id, doc):
+        fields = self._fields(doc)
+        self._docs[doc_id] = (doc, fields)
+        for word in self._index_words(fields):
+            self._trie.add(word, doc_id)
+            for gram in _grams(word):
+                self._grams.setdefault(gram, set()).add(doc_id)
+
+    def _remove(self, doc_id):
+        _, fields = self._docs.pop(doc_id)
+        for word in self._index_words(fields):
+            self._trie.remove(word, doc_id)
+            for gram in _grams(word):
+                postings = self._grams.get(gram)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del self._grams[gram]
+
+    def sync(self, docs):
+        """
+        与最新数据同步，只更新新增、修改、删除的条目
+
+        Args:
+            docs (dict): {条目 ID: 条目字典}
+
+        Returns:
+            tuple: (新增数, 修改数, 删除数)
+        """
+        added = changed = 0
+        removed_ids = [doc_id for doc_id in self._docs if doc_id not in docs]
+        for doc_id in removed_ids:
+            self._remove(doc_id)
+            self._signatures.pop(doc_id, None)
+        for doc_id, doc in docs.items():
+            # 原表顺序只影响同分排序，不计入签名；前面插入或删除行时后续条目不必重建索引
+            signature = tuple(sorted((k, repr(v)) for k, v in doc.items() if k != '_order'))
+            if self._signatures.get(doc_id) == signature:
+                self._docs[doc_id] = (doc, self._docs[doc_id][1])
+                continue
+            if doc_id in self._docs:
+                self._remove(doc_id)
+                changed += 1
+            else:
+                added += 1
+            self._add(doc_id, doc)
+            self._signatures[doc_id] = signature
+        return added, changed, len(removed_ids)
+
+    def _candidates(self, query):
+        """前缀树与 n-gram 倒排表求候选条目"""
+        candidates = set(self._trie.lookup(query))
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        postings = [self._grams.get(gram) for gram in grams]
+        if all(postings):
+            candidates |= set.intersection(*postings)
+        return candidates
+
+    def _score(self, query, fields):
+        name = fields['name']
+        if name == query:
+            return _SCORE_NAME_EXACT
+        if name.startswith(query):
+            return _SCORE_NAME_PREFIX
+        if any(token.startswith(query) for token in _tokens(name)):
+            return _SCORE_NAME_TOKEN_PREFIX
+        if query in name:
+            return _SCORE_NAME_SUBSTRING
+        if any(query in alias for alias in fields['aliases']):
+            return _SCORE_ALIAS
+        return 0
+
+    def search(self, term, limit=10):
+        """按得分排序返回至多 limit 个匹配条目（条目字典的副本，不含别名）"""
+        query = normalize(term)
+        if not query:
+            return []
+        scored = []
+        for doc_id in self._candidates(query):
+            doc, fields = self._docs[doc_id]
+            score = self._score(query, fields)
+            if score:
+                scored.append((-score, len(fields['name']), doc['_order'], doc_id))
+        scored.sort()
+        results = []
+        for _, _, _, doc_id in scored[:limit]:
+            doc = self._docs[doc_id][0]
+            results.append({k: v for k, v in doc.items() if k not in ('aliases', '_order')})
+        return results
+
+
+def _load_table_docs(cursor, table, aliases):
+    """
+    读取价格基准表，组装与 search_indicators 返回格式一致的条目
+
+    表没有主键，条目 ID 为 (整行内容, 相同内容的第几行)，数据增删改时其余条目的 ID 不变
+    """
+    cursor.execute(f"""
+        SELECT
+            parameter_category as name,
+            sequence_number as code,
+            project as project_name,
+            unit,
+            modular_labor_unit_price as labor_price,
+            modular_material_unit_price as material_price,
+            modular_machinery_unit_price as machinery_price,
+            total_price
+        FROM `{table}`
+        ORDER BY sequence_number
+    """)
+    docs = {}
+    occurrences = {}
+    for order, row in enumerate(cursor.fetchall()):
+        content = tuple(row.values())
+        occurrence = occurrences.get(content, 0)
+        occurrences[content] = occurrence + 1
+        name = normalize(row['name'])
+        docs[(content, occurrence)] = {
+            'id': row['code'],
+            'name': row['name'],
+            'code': row['code'],
+            'project_name': row['project_name'],
+            'unit': row['unit'],
+            'unit_prices': {
+                'labor': float(row['labor_price'] or 0),
+                'material': float(row['material_price'] or 0),
+                'machinery': float(row['machinery_price'] or 0)
+            },
+            'total_price': float(row['total_price'] or 0),
+            'aliases': tuple(alias for stem, alias in aliases if stem and stem in name),
+            '_order': order,
+        }
+    return docs
+
+
+def _load_aliases(cursor):
+    """读取已启用基础指标的（名称词干, 名称）列表；表不存在时返回空列表"""
+    try:
+        cursor.execute(f"SELECT name FROM `{ALIAS_SOURCE_TABLE}` WHERE status = 'enabled'")
+    except Exception as e:
+        logger.warning(f"读取基础指标别名失败: {e}")
+        return []
+    return [(_alias_stem(row['name']), row['name']) for row in cursor.fetchall() if row['name']]
+
+
+class IndicatorSearchIndex:
+    """价格基准表搜索索引集合（线程安全）"""
+
+    def __init__(self, ttl=SEARCH_INDEX_TTL, version_check_interval=SEARCH_INDEX_VERSION_CHECK_INTERVAL):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._lock = threading.RLock()
+        self._indexes = {}
+        self._loaded_at = {}
+        self._version = None
+        self._version_checked_at = 0
+        self._stats = {'hits': 0, 'refreshes': 0, 'invalidations': 0, 'queries': 0}
+
+    def _check_version(self, now):
+        """定期比对跨进程版本号，版本变化时把全部索引标记为过期（调用方持有锁）"""
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        version = read_cache_version(SEARCH_INDEX_CACHE_NAME)
+        if version is None or version == self._version:
+            return
+        if self._version is not None:
+            logger.info(f"指标搜索索引版本已变化 ({self._version} -> {version})，重新同步")
+        self._loaded_at.clear()
+        self._version = version
+
+    def _refresh(self, table):
+        """读取最新数据并增量同步索引（调用方持有锁）"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            aliases = _load_aliases(cursor)
+            docs = _load_table_docs(cursor, table, aliases)
+            cursor.close()
+        finally:
+            conn.close()
+
+        index = self._indexes.setdefault(table, TableSearchIndex())
+        added, changed, removed = index.sync(docs)
+        self._loaded_at[table] = time.time()
+        self._stats['refreshes'] += 1
+        logger.info(f"指标搜索索引已同步 {table}: {len(index)} 条"
+                    f"（新增 {added}，修改 {changed}，删除 {removed}）")
+        return index
+
+    def get_index(self, table):
+        now = time.time()
+        with self._lock:
+            self._check_version(now)
+            loaded_at = self._loaded_at.get(table)
+            if loaded_at is not None and now - loaded_at < self.ttl:
+                self._stats['hits'] += 1
+                return self._indexes[table]
+            return self._refresh(table)
+
+    def search(self, table, term, limit=10):
+        index = self.get_index(table)
+        with self._lock:
+            self._stats['queries'] += 1
+            return index.search(term, limit)
+
+    def invalidate(self, table=None, reason=None, broadcast=True):
+        """把索引标记为过期（下次搜索时增量同步）；不指定 table 时标记全部"""
+        with self._lock:
+            if table is None:
+                self._loaded_at.clear()
+            else:
+                self._loaded_at.pop(table, None)
+            self._stats['invalidations'] += 1
+        if broadcast:
+            version = bump_cache_version(SEARCH_INDEX_CACHE_NAME)
+            if version is not None:
+                with self._lock:
+                    self._version = version
+        logger.info(f"指标搜索索引已失效{f'（{reason}）' if reason else ''}")
+
+    def get_stats(self):
+        """索引状态，用于调试和监控"""
+        with self._lock:
+            return dict(self._stats, tables={table: len(index) for table, index in self._indexes.items()},
+                        version=self._version, ttl=self.ttl)
+
+
+# 全局指标搜索索引（进程内共享）
+indicator_search_index = IndicatorSearchIndex()
+
+
+def search_indicator_index(table, term, limit=10):
+    """在价格基准表 table 的索引中搜索（模块级便捷函数）"""
+    return indicator_search_index.search(table, term, limit)
+
+
+def invalidate_search_index(table=None, reason=None):
+    """使指标搜索索引失效（本进程立即生效，其他进程在下次版本检查时生效）"""
+    indicator_search_index.invalidate(table=table, reason=reason)
+
+
+def invalidate_search_index_for_table(table_name, reason=None):
+    """表 table_name 被修改时，如果它是价格基准表或基础指标表则使索引失效"""
+    if table_name in SEARCH_SOURCE_TABLES:
+        invalidate_search_index(table_name, reason or f"{table_name} 已修改")
+    elif table_name == ALIAS_SOURCE_TABLE:
+        invalidate_search_index(reason=reason or f"{table_name} 已修改")